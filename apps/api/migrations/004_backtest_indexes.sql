@@ -0,0 +1,12 @@
+-- Migration 004: Point-in-time lookups for python/backtest_rankings.py
+-- Backtests load a whole season of observations with one (crop_type, observed_at) range scan.
+-- INCLUDE keeps the scan index-only for the narrow column set the replay needs.
+
+CREATE INDEX IF NOT EXISTS idx_buyer_cash_bid_obs_crop_observed_pit
+    ON buyer_cash_bid_observations (crop_type, observed_at)
+    INCLUDE (buyer_id, source_kind, cash_bid, basis, futures_price, confidence_score);
+
+-- First successful run per morning.
+CREATE INDEX IF NOT EXISTS idx_morning_reco_runs_crop_status_date
+    ON morning_recommendation_runs (crop_type, run_date, started_at)
+    WHERE status IN ('success', 'partial');
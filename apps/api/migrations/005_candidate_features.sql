@@ -0,0 +1,32 @@
+-- Migration 005: Point-in-time feature store for the morning ranker
+-- One narrow row per evaluated candidate per run (not just the persisted top-N),
+-- written with COPY by python/morning_ranker.py. Training and backtests read these
+-- instead of re-deriving features from raw observations.
+
+CREATE TABLE IF NOT EXISTS morning_candidate_features (
+    run_id UUID NOT NULL REFERENCES morning_recommendation_runs(id) ON DELETE CASCADE,
+    buyer_id UUID NOT NULL REFERENCES buyers(id) ON DELETE CASCADE,
+    run_date DATE NOT NULL,
+    crop_type TEXT NOT NULL,
+    state TEXT NOT NULL,
+    verified_status TEXT,
+    selected_rank INTEGER,
+    cash_bid REAL,
+    estimated_net_bid REAL,
+    rail_confidence REAL,
+    contact_verified REAL,
+    bid_freshness_hours REAL,
+    source_confidence REAL,
+    state_basis REAL,
+    estimated_freight REAL,
+    bid_source_kind TEXT,
+    weighted_score REAL,
+    ml_score REAL,
+    composite_score REAL,
+    PRIMARY KEY (run_id, buyer_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_morning_candidate_features_crop_date
+    ON morning_candidate_features (crop_type, run_date);
+CREATE INDEX IF NOT EXISTS idx_morning_candidate_features_buyer
+    ON morning_candidate_features (buyer_id, run_date);
@@ -0,0 +1,13 @@
+-- Migration 006: Memoized morning runs
+-- The ranker hashes its resolved inputs (buyer row versions, the content of each
+-- buyer's ranked observation -- never its id -- USDA context, weights, model, config).
+-- A rerun with an identical fingerprint records a lightweight run row pointing at the
+-- run that owns the morning_recommendations rows.
+
+ALTER TABLE morning_recommendation_runs ADD COLUMN IF NOT EXISTS input_fingerprint TEXT;
+ALTER TABLE morning_recommendation_runs ADD COLUMN IF NOT EXISTS reused_from_run_id UUID
+    REFERENCES morning_recommendation_runs(id) ON DELETE SET NULL;
+
+CREATE INDEX IF NOT EXISTS idx_morning_reco_runs_fingerprint
+    ON morning_recommendation_runs (crop_type, input_fingerprint, started_at DESC)
+    WHERE status = 'success';
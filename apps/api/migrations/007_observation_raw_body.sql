@@ -0,0 +1,11 @@
+-- Migration 007: Raw document archive references
+-- With --raw-archive-dir the scraper keeps every fetched page/PDF in a zstd
+-- content-addressed archive (python/raw_archive.py). Observations point at the
+-- body they were extracted from, so `raw_archive.py reextract` results can be
+-- joined back to stored bids.
+
+ALTER TABLE buyer_cash_bid_observations ADD COLUMN IF NOT EXISTS raw_body_sha256 TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_buyer_cash_bid_obs_raw_body
+    ON buyer_cash_bid_observations (raw_body_sha256)
+    WHERE raw_body_sha256 IS NOT NULL;
@@ -0,0 +1,24 @@
+-- Migration 008: Lane-level freight rates
+-- Tariff and shuttle rates per (origin station, destination state or station,
+-- car type), versioned by effective date. Loaded with
+-- `python python/freight_rates.py load --csv rates.csv` and read by
+-- `morning_ranker.py --freight-rates db`; buyers without a lane fall back to
+-- the per-state estimate.
+
+CREATE TABLE IF NOT EXISTS freight_lane_rates (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    origin_station TEXT NOT NULL,
+    destination TEXT NOT NULL,
+    destination_type TEXT NOT NULL
+        CHECK (destination_type IN ('state', 'station')),
+    car_type TEXT NOT NULL DEFAULT 'shuttle',
+    rate_per_bushel NUMERIC(10, 4) NOT NULL,
+    effective_date DATE NOT NULL,
+    expiration_date DATE,
+    tariff_ref TEXT,
+    loaded_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    UNIQUE (origin_station, destination_type, destination, car_type, effective_date)
+);
+
+CREATE INDEX IF NOT EXISTS idx_freight_lane_rates_origin
+    ON freight_lane_rates (origin_station, car_type, effective_date DESC);
@@ -0,0 +1,14 @@
+-- Migration 009: Rolling bid history features (python/bid_history.py)
+-- The ranker's history cache is refreshed with only the observations created since its
+-- last load; this index keeps that tail read off the full table.
+
+CREATE INDEX IF NOT EXISTS idx_buyer_cash_bid_obs_crop_created
+    ON buyer_cash_bid_observations (crop_type, created_at)
+    INCLUDE (buyer_id, observed_at, cash_bid, basis, futures_price);
+
+-- Optional feature-store columns, NULL for runs ranked without --history-features.
+ALTER TABLE morning_candidate_features ADD COLUMN IF NOT EXISTS basis_mean_7d REAL;
+ALTER TABLE morning_candidate_features ADD COLUMN IF NOT EXISTS basis_mean_30d REAL;
+ALTER TABLE morning_candidate_features ADD COLUMN IF NOT EXISTS bid_volatility_30d REAL;
+ALTER TABLE morning_candidate_features ADD COLUMN IF NOT EXISTS bid_trend_30d REAL;
+ALTER TABLE morning_candidate_features ADD COLUMN IF NOT EXISTS posting_regularity_30d REAL;
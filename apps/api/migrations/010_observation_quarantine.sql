@@ -0,0 +1,14 @@
+-- Migration 010: Quarantined bid observations (python/bid_validation.py)
+-- Scraped bids that fail the morning run's batch validation are stored with the
+-- reasons instead of being dropped, and every reader skips them.
+
+ALTER TABLE buyer_cash_bid_observations ADD COLUMN IF NOT EXISTS quarantine_reasons JSONB;
+
+-- The latest-observation lookup only ever reads accepted rows.
+CREATE INDEX IF NOT EXISTS idx_buyer_cash_bid_obs_accepted_latest
+    ON buyer_cash_bid_observations (buyer_id, crop_type, observed_at DESC)
+    WHERE quarantine_reasons IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_buyer_cash_bid_obs_quarantined
+    ON buyer_cash_bid_observations (observed_at DESC)
+    WHERE quarantine_reasons IS NOT NULL;
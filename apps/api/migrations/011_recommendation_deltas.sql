@@ -0,0 +1,38 @@
+-- Migration 011: Delta-persisted recommendation runs (morning_ranker.py --persist-deltas)
+-- An intraday rerun stores only the ranks whose row changed against the day's last
+-- full run (its base). Unchanged ranks are read through from the base, and ranks past
+-- the run's own list length are dropped. Bases are always full runs, so resolving a
+-- run is one overlay.
+
+ALTER TABLE morning_recommendation_runs ADD COLUMN IF NOT EXISTS base_run_id UUID
+    REFERENCES morning_recommendation_runs(id);
+ALTER TABLE morning_recommendation_runs ADD COLUMN IF NOT EXISTS recommendation_count INTEGER;
+
+CREATE INDEX IF NOT EXISTS idx_morning_reco_runs_base
+    ON morning_recommendation_runs (base_run_id)
+    WHERE base_run_id IS NOT NULL;
+
+-- Full list for every run: its own rows, plus the base rows for ranks it did not rewrite.
+-- Readers filter on run_id; both branches resolve through (run_id, rank) indexes.
+CREATE OR REPLACE VIEW morning_recommendations_resolved AS
+SELECT
+    m.run_id, m.buyer_id, m.rank, m.state, m.composite_score,
+    m.cash_bid, m.basis, m.futures_price, m.estimated_freight, m.estimated_net_bid,
+    m.rail_confidence, m.bid_source_kind, m.bid_source_label, m.bid_source_url,
+    m.bid_observed_at, m.rationale_json, m.created_at
+FROM morning_recommendations m
+UNION ALL
+SELECT
+    r.id AS run_id, m.buyer_id, m.rank, m.state, m.composite_score,
+    m.cash_bid, m.basis, m.futures_price, m.estimated_freight, m.estimated_net_bid,
+    m.rail_confidence, m.bid_source_kind, m.bid_source_label, m.bid_source_url,
+    m.bid_observed_at, m.rationale_json, m.created_at
+FROM morning_recommendation_runs r
+JOIN morning_recommendations m
+    ON m.run_id = r.base_run_id
+   AND m.rank <= r.recommendation_count
+WHERE r.base_run_id IS NOT NULL
+  AND NOT EXISTS (
+      SELECT 1 FROM morning_recommendations d
+      WHERE d.run_id = r.id AND d.rank = m.rank
+  );
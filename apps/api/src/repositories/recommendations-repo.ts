@@ -195,7 +195,12 @@ export async function listMorningRecommendationsForRun(args: {
     const limit = Math.min(Math.max(args.limit ?? 25, 1), 200);
     const params: unknown[] = [args.runId];
 
-    const clauses = ['mr.run_id = $1', 'b.active = TRUE'];
+    // Memoized runs carry no rows of their own; read through to the run they reuse.
+    // Delta runs (migration 011) are resolved against their base by the view.
+    const clauses = [
+        'mr.run_id = (SELECT COALESCE(r.reused_from_run_id, r.id) FROM morning_recommendation_runs r WHERE r.id = $1)',
+        'b.active = TRUE',
+    ];
     if (args.scope && args.scope !== 'all') {
         params.push(args.scope);
         clauses.push(`b.launch_scope = $${params.length}`);
@@ -242,7 +247,7 @@ export async function listMorningRecommendationsForRun(args: {
                 bc.verified_status AS "verifiedStatus",
                 bc.confidence_score AS "contactConfidenceScore",
                 bc.last_checked_at AS "contactLastCheckedAt"
-            FROM morning_recommendations mr
+            FROM morning_recommendations_resolved mr
             JOIN buyers b ON b.id = mr.buyer_id
             LEFT JOIN buyer_contacts bc ON bc.buyer_id = b.id
             WHERE ${clauses.join(' AND ')}
@@ -0,0 +1,552 @@
+#!/usr/bin/env python3
+"""Backtest morning call lists against realized outcomes.
+
+For every historical `morning_recommendation_runs` row in the window this:
+1) Rebuilds the point-in-time inputs as of the run's start: buyers that existed,
+   the latest bid observation per buyer at that moment, and the run's USDA context.
+2) Re-runs `build_rankings` once per variant (alternative weights and/or model file).
+3) Scores each list against what actually happened afterwards:
+   - realized bids posted within `--outcome-window-hours` after the run
+   - optional labeled call outcomes (`--outcomes-csv` with run_date, buyer_id, outcome_won)
+
+All observations for the season are loaded in one indexed range scan and kept in a
+per-buyer timeline, so each point-in-time lookup is a bisect instead of a query.
+Days are evaluated in parallel worker processes.
+
+With `--from-feature-store` the candidate feature vectors recorded by the live run
+(`morning_candidate_features`) are re-scored directly instead of being re-derived
+from observations, so a replay sees exactly what the morning run saw.
+
+Buyer rows have no history: the replay universe is today's active buyers, and when
+features are re-derived from observations, rail_confidence and verified_status are
+today's values too. Each day lists those fields under `currentStateFields`; the
+feature store records rail_confidence and verified_status as of the run.
+
+A run whose summary has no regionalBasis replays with the basis from
+`--basis-history-dir` as of its date, else with FALLBACK_REGIONAL_BASIS; such days
+are counted in `runsWithFallbackBasis` and marked by `regionalBasisSource`.
+
+Variants file format:
+{
+  "variants": [
+    {"name": "current"},
+    {"name": "rail-heavy", "weights": {"rail_confidence": 0.25, "cash_bid": 0.24}},
+    {"name": "ml-v2", "modelCoefficientsFile": "model_v2.json"}
+  ]
+}
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from morning_ranker import (
+    DEFAULT_CROP,
+    DEFAULT_WEIGHTED_SCORE,
+    FALLBACK_REGIONAL_BASIS,
+    HISTORY_FEATURE_NAMES,
+    UTC,
+    BidObservation,
+    BuyerRow,
+    RankedBuyer,
+    apply_scores,
+    build_rankings,
+    connect_db,
+    estimate_freight,
+    fetch_buyers,
+    fetch_candidate_features,
+    load_model_coefficients,
+    select_rankings,
+)
+
+
+@dataclass
+class BacktestVariant:
+    name: str
+    weights: Dict[str, float]
+    model_payload: Optional[Dict[str, Any]]
+
+
+@dataclass
+class HistoricalRun:
+    run_id: str
+    run_date: date
+    started_at: datetime
+    futures_price: float
+    regional_basis: Dict[str, float]
+    top_n: int
+    top_states: int
+    max_bid_age_hours: float
+    grain_source: str = "usda"
+    # "run" (recorded in its summary), "history" (--basis-history-dir) or "fallback".
+    basis_source: str = "run"
+
+
+class ObservationTimeline:
+    """Per-buyer observations sorted by (observed_at, confidence) for point-in-time lookups."""
+
+    def __init__(self, observations: List[BidObservation]):
+        self._times: Dict[str, List[datetime]] = {}
+        self._items: Dict[str, List[BidObservation]] = {}
+        ordered = sorted(observations, key=lambda o: (o.buyer_id, o.observed_at, o.confidence_score))
+        for obs in ordered:
+            self._times.setdefault(obs.buyer_id, []).append(obs.observed_at)
+            self._items.setdefault(obs.buyer_id, []).append(obs)
+
+    def latest_as_of(self, buyer_id: str, as_of: datetime) -> Optional[BidObservation]:
+        times = self._times.get(buyer_id)
+        if not times:
+            return None
+        # Ties on observed_at keep the highest confidence last, matching the live DISTINCT ON ordering.
+        idx = bisect.bisect_right(times, as_of)
+        return self._items[buyer_id][idx - 1] if idx > 0 else None
+
+    def realized_between(self, buyer_id: str, start: datetime, end: datetime) -> List[BidObservation]:
+        times = self._times.get(buyer_id)
+        if not times:
+            return []
+        lo = bisect.bisect_right(times, start)
+        hi = bisect.bisect_right(times, end)
+        return self._items[buyer_id][lo:hi]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Backtest morning rankings over historical runs")
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--crop", default=DEFAULT_CROP)
+    parser.add_argument("--start-date", help="First run_date to replay (YYYY-MM-DD)")
+    parser.add_argument("--end-date", help="Last run_date to replay (YYYY-MM-DD)")
+    parser.add_argument("--variants-file", help="JSON file describing weight/model variants to compare")
+    parser.add_argument("--model-coefficients-file", help="Model for the default 'current' variant")
+    parser.add_argument("--outcomes-csv", help="Optional labeled outcomes (run_date, buyer_id, outcome_won)")
+    parser.add_argument("--outcome-window-hours", type=float, default=24.0)
+    parser.add_argument("--limit", type=int, default=5000, help="Max buyers in the replay universe")
+    parser.add_argument("--verified-only", action="store_true")
+    parser.add_argument(
+        "--from-feature-store",
+        action="store_true",
+        help="Re-score stored candidate features instead of re-deriving them from observations",
+    )
+    parser.add_argument(
+        "--basis-history-dir",
+        default=os.environ.get("CORN_INTEL_USDA_HISTORY_DIR"),
+        help="usda_history.py store; runs that fell back to the hard-coded basis replay with the basis as of their date",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--out", help="Write the full JSON report here (default: stdout)")
+    return parser.parse_args()
+
+
+def parse_iso_date(value: Optional[str]) -> Optional[date]:
+    return date.fromisoformat(value) if value else None
+
+
+def load_variants(path: Optional[str], default_model_path: Optional[str]) -> List[BacktestVariant]:
+    if not path:
+        return [
+            BacktestVariant(
+                name="current",
+                weights=dict(DEFAULT_WEIGHTED_SCORE),
+                model_payload=load_model_coefficients(default_model_path),
+            )
+        ]
+    with open(path, "r", encoding="utf-8") as f:
+        payload = json.load(f)
+    raw_variants = payload.get("variants", []) if isinstance(payload, dict) else []
+    base_dir = os.path.dirname(os.path.abspath(path))
+    variants: List[BacktestVariant] = []
+    for raw in raw_variants:
+        if not isinstance(raw, dict) or not raw.get("name"):
+            continue
+        unknown = set(raw.get("weights") or {}) - set(DEFAULT_WEIGHTED_SCORE)
+        if unknown:
+            raise ValueError(f"Variant {raw['name']}: unknown weight keys {sorted(unknown)}")
+        weights = {**DEFAULT_WEIGHTED_SCORE, **{k: float(v) for k, v in (raw.get("weights") or {}).items()}}
+        model_path = raw.get("modelCoefficientsFile")
+        if model_path and not os.path.isabs(model_path):
+            model_path = os.path.join(base_dir, model_path)
+        variants.append(
+            BacktestVariant(name=str(raw["name"]), weights=weights, model_payload=load_model_coefficients(model_path))
+        )
+    if not variants:
+        raise ValueError(f"No variants found in {path}")
+    return variants
+
+
+def load_outcomes(path: Optional[str]) -> Dict[str, Dict[str, int]]:
+    """Return {run_date_iso: {buyer_id: outcome_won}}."""
+    if not path:
+        return {}
+    out: Dict[str, Dict[str, int]] = {}
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            if not row.get("run_date") or not row.get("buyer_id"):
+                continue
+            out.setdefault(row["run_date"], {})[row["buyer_id"]] = int(float(row.get("outcome_won") or 0))
+    return out
+
+
+def fetch_historical_runs(conn, crop: str, start: Optional[date], end: Optional[date]) -> List[HistoricalRun]:
+    clauses = ["crop_type = %s", "status IN ('success', 'partial')"]
+    params: List[Any] = [crop]
+    if start:
+        clauses.append("run_date >= %s")
+        params.append(start)
+    if end:
+        clauses.append("run_date <= %s")
+        params.append(end)
+
+    # One run per morning: the first successful run of each day is what the desk called from.
+    sql = f"""
+        SELECT DISTINCT ON (run_date)
+            id, run_date, started_at, source_summary_json, summary_json
+        FROM morning_recommendation_runs
+        WHERE {' AND '.join(clauses)}
+        ORDER BY run_date, started_at ASC
+    """
+    with conn.cursor() as cur:
+        cur.execute(sql, params)
+        rows = cur.fetchall()
+
+    return [historical_run_from_row(row) for row in rows]
+
+
+def historical_run_from_row(row: Dict[str, Any]) -> HistoricalRun:
+    summary = row.get("summary_json") or {}
+    config = (row.get("source_summary_json") or {}).get("config") or {}
+    recorded_basis = summary.get("regionalBasis")
+    return HistoricalRun(
+        run_id=row["id"],
+        run_date=row["run_date"],
+        started_at=row["started_at"].astimezone(UTC),
+        futures_price=float(summary.get("futuresPrice") or 4.30),
+        regional_basis=dict(recorded_basis or FALLBACK_REGIONAL_BASIS),
+        top_n=int(config.get("topN") or 30),
+        top_states=int(config.get("topStates") or 3),
+        max_bid_age_hours=float(config.get("maxBidAgeHours") or 36.0),
+        grain_source=str(((row.get("source_summary_json") or {}).get("usda") or {}).get("grainSource") or "usda"),
+        basis_source="run" if recorded_basis else "fallback",
+    )
+
+
+def apply_basis_history(runs: List[HistoricalRun], history: Any) -> int:
+    """Replay runs on the USDA fallback, or with no recorded basis, with the basis as of their date."""
+    replaced = 0
+    for run in runs:
+        if not run.grain_source.startswith("fallback") and run.basis_source != "fallback":
+            continue
+        basis, meta = history.as_of(run.started_at.date())
+        if meta["regions"]:
+            run.regional_basis = basis
+            run.basis_source = "history"
+            replaced += 1
+    return replaced
+
+
+def fetch_observation_window(conn, crop: str, start: datetime, end: datetime) -> List[BidObservation]:
+    # Narrow columns + (crop_type, observed_at) range scan; see migration 004.
+    sql = """
+        SELECT
+            buyer_id, crop_type, source_kind,
+            COALESCE(source_label, source_kind) AS source_label,
+            COALESCE(source_url, '') AS source_url,
+            observed_at, cash_bid, basis, futures_price,
+            COALESCE(confidence_score, 50) AS confidence_score,
+            parsed_from_pdf
+        FROM buyer_cash_bid_observations
+        WHERE crop_type = %s
+          AND observed_at >= %s
+          AND observed_at <= %s
+          AND quarantine_reasons IS NULL
+    """
+    with conn.cursor() as cur:
+        cur.execute(sql, [crop, start, end])
+        rows = cur.fetchall()
+    return [
+        BidObservation(
+            buyer_id=row["buyer_id"],
+            crop_type=row["crop_type"],
+            source_kind=row["source_kind"],
+            source_label=row["source_label"],
+            source_url=row["source_url"],
+            observed_at=row["observed_at"].astimezone(UTC),
+            cash_bid=float(row["cash_bid"]) if row.get("cash_bid") is not None else None,
+            basis=float(row["basis"]) if row.get("basis") is not None else None,
+            futures_price=float(row["futures_price"]) if row.get("futures_price") is not None else None,
+            confidence_score=int(row["confidence_score"]),
+            parsed_from_pdf=bool(row.get("parsed_from_pdf")),
+            raw_excerpt=None,
+            raw_payload_json={},
+        )
+        for row in rows
+    ]
+
+
+# Buyer columns the replay reads from today's rows; a feature-store replay has the
+# recorded rail_confidence / verified_status instead.
+CURRENT_STATE_FIELDS = ("active", "rail_confidence", "verified_status")
+FEATURE_STORE_CURRENT_STATE_FIELDS = ("active",)
+
+
+# Worker-process state, installed once per process by `_init_worker` so the season
+# dataset is not re-pickled for every day.
+_WORKER_STATE: Dict[str, Any] = {}
+
+
+def _init_worker(
+    buyers: List[BuyerRow],
+    timeline: ObservationTimeline,
+    variants: List[BacktestVariant],
+    outcomes: Dict[str, Dict[str, int]],
+    outcome_window_hours: float,
+    stored_features: Dict[str, List[Dict[str, Any]]],
+) -> None:
+    _WORKER_STATE.update(
+        stored_features=stored_features,
+        buyers=buyers,
+        timeline=timeline,
+        variants=variants,
+        outcomes=outcomes,
+        outcome_window=timedelta(hours=outcome_window_hours),
+    )
+
+
+def candidates_from_store(rows: List[Dict[str, Any]], buyers_by_id: Dict[str, BuyerRow]) -> List[RankedBuyer]:
+    """Rebuild unscored candidates from stored feature rows (contact/rail as recorded that morning)."""
+    out: List[RankedBuyer] = []
+    for row in rows:
+        buyer = buyers_by_id.get(row["buyer_id"])
+        if buyer is None:
+            continue
+        buyer = replace(
+            buyer,
+            verified_status=row.get("verified_status"),
+            rail_confidence=int(row["rail_confidence"]) if row.get("rail_confidence") is not None else None,
+        )
+        features = {
+            name: float(row.get(name) or 0.0)
+            for name in (
+                "cash_bid",
+                "estimated_net_bid",
+                "rail_confidence",
+                "contact_verified",
+                "bid_freshness_hours",
+                "source_confidence",
+            )
+        }
+        # Rolling-window features, when the run computed them (--history-features).
+        features.update({name: float(row[name]) for name in HISTORY_FEATURE_NAMES if row.get(name) is not None})
+        out.append(
+            RankedBuyer(
+                buyer=buyer,
+                cash_bid=features["cash_bid"],
+                basis=None,
+                futures_price=None,
+                estimated_freight=float(row.get("estimated_freight") or 0.0),
+                estimated_net_bid=features["estimated_net_bid"],
+                bid_source_kind=row.get("bid_source_kind") or "usda",
+                bid_source_label=None,
+                bid_source_url=None,
+                bid_observed_at=None,
+                source_confidence=features["source_confidence"],
+                bid_freshness_hours=features["bid_freshness_hours"],
+                feature_values=features,
+                weighted_score=0.0,
+                ml_score=None,
+                composite_score=0.0,
+                rationale={},
+                state_basis=float(row["state_basis"]) if row.get("state_basis") is not None else None,
+            )
+        )
+    return out
+
+
+def score_list(
+    ranked: List[RankedBuyer],
+    candidates: List[BuyerRow],
+    run: HistoricalRun,
+    timeline: ObservationTimeline,
+    outcome_window: timedelta,
+    labeled: Dict[str, int],
+) -> Dict[str, Any]:
+    end = run.started_at + outcome_window
+    realized_by_buyer: Dict[str, float] = {}
+    for buyer in candidates:
+        realized = timeline.realized_between(buyer.id, run.started_at, end)
+        bids = [o.cash_bid for o in realized if o.cash_bid is not None]
+        if bids:
+            realized_by_buyer[buyer.id] = sum(bids) / len(bids) - estimate_freight(buyer.state, buyer.rail_confidence)
+
+    listed_ids = [item.buyer.id for item in ranked]
+    listed_realized = [realized_by_buyer[bid] for bid in listed_ids if bid in realized_by_buyer]
+    n = len(listed_ids)
+    oracle = sorted(realized_by_buyer, key=realized_by_buyer.get, reverse=True)[:n]
+    denom = min(n, len(oracle))
+    precision = (len(set(listed_ids) & set(oracle)) / denom) if denom else None
+
+    metrics: Dict[str, Any] = {
+        "listSize": n,
+        "realizedCoverage": round(len(listed_realized) / n, 4) if n else 0.0,
+        "realizedNetBidMean": round(sum(listed_realized) / len(listed_realized), 4) if listed_realized else None,
+        "precisionAtN": round(precision, 4) if precision is not None else None,
+    }
+    if labeled:
+        labeled_hits = [labeled[bid] for bid in listed_ids if bid in labeled]
+        metrics["labeledCount"] = len(labeled_hits)
+        metrics["wins"] = sum(labeled_hits)
+        metrics["winRate"] = round(sum(labeled_hits) / len(labeled_hits), 4) if labeled_hits else None
+    return metrics
+
+
+def evaluate_day(run: HistoricalRun) -> Dict[str, Any]:
+    buyers: List[BuyerRow] = _WORKER_STATE["buyers"]
+    timeline: ObservationTimeline = _WORKER_STATE["timeline"]
+    variants: List[BacktestVariant] = _WORKER_STATE["variants"]
+    labeled = _WORKER_STATE["outcomes"].get(run.run_date.isoformat(), {})
+
+    as_of = run.started_at
+    day_buyers = [b for b in buyers if b.created_at is None or b.created_at.astimezone(UTC) <= as_of]
+    latest_obs: Dict[str, BidObservation] = {}
+    for buyer in day_buyers:
+        obs = timeline.latest_as_of(buyer.id, as_of)
+        if obs is not None:
+            latest_obs[buyer.id] = obs
+
+    stored = _WORKER_STATE["stored_features"].get(run.run_id)
+    buyers_by_id = {b.id: b for b in buyers}
+
+    per_variant: Dict[str, Any] = {}
+    for variant in variants:
+        if stored is not None:
+            candidates = candidates_from_store(stored, buyers_by_id)
+            apply_scores(candidates, variant.model_payload, variant.weights)
+            ranked, top_states, _ = select_rankings(
+                candidates, variant.model_payload, variant.weights, run.top_states, run.top_n
+            )
+        else:
+            ranked, top_states, _ = build_rankings(
+                buyers=day_buyers,
+                latest_obs=latest_obs,
+                scraped_obs={},
+                futures_price=run.futures_price,
+                regional_basis=run.regional_basis,
+                max_bid_age_hours=run.max_bid_age_hours,
+                model_payload=variant.model_payload,
+                top_states_count=run.top_states,
+                top_n=run.top_n,
+                weights=variant.weights,
+                reference=as_of,
+            )
+        metrics = score_list(ranked, day_buyers, run, timeline, _WORKER_STATE["outcome_window"], labeled)
+        metrics["topStates"] = top_states
+        metrics["featureSource"] = "feature_store" if stored is not None else "observations"
+        per_variant[variant.name] = metrics
+
+    return {
+        "runId": run.run_id,
+        "runDate": run.run_date.isoformat(),
+        "regionalBasisSource": run.basis_source,
+        "currentStateFields": list(FEATURE_STORE_CURRENT_STATE_FIELDS if stored is not None else CURRENT_STATE_FIELDS),
+        "variants": per_variant,
+    }
+
+
+def aggregate(days: List[Dict[str, Any]], variants: List[BacktestVariant]) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    for variant in variants:
+        rows = [d["variants"][variant.name] for d in days]
+        summary: Dict[str, Any] = {"days": len(rows)}
+        for key in ("realizedNetBidMean", "precisionAtN", "realizedCoverage", "winRate"):
+            vals = [r[key] for r in rows if r.get(key) is not None]
+            summary[key] = round(sum(vals) / len(vals), 4) if vals else None
+        if any("wins" in r for r in rows):
+            summary["wins"] = sum(r.get("wins", 0) for r in rows)
+        summary["weights"] = variant.weights
+        summary["usesMlGuidance"] = variant.model_payload is not None
+        out[variant.name] = summary
+    return out
+
+
+def main() -> int:
+    args = parse_args()
+    if not args.database_url:
+        print("DATABASE_URL is required (or pass --database-url)", file=sys.stderr)
+        return 2
+
+    variants = load_variants(args.variants_file, args.model_coefficients_file)
+    outcomes = load_outcomes(args.outcomes_csv)
+
+    conn = connect_db(args.database_url)
+    try:
+        runs = fetch_historical_runs(conn, args.crop, parse_iso_date(args.start_date), parse_iso_date(args.end_date))
+        if not runs:
+            print("No historical runs in the requested window.", file=sys.stderr)
+            return 1
+        buyers = fetch_buyers(conn, args.crop, args.verified_only, args.limit)
+        max_age = max(r.max_bid_age_hours for r in runs)
+        window_start = min(r.started_at for r in runs) - timedelta(hours=max_age)
+        window_end = max(r.started_at for r in runs) + timedelta(hours=args.outcome_window_hours)
+        observations = fetch_observation_window(conn, args.crop, window_start, window_end)
+        stored_features = fetch_candidate_features(conn, [r.run_id for r in runs]) if args.from_feature_store else {}
+    finally:
+        conn.close()
+
+    basis_from_history = 0
+    if args.basis_history_dir:
+        from usda_history import load_basis_history
+
+        basis_from_history = apply_basis_history(runs, load_basis_history(args.basis_history_dir, args.crop))
+    fallback_basis_days = [r.run_date.isoformat() for r in runs if r.basis_source == "fallback"]
+    if fallback_basis_days:
+        print(
+            f"[backtest] {len(fallback_basis_days)} runs recorded no regionalBasis; replaying them with "
+            f"FALLBACK_REGIONAL_BASIS ({', '.join(fallback_basis_days[:5])}{', ...' if len(fallback_basis_days) > 5 else ''})",
+            file=sys.stderr,
+        )
+
+    timeline = ObservationTimeline(observations)
+    init_args = (buyers, timeline, variants, outcomes, args.outcome_window_hours, stored_features)
+    started = datetime.now(tz=UTC)
+    if args.workers <= 1 or len(runs) == 1:
+        _init_worker(*init_args)
+        days = [evaluate_day(run) for run in runs]
+    else:
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=init_args) as pool:
+            days = list(pool.map(evaluate_day, runs, chunksize=max(1, len(runs) // (args.workers * 4))))
+    elapsed = (datetime.now(tz=UTC) - started).total_seconds()
+
+    report = {
+        "crop": args.crop,
+        "runsReplayed": len(days),
+        "buyerUniverse": len(buyers),
+        "observationsLoaded": len(observations),
+        "runsFromFeatureStore": len(stored_features),
+        "runsWithHistoricalBasis": basis_from_history,
+        "runsWithFallbackBasis": len(fallback_basis_days),
+        # Days ranked on today's rail_confidence / verified_status (no stored features).
+        "runsWithCurrentBuyerState": sum(1 for d in days if "rail_confidence" in d["currentStateFields"]),
+        "outcomeWindowHours": args.outcome_window_hours,
+        "elapsedSeconds": round(elapsed, 3),
+        "variants": aggregate(days, variants),
+        "days": days,
+    }
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(json.dumps({k: v for k, v in report.items() if k != "days"}, indent=2))
+    else:
+        print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
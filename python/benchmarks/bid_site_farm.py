@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""Local mock bid-site farm for load-testing the scraper offline.
+
+Starts `--servers` ThreadingHTTPServers on consecutive ports, together hosting
+`--sites` synthetic buyer sites. Each site is one of:
+
+- html:         /site/<i>/bids.html     cash bid table
+- pdf:          /site/<i>/bids.pdf      bid sheet PDF
+- html_to_pdf:  /site/<i>/grain.html    page linking to /site/<i>/corn-bid-price.pdf
+
+Every response draws a latency from a lognormal distribution (`--latency-median-ms`,
+`--latency-p99-ms`) and may instead fail with a 5xx (`--error-rate`) or hang past the
+client timeout (`--timeout-rate`, `--hang-seconds`). Bodies carry a strong ETag and
+`If-None-Match` gets a 304; bids change every `--rotate-seconds`, which changes the ETag.
+`GET /__stats` returns per-status counts.
+
+The farm writes a matching bid source config (`--write-sources`) for either synthetic
+buyers or the real facilities seed (`--facilities-seed`, whose keys match a seeded
+database), so both `scrape_observations_for_buyers` and `morning_ranker.py main()`
+can run against it:
+
+  python benchmarks/bid_site_farm.py --sites 2000 --write-sources /tmp/bid_sources.json --load-test
+  python benchmarks/bid_site_farm.py --facilities-seed ../apps/api/seeds/facilities.seed.json \\
+      --write-sources /tmp/bid_sources.json --serve
+  python morning_ranker.py --bid-source-config /tmp/bid_sources.json --dry-run
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import statistics
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from synthetic import generate_buyers, render_text_pdf, seed_key
+
+import morning_ranker as mr
+from ranker_metrics import METRICS
+
+MODES = ("html", "pdf", "html_to_pdf")
+VALUE_REGEX = r"(?i)corn[^\n]{0,120}?\$?([0-9]+(?:\.[0-9]{1,4})?)"
+BASIS_REGEX = r"(?i)basis[^\n]{0,40}?([+-]?[0-9]+(?:\.[0-9]{1,4})?)"
+PDF_LINK_REGEX = r"(?i)(corn|grain).*(bid|price).*(pdf)$"
+ERROR_STATUSES = (500, 502, 503)
+
+
+class _FarmServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Read at listen() time, so it has to be a class attribute.
+    request_queue_size = 1024
+
+
+@dataclass
+class FarmConfig:
+    sites: int = 1000
+    servers: int = 4
+    host: str = "127.0.0.1"
+    port: int = 18080
+    mode_weights: Tuple[float, float, float] = (0.6, 0.25, 0.15)
+    latency_median_ms: float = 80.0
+    latency_p99_ms: float = 900.0
+    error_rate: float = 0.03
+    timeout_rate: float = 0.01
+    hang_seconds: float = 30.0
+    rotate_seconds: float = 300.0
+    rows_per_page: int = 6
+    seed: int = 7
+
+
+class BidSiteFarm:
+    def __init__(self, config: FarmConfig):
+        self.config = config
+        rng = random.Random(config.seed)
+        self.site_modes = [rng.choices(MODES, weights=config.mode_weights)[0] for _ in range(config.sites)]
+        # Lognormal with the requested median and p99 (z_0.99 ~= 2.326).
+        self._mu = math.log(max(config.latency_median_ms, 0.01))
+        self._sigma = max(0.0, math.log(max(config.latency_p99_ms, config.latency_median_ms) / max(config.latency_median_ms, 0.01)) / 2.326)
+        self._rng = random.Random(config.seed + 1)
+        self._rng_lock = threading.Lock()
+        self.stats: Dict[str, int] = {}
+        self._stats_lock = threading.Lock()
+        self._servers: List[_FarmServer] = []
+        self._threads: List[threading.Thread] = []
+
+    # -- content ---------------------------------------------------------------
+
+    def base_url(self, site: int) -> str:
+        return f"http://{self.config.host}:{self.config.port + site % self.config.servers}"
+
+    def entry_url(self, site: int) -> str:
+        path = {"html": "bids.html", "pdf": "bids.pdf", "html_to_pdf": "grain.html"}[self.site_modes[site]]
+        return f"{self.base_url(site)}/site/{site}/{path}"
+
+    def epoch(self) -> int:
+        return int(time.time() // max(self.config.rotate_seconds, 1.0))
+
+    @lru_cache(maxsize=8192)
+    def _bids(self, site: int, epoch: int) -> List[Tuple[str, float, float]]:
+        rng = random.Random(f"{self.config.seed}:{site}:{epoch}")
+        months = ["Spot", "Mar", "May", "Jul", "Sep", "Dec"][: self.config.rows_per_page]
+        return [(m, round(4.1 + rng.random() * 0.6, 2), round(rng.random() * 0.8 - 0.4, 2)) for m in months]
+
+    @lru_cache(maxsize=8192)
+    def render(self, site: int, page: str, epoch: int) -> Tuple[bytes, str]:
+        bids = self._bids(site, epoch)
+        if page == "bids.html":
+            rows = "".join(
+                f"<tr><td>Yellow Corn</td><td>{m}</td><td>${cash:.2f}</td><td>Basis {basis:+.2f}</td></tr>"
+                for m, cash, basis in bids
+            )
+            body = (
+                f"<html><head><title>Site {site} cash bids</title></head><body>"
+                "<nav><a href='/'>Home</a> <a href='/markets'>Markets</a></nav>"
+                f"<table class='cash-bids'><tr><th>Commodity</th><th>Delivery</th><th>Cash</th><th>Basis</th></tr>{rows}</table>"
+                "<footer>Bids subject to change.</footer></body></html>"
+            )
+            return body.encode("utf-8"), "text/html; charset=utf-8"
+        if page == "grain.html":
+            body = (
+                f"<html><body><h1>Site {site} grain</h1>"
+                f"<a href='/site/{site}/corn-bid-price.pdf'>Corn bid price sheet (pdf)</a>"
+                f"<a href='/site/{site}/hours.pdf'>Harvest hours</a></body></html>"
+            )
+            return body.encode("utf-8"), "text/html; charset=utf-8"
+        if page in ("bids.pdf", "corn-bid-price.pdf"):
+            lines = [f"Corn    {m}    Cash bid ${cash:.2f}    Basis {basis:+.2f}" for m, cash, basis in bids]
+            return render_text_pdf([lines], title=f"Site {site} daily bid sheet"), "application/pdf"
+        raise KeyError(page)
+
+    # -- faults ----------------------------------------------------------------
+
+    def draw_fault(self) -> Tuple[float, Optional[str]]:
+        """(latency seconds, fault) where fault is None, "error" or "hang"."""
+        with self._rng_lock:
+            latency_ms = self._rng.lognormvariate(self._mu, self._sigma) if self._sigma else math.exp(self._mu)
+            roll = self._rng.random()
+        if roll < self.config.timeout_rate:
+            return latency_ms / 1000.0, "hang"
+        if roll < self.config.timeout_rate + self.config.error_rate:
+            return latency_ms / 1000.0, "error"
+        return latency_ms / 1000.0, None
+
+    def count(self, key: str) -> None:
+        with self._stats_lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+    # -- servers ---------------------------------------------------------------
+
+    def start(self) -> None:
+        handler = _make_handler(self)
+        for i in range(self.config.servers):
+            server = _FarmServer((self.config.host, self.config.port + i), handler)
+            thread = threading.Thread(target=server.serve_forever, name=f"bid-farm-{i}", daemon=True)
+            thread.start()
+            self._servers.append(server)
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+
+    # -- configs ---------------------------------------------------------------
+
+    def source_configs(self, buyer_keys: List[str], crop: str = mr.DEFAULT_CROP) -> List[Dict[str, Any]]:
+        """bid_sources.json entries; sites are assigned to buyers round-robin."""
+        sources = []
+        for site in range(self.config.sites):
+            mode = self.site_modes[site]
+            entry: Dict[str, Any] = {
+                "buyer_external_seed_key": buyer_keys[site % len(buyer_keys)],
+                "crop_type": crop,
+                "mode": mode,
+                "url": self.entry_url(site),
+                "label": f"Mock site {site} ({mode})",
+                "value_regex": VALUE_REGEX,
+                "basis_regex": BASIS_REGEX,
+                "confidence_score": 90,
+            }
+            if mode == "html":
+                entry["text_selector"] = ".cash-bids"
+            if mode == "html_to_pdf":
+                entry["pdf_link_regex"] = PDF_LINK_REGEX
+            sources.append(entry)
+        return sources
+
+
+def _make_handler(farm: BidSiteFarm):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+            return
+
+        def _send(self, status: int, body: bytes = b"", content_type: str = "text/plain", headers: Optional[Dict[str, str]] = None) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            if body and self.command != "HEAD":
+                self.wfile.write(body)
+            farm.count(str(status))
+
+        def do_HEAD(self) -> None:
+            self.do_GET()
+
+        def do_GET(self) -> None:
+            if self.path == "/__stats":
+                with farm._stats_lock:
+                    body = json.dumps(farm.stats).encode("utf-8")
+                self._send(200, body, "application/json")
+                return
+
+            parts = self.path.split("?", 1)[0].strip("/").split("/")
+            if len(parts) != 3 or parts[0] != "site" or not parts[1].isdigit() or int(parts[1]) >= farm.config.sites:
+                self._send(404, b"not found")
+                return
+            site, page = int(parts[1]), parts[2]
+
+            latency, fault = farm.draw_fault()
+            time.sleep(latency)
+            if fault == "hang":
+                farm.count("hang")
+                time.sleep(farm.config.hang_seconds)
+                self.close_connection = True
+                return
+            if fault == "error":
+                self._send(random.choice(ERROR_STATUSES), b"upstream error")
+                return
+
+            epoch = farm.epoch()
+            try:
+                body, content_type = farm.render(site, page, epoch)
+            except KeyError:
+                self._send(404, b"not found")
+                return
+            etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+            cache_headers = {"ETag": etag, "Cache-Control": f"max-age={int(farm.config.rotate_seconds)}"}
+            if etag in [t.strip() for t in (self.headers.get("If-None-Match") or "").split(",")]:
+                self._send(304, b"", content_type, cache_headers)
+                return
+            self._send(200, body, content_type, cache_headers)
+
+    return Handler
+
+
+def load_facility_keys(path: str) -> List[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        facilities = json.load(f)
+    return [seed_key(f["name"], f["city"], f["state"], f["type"]) for f in facilities]
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, int(math.ceil(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[idx]
+
+
+def load_test(farm: BidSiteFarm, buyer_count: int, timeout: float, seed: int) -> Dict[str, Any]:
+    """Run scrape_observations_for_buyers against the farm and summarize it."""
+    buyers = generate_buyers(buyer_count, seed)
+    sources = farm.source_configs([b.external_seed_key for b in buyers if b.external_seed_key])
+    configs = [mr.SourceConfig(**s) for s in sources]
+
+    METRICS.reset()
+    started = time.perf_counter()
+    observations, best, summary = mr.scrape_observations_for_buyers(buyers, configs, timeout=timeout, debug=False)
+    elapsed = time.perf_counter() - started
+
+    durations = sorted((s.end_ns - s.start_ns) / 1e6 for s in METRICS.spans if s.name == "scrape.source")
+    return {
+        "sites": len(configs),
+        "elapsedSeconds": round(elapsed, 3),
+        "sourcesPerSecond": round(len(configs) / elapsed, 2) if elapsed else None,
+        "latencyMs": {
+            "p50": round(_percentile(durations, 50), 2),
+            "p90": round(_percentile(durations, 90), 2),
+            "p99": round(_percentile(durations, 99), 2),
+            "max": round(durations[-1], 2) if durations else 0.0,
+            "mean": round(statistics.fmean(durations), 2) if durations else 0.0,
+        },
+        "observations": len(observations),
+        "buyersWithBids": len(best),
+        "attempted": summary.get("attempted"),
+        "succeeded": summary.get("succeeded"),
+        "failed": summary.get("failed"),
+        "farmStats": dict(farm.stats),
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    defaults = FarmConfig()
+    parser = argparse.ArgumentParser(description="Mock bid-site farm for scraper load tests")
+    parser.add_argument("--sites", type=int, default=defaults.sites)
+    parser.add_argument("--servers", type=int, default=defaults.servers)
+    parser.add_argument("--host", default=defaults.host)
+    parser.add_argument("--port", type=int, default=defaults.port, help="First port; servers use consecutive ports")
+    parser.add_argument("--mode-weights", default="0.6,0.25,0.15", help="html,pdf,html_to_pdf share of sites")
+    parser.add_argument("--latency-median-ms", type=float, default=defaults.latency_median_ms)
+    parser.add_argument("--latency-p99-ms", type=float, default=defaults.latency_p99_ms)
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate)
+    parser.add_argument("--timeout-rate", type=float, default=defaults.timeout_rate)
+    parser.add_argument("--hang-seconds", type=float, default=defaults.hang_seconds)
+    parser.add_argument("--rotate-seconds", type=float, default=defaults.rotate_seconds)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--facilities-seed", help="Key sources to facilities.seed.json buyers (for main() on a seeded DB)")
+    parser.add_argument("--buyers", type=int, default=500, help="Synthetic buyer count when not using --facilities-seed")
+    parser.add_argument("--crop", default=mr.DEFAULT_CROP)
+    parser.add_argument("--write-sources", help="Write a matching bid_sources.json here")
+    parser.add_argument("--load-test", action="store_true", help="Scrape every site once in-process and print a summary")
+    parser.add_argument("--http-timeout", type=float, default=5.0, help="Client timeout for --load-test")
+    parser.add_argument("--serve", action="store_true", help="Keep serving until interrupted")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    config = FarmConfig(
+        sites=args.sites,
+        servers=args.servers,
+        host=args.host,
+        port=args.port,
+        mode_weights=tuple(float(x) for x in args.mode_weights.split(",")),  # type: ignore[arg-type]
+        latency_median_ms=args.latency_median_ms,
+        latency_p99_ms=args.latency_p99_ms,
+        error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate,
+        hang_seconds=args.hang_seconds,
+        rotate_seconds=args.rotate_seconds,
+        seed=args.seed,
+    )
+    farm = BidSiteFarm(config)
+    farm.start()
+    print(
+        f"[farm] {config.sites} sites on http://{config.host}:{config.port}-{config.port + config.servers - 1}",
+        file=sys.stderr,
+    )
+    try:
+        if args.write_sources:
+            if args.facilities_seed:
+                keys = load_facility_keys(args.facilities_seed)
+            else:
+                keys = [b.external_seed_key for b in generate_buyers(args.buyers, args.seed) if b.external_seed_key]
+            with open(args.write_sources, "w", encoding="utf-8") as f:
+                json.dump({"sources": farm.source_configs(keys, args.crop)}, f, indent=2)
+            print(f"[farm] wrote {config.sites} sources to {args.write_sources}", file=sys.stderr)
+        if args.load_test:
+            print(json.dumps(load_test(farm, args.buyers, args.http_timeout, args.seed), indent=2))
+        if args.serve:
+            while True:
+                time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        farm.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
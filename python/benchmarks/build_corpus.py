@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Regenerate the saved extraction corpus under `benchmarks/corpus/`.
+
+The corpus is checked in so extraction benchmarks stay comparable across commits;
+rerun this only when deliberately changing it (and refresh the baseline after).
+
+Each document is listed in `corpus/manifest.json` with the `SourceConfig` fields
+used to extract it, mirroring entries in `bid_sources.json`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+from typing import Any, Dict, List
+
+from synthetic import HERE, render_text_pdf
+
+CORPUS_DIR = os.path.join(HERE, "corpus")
+MONTHS = ["Spot", "Mar", "May", "Jul", "Sep", "Dec"]
+LOCATIONS = [
+    "Hankinson", "Richardton", "Casselton", "Wahpeton", "Breckenridge", "Fergus Falls",
+    "Aberdeen", "Watertown", "Mitchell", "Sioux Falls", "Mankato", "Marshall",
+]
+
+PAGE_CHROME = """<header><nav><ul>{nav}</ul></nav></header>
+<aside class="weather">Forecast: {weather}</aside>"""
+FOOTER = "<footer><p>Bids subject to change without notice. Call the grain desk to confirm.</p>{links}</footer>"
+
+
+def _chrome(rng: random.Random, nav_items: int) -> str:
+    nav = "".join(f'<li><a href="/page-{i}">Section {i}</a></li>' for i in range(nav_items))
+    weather = ", ".join(f"{d}: {rng.randint(10, 60)}F" for d in ["Mon", "Tue", "Wed", "Thu", "Fri"])
+    return PAGE_CHROME.format(nav=nav, weather=weather)
+
+
+def _bid_rows(rng: random.Random, location: str, cents: bool) -> List[str]:
+    rows = []
+    for month in MONTHS:
+        cash = 4.10 + rng.random() * 0.6
+        basis = cash - 4.4475
+        if cents:
+            rows.append(
+                f"<tr><td>{location}</td><td>Corn</td><td>{month}</td>"
+                f"<td>{cash * 100:.2f}</td><td>{basis * 100:+.0f}</td></tr>"
+            )
+        else:
+            rows.append(
+                f"<tr><td>{location}</td><td>Yellow Corn</td><td>{month}</td>"
+                f"<td>${cash:.2f}</td><td>Basis {basis:+.2f}</td></tr>"
+            )
+    rows.append(f"<tr><td>{location}</td><td>Soybeans</td><td>Spot</td><td>${9.5 + rng.random():.2f}</td><td>Basis -0.85</td></tr>")
+    return rows
+
+
+def _html_page(rng: random.Random, locations: List[str], cents: bool, nav_items: int, selector_class: str) -> str:
+    rows = []
+    for loc in locations:
+        rows.extend(_bid_rows(rng, loc, cents))
+    links = "".join(f'<a href="/archive/{i}.html">Archive {i}</a> ' for i in range(nav_items))
+    return (
+        "<!doctype html><html><head><title>Cash Bids</title></head><body>"
+        + _chrome(rng, nav_items)
+        + f'<main><h1>Cash Bids</h1><table class="{selector_class}"><thead><tr>'
+        "<th>Location</th><th>Commodity</th><th>Delivery</th><th>Cash</th><th>Basis</th></tr></thead><tbody>"
+        + "".join(rows)
+        + "</tbody></table></main>"
+        + FOOTER.format(links=links)
+        + "</body></html>"
+    )
+
+
+def _pdf_lines(rng: random.Random, locations: List[str], with_basis: bool) -> List[List[str]]:
+    pages = []
+    for loc in locations:
+        lines = [f"Location: {loc}", "Commodity    Delivery    Cash Bid    Basis    Futures"]
+        for month in MONTHS:
+            cash = 4.10 + rng.random() * 0.6
+            basis = f"{cash - 4.4475:+.2f}" if with_basis else "--"
+            lines.append(f"Corn    {month}    Cash bid ${cash:.2f}    Basis {basis}    Futures 444.75")
+        lines.append("Soybeans    Spot    Cash bid $9.87    Basis -0.85")
+        pages.append(lines)
+    return pages
+
+
+def build_corpus(out_dir: str, seed: int = 11) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    corn_value = r"(?i)corn[^\n]{0,120}?\$?([0-9]+(?:\.[0-9]{1,4})?)"
+    basis_value = r"(?i)basis[^\n]{0,40}?([+-]?[0-9]+(?:\.[0-9]{1,4})?)"
+    docs: List[Dict[str, Any]] = []
+
+    def html(name: str, body: str, **source: Any) -> None:
+        with open(os.path.join(out_dir, name), "w", encoding="utf-8") as f:
+            f.write(body)
+        docs.append({"file": name, "mode": "html", **source})
+
+    def pdf(name: str, body: bytes, **source: Any) -> None:
+        with open(os.path.join(out_dir, name), "wb") as f:
+            f.write(body)
+        docs.append({"file": name, "mode": "pdf", **source})
+
+    html("single_location.html", _html_page(rng, LOCATIONS[:1], False, 8, "cash-bids"),
+         text_selector=".cash-bids", value_regex=corn_value, basis_regex=basis_value)
+    html("cents_quotes.html", _html_page(rng, LOCATIONS[:3], True, 12, "bids"),
+         text_selector=".bids", value_regex=corn_value)
+    html("no_selector_generic.html", _html_page(rng, LOCATIONS[:4], False, 20, "grid"))
+    html("large_multi_location.html", _html_page(rng, LOCATIONS * 8, False, 150, "cash-bids"),
+         text_selector=".cash-bids", value_regex=corn_value, basis_regex=basis_value)
+    html("no_bids_posted.html",
+         "<html><body>" + _chrome(rng, 10) + "<main><p>Bids will be posted after the open.</p></main></body></html>",
+         text_selector=".cash-bids", value_regex=corn_value)
+    pdf("bid_sheet_1page.pdf", render_text_pdf(_pdf_lines(rng, LOCATIONS[:1], True), title="Daily Bid Sheet"),
+        value_regex=corn_value, basis_regex=basis_value,
+        futures_regex=r"(?i)futures[^\n]{0,40}?([0-9]+(?:\.[0-9]{1,4})?)")
+    pdf("bid_sheet_12page.pdf", render_text_pdf(_pdf_lines(rng, LOCATIONS, True), title="Daily Bid Sheet"),
+        value_regex=corn_value, basis_regex=basis_value)
+    pdf("bid_sheet_no_basis.pdf", render_text_pdf(_pdf_lines(rng, LOCATIONS[:2], False)))
+
+    for doc in docs:
+        doc.setdefault("label", os.path.splitext(doc["file"])[0])
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump({"seed": seed, "documents": docs}, f, indent=2)
+        f.write("\n")
+    return docs
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Regenerate the benchmark extraction corpus")
+    parser.add_argument("--out", default=CORPUS_DIR)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+    docs = build_corpus(args.out, args.seed)
+    print(f"Wrote {len(docs)} documents to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,732 @@
+#!/usr/bin/env python3
+"""Benchmarks for the morning ranker's hot paths.
+
+Suites:
+- ranking:     build_rankings (state-table and lane-rate freight) / compute_top_states_by_cash
+               on synthetic 1k/10k/100k buyers, plus read_snapshot and build_rankings on a
+               captured production run (`--snapshot`, from `morning_ranker.py --dump-snapshot`)
+- origins:     multi_origin.rank_origins, 50 origins x 10k buyers (numpy) and a small
+               pure-Python reference run for comparison
+- forward:     forward_curve.rank_delivery_months, 12 delivery months x 10k buyers in one pass,
+               against one build_rankings for the same buyers
+- spatial:     spatial_index build plus radius / rail-corridor queries over 100k buyers
+- history:     usda_history report parsing, Parquet ingest, history load and as-of lookups
+               over a synthetic year of grain reports
+- uncertainty: rank_uncertainty, 2000 Monte Carlo samples over every candidate from 1k and
+               10k synthetic buyers
+- extraction:  extract_html_text / extract_text_from_pdf / extract_bid_metrics on the saved corpus
+- startup:     `import morning_ranker` in a fresh interpreter (`python -X importtime`), a
+               cold-process memory-backend `--dry-run`, and load_source_configs for 500
+               sources built from scratch against the compiled cache (config_cache)
+- persistence: insert_recommendations, and a 5%-changed rerun persisted as a delta, against a
+               local Postgres (--database-url), rolled back
+
+Results are written as JSON (`--output`) and compared against a stored baseline
+(`--baseline`, default `benchmarks/baseline.json`). A benchmark regresses when its
+median exceeds the baseline median by more than `--threshold-pct`; the exit code is 1
+if anything regressed, so this can gate a deploy. Record a baseline on the deploy
+machine with `--save-baseline`; timings from different hardware are not comparable.
+
+The startup suite also has an absolute budget: the exit code is 1 when `import
+morning_ranker` takes longer than `--import-budget-ms`, or when it loads any of
+LAZY_MODULES, which only the paths that need them may import.
+
+Usage:
+  python benchmarks/run_benchmarks.py
+  python benchmarks/run_benchmarks.py --sizes 1000,10000 --suite ranking --output /tmp/bench.json
+  python benchmarks/run_benchmarks.py --suite ranking --snapshot /var/tmp/morning.snapshot
+  python benchmarks/run_benchmarks.py --database-url postgres://... --suite persistence
+  python benchmarks/run_benchmarks.py --suite startup --import-budget-ms 60
+  python benchmarks/run_benchmarks.py --save-baseline
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import platform
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from synthetic import (
+    FIXED_FUTURES_PRICE,
+    FIXED_REGIONAL_BASIS,
+    HERE,
+    PYTHON_DIR,
+    REFERENCE_TIME,
+    SYNTHETIC_CORRIDOR,
+    generate_buyers,
+    generate_freight_quotes,
+    generate_observations,
+    generate_origins,
+    generate_source_configs,
+    generate_usda_reports,
+)
+
+import morning_ranker as mr
+
+DEFAULT_BASELINE = os.path.join(HERE, "baseline.json")
+CORPUS_DIR = os.path.join(HERE, "corpus")
+RESULT_VERSION = 1
+# Differences below this are timer noise, whatever the percentage.
+NOISE_FLOOR_MS = 0.5
+DEFAULT_IMPORT_BUDGET_MS = float(os.environ.get("CORN_INTEL_IMPORT_BUDGET_MS", "80"))
+# Optional or heavy dependencies that `import morning_ranker` must not pull in.
+LAZY_MODULES = ("psycopg", "requests", "bs4", "pypdf", "numpy", "pandas", "sklearn", "pyarrow", "multiprocessing")
+STARTUP_SOURCES = 500
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the morning ranker benchmarks")
+    parser.add_argument("--suite", action="append", choices=["ranking", "origins", "forward", "spatial", "history", "uncertainty", "extraction", "startup", "persistence"],
+                        help="Suites to run (repeatable; default: all that can run here)")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Synthetic buyer counts for the ranking suite")
+    parser.add_argument("--snapshot", action="append", default=[], metavar="PATH",
+                        help="Run snapshot (--dump-snapshot) to rank in the ranking suite; repeatable")
+    parser.add_argument("--origins", default="50x10000", help="Origins x buyers for the origins suite")
+    parser.add_argument("--forward-shape", default="12x10000", help="Delivery months x buyers for the forward suite")
+    parser.add_argument("--spatial-size", type=int, default=100000, help="Synthetic buyers for the spatial suite")
+    parser.add_argument("--history-shape", default="365x1000", help="Days x rows per report for the history suite")
+    parser.add_argument("--uncertainty-shape", default="2000x1000,10000", help="Samples x buyer counts for the uncertainty suite")
+    parser.add_argument("--import-budget-ms", type=float, default=DEFAULT_IMPORT_BUDGET_MS,
+                        help="Startup suite: fail when `import morning_ranker` takes longer than this")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed repetitions per benchmark")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--database-url", default=os.environ.get("CORN_INTEL_BENCH_DATABASE_URL"),
+                        help="Local Postgres for the persistence suite (writes are rolled back)")
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Write these results to --baseline")
+    parser.add_argument("--threshold-pct", type=float, default=20.0)
+    return parser.parse_args()
+
+
+def time_call(fn: Callable[[], Any], repeat: int, setup: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+    """Run fn once to warm up, then `repeat` timed runs with GC paused."""
+    if setup:
+        setup()
+    fn()
+    samples: List[float] = []
+    gc_was_enabled = gc.isenabled()
+    for _ in range(repeat):
+        if setup:
+            setup()
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - start) * 1000.0)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+    return summarize(samples)
+
+
+def summarize(samples: List[float]) -> Dict[str, Any]:
+    return {
+        "repeat": len(samples),
+        "minMs": round(min(samples), 4),
+        "medianMs": round(statistics.median(samples), 4),
+        "meanMs": round(statistics.fmean(samples), 4),
+        "maxMs": round(max(samples), 4),
+    }
+
+
+def _repeat_for(size: int, repeat: int) -> int:
+    # 100k-buyer runs take seconds each; a couple of samples is enough there.
+    return max(1, min(repeat, int(repeat * 10_000 / max(size, 1)) or 1))
+
+
+def bench_ranking(sizes: List[int], repeat: int, seed: int) -> Dict[str, Dict[str, Any]]:
+    results: Dict[str, Dict[str, Any]] = {}
+    for size in sizes:
+        buyers = generate_buyers(size, seed)
+        latest, scraped = generate_observations(buyers, seed)
+        n = _repeat_for(size, repeat)
+
+        def rank() -> Any:
+            return mr.build_rankings(
+                buyers=buyers,
+                latest_obs=latest,
+                scraped_obs=scraped,
+                futures_price=FIXED_FUTURES_PRICE,
+                regional_basis=FIXED_REGIONAL_BASIS,
+                max_bid_age_hours=36.0,
+                model_payload=None,
+                top_states_count=3,
+                top_n=30,
+                reference=REFERENCE_TIME,
+            )
+
+        results[f"build_rankings[{size}]"] = {"n": size, **time_call(rank, n)}
+
+        quotes = generate_freight_quotes(buyers, seed)
+
+        def rank_lanes() -> Any:
+            return mr.build_rankings(
+                buyers=buyers,
+                latest_obs=latest,
+                scraped_obs=scraped,
+                futures_price=FIXED_FUTURES_PRICE,
+                regional_basis=FIXED_REGIONAL_BASIS,
+                max_bid_age_hours=36.0,
+                model_payload=None,
+                top_states_count=3,
+                top_n=30,
+                reference=REFERENCE_TIME,
+                freight_quotes=quotes,
+            )
+
+        results[f"build_rankings_lanes[{size}]"] = {"n": size, **time_call(rank_lanes, n)}
+
+        candidates = mr.score_candidates(
+            buyers, latest, scraped, FIXED_FUTURES_PRICE, FIXED_REGIONAL_BASIS, 36.0, None, reference=REFERENCE_TIME
+        )
+        results[f"compute_top_states_by_cash[{size}]"] = {
+            "n": len(candidates),
+            **time_call(lambda: mr.compute_top_states_by_cash(candidates, 3), repeat),
+        }
+        print(f"[bench] ranking {size}: {results[f'build_rankings[{size}]']['medianMs']:.2f} ms", file=sys.stderr)
+    return results
+
+
+def bench_ranking_snapshot(path: str, repeat: int) -> Dict[str, Dict[str, Any]]:
+    """build_rankings on a captured run's real inputs, ranked the way `--replay` ranks them."""
+    from run_snapshot import read_snapshot
+
+    name = os.path.splitext(os.path.basename(path))[0]
+    results: Dict[str, Dict[str, Any]] = {}
+    snap = read_snapshot(path)
+    results[f"read_snapshot[{name}]"] = {"n": len(snap.buyers), **time_call(lambda: read_snapshot(path), repeat)}
+
+    config = snap.config
+    freight_quotes = None
+    if config.get("freight"):
+        from freight_rates import FreightQuotes
+
+        freight_quotes = FreightQuotes.from_json(config["freight"]["quotes"])
+
+    def rank() -> Any:
+        return mr.build_rankings(
+            buyers=snap.buyers,
+            latest_obs=snap.latest_obs,
+            scraped_obs=snap.scraped_best_map,
+            futures_price=snap.futures_price,
+            regional_basis=snap.regional_basis,
+            max_bid_age_hours=float(config.get("maxBidAgeHours") or 36.0),
+            model_payload=snap.model_payload,
+            top_states_count=int(config.get("topStates") or 3),
+            top_n=int(config.get("topN") or 30),
+            reference=snap.captured_at,
+            freight_quotes=freight_quotes,
+            history_features=snap.history_features,
+        )
+
+    results[f"build_rankings_snapshot[{name}]"] = {
+        "n": len(snap.buyers),
+        **time_call(rank, _repeat_for(len(snap.buyers), repeat)),
+    }
+    print(
+        f"[bench] ranking snapshot {name} ({len(snap.buyers)} buyers): "
+        f"{results[f'build_rankings_snapshot[{name}]']['medianMs']:.2f} ms",
+        file=sys.stderr,
+    )
+    return results
+
+
+def bench_origins(shape: str, repeat: int, seed: int) -> Dict[str, Dict[str, Any]]:
+    import multi_origin
+
+    origin_count, buyer_count = (int(part) for part in shape.lower().split("x"))
+    buyers = generate_buyers(buyer_count, seed)
+    latest, scraped = generate_observations(buyers, seed)
+    candidates = mr.resolve_candidates(
+        buyers, latest, scraped, FIXED_FUTURES_PRICE, FIXED_REGIONAL_BASIS, 36.0, REFERENCE_TIME
+    )
+    origins = generate_origins(origin_count, seed)
+    results: Dict[str, Dict[str, Any]] = {}
+    if multi_origin.np is not None:
+        results[f"rank_origins[{origin_count}x{buyer_count}]"] = {
+            "n": origin_count * len(candidates),
+            **time_call(lambda: multi_origin.rank_origins(candidates, origins, None, top_n=30), repeat),
+        }
+    else:
+        print("[bench] numpy not installed; skipping vectorized rank_origins", file=sys.stderr)
+    # The per-origin Python path costs about one build_rankings per origin; time a few.
+    few = origins[:2]
+    results[f"rank_origins_python[{len(few)}x{buyer_count}]"] = {
+        "n": len(few) * len(candidates),
+        **time_call(lambda: multi_origin.rank_origins(candidates, few, None, top_n=30, vectorized=False), max(1, repeat // 2)),
+    }
+    for name, result in results.items():
+        print(f"[bench] {name}: {result['medianMs']:.2f} ms", file=sys.stderr)
+    return results
+
+
+def bench_forward(shape: str, repeat: int, seed: int) -> Dict[str, Dict[str, Any]]:
+    import forward_curve
+
+    results: Dict[str, Dict[str, Any]] = {}
+    if forward_curve.np is None:
+        print("[bench] numpy not installed; skipping rank_delivery_months", file=sys.stderr)
+        return results
+    month_count, buyer_count = (int(part) for part in shape.lower().split("x"))
+    buyers = generate_buyers(buyer_count, seed)
+    latest, scraped = generate_observations(buyers, seed)
+    candidates = mr.resolve_candidates(
+        buyers, latest, scraped, FIXED_FUTURES_PRICE, FIXED_REGIONAL_BASIS, 36.0, REFERENCE_TIME
+    )
+    start = REFERENCE_TIME.year * 12 + REFERENCE_TIME.month - 1
+    months = [f"{(start + i) // 12:04d}-{(start + i) % 12 + 1:02d}" for i in range(month_count)]
+    curve = forward_curve.ForwardCurve(
+        prices={m: round(FIXED_FUTURES_PRICE + 0.04 * i, 4) for i, m in enumerate(months)}, source="synthetic"
+    )
+    results[f"rank_delivery_months[{shape}]"] = {
+        "n": month_count * len(candidates),
+        **time_call(lambda: forward_curve.rank_delivery_months(candidates, curve, months, None), repeat),
+    }
+    # The cost of one more full run, for comparison with the per-month increment.
+    results[f"build_rankings_once[{buyer_count}]"] = {
+        "n": buyer_count,
+        **time_call(
+            lambda: mr.build_rankings(
+                buyers, latest, scraped, FIXED_FUTURES_PRICE, FIXED_REGIONAL_BASIS, 36.0, None, 3, 30,
+                reference=REFERENCE_TIME,
+            ),
+            repeat,
+        ),
+    }
+    for name, result in results.items():
+        print(f"[bench] {name}: {result['medianMs']:.2f} ms", file=sys.stderr)
+    return results
+
+
+def bench_uncertainty(shape: str, repeat: int, seed: int) -> Dict[str, Dict[str, Any]]:
+    import rank_uncertainty
+
+    results: Dict[str, Dict[str, Any]] = {}
+    if rank_uncertainty.np is None:
+        print("[bench] numpy not installed; skipping rank_uncertainty", file=sys.stderr)
+        return results
+    samples, sizes = shape.lower().split("x", 1)
+    for size in (int(s) for s in sizes.split(",")):
+        buyers = generate_buyers(size, seed)
+        latest, scraped = generate_observations(buyers, seed)
+        candidates = mr.score_candidates(
+            buyers, latest, scraped, FIXED_FUTURES_PRICE, FIXED_REGIONAL_BASIS, 36.0, None, reference=REFERENCE_TIME
+        )
+        ranked, top_states, _ = mr.select_rankings(candidates, None, mr.DEFAULT_WEIGHTED_SCORE, 3, 30)
+        name = f"rank_uncertainty[{samples}x{size}]"
+        results[name] = {
+            "n": int(samples) * len(candidates),
+            **time_call(
+                lambda: rank_uncertainty.rank_uncertainty(candidates, ranked, top_states, None, samples=int(samples)),
+                _repeat_for(size, repeat),
+            ),
+        }
+        print(f"[bench] {name}: {results[name]['medianMs']:.1f} ms ({len(candidates)} candidates)", file=sys.stderr)
+    return results
+
+
+def bench_spatial(size: int, repeat: int, seed: int) -> Dict[str, Dict[str, Any]]:
+    import spatial_index
+
+    buyers = generate_buyers(size, seed)
+    results: Dict[str, Dict[str, Any]] = {
+        f"spatial_index_build[{size}]": {"n": size, **time_call(lambda: spatial_index.BuyerSpatialIndex(buyers), repeat)},
+    }
+    index = spatial_index.BuyerSpatialIndex(buyers)
+    lat, lng = SYNTHETIC_CORRIDOR[0]
+    # Single queries are sub-millisecond; more repetitions keep the median stable.
+    for miles in (25, 100):
+        hits = index.within_radius(lat, lng, miles)
+        results[f"within_radius_{miles}mi[{size}]"] = {
+            "n": len(hits),
+            **time_call(lambda: index.within_radius(lat, lng, miles), repeat * 20),
+        }
+    for miles in (10, 25):
+        hits = index.within_corridor([SYNTHETIC_CORRIDOR], miles)
+        results[f"within_corridor_{miles}mi[{size}]"] = {
+            "n": len(hits),
+            **time_call(lambda: index.within_corridor([SYNTHETIC_CORRIDOR], miles), repeat * 20),
+        }
+    for name, result in results.items():
+        print(f"[bench] {name}: {result['medianMs']:.3f} ms (n={result['n']})", file=sys.stderr)
+    return results
+
+
+def bench_history(shape: str, repeat: int, seed: int) -> Dict[str, Dict[str, Any]]:
+    import shutil
+    import tempfile
+
+    import usda_history
+
+    days, rows_per_day = (int(x) for x in shape.lower().split("x"))
+    reports = generate_usda_reports(days, rows_per_day, seed)
+    rows = days * rows_per_day
+
+    def parse_all() -> Dict[str, List[Any]]:
+        columns: Dict[str, List[Any]] = {name: [] for name in usda_history.COLUMNS}
+        for report in reports:
+            usda_history.parse_report(report, usda_history.DEFAULT_COMMODITY, "synthetic", columns)
+        return columns
+
+    workdir = tempfile.mkdtemp(prefix="usda-history-bench-")
+    try:
+        columns = parse_all()
+        import pyarrow as pa  # type: ignore
+
+        table = usda_history._table(pa, columns)
+        results: Dict[str, Dict[str, Any]] = {
+            f"usda_history_parse[{shape}]": {"n": rows, **time_call(parse_all, repeat)},
+            f"usda_history_write[{shape}]": {
+                "n": rows,
+                **time_call(lambda: usda_history._write_part(os.path.join(workdir, "write"), table), repeat),
+            },
+        }
+        store = os.path.join(workdir, "store")
+        usda_history._write_part(store, table)
+        results[f"usda_history_load[{shape}]"] = {
+            "n": rows,
+            **time_call(
+                lambda: usda_history.load_basis_history(store),
+                repeat,
+                setup=lambda: usda_history.invalidate_basis_history(store),
+            ),
+        }
+        history = usda_history.load_basis_history(store)
+        day = REFERENCE_TIME.date()
+        results["usda_history_as_of"] = {"n": len(history.series), **time_call(lambda: history.as_of(day), repeat * 20)}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    for name, result in results.items():
+        if name.startswith(("usda_history_parse", "usda_history_write")):
+            per_minute = result["n"] * 60000.0 / max(result["medianMs"], 1e-9)
+            print(f"[bench] {name}: {result['medianMs']:.1f} ms ({per_minute / 1e6:.1f}M rows/min)", file=sys.stderr)
+        else:
+            print(f"[bench] {name}: {result['medianMs']:.3f} ms", file=sys.stderr)
+    return results
+
+
+def load_corpus(corpus_dir: str = CORPUS_DIR) -> List[Dict[str, Any]]:
+    with open(os.path.join(corpus_dir, "manifest.json"), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    docs = []
+    for entry in manifest["documents"]:
+        with open(os.path.join(corpus_dir, entry["file"]), "rb") as f:
+            raw = f.read()
+        source = mr.SourceConfig(
+            buyer_external_seed_key=entry["file"],
+            crop_type=mr.DEFAULT_CROP,
+            mode=entry["mode"],
+            url=f"file://{entry['file']}",
+            label=entry["label"],
+            text_selector=entry.get("text_selector"),
+            value_regex=entry.get("value_regex"),
+            basis_regex=entry.get("basis_regex"),
+            futures_regex=entry.get("futures_regex"),
+        )
+        docs.append({"file": entry["file"], "raw": raw, "source": source})
+    return docs
+
+
+def bench_extraction(repeat: int) -> Dict[str, Dict[str, Any]]:
+    docs = load_corpus()
+    html_docs = [d for d in docs if d["source"].mode != "pdf"]
+    pdf_docs = [d for d in docs if d["source"].mode == "pdf"]
+
+    def parse_html() -> None:
+        for d in html_docs:
+            d["text"] = mr.extract_html_text(d["raw"].decode("utf-8", errors="ignore"), d["source"].text_selector)
+
+    def parse_pdf() -> None:
+        for d in pdf_docs:
+            d["text"] = mr.extract_text_from_pdf(d["raw"])
+
+    results = {
+        "extract_html_text[corpus]": {"n": len(html_docs), **time_call(parse_html, repeat)},
+        "extract_text_from_pdf[corpus]": {"n": len(pdf_docs), **time_call(parse_pdf, repeat)},
+    }
+
+    def extract_all() -> None:
+        for d in docs:
+            mr.extract_bid_metrics(d["text"], d["source"])
+
+    # Extraction is fast per document; loop the corpus so timings clear the noise floor.
+    def extract_many() -> None:
+        for _ in range(50):
+            extract_all()
+
+    results["extract_bid_metrics[corpus x50]"] = {"n": len(docs) * 50, **time_call(extract_many, repeat)}
+    return results
+
+
+def _startup_env() -> Dict[str, str]:
+    # A scheduled job runs from cached bytecode; let the warm-up run write it.
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    return env
+
+
+def import_profile(module: str) -> Tuple[float, List[str]]:
+    """(cumulative import ms, modules imported) for `module` in a fresh interpreter."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PYTHON_DIR,
+        env=_startup_env(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total_ms = 0.0
+    loaded: List[str] = []
+    # "import time: <self us> | <cumulative us> | <indented module name>"
+    for line in proc.stderr.splitlines():
+        parts = line.split("|")
+        if not line.startswith("import time:") or len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].strip()
+        loaded.append(name)
+        if name == module:
+            total_ms = int(parts[1]) / 1000.0
+    return total_ms, loaded
+
+
+def bench_startup(repeat: int, seed: int) -> Dict[str, Dict[str, Any]]:
+    import config_cache
+
+    results: Dict[str, Dict[str, Any]] = {}
+    import_profile("morning_ranker")
+    samples: List[float] = []
+    loaded: List[str] = []
+    for _ in range(repeat):
+        elapsed, loaded = import_profile("morning_ranker")
+        samples.append(elapsed)
+    lazy_loaded = sorted({name.split(".")[0] for name in loaded} & set(LAZY_MODULES))
+    results["import_morning_ranker"] = {"n": len(loaded), **summarize(samples), "lazyModulesLoaded": lazy_loaded}
+
+    workdir = tempfile.mkdtemp(prefix="cornintel-startup-")
+    try:
+        command = [
+            sys.executable, os.path.join(PYTHON_DIR, "morning_ranker.py"),
+            "--backend", "memory", "--dry-run", "--skip-scrape", "--no-reuse", "--no-usda-cache",
+            "--checkpoint-dir", os.path.join(workdir, "runs"),
+            # Nothing listens on the discard port, so the USDA fetch fails fast to the fallbacks.
+            "--api-base-url", "http://127.0.0.1:9",
+        ]
+
+        def dry_run() -> None:
+            subprocess.run(command, env=_startup_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+
+        results["dry_run_memory[cold process]"] = {"n": 1, **time_call(dry_run, repeat)}
+
+        config_path = os.path.join(workdir, "bid_sources.json")
+        with open(config_path, "w", encoding="utf-8") as f:
+            json.dump(generate_source_configs(STARTUP_SOURCES, seed), f)
+        config_cache.DEFAULT_COMPILED_CACHE_DIR = os.path.join(workdir, "compiled")
+
+        def forget_compiled() -> None:
+            config_cache.invalidate_compiled()
+            shutil.rmtree(config_cache.DEFAULT_COMPILED_CACHE_DIR, ignore_errors=True)
+            # Patterns compiled by an earlier sample would make the next build look free.
+            mr.REGEX_GUARD._compiled.clear()
+            re.purge()
+
+        def load() -> None:
+            mr.load_source_configs(config_path, mr.DEFAULT_CROP)
+
+        results[f"load_source_configs[{STARTUP_SOURCES},build]"] = {
+            "n": STARTUP_SOURCES,
+            **time_call(load, repeat, setup=forget_compiled),
+        }
+        results[f"load_source_configs[{STARTUP_SOURCES},disk]"] = {
+            "n": STARTUP_SOURCES,
+            **time_call(load, repeat, setup=config_cache.invalidate_compiled),
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    for name, result in results.items():
+        print(f"[bench] {name}: {result['medianMs']:.1f} ms", file=sys.stderr)
+    return results
+
+
+def check_startup_budget(results: Dict[str, Dict[str, Any]], budget_ms: float) -> Optional[Dict[str, Any]]:
+    current = results.get("import_morning_ranker")
+    if current is None:
+        return None
+    return {
+        "budgetMs": budget_ms,
+        "medianMs": current["medianMs"],
+        "lazyModulesLoaded": current["lazyModulesLoaded"],
+        "ok": current["medianMs"] <= budget_ms and not current["lazyModulesLoaded"],
+    }
+
+
+def bench_persistence(database_url: str, repeat: int, seed: int) -> Dict[str, Dict[str, Any]]:
+    """insert_recommendations for real buyer rows (FKs), rolled back after every sample."""
+    from ranker_repository import PostgresRepository
+
+    conn = mr.connect_db(database_url)
+    conn.autocommit = False
+    repo = PostgresRepository(conn)
+    results: Dict[str, Dict[str, Any]] = {}
+    try:
+        buyers = mr.fetch_buyers(conn, mr.DEFAULT_CROP, False, 5000)
+        if not buyers:
+            print("[bench] persistence skipped: no buyers in database", file=sys.stderr)
+            return results
+        latest, scraped = generate_observations(buyers, seed)
+        candidates = mr.score_candidates(
+            buyers, latest, scraped, FIXED_FUTURES_PRICE, FIXED_REGIONAL_BASIS, 36.0, None, reference=REFERENCE_TIME
+        )
+        candidates.sort(key=lambda c: c.composite_score, reverse=True)
+        for top_n in (30, len(candidates)):
+            ranked = candidates[:top_n]
+            state: Dict[str, Any] = {}
+
+            def setup() -> None:
+                conn.rollback()
+                state["run_id"] = mr.create_run(conn, mr.DEFAULT_CROP)
+
+            def insert() -> None:
+                mr.insert_recommendations(conn, state["run_id"], ranked)
+
+            results[f"insert_recommendations[{len(ranked)}]"] = {"n": len(ranked), **time_call(insert, repeat, setup)}
+            conn.rollback()
+
+            # An intraday rerun where one row in 20 moved, written as a delta against the first.
+            rerun = [
+                replace(item, cash_bid=(item.cash_bid or 0.0) + 0.01) if i % 20 == 0 else item
+                for i, item in enumerate(ranked)
+            ]
+
+            def setup_delta() -> None:
+                conn.rollback()
+                base_run_id = mr.create_run(conn, mr.DEFAULT_CROP)
+                mr.insert_recommendations(conn, base_run_id, ranked)
+                mr.set_run_recommendations(conn, base_run_id, len(ranked))
+                mr.finalize_run(conn, base_run_id, "success", [], {}, {})
+                state["run_id"] = mr.create_run(conn, mr.DEFAULT_CROP)
+
+            def insert_delta() -> None:
+                mr.persist_recommendations(repo, mr.DEFAULT_CROP, state["run_id"], rerun, True, 0.5)
+
+            results[f"persist_recommendations_delta[{len(ranked)}]"] = {
+                "n": len(ranked),
+                **time_call(insert_delta, repeat, setup_delta),
+            }
+            conn.rollback()
+    finally:
+        conn.rollback()
+        conn.close()
+    return results
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any], threshold_pct: float) -> List[Dict[str, Any]]:
+    regressions = []
+    base_results = baseline.get("results", {})
+    for name, current in results.items():
+        base = base_results.get(name)
+        if not base:
+            continue
+        cur_ms, base_ms = current["medianMs"], base["medianMs"]
+        if cur_ms - base_ms < NOISE_FLOOR_MS or base_ms <= 0:
+            continue
+        growth = (cur_ms - base_ms) * 100.0 / base_ms
+        if growth > threshold_pct:
+            regressions.append({"benchmark": name, "baselineMs": base_ms, "medianMs": cur_ms, "growthPct": round(growth, 1)})
+    return regressions
+
+
+def main() -> int:
+    args = parse_args()
+    suites = args.suite or ["ranking", "origins", "forward", "spatial", "history", "uncertainty", "extraction", "startup"] + (["persistence"] if args.database_url else [])
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+
+    results: Dict[str, Dict[str, Any]] = {}
+    if "ranking" in suites:
+        results.update(bench_ranking(sizes, args.repeat, args.seed))
+        for path in args.snapshot:
+            results.update(bench_ranking_snapshot(path, args.repeat))
+    if "origins" in suites:
+        results.update(bench_origins(args.origins, args.repeat, args.seed))
+    if "forward" in suites:
+        results.update(bench_forward(args.forward_shape, args.repeat, args.seed))
+    if "spatial" in suites:
+        results.update(bench_spatial(args.spatial_size, args.repeat, args.seed))
+    if "history" in suites:
+        results.update(bench_history(args.history_shape, args.repeat, args.seed))
+    if "uncertainty" in suites:
+        results.update(bench_uncertainty(args.uncertainty_shape, args.repeat, args.seed))
+    if "extraction" in suites:
+        results.update(bench_extraction(args.repeat))
+    if "startup" in suites:
+        results.update(bench_startup(args.repeat, args.seed))
+    if "persistence" in suites:
+        if not args.database_url:
+            print("--database-url is required for the persistence suite", file=sys.stderr)
+            return 2
+        results.update(bench_persistence(args.database_url, args.repeat, args.seed))
+
+    report: Dict[str, Any] = {
+        "version": RESULT_VERSION,
+        "createdAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+        },
+        "seed": args.seed,
+        "results": results,
+    }
+
+    regressions: List[Dict[str, Any]] = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("machine", {}).get("platform") != report["machine"]["platform"]:
+            print("[bench] baseline was recorded on a different platform; comparison is indicative only", file=sys.stderr)
+        regressions = compare(results, baseline, args.threshold_pct)
+        report["baseline"] = {"path": args.baseline, "createdAt": baseline.get("createdAt"), "thresholdPct": args.threshold_pct}
+    report["regressions"] = regressions
+    budget = check_startup_budget(results, args.import_budget_ms)
+    if budget is not None:
+        report["startupBudget"] = budget
+
+    payload = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(payload + "\n")
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            f.write(payload + "\n")
+        print(f"[bench] baseline written to {args.baseline}", file=sys.stderr)
+    print(payload)
+
+    for item in regressions:
+        print(
+            f"[bench] REGRESSION {item['benchmark']}: {item['baselineMs']:.2f} ms -> "
+            f"{item['medianMs']:.2f} ms (+{item['growthPct']}%)",
+            file=sys.stderr,
+        )
+    if budget is not None and not budget["ok"]:
+        print(
+            f"[bench] STARTUP BUDGET import morning_ranker: {budget['medianMs']:.1f} ms "
+            f"(budget {budget['budgetMs']:.0f} ms), lazy modules loaded: {budget['lazyModulesLoaded'] or 'none'}",
+            file=sys.stderr,
+        )
+    return 1 if regressions or (budget is not None and not budget["ok"]) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""Synthetic ranker inputs for the benchmarks.
+
+Buyers are laid out with the region/city table and jitter from
+`python/legacy/generate_buyers.py`, cloned and spread out until the requested count
+is reached. Everything is seeded, so a given (count, seed) always produces the same
+buyers and observations.
+
+`generate_origins` places origin elevators for the multi-origin benchmark;
+`generate_freight_quotes` prices every state and a share of buyer stations from lane
+rates; `SYNTHETIC_CORRIDOR` is a rough northern rail line for the spatial benchmark;
+`generate_usda_reports` writes MARS-shaped daily grain reports for the history suite;
+`generate_source_configs` writes a large bid_sources.json for the startup suite.
+Also renders
+the small hand-made PDFs used by the extraction corpus (`render_text_pdf`).
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import sys
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PYTHON_DIR = os.path.dirname(HERE)
+for path in (PYTHON_DIR, os.path.join(PYTHON_DIR, "legacy")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from generate_buyers import COORDS, FUTURES_PRICE, REGIONS  # noqa: E402
+from freight_rates import FreightQuotes  # noqa: E402
+from morning_ranker import DEFAULT_CROP, STATE_FREIGHT_ESTIMATE, UTC, BidObservation, BuyerRow  # noqa: E402
+from multi_origin import Origin  # noqa: E402
+from ranker_repository import seed_key  # noqa: E402,F401
+
+# generate_buyers.py spells this out in an if/elif chain.
+_STATE_BY_SUBREGION = {
+    "Nebraska": "NE",
+    "Iowa": "IA",
+    "Illinois": "IL",
+    "Minnesota": "MN",
+    "North Dakota": "ND",
+    "South Dakota": "SD",
+    "Ohio": "OH",
+    "Manitoba": "MB",
+    "Saskatchewan": "SK",
+}
+_STATE_BY_REGION = {"California": "CA", "Idaho": "ID", "Washington": "WA"}
+_CASH_ANCHOR = {"California": 6.02, "Idaho": 5.95, "Washington": 6.10}
+_VERIFIED = ["verified", "verified", "needs_review", "unverified", None]
+
+REFERENCE_TIME = datetime(2026, 3, 2, 12, 0, tzinfo=UTC)
+FIXED_FUTURES_PRICE = FUTURES_PRICE
+FIXED_REGIONAL_BASIS = {
+    "Texas": 0.85,
+    "Washington": 1.10,
+    "California": 1.45,
+    "Midwest": -0.25,
+    "Idaho": 0.95,
+    "PNW": 1.15,
+}
+
+
+def _layout() -> List[Tuple[str, str, str, Dict[str, str]]]:
+    out = []
+    for region_name, subregions in REGIONS.items():
+        for subregion_name, buyer_list in subregions.items():
+            state = _STATE_BY_REGION.get(region_name) or _STATE_BY_SUBREGION.get(subregion_name, "IA")
+            for buyer in buyer_list:
+                out.append((region_name, subregion_name, state, buyer))
+    return out
+
+
+def generate_buyers(count: int, seed: int = 7) -> List[BuyerRow]:
+    rng = random.Random(seed)
+    layout = _layout()
+    buyers: List[BuyerRow] = []
+    for i in range(count):
+        region_name, subregion_name, state, template = layout[i % len(layout)]
+        clone = i // len(layout)
+        base = COORDS.get(subregion_name, {"lat": 40.0, "lng": -100.0})
+        # Clones drift further out so large sets do not stack on the seed coordinates.
+        spread = 0.1 + min(clone, 50) * 0.05
+        lat = base["lat"] + (rng.random() - 0.5) * spread
+        lng = base["lng"] + (rng.random() - 0.5) * spread
+        name = template["name"] if clone == 0 else f"{template['name']} #{clone + 1}"
+        city = subregion_name
+        buyers.append(
+            BuyerRow(
+                id=str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                external_seed_key=seed_key(name, city, state, template["type"]),
+                name=name,
+                type=template["type"],
+                city=city,
+                state=state,
+                region=region_name,
+                lat=lat,
+                lng=lng,
+                crop_type=DEFAULT_CROP,
+                launch_scope="corridor",
+                rail_confidence=rng.choice([25, 40, 55, 70, 85, 95]),
+                verified_status=rng.choice(_VERIFIED),
+                facility_phone=f"555-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}",
+                website_url=None,
+                contact_role="Grain Desk",
+                created_at=REFERENCE_TIME - timedelta(days=rng.randint(30, 900)),
+            )
+        )
+    return buyers
+
+
+def _observation(rng: random.Random, buyer: BuyerRow, kind: str, max_age_hours: float) -> BidObservation:
+    anchor = _CASH_ANCHOR.get(buyer.region, 4.60)
+    cash = round(anchor + rng.random() * 0.20 - 0.10, 2)
+    return BidObservation(
+        buyer_id=buyer.id,
+        crop_type=buyer.crop_type,
+        source_kind=kind,
+        source_label="Synthetic bid",
+        source_url=f"https://bids.example.com/{buyer.id}",
+        observed_at=REFERENCE_TIME - timedelta(hours=rng.random() * max_age_hours),
+        cash_bid=cash,
+        basis=round(cash - FIXED_FUTURES_PRICE, 4) if rng.random() < 0.7 else None,
+        futures_price=FIXED_FUTURES_PRICE if rng.random() < 0.5 else None,
+        confidence_score=rng.randint(60, 99),
+        parsed_from_pdf=kind == "website_pdf",
+        raw_excerpt=f"Cash bid corn ${cash:.2f}",
+        raw_payload_json={"synthetic": True},
+    )
+
+
+def generate_observations(
+    buyers: Sequence[BuyerRow],
+    seed: int = 7,
+    latest_share: float = 0.8,
+    scraped_share: float = 0.2,
+) -> Tuple[Dict[str, BidObservation], Dict[str, BidObservation]]:
+    """(latest_obs, scraped_best_map) keyed by buyer id, like the ranker's inputs.
+
+    Latest observations go up to 72h old so some fall outside the default 36h window.
+    """
+    rng = random.Random(seed + 1)
+    latest: Dict[str, BidObservation] = {}
+    scraped: Dict[str, BidObservation] = {}
+    for buyer in buyers:
+        if rng.random() < latest_share:
+            latest[buyer.id] = _observation(rng, buyer, "manual", 72.0)
+        if rng.random() < scraped_share:
+            kind = "website_pdf" if rng.random() < 0.4 else "website_html"
+            scraped[buyer.id] = _observation(rng, buyer, kind, 6.0)
+    return latest, scraped
+
+
+# (lat, lng) waypoints, roughly Campbell MN -> Fargo -> Minot -> Havre -> Spokane -> Pasco -> Portland.
+SYNTHETIC_CORRIDOR = [
+    (46.10, -96.40),
+    (46.88, -96.79),
+    (48.23, -101.30),
+    (48.55, -109.68),
+    (47.66, -117.43),
+    (46.24, -119.10),
+    (45.52, -122.68),
+]
+
+
+def generate_freight_quotes(buyers: Sequence[BuyerRow], seed: int = 7, station_share: float = 0.2) -> FreightQuotes:
+    """Lane rates for every state plus station lanes for `station_share` of buyer cities."""
+    rng = random.Random(seed + 3)
+    by_state = {state: (round(rate * 0.95, 4), "SYN-STATE") for state, rate in STATE_FREIGHT_ESTIMATE.items()}
+    by_station = {}
+    for buyer in buyers:
+        if rng.random() < station_share:
+            base = STATE_FREIGHT_ESTIMATE.get(buyer.state.upper(), 0.56)
+            by_station[f"{buyer.city.upper()}, {buyer.state.upper()}"] = (round(base * rng.uniform(0.85, 1.05), 4), "SYN-STN")
+    return FreightQuotes("CAMPBELL, MN", "shuttle", REFERENCE_TIME.date(), by_station, by_state)
+
+
+def generate_origins(count: int, seed: int = 7) -> List[Origin]:
+    """Origin elevators scattered around the subregion centres buyers are laid out on."""
+    rng = random.Random(seed + 2)
+    centres = list(COORDS.items())
+    origins = []
+    for i in range(count):
+        name, base = centres[i % len(centres)]
+        origins.append(
+            Origin(
+                name=f"{name} origin {i + 1}",
+                lat=base["lat"] + (rng.random() - 0.5) * 2.0,
+                lng=base["lng"] + (rng.random() - 0.5) * 2.0,
+            )
+        )
+    return origins
+
+
+def generate_usda_reports(days: int, rows_per_day: int, seed: int = 7) -> List[List[Dict[str, object]]]:
+    """One MARS grain report per day (a "Report Detail" section) ending at REFERENCE_TIME."""
+    rng = random.Random(seed + 4)
+    states = ["TX", "CA", "WA", "OR", "ID", "IA", "IL", "NE", "MN", "SD", "ND", "KS"]
+    reports = []
+    for d in range(days):
+        day = (REFERENCE_TIME - timedelta(days=days - 1 - d)).strftime("%m/%d/%Y")
+        rows = []
+        for i in range(rows_per_day):
+            low = rng.randint(-60, 140)
+            rows.append(
+                {
+                    "report_date": day,
+                    "commodity": "Yellow Corn",
+                    "market_location_state": states[i % len(states)],
+                    "trade_loc": f"Terminal {i}",
+                    "basis Min": low,
+                    "basis Max": low + rng.randint(0, 15),
+                    "current": "Yes",
+                }
+            )
+        reports.append([{"reportSection": "Report Summary", "results": []}, {"reportSection": "Report Detail", "results": rows}])
+    return reports
+
+
+def generate_source_configs(count: int, seed: int = 7) -> Dict[str, object]:
+    """A bid_sources.json payload: `count` sources with the example file's pattern shapes."""
+    rng = random.Random(seed + 5)
+    sources = []
+    for i in range(count):
+        mode = rng.choice(["html", "html", "pdf", "html_to_pdf"])
+        # A distinct literal per source, so no two sources share a compiled pattern.
+        tag = f"(?i)(?:site{i})?"
+        source: Dict[str, object] = {
+            "buyer_external_seed_key": f"synthetic-buyer-{i}",
+            "crop_type": DEFAULT_CROP,
+            "mode": mode,
+            "url": f"https://bids.example.com/{i}",
+            "label": f"Synthetic source {i}",
+            "value_regex": tag + r"corn[^\n]{0,120}?\$?([0-9]+(?:\.[0-9]{1,4})?)",
+            "basis_regex": tag + r"basis[^\n]{0,40}?([+-]?[0-9]+(?:\.[0-9]{1,4})?)",
+            "confidence_score": rng.randint(70, 98),
+        }
+        if mode == "html":
+            source["text_selector"] = ".cash-bids"
+            source["delivery_basis_regex"] = {
+                "2026-12": tag + r"dec(?:ember)?\s*(?:'|20)?26[^\n]{0,60}?basis[^\n]{0,20}?([+-]?[0-9]+(?:\.[0-9]{1,4})?)",
+                "2027-03": tag + r"mar(?:ch)?\s*(?:'|20)?27[^\n]{0,60}?basis[^\n]{0,20}?([+-]?[0-9]+(?:\.[0-9]{1,4})?)",
+            }
+        if mode == "html_to_pdf":
+            source["pdf_link_regex"] = tag + r"(corn|grain).*(bid|price).*(pdf)$"
+        sources.append(source)
+    return {"sources": sources}
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def render_text_pdf(pages: Sequence[Sequence[str]], title: Optional[str] = None) -> bytes:
+    """Minimal uncompressed PDF 1.4: Helvetica text, one line per entry, letter pages."""
+    objects: List[bytes] = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    catalog = add(b"")  # filled once the page tree id is known
+    pages_id = add(b"")
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    page_ids = []
+    for lines in pages:
+        ops = ["BT", "/F1 10 Tf", "14 TL", "50 750 Td"]
+        if title:
+            ops.append(f"({_pdf_escape(title)}) Tj T*")
+        ops.extend(f"({_pdf_escape(line)}) Tj T*" for line in lines)
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1", errors="replace")
+        content_id = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        page_ids.append(
+            add(
+                b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] "
+                b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (pages_id, font_id, content_id)
+            )
+        )
+    objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id
+    kids = b" ".join(b"%d 0 R" % pid for pid in page_ids)
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % i + body + b"\nendobj\n"
+    xref_at = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for off in offsets:
+        out += b"%010d 00000 n \n" % off
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog, xref_at)
+    return bytes(out)
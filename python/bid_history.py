@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""Rolling-window bid history features per buyer, from an incrementally maintained cache.
+
+The ranker scores each buyer on its single latest observation. This module adds
+features from the last 30 days of `buyer_cash_bid_observations` (HISTORY_FEATURE_NAMES
+in morning_ranker):
+
+- basis_mean_7d / basis_mean_30d: mean posted basis (cash - futures when not posted)
+- bid_volatility_30d: standard deviation of the cash bid
+- bid_trend_30d: least-squares slope of the cash bid, dollars per day
+- posting_regularity_30d: share of the 30 days with at least one posting
+
+Each buyer keeps a ring buffer (`deque(maxlen=capacity)`) of (observed_at, cash_bid,
+basis), ordered by time; entries older than the window are evicted on append. The
+cache is saved as one JSON file with a watermark, the newest `created_at` loaded from
+the database:
+
+- cold (no file, another crop, or a watermark older than the window): one query for
+  the window, `observed_at >= reference - 30 days`
+- warm: only rows created after the watermark (minus WATERMARK_OVERLAP, so rows from
+  transactions that committed late are not missed; duplicates are dropped on append)
+
+Scraped observations are appended as they are extracted, so a run never re-reads
+history it already holds.
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import math
+import os
+import sys
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+from morning_ranker import DEFAULT_CROP, UTC, BidObservation
+
+DEFAULT_BID_HISTORY_DIR = os.environ.get(
+    "CORN_INTEL_BID_HISTORY_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "cornintel"),
+)
+CACHE_VERSION = 1
+WINDOW_DAYS = 30
+SHORT_WINDOW_DAYS = 7
+# 30 days of a source that posts morning and afternoon, with room for re-scrapes.
+DEFAULT_CAPACITY = 128
+WATERMARK_OVERLAP = timedelta(minutes=15)
+
+# (observed_at epoch seconds, cash_bid, basis); missing values are NaN so entries sort.
+Entry = Tuple[float, float, float]
+_NAN = float("nan")
+
+
+def _num(value: Any) -> float:
+    return _NAN if value is None else float(value)
+
+
+def _same(a: Entry, b: Entry) -> bool:
+    return all(x == y or (math.isnan(x) and math.isnan(y)) for x, y in zip(a, b))
+
+
+def default_cache_path(crop: str) -> str:
+    slug = "".join(ch if ch.isalnum() else "-" for ch in crop.lower()).strip("-")
+    return os.path.join(DEFAULT_BID_HISTORY_DIR, f"bid_history-{slug}.json")
+
+
+def fetch_history_rows(
+    conn,
+    crop: str,
+    observed_since: datetime,
+    created_after: Optional[datetime] = None,
+) -> List[Dict[str, Any]]:
+    """Window rows for the cache; with `created_after`, only rows inserted since (migration 009)."""
+    clauses = ["crop_type = %s", "observed_at >= %s", "quarantine_reasons IS NULL"]
+    params: List[Any] = [crop, observed_since]
+    if created_after is not None:
+        clauses.append("created_at > %s")
+        params.append(created_after)
+    sql = f"""
+        SELECT buyer_id, observed_at, cash_bid, basis, futures_price, created_at
+        FROM buyer_cash_bid_observations
+        WHERE {' AND '.join(clauses)}
+    """
+    with conn.cursor() as cur:
+        cur.execute(sql, params)
+        return cur.fetchall()
+
+
+class BidHistoryCache:
+    def __init__(self, crop: str = DEFAULT_CROP, capacity: int = DEFAULT_CAPACITY, window_days: int = WINDOW_DAYS):
+        self.crop = crop
+        self.capacity = max(2, capacity)
+        self.window = timedelta(days=window_days)
+        self.rings: Dict[str, Deque[Entry]] = {}
+        self.watermark: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+    # -- maintenance -------------------------------------------------------
+
+    def add(self, buyer_id: Any, observed_at: datetime, cash_bid: Optional[float], basis: Optional[float]) -> bool:
+        """Append one observation; False when it is a duplicate or too old to keep."""
+        entry: Entry = (observed_at.timestamp(), _num(cash_bid), _num(basis))
+        key = str(buyer_id)
+        with self._lock:
+            ring = self.rings.get(key)
+            if ring is None:
+                ring = self.rings[key] = deque(maxlen=self.capacity)
+            if not ring or entry[0] >= ring[-1][0]:
+                if ring and entry[0] == ring[-1][0] and any(_same(entry, e) for e in reversed(ring) if e[0] == entry[0]):
+                    return False
+                ring.append(entry)
+            else:
+                # Out of order (backfill, or the overlap re-read): insert in place.
+                idx = bisect.bisect_left(ring, (entry[0],))
+                j = idx
+                while j < len(ring) and ring[j][0] == entry[0]:
+                    if _same(ring[j], entry):
+                        return False
+                    j += 1
+                if len(ring) == ring.maxlen:
+                    if idx == 0:
+                        return False
+                    ring.popleft()
+                    idx -= 1
+                ring.insert(idx, entry)
+            horizon = ring[-1][0] - self.window.total_seconds()
+            while ring[0][0] < horizon:
+                ring.popleft()
+        return True
+
+    def add_observations(self, observations: Iterable[BidObservation]) -> int:
+        added = 0
+        for obs in observations:
+            if obs.crop_type != self.crop:
+                continue
+            basis = obs.basis
+            if basis is None and obs.cash_bid is not None and obs.futures_price is not None:
+                basis = obs.cash_bid - obs.futures_price
+            added += self.add(obs.buyer_id, obs.observed_at, obs.cash_bid, basis)
+        return added
+
+    def add_rows(self, rows: Iterable[Dict[str, Any]]) -> int:
+        added = 0
+        newest = self.watermark
+        for row in rows:
+            cash_bid = float(row["cash_bid"]) if row.get("cash_bid") is not None else None
+            basis = float(row["basis"]) if row.get("basis") is not None else None
+            if basis is None and cash_bid is not None and row.get("futures_price") is not None:
+                basis = cash_bid - float(row["futures_price"])
+            added += self.add(row["buyer_id"], row["observed_at"].astimezone(UTC), cash_bid, basis)
+            created = row.get("created_at") or row["observed_at"]
+            if newest is None or created > newest:
+                newest = created
+        self.watermark = newest
+        return added
+
+    def refresh(self, repo: Any, reference: datetime) -> Dict[str, Any]:
+        """Bring the cache up to date from the repository: the window when cold, else the tail."""
+        window_start = reference - self.window
+        cold = self.watermark is None or self.watermark < window_start
+        if cold:
+            with self._lock:
+                self.rings.clear()
+            self.watermark = None
+            rows = repo.fetch_bid_history(self.crop, window_start)
+        else:
+            rows = repo.fetch_bid_history(self.crop, window_start, self.watermark - WATERMARK_OVERLAP)
+        added = self.add_rows(rows)
+        return {
+            "mode": "window" if cold else "incremental",
+            "rowsRead": len(rows),
+            "entriesAdded": added,
+            "buyers": len(self.rings),
+            "watermark": self.watermark.isoformat() if self.watermark else None,
+        }
+
+    # -- features ----------------------------------------------------------
+
+    def features(self, buyer_id: Any, reference: datetime) -> Optional[Dict[str, float]]:
+        """Point-in-time features as of `reference`; None without postings in the window."""
+        ring = self.rings.get(str(buyer_id))
+        if not ring:
+            return None
+        ref = reference.timestamp()
+        start = ref - self.window.total_seconds()
+        short_start = ref - SHORT_WINDOW_DAYS * 86400.0
+        # One pass, newest first (the ring is time-ordered). Times are days before
+        # `reference`, which keeps the regression sums small.
+        n_bid = n_basis = n_basis_7 = 0
+        sum_t = sum_b = sum_tt = sum_bb = sum_tb = sum_basis = sum_basis_7 = 0.0
+        days = set()
+        with self._lock:
+            for ts, bid, basis in reversed(ring):
+                if ts <= start:
+                    break
+                if ts > ref:
+                    continue
+                days.add(int(ts // 86400))
+                if bid == bid:
+                    t = (ref - ts) / 86400.0
+                    n_bid += 1
+                    sum_t += t
+                    sum_b += bid
+                    sum_tt += t * t
+                    sum_bb += bid * bid
+                    sum_tb += t * bid
+                if basis == basis:
+                    n_basis += 1
+                    sum_basis += basis
+                    if ts > short_start:
+                        n_basis_7 += 1
+                        sum_basis_7 += basis
+        if not days:
+            return None
+
+        volatility = trend = 0.0
+        if n_bid >= 2:
+            mean_b = sum_b / n_bid
+            volatility = math.sqrt(max(0.0, sum_bb / n_bid - mean_b * mean_b))
+            sxx = sum_tt - sum_t * sum_t / n_bid
+            if sxx > 1e-12:
+                # Slope against days-before-reference is the negative of the trend over time.
+                trend = -(sum_tb - sum_t * sum_b / n_bid) / sxx
+        values = {
+            "bid_volatility_30d": round(volatility, 6),
+            "bid_trend_30d": round(trend, 6),
+            "posting_regularity_30d": round(min(1.0, len(days) / (self.window.total_seconds() / 86400.0)), 6),
+        }
+        # No basis in the window: leave the means out; resolve_candidates substitutes the state basis.
+        if n_basis:
+            values["basis_mean_30d"] = round(sum_basis / n_basis, 6)
+            values["basis_mean_7d"] = round(sum_basis_7 / n_basis_7, 6) if n_basis_7 else values["basis_mean_30d"]
+        return values
+
+    def features_for(self, buyer_ids: Iterable[Any], reference: datetime) -> Dict[str, Dict[str, float]]:
+        out: Dict[str, Dict[str, float]] = {}
+        for buyer_id in buyer_ids:
+            values = self.features(buyer_id, reference)
+            if values is not None:
+                out[str(buyer_id)] = values
+        return out
+
+    # -- persistence -------------------------------------------------------
+
+    def to_json(self) -> Dict[str, Any]:
+        with self._lock:
+            buyers = {
+                key: [[t, None if c != c else c, None if b != b else b] for t, c, b in ring]
+                for key, ring in self.rings.items()
+                if ring
+            }
+        return {
+            "version": CACHE_VERSION,
+            "crop": self.crop,
+            "capacity": self.capacity,
+            "windowDays": self.window.days,
+            "watermark": self.watermark.isoformat() if self.watermark else None,
+            "buyers": buyers,
+        }
+
+    @classmethod
+    def from_json(cls, payload: Dict[str, Any], crop: str, capacity: int = DEFAULT_CAPACITY) -> "BidHistoryCache":
+        cache = cls(crop, capacity)
+        if (
+            payload.get("version") != CACHE_VERSION
+            or payload.get("crop") != crop
+            or payload.get("capacity") != cache.capacity
+            or payload.get("windowDays") != cache.window.days
+        ):
+            return cache
+        for key, entries in (payload.get("buyers") or {}).items():
+            ring: Deque[Entry] = deque(maxlen=cache.capacity)
+            ring.extend((float(t), _num(c), _num(b)) for t, c, b in entries)
+            cache.rings[key] = ring
+        watermark = payload.get("watermark")
+        cache.watermark = datetime.fromisoformat(watermark) if watermark else None
+        return cache
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.to_json(), f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+
+def load_bid_history(path: str, crop: str, capacity: int = DEFAULT_CAPACITY) -> BidHistoryCache:
+    """The saved cache at `path`, or an empty (cold) one when it is missing or unusable."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+    except FileNotFoundError:
+        return BidHistoryCache(crop, capacity)
+    except (OSError, ValueError) as exc:
+        print(f"[bid-history] ignoring unreadable cache {path}: {exc}", file=sys.stderr)
+        return BidHistoryCache(crop, capacity)
+    return BidHistoryCache.from_json(payload, crop, capacity)
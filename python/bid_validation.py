@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""Batch validation of a run's scraped bids before they reach the ranking.
+
+`extract_bid_metrics` keeps any number in the plausible cash range, so a figure from the
+wrong line of a page (a deferred month, last week's bid, a freight rate) looks valid.
+After the scrape, `validate_observations` checks every new observation together and
+quarantines the suspicious ones with reasons:
+
+- futures_mismatch: the posted futures price is far from the run's futures price
+- basis_inconsistent: cash != futures + basis (tight with the source's own futures,
+  looser against the run's, which may be another contract month or time of day)
+- buyer_zscore: the implied basis is more than `z_threshold` standard deviations from
+  the buyer's own 90-day distribution (when it has MIN_SAMPLES postings)
+- state_zscore: the same against the state's distribution, for buyers without history
+- regional_basis: no history at all, and far from the USDA regional basis
+- batch_outlier: a robust (median/MAD) outlier among this run's bids in the same state
+
+Distributions are counts, means and sums of squared deviations of the implied basis
+(basis, or cash - futures), per buyer and per state. `load_distributions` reads them
+from a JSON cache and rebuilds them with one grouped query when the cache is older than
+the TTL. Accepted bids are folded in afterwards, so a check is a few dict lookups and
+some arithmetic per observation.
+
+Quarantined observations are still stored, with `quarantine_reasons` set (migration
+010), and are left out of the ranking, the latest-observation lookup and the
+distributions.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from morning_ranker import BidObservation, BuyerRow, basis_for_state
+
+DEFAULT_BID_DISTRIBUTION_DIR = os.environ.get(
+    "CORN_INTEL_BID_DISTRIBUTION_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "cornintel"),
+)
+CACHE_VERSION = 1
+DISTRIBUTION_WINDOW_DAYS = 90
+DISTRIBUTION_TTL_HOURS = 24.0
+DEFAULT_Z_THRESHOLD = 4.0
+# Fewer postings than this do not make a distribution.
+MIN_SAMPLES = 5
+# A buyer that always posts the same basis has sd 0; any move would be "infinite" z.
+MIN_STD = 0.05
+FUTURES_TOLERANCE = 0.75
+BASIS_TOLERANCE_OWN_FUTURES = 0.05
+BASIS_TOLERANCE_RUN_FUTURES = 0.35
+REGIONAL_TOLERANCE = 1.25
+BATCH_MIN_SIZE = 5
+BATCH_Z_THRESHOLD = 5.0
+BATCH_MIN_MAD = 0.03
+
+
+@dataclass
+class BasisStats:
+    """Welford running count / mean / sum of squared deviations."""
+
+    n: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+
+    def add(self, x: float) -> None:
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / self.n) if self.n else 0.0
+
+    def zscore(self, x: float) -> float:
+        return (x - self.mean) / max(self.std, MIN_STD)
+
+
+@dataclass
+class BidDistributions:
+    crop: str
+    built_at: datetime
+    by_buyer: Dict[str, BasisStats] = field(default_factory=dict)
+    by_state: Dict[str, BasisStats] = field(default_factory=dict)
+
+    def observe(self, buyer_id: Any, state: str, basis: float) -> None:
+        self.by_buyer.setdefault(str(buyer_id), BasisStats()).add(basis)
+        self.by_state.setdefault(state.upper(), BasisStats()).add(basis)
+
+    @classmethod
+    def from_rows(cls, crop: str, rows: Iterable[Dict[str, Any]], built_at: datetime) -> "BidDistributions":
+        out = cls(crop, built_at)
+        for row in rows:
+            stats = BasisStats(int(row["n"]), float(row["mean"]), float(row["m2"] or 0.0))
+            if row.get("buyer_id") is None:
+                out.by_state[str(row["state"]).upper()] = stats
+            else:
+                out.by_buyer[str(row["buyer_id"])] = stats
+        return out
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "version": CACHE_VERSION,
+            "crop": self.crop,
+            "builtAt": self.built_at.isoformat(),
+            "byBuyer": {k: [s.n, s.mean, s.m2] for k, s in self.by_buyer.items()},
+            "byState": {k: [s.n, s.mean, s.m2] for k, s in self.by_state.items()},
+        }
+
+    @classmethod
+    def from_json(cls, payload: Dict[str, Any]) -> "BidDistributions":
+        return cls(
+            crop=str(payload["crop"]),
+            built_at=datetime.fromisoformat(payload["builtAt"]),
+            by_buyer={k: BasisStats(int(n), float(m), float(m2)) for k, (n, m, m2) in payload["byBuyer"].items()},
+            by_state={k: BasisStats(int(n), float(m), float(m2)) for k, (n, m, m2) in payload["byState"].items()},
+        )
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.to_json(), f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+
+def fetch_distribution_rows(conn, crop: str, since: datetime) -> List[Dict[str, Any]]:
+    """Per-buyer and per-state (buyer_id NULL) implied-basis moments since `since`."""
+    sql = """
+        SELECT
+            b.state,
+            CASE WHEN GROUPING(o.buyer_id) = 0 THEN o.buyer_id::text END AS buyer_id,
+            COUNT(*) AS n,
+            AVG(o.x) AS mean,
+            COALESCE(VAR_POP(o.x), 0) * COUNT(*) AS m2
+        FROM (
+            SELECT buyer_id, COALESCE(basis, cash_bid - futures_price) AS x
+            FROM buyer_cash_bid_observations
+            WHERE crop_type = %s
+              AND observed_at >= %s
+              AND source_kind <> 'usda'
+              AND quarantine_reasons IS NULL
+        ) o
+        JOIN buyers b ON b.id = o.buyer_id
+        WHERE o.x IS NOT NULL
+        GROUP BY GROUPING SETS ((b.state, o.buyer_id), (b.state))
+    """
+    with conn.cursor() as cur:
+        cur.execute(sql, [crop, since])
+        return cur.fetchall()
+
+
+def default_cache_path(crop: str) -> str:
+    slug = "".join(ch if ch.isalnum() else "-" for ch in crop.lower()).strip("-")
+    return os.path.join(DEFAULT_BID_DISTRIBUTION_DIR, f"bid_distributions-{slug}.json")
+
+
+def load_distributions(
+    path: str,
+    crop: str,
+    repo: Any,
+    now: datetime,
+    ttl_hours: float = DISTRIBUTION_TTL_HOURS,
+) -> Tuple[BidDistributions, Dict[str, Any]]:
+    """Cached distributions, rebuilt from the repository when missing or older than the TTL."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+        if payload.get("version") == CACHE_VERSION and payload.get("crop") == crop:
+            cached = BidDistributions.from_json(payload)
+            age_h = (now - cached.built_at).total_seconds() / 3600.0
+            if 0 <= age_h < ttl_hours:
+                return cached, {"source": "cache", "ageHours": round(age_h, 2)}
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, KeyError, TypeError) as exc:
+        print(f"[validation] rebuilding unreadable distribution cache {path}: {exc}", file=sys.stderr)
+    rows = repo.fetch_bid_distributions(crop, now - timedelta(days=DISTRIBUTION_WINDOW_DAYS))
+    built = BidDistributions.from_rows(crop, rows, now)
+    built.save(path)
+    return built, {"source": "rebuilt", "rows": len(rows)}
+
+
+@dataclass
+class ValidationReport:
+    accepted: List[BidObservation]
+    quarantined: List[Tuple[BidObservation, List[str]]]
+    elapsed_ms: float
+
+    def to_json(self, buyers_by_id: Dict[str, BuyerRow]) -> Dict[str, Any]:
+        reasons: Dict[str, int] = {}
+        for _, found in self.quarantined:
+            for code in {r.split(" ", 1)[0] for r in found}:
+                reasons[code] = reasons.get(code, 0) + 1
+        checked = len(self.accepted) + len(self.quarantined)
+        return {
+            "checked": checked,
+            "quarantined": len(self.quarantined),
+            "reasons": reasons,
+            "usPerObservation": round(self.elapsed_ms * 1000.0 / checked, 2) if checked else None,
+            "sample": [
+                {
+                    "buyer": getattr(buyers_by_id.get(str(obs.buyer_id)), "name", str(obs.buyer_id)),
+                    "sourceUrl": obs.source_url,
+                    "cashBid": obs.cash_bid,
+                    "basis": obs.basis,
+                    "reasons": found,
+                }
+                for obs, found in self.quarantined[:10]
+            ],
+        }
+
+
+def implied_basis(obs: BidObservation, futures_price: Optional[float]) -> Optional[float]:
+    if obs.basis is not None:
+        return obs.basis
+    futures = obs.futures_price if obs.futures_price is not None else futures_price
+    if obs.cash_bid is None or futures is None:
+        return None
+    return obs.cash_bid - futures
+
+
+def _batch_outliers(items: List[Tuple[int, str, float]]) -> Dict[int, str]:
+    """Robust z against this run's other bids in the same state: {index: reason}."""
+    by_state: Dict[str, List[Tuple[int, float]]] = {}
+    for idx, state, x in items:
+        by_state.setdefault(state, []).append((idx, x))
+    out: Dict[int, str] = {}
+    for state, group in by_state.items():
+        if len(group) < BATCH_MIN_SIZE:
+            continue
+        values = [x for _, x in group]
+        median = statistics.median(values)
+        mad = max(statistics.median(abs(x - median) for x in values) * 1.4826, BATCH_MIN_MAD)
+        for idx, x in group:
+            z = (x - median) / mad
+            if abs(z) > BATCH_Z_THRESHOLD:
+                out[idx] = f"batch_outlier {z:+.1f} (basis {x:.2f}, {state} median {median:.2f})"
+    return out
+
+
+def validate_observations(
+    observations: List[BidObservation],
+    buyers_by_id: Dict[str, BuyerRow],
+    futures_price: Optional[float],
+    regional_basis: Dict[str, float],
+    distributions: Optional[BidDistributions],
+    z_threshold: float = DEFAULT_Z_THRESHOLD,
+) -> ValidationReport:
+    """Check `observations` as one batch; quarantined ones get `quarantine_reasons` set.
+
+    Pass `futures_price=None` when the run only has the fallback futures price: the
+    checks against it are skipped, and a bid posted without basis or futures is then
+    not checked at all.
+    """
+    started = time.perf_counter()
+    by_buyer = distributions.by_buyer if distributions is not None else {}
+    by_state = distributions.by_state if distributions is not None else {}
+    reasons: List[List[str]] = [[] for _ in observations]
+    batch: List[Tuple[int, str, float]] = []
+
+    for idx, obs in enumerate(observations):
+        if obs.cash_bid is None:
+            continue
+        found = reasons[idx]
+        buyer = buyers_by_id.get(str(obs.buyer_id))
+        state = buyer.state.upper() if buyer is not None else ""
+
+        if obs.futures_price is not None and futures_price is not None and abs(obs.futures_price - futures_price) > FUTURES_TOLERANCE:
+            found.append(f"futures_mismatch (posted {obs.futures_price:.2f}, run {futures_price:.2f})")
+        own = obs.futures_price is not None
+        if obs.basis is not None and (own or futures_price is not None):
+            expected = (obs.futures_price if own else futures_price) + obs.basis
+            tolerance = BASIS_TOLERANCE_OWN_FUTURES if own else BASIS_TOLERANCE_RUN_FUTURES
+            if abs(obs.cash_bid - expected) > tolerance:
+                found.append(f"basis_inconsistent (cash {obs.cash_bid:.2f}, futures + basis {expected:.2f})")
+
+        x = implied_basis(obs, futures_price)
+        if x is None:
+            continue
+        buyer_stats = by_buyer.get(str(obs.buyer_id))
+        state_stats = by_state.get(state)
+        if buyer_stats is not None and buyer_stats.n >= MIN_SAMPLES:
+            z = buyer_stats.zscore(x)
+            if abs(z) > z_threshold:
+                found.append(f"buyer_zscore {z:+.1f} (basis {x:.2f}, mean {buyer_stats.mean:.2f}, n {buyer_stats.n})")
+        elif state_stats is not None and state_stats.n >= MIN_SAMPLES:
+            z = state_stats.zscore(x)
+            if abs(z) > z_threshold:
+                found.append(f"state_zscore {z:+.1f} (basis {x:.2f}, {state} mean {state_stats.mean:.2f}, n {state_stats.n})")
+        elif state:
+            regional = basis_for_state(state, regional_basis)
+            if abs(x - regional) > REGIONAL_TOLERANCE:
+                found.append(f"regional_basis (basis {x:.2f}, regional {regional:.2f})")
+        if state:
+            batch.append((idx, state, x))
+
+    for idx, reason in _batch_outliers(batch).items():
+        reasons[idx].append(reason)
+
+    accepted: List[BidObservation] = []
+    quarantined: List[Tuple[BidObservation, List[str]]] = []
+    for obs, found in zip(observations, reasons):
+        if found:
+            obs.quarantine_reasons = found
+            quarantined.append((obs, found))
+        else:
+            accepted.append(obs)
+    return ValidationReport(accepted, quarantined, (time.perf_counter() - started) * 1000.0)
+
+
+def record_accepted(
+    distributions: BidDistributions,
+    accepted: Iterable[BidObservation],
+    buyers_by_id: Dict[str, BuyerRow],
+    futures_price: Optional[float],
+) -> int:
+    """Fold accepted bids into the cached distributions (until the next rebuild)."""
+    added = 0
+    for obs in accepted:
+        buyer = buyers_by_id.get(str(obs.buyer_id))
+        x = implied_basis(obs, futures_price)
+        if buyer is None or x is None or obs.source_kind == "usda":
+            continue
+        distributions.observe(obs.buyer_id, buyer.state, x)
+        added += 1
+    return added
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""mtime-keyed compiled forms of the ranker's config files.
+
+Every invocation of `morning_ranker.py` (the morning run, each intraday rerun, every
+`--dry-run` check) used to re-read `bid_sources.json`, re-compile and re-check every
+configured pattern (`validate_source_patterns`) and re-read the model file, even though
+those files change a few times a season. `load_compiled` keeps the compiled form:
+
+- in process: one entry per (kind, path, variant), reused while the file's
+  (st_mtime_ns, st_size) is unchanged, as freight_rates / usda_history do
+- on disk (`persist=True`): the compiled form as JSON under ~/.cache/cornintel/compiled,
+  so the next process skips the build too
+
+An entry is also keyed by a content hash of the code that compiles it: the module that
+defines `build` plus any `depends_on` modules (e.g. regex_guard for source patterns).
+A deploy that changes how a config is compiled (a new validation rule) rebuilds it,
+whatever the files' mtimes. Changes outside source files (an optional engine
+being installed, a rule table elsewhere) belong in `variant`. The compiled form must be
+JSON-serializable; callers turn it back into their objects.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sys
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from ranker_metrics import METRICS
+
+DEFAULT_COMPILED_CACHE_DIR = os.environ.get(
+    "CORN_INTEL_COMPILED_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "cornintel", "compiled"),
+)
+CACHE_VERSION = 2
+
+Version = Tuple[int, int]
+
+_CACHE: Dict[Tuple[str, str, str], Tuple[List[Any], Any]] = {}
+_CACHE_LOCK = threading.Lock()
+# Code files are hashed once per process; they do not change under a running ranker.
+_SOURCE_DIGESTS: Dict[str, str] = {}
+
+
+def file_version(path: str) -> Version:
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def source_digest(path: str) -> str:
+    path = os.path.abspath(path)
+    with _CACHE_LOCK:
+        digest = _SOURCE_DIGESTS.get(path)
+    if digest is None:
+        with open(path, "rb") as f:
+            digest = hashlib.sha1(f.read()).hexdigest()
+        with _CACHE_LOCK:
+            _SOURCE_DIGESTS[path] = digest
+    return digest
+
+
+def _versions(path: str, build: Callable[[Any], Any], depends_on: Sequence[str]) -> List[Any]:
+    """[[mtime_ns, size] of `path`, content hash of each code file]; JSON round-trips unchanged."""
+    versions: List[Any] = [list(file_version(path))]
+    code = getattr(build, "__code__", None)
+    code_files = ([code.co_filename] if code is not None else []) + list(depends_on)
+    for code_file in code_files:
+        if os.path.exists(code_file):
+            versions.append(source_digest(code_file))
+    return versions
+
+
+def compiled_cache_path(kind: str, path: str, variant: str = "", cache_dir: Optional[str] = None) -> str:
+    digest = hashlib.sha1(f"{os.path.abspath(path)}\0{variant}".encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir or DEFAULT_COMPILED_CACHE_DIR, f"{kind}-{digest}.json")
+
+
+def _read_disk(target: str, path: str, variant: str, versions: List[Any]) -> Optional[Dict[str, Any]]:
+    try:
+        with open(target, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (
+        not isinstance(payload, dict)
+        or payload.get("version") != CACHE_VERSION
+        or payload.get("path") != os.path.abspath(path)
+        or payload.get("variant") != variant
+        or payload.get("stamps") != versions
+    ):
+        return None
+    return payload
+
+
+def _write_disk(target: str, path: str, variant: str, versions: List[Any], compiled: Any) -> None:
+    payload = {
+        "version": CACHE_VERSION,
+        "path": os.path.abspath(path),
+        "variant": variant,
+        "stamps": versions,
+        "compiled": compiled,
+    }
+    try:
+        os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+        tmp = f"{target}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(payload, f, separators=(",", ":"))
+        os.replace(tmp, target)
+    except OSError as exc:
+        print(f"[config-cache] not saving {target}: {exc}", file=sys.stderr)
+
+
+def invalidate_compiled(path: Optional[str] = None) -> None:
+    """Drop in-process entries (for `path`, or all); disk entries are invalidated by their stamps."""
+    with _CACHE_LOCK:
+        for key in [k for k in _CACHE if path is None or k[1] == os.path.abspath(path)]:
+            _CACHE.pop(key, None)
+
+
+def load_compiled(
+    kind: str,
+    path: str,
+    build: Callable[[Any], Any],
+    variant: str = "",
+    persist: bool = False,
+    cache_dir: Optional[str] = None,
+    depends_on: Sequence[str] = (),
+) -> Any:
+    """`build(json.load(path))`, cached while `path`, `build`'s module and `depends_on` are unchanged.
+
+    Raises what `open` / `json.load` / `build` raise for a missing or invalid file; a
+    failed build is not cached.
+    """
+    versions = _versions(path, build, depends_on)
+    key = (kind, os.path.abspath(path), variant)
+    with _CACHE_LOCK:
+        cached = _CACHE.get(key)
+    if cached is not None and cached[0] == versions:
+        METRICS.incr("config_cache_lookups_total", kind=kind, result="memory")
+        return cached[1]
+
+    target = compiled_cache_path(kind, path, variant, cache_dir) if persist else None
+    stored = _read_disk(target, path, variant, versions) if target else None
+    if stored is not None:
+        compiled = stored["compiled"]
+        result = "disk"
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            compiled = build(json.load(f))
+        result = "build"
+        if target:
+            _write_disk(target, path, variant, versions, compiled)
+    with _CACHE_LOCK:
+        _CACHE[key] = (versions, compiled)
+    METRICS.incr("config_cache_lookups_total", kind=kind, result=result)
+    return compiled
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""Per-delivery-month call lists priced off a futures forward curve.
+
+The morning ranker prices every bid against one futures price, as if all grain moved
+spot. Buyers also bid for deferred delivery, each window priced against its own contract
+month (November and December delivery off December futures, January through March off
+March, ...). `rank_delivery_months` ranks the candidates from one `resolve_candidates`
+pass for every delivery month at once:
+
+    cash[m, b] = curve[contract(m)] + basis[m, b]
+    net[m, b]  = cash[m, b] - freight[b]
+
+`basis[m, b]` is the buyer's posted basis for month m when its bid sheet lists one
+(a source's `delivery_basis_regex`, kept in the observation's raw_payload_json as
+`deliveryBasis`). Otherwise it is the buyer's spot basis, i.e. a flat basis curve.
+`contract(m)` is the first contract on the curve expiring in or after month m.
+Freight, rail confidence, contact, freshness and source confidence do not depend on the
+delivery month. They are scored once. Cash, net, the ML score and the top states are
+computed for all months together as (months x candidates) arrays. Scoring and the
+top-N cut follow `apply_scores` / `compute_top_states_by_cash` / `select_rankings`.
+
+Curve file (`morning_ranker.py --forward-curve`), a JSON object keyed by contract,
+as YYYY-MM or CME symbol (ZCZ26), with prices in $/bu or cents:
+
+    {"source": "cme-settle", "contracts": {"ZCZ26": 4.52, "ZCH27": 4.66, "2027-05": 4.74}}
+
+A URL is fetched instead of read. With the USDA market context cache, the last good
+curve is served when the URL is down.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import re
+from dataclasses import dataclass, replace
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from morning_ranker import (
+    DEFAULT_WEIGHTED_SCORE,
+    RankedBuyer,
+    fetch_json,
+    freshness_score,
+    score_contact_verified,
+    source_confidence_norm,
+)
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover
+    np = None
+
+MONTH_CODES = {"F": 1, "G": 2, "H": 3, "J": 4, "K": 5, "M": 6, "N": 7, "Q": 8, "U": 9, "V": 10, "X": 11, "Z": 12}
+_SYMBOL = re.compile(r"^(?:ZC|C)?([FGHJKMNQUVXZ])(\d{1,2})$", re.I)
+_MONTH = re.compile(r"^(\d{4})-(\d{2})$")
+
+
+def parse_contract_month(key: str) -> str:
+    """'2026-12', 'ZCZ26', 'ZCZ6' or 'CZ26' -> '2026-12'."""
+    text = str(key).strip()
+    match = _MONTH.match(text)
+    if match and 1 <= int(match.group(2)) <= 12:
+        return text
+    match = _SYMBOL.match(text.replace(" ", ""))
+    if not match:
+        raise ValueError(f"unrecognised contract month {key!r}")
+    year = int(match.group(2))
+    # One-digit years are this decade's, as on exchange tickers.
+    year += 2020 if year < 10 else 2000
+    return f"{year:04d}-{MONTH_CODES[match.group(1).upper()]:02d}"
+
+
+def parse_curve_payload(payload: Any) -> Dict[str, float]:
+    """{contract month: $/bu} from a curve file or response."""
+    if isinstance(payload, dict):
+        rows = payload.get("contracts", payload.get("curve", payload))
+    else:
+        rows = payload
+    if isinstance(rows, list):
+        rows = {
+            str(r.get("contract") or r.get("month")): r.get("price", r.get("futuresPrice"))
+            for r in rows
+            if isinstance(r, dict)
+        }
+    if not isinstance(rows, dict):
+        raise ValueError("forward curve must map contract months to prices")
+    prices: Dict[str, float] = {}
+    for key, value in rows.items():
+        if key in ("source", "fetchedAt") or value is None:
+            continue
+        price = float(value)
+        # Same cents heuristic as futures_regex.
+        prices[parse_contract_month(key)] = price / 100.0 if price > 20 else price
+    if not prices:
+        raise ValueError("forward curve has no contracts")
+    return dict(sorted(prices.items()))
+
+
+@dataclass
+class ForwardCurve:
+    prices: Dict[str, float]
+    source: str
+
+    def contract_for(self, delivery_month: str) -> Optional[str]:
+        """The first contract in or after `delivery_month`; None past the end of the curve."""
+        for month in self.prices:
+            if month >= delivery_month:
+                return month
+        return None
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"source": self.source, "contracts": dict(self.prices)}
+
+    @classmethod
+    def from_json(cls, payload: Dict[str, Any]) -> "ForwardCurve":
+        return cls(prices=parse_curve_payload(payload), source=str(payload.get("source") or "snapshot"))
+
+
+def _fetch_curve(spec: str, timeout: float) -> Tuple[Dict[str, float], str]:
+    if spec.startswith(("http://", "https://")):
+        payload = fetch_json(spec, timeout)
+    else:
+        with open(spec, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+    source = str(payload.get("source") or spec) if isinstance(payload, dict) else spec
+    return parse_curve_payload(payload), source
+
+
+def load_forward_curve(spec: str, timeout: float, cache: Any = None) -> Tuple[ForwardCurve, Dict[str, Any]]:
+    """The curve at `spec` (file or URL), through `cache` (usda_cache.MarketContextCache) if given."""
+    if cache is None:
+        prices, source = _fetch_curve(spec, timeout)
+        return ForwardCurve(prices=prices, source=source), {"source": source}
+    value, meta = cache.resolve(f"forwardCurve:{spec}", lambda: _fetch_curve(spec, timeout))
+    if value is None:
+        raise RuntimeError(f"forward curve unavailable: {meta.get('error')}")
+    return ForwardCurve(prices=parse_curve_payload(value), source=str(meta.get("source"))), meta
+
+
+def parse_delivery_months(value: Optional[str], curve: ForwardCurve) -> List[str]:
+    """`--delivery-months` (comma-separated YYYY-MM or symbols); default every curve month."""
+    if not value:
+        return list(curve.prices)
+    return sorted({parse_contract_month(part) for part in value.split(",") if part.strip()})
+
+
+@dataclass
+class DeliveryRanking:
+    delivery_month: str
+    contract: str
+    futures_price: float
+    top_states: List[str]
+    ranked: List[RankedBuyer]
+    posted_basis_count: int
+
+    def to_json(self, limit: Optional[int] = None) -> Dict[str, Any]:
+        return {
+            "contract": self.contract,
+            "futuresPrice": self.futures_price,
+            "topStates": self.top_states,
+            "buyersWithPostedBasis": self.posted_basis_count,
+            "ranked": [
+                {
+                    "rank": i + 1,
+                    "buyerId": str(item.buyer.id),
+                    "buyer": item.buyer.name,
+                    "state": item.buyer.state,
+                    "cashBid": item.cash_bid,
+                    "basis": item.basis,
+                    "basisSource": item.rationale.get("basisSource"),
+                    "estimatedNetBid": item.estimated_net_bid,
+                    "score": round(item.composite_score, 4),
+                }
+                for i, item in enumerate(self.ranked[:limit] if limit else self.ranked)
+            ],
+        }
+
+
+def _min_max_rows(matrix):
+    lo = matrix.min(axis=1, keepdims=True)
+    hi = matrix.max(axis=1, keepdims=True)
+    # math.isclose's default test, which min_max_norm uses.
+    flat = np.abs(hi - lo) <= 1e-9 * np.maximum(np.abs(lo), np.abs(hi))
+    return np.where(flat, 0.5, (matrix - lo) / np.where(flat, 1.0, hi - lo))
+
+
+def _min_max(values):
+    lo, hi = values.min(), values.max()
+    if math.isclose(lo, hi):
+        return np.full_like(values, 0.5)
+    return (values - lo) / (hi - lo)
+
+
+def rank_delivery_months(
+    candidates: Sequence[RankedBuyer],
+    curve: ForwardCurve,
+    delivery_months: Sequence[str],
+    model_payload: Optional[Dict[str, Any]],
+    weights: Optional[Dict[str, float]] = None,
+    top_states_count: int = 3,
+    top_n: int = 30,
+) -> List[DeliveryRanking]:
+    """Top states and top-N per delivery month from resolved candidates (see `resolve_candidates`).
+
+    Months past the end of the curve are skipped.
+    """
+    if np is None:
+        raise RuntimeError("numpy is required for --forward-curve")
+    weights = weights or DEFAULT_WEIGHTED_SCORE
+    months = [(m, c) for m, c in ((m, curve.contract_for(m)) for m in delivery_months) if c is not None]
+    candidates = list(candidates)
+    if not candidates or not months:
+        return [DeliveryRanking(m, c, curve.prices[c], [], [], 0) for m, c in months]
+
+    futures = np.array([curve.prices[c] for _, c in months], dtype=np.float64)[:, None]
+    spot_basis = np.array(
+        [
+            c.basis if c.basis is not None else c.cash_bid - (c.futures_price or 0.0)
+            for c in candidates
+        ],
+        dtype=np.float64,
+    )
+    basis = np.repeat(spot_basis[None, :], len(months), axis=0)
+    posted = np.zeros(basis.shape, dtype=bool)
+    for b, c in enumerate(candidates):
+        if c.delivery_basis:
+            for row, (month, _) in enumerate(months):
+                value = c.delivery_basis.get(month)
+                if value is not None:
+                    basis[row, b] = float(value)
+                    posted[row, b] = True
+    freight = np.array([c.estimated_freight for c in candidates], dtype=np.float64)
+    cash = np.round(futures + basis, 4)
+    net = np.round(cash - freight, 4)
+
+    # Month-independent contributions, computed once (same terms as apply_scores).
+    rail = np.array([c.feature_values["rail_confidence"] for c in candidates])
+    rail_c = _min_max(rail) * weights["rail_confidence"]
+    contact_c = np.array([score_contact_verified(c.buyer.verified_status) for c in candidates]) * weights["contact_verified"]
+    fresh_c = np.array([freshness_score(c.bid_freshness_hours) for c in candidates]) * weights["bid_freshness"]
+    source_c = np.array([source_confidence_norm(c.source_confidence) for c in candidates]) * weights["source_confidence"]
+    cash_c = _min_max_rows(cash) * weights["cash_bid"]
+    net_c = _min_max_rows(net) * weights["estimated_net_bid"]
+    weighted = cash_c + net_c + rail_c + contact_c + fresh_c + source_c
+
+    composite = weighted
+    ml = None
+    if model_payload:
+        coeffs = model_payload.get("coefficients") or {}
+        total = np.full(cash.shape, float(model_payload.get("intercept") or 0.0))
+        for name in candidates[0].feature_values:
+            coef = coeffs.get(name)
+            if coef is None:
+                continue
+            if name == "cash_bid":
+                column = cash
+            elif name == "estimated_net_bid":
+                column = net
+            else:
+                column = np.array([c.feature_values[name] for c in candidates])
+            total = total + float(coef) * column
+        if str(model_payload.get("model_type", "")).startswith("logistic"):
+            with np.errstate(over="ignore"):
+                ml = 1.0 / (1.0 + np.exp(-total))
+        else:
+            ml = total
+        composite = weighted * 0.7 + _min_max_rows(ml) * 0.3
+
+    # compute_top_states_by_cash for every month: each state's top 3 by (cash, net).
+    by_state: Dict[str, List[int]] = {}
+    for idx, c in enumerate(candidates):
+        by_state.setdefault(c.buyer.state, []).append(idx)
+    state_index = {state: code for code, state in enumerate(by_state)}
+    state_codes = np.array([state_index[c.buyer.state] for c in candidates])
+    rows = np.arange(len(months))[:, None]
+    state_avgs = []
+    for state, idx in by_state.items():
+        idx = np.array(idx)
+        order = np.lexsort((net[:, idx], cash[:, idx]), axis=-1)[:, ::-1][:, :3]
+        top = idx[order]
+        state_avgs.append((state, cash[rows, top].mean(axis=1), net[rows, top].mean(axis=1), float(rail[idx].mean())))
+
+    out = []
+    k = max(1, top_n)
+    for row, (month, contract) in enumerate(months):
+        scored_states = sorted(
+            ((state, float(c_avg[row]), float(n_avg[row]), r_avg) for state, c_avg, n_avg, r_avg in state_avgs),
+            key=lambda x: (x[1], x[2], x[3]),
+            reverse=True,
+        )
+        top_states = [s for s, *_ in scored_states[: max(1, top_states_count)]]
+
+        allowed = np.isin(state_codes, [state_index[s] for s in top_states])
+        comp = np.where(allowed, composite[row], -np.inf)
+        if int(allowed.sum()) > k:
+            part = np.argpartition(-comp, k - 1)[:k]
+            pool = np.nonzero(comp >= comp[part].min())[0]  # keep ties at the cut
+        else:
+            pool = np.nonzero(allowed)[0]
+        pool = sorted(
+            pool,
+            key=lambda i: (comp[i], net[row, i], cash[row, i], candidates[i].buyer.rail_confidence or 0),
+            reverse=True,
+        )[:k]
+
+        ranked = []
+        for i in pool:
+            features = dict(candidates[i].feature_values)
+            features["cash_bid"] = float(cash[row, i])
+            features["estimated_net_bid"] = float(net[row, i])
+            item = replace(
+                candidates[i],
+                cash_bid=float(cash[row, i]),
+                basis=round(float(basis[row, i]), 4),
+                futures_price=float(futures[row, 0]),
+                estimated_net_bid=float(net[row, i]),
+                feature_values=features,
+                weighted_score=float(weighted[row, i]),
+                ml_score=float(ml[row, i]) if ml is not None else None,
+                composite_score=float(composite[row, i]),
+            )
+            contributions = {
+                "cash_bid": cash_c[row, i],
+                "estimated_net_bid": net_c[row, i],
+                "rail_confidence": rail_c[i],
+                "contact_verified": contact_c[i],
+                "bid_freshness": fresh_c[i],
+                "source_confidence": source_c[i],
+            }
+            item.rationale = {
+                **candidates[i].rationale,
+                "contributions": {name: round(float(v), 4) for name, v in contributions.items()},
+                "rawFeatures": {name: round(v, 4) for name, v in features.items()},
+                "weightedScore": round(item.weighted_score, 4),
+                "mlScore": round(item.ml_score, 6) if item.ml_score is not None else None,
+                "compositeScore": round(item.composite_score, 4),
+                "deliveryMonth": month,
+                "contract": contract,
+                "basisSource": "posted" if posted[row, i] else "spot",
+            }
+            ranked.append(item)
+        out.append(
+            DeliveryRanking(
+                delivery_month=month,
+                contract=contract,
+                futures_price=float(futures[row, 0]),
+                top_states=top_states,
+                ranked=ranked,
+                posted_basis_count=int(posted[row].sum()),
+            )
+        )
+    return out
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""Lane-level freight rates (tariff and shuttle) for the morning ranker.
+
+`estimate_freight` prices every buyer from a per-state constant. This module loads
+lane rates instead: one row per (origin station, destination, car type, effective date),
+where the destination is a state code (`CA`) or a station (`FRESNO, CA`). Sources:
+
+- CSV (`--freight-rates rates.csv`, see `freight_rates.example.csv`)
+- the repository (`--freight-rates db`): Postgres `freight_lane_rates` (migration 008),
+  loaded with `python freight_rates.py load --csv rates.csv`
+
+Lookups:
+- `FreightRateTable` indexes lanes by (origin, car type) -> destination -> versions
+  sorted by effective date; resolving a date is a bisect per lane.
+- `FreightRateTable.quotes(origin, car_type, on)` resolves every lane once for that date
+  into a `FreightQuotes` of plain dicts (memoized per table). The ranker's per-buyer loop
+  then does one or two dict lookups: station first, then state, else `estimate_freight`.
+
+Caching and invalidation: `load_freight_rates` keeps one table per source in-process,
+keyed by a version token -- (mtime, size) for a CSV, (row count, max(loaded_at)) for
+Postgres. Loading new tariffs changes the token, so the next call rebuilds the table
+and its memoized quotes. `invalidate_freight_rates()` drops the cache outright.
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import csv
+import os
+import sys
+import threading
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_CAR_TYPE = "shuttle"
+DEFAULT_ORIGIN_STATION = "CAMPBELL, MN"
+# Covered hopper capacity, for tariffs quoted per car.
+DEFAULT_BUSHELS_PER_CAR = 3500.0
+DB_SOURCE = "db"
+
+
+def normalize_station(value: str) -> str:
+    return " ".join(str(value).upper().replace(",", ", ").split()).replace(" ,", ",")
+
+
+@dataclass(frozen=True)
+class FreightLane:
+    origin_station: str
+    destination: str
+    destination_type: str  # state | station
+    car_type: str
+    rate_per_bushel: float
+    effective_date: date
+    expiration_date: Optional[date] = None
+    tariff_ref: Optional[str] = None
+
+
+@dataclass
+class FreightQuotes:
+    """Rates in force on one date from one origin for one car type."""
+
+    origin_station: str
+    car_type: str
+    on: date
+    by_station: Dict[str, Tuple[float, Optional[str]]]
+    by_state: Dict[str, Tuple[float, Optional[str]]]
+
+    def lookup(self, city: str, state: str) -> Optional[Tuple[float, str]]:
+        """(rate per bushel, freight source label) or None when no lane covers the buyer."""
+        st = state.upper()
+        hit = self.by_station.get(f"{city.upper()}, {st}") if self.by_station else None
+        if hit is not None:
+            return hit[0], f"lane:{hit[1] or 'station'}"
+        hit = self.by_state.get(st)
+        if hit is not None:
+            return hit[0], f"lane:{hit[1] or 'state'}"
+        return None
+
+    def __len__(self) -> int:
+        return len(self.by_station) + len(self.by_state)
+
+    def to_json(self) -> Dict[str, Any]:
+        """Resolved rates, for run snapshots and the input fingerprint."""
+        return {
+            "originStation": self.origin_station,
+            "carType": self.car_type,
+            "on": self.on.isoformat(),
+            "byStation": {k: list(v) for k, v in sorted(self.by_station.items())},
+            "byState": {k: list(v) for k, v in sorted(self.by_state.items())},
+        }
+
+    @classmethod
+    def from_json(cls, payload: Dict[str, Any]) -> "FreightQuotes":
+        return cls(
+            origin_station=payload["originStation"],
+            car_type=payload["carType"],
+            on=date.fromisoformat(payload["on"]),
+            by_station={k: (float(v[0]), v[1]) for k, v in payload.get("byStation", {}).items()},
+            by_state={k: (float(v[0]), v[1]) for k, v in payload.get("byState", {}).items()},
+        )
+
+
+class FreightRateTable:
+    def __init__(self, lanes: Iterable[FreightLane], version: Any = None):
+        self.version = version
+        self.lane_count = 0
+        # (origin, car_type) -> (destination_type, destination) -> sorted [(effective, expiration, rate, ref)]
+        self._index: Dict[Tuple[str, str], Dict[Tuple[str, str], List[Tuple[date, Optional[date], float, Optional[str]]]]] = {}
+        for lane in lanes:
+            key = (normalize_station(lane.origin_station), lane.car_type.lower())
+            dest = (lane.destination_type, normalize_station(lane.destination))
+            self._index.setdefault(key, {}).setdefault(dest, []).append(
+                (lane.effective_date, lane.expiration_date, float(lane.rate_per_bushel), lane.tariff_ref)
+            )
+            self.lane_count += 1
+        for destinations in self._index.values():
+            for versions in destinations.values():
+                versions.sort(key=lambda v: v[0])
+        self._quotes: Dict[Tuple[str, str, date], FreightQuotes] = {}
+        self._lock = threading.Lock()
+
+    def origins(self) -> List[str]:
+        return sorted({origin for origin, _ in self._index})
+
+    def quotes(self, origin_station: str, car_type: str, on: date) -> FreightQuotes:
+        key = (normalize_station(origin_station), car_type.lower(), on)
+        with self._lock:
+            cached = self._quotes.get(key)
+        if cached is not None:
+            return cached
+        by_station: Dict[str, Tuple[float, Optional[str]]] = {}
+        by_state: Dict[str, Tuple[float, Optional[str]]] = {}
+        for (dest_type, dest), versions in self._index.get(key[:2], {}).items():
+            # Latest version effective on or before `on` that has not expired.
+            pos = bisect.bisect_right([v[0] for v in versions], on) - 1
+            if pos < 0:
+                continue
+            _, expires, rate, ref = versions[pos]
+            if expires is not None and on > expires:
+                continue
+            (by_station if dest_type == "station" else by_state)[dest] = (rate, ref)
+        quotes = FreightQuotes(key[0], key[1], on, by_station, by_state)
+        with self._lock:
+            self._quotes[key] = quotes
+        return quotes
+
+
+def _parse_date(value: Optional[str]) -> Optional[date]:
+    value = (value or "").strip()
+    return date.fromisoformat(value) if value else None
+
+
+def read_lanes_csv(path: str) -> List[FreightLane]:
+    """Columns: origin_station, destination, destination_type (state|station, default by
+    shape), car_type, rate_per_bushel or rate_per_car [+ bushels_per_car], effective_date,
+    expiration_date, tariff_ref."""
+    lanes: List[FreightLane] = []
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for line_no, row in enumerate(csv.DictReader(f), start=2):
+            try:
+                destination = row["destination"].strip()
+                dest_type = (row.get("destination_type") or "").strip().lower() or (
+                    "state" if len(destination) == 2 else "station"
+                )
+                if dest_type not in {"state", "station"}:
+                    raise ValueError(f"destination_type must be state or station, got {dest_type!r}")
+                if (row.get("rate_per_bushel") or "").strip():
+                    rate = float(row["rate_per_bushel"])
+                else:
+                    rate = float(row["rate_per_car"]) / float(row.get("bushels_per_car") or DEFAULT_BUSHELS_PER_CAR)
+                effective = _parse_date(row.get("effective_date"))
+                if effective is None:
+                    raise ValueError("effective_date is required")
+                lanes.append(
+                    FreightLane(
+                        origin_station=row["origin_station"],
+                        destination=destination,
+                        destination_type=dest_type,
+                        car_type=(row.get("car_type") or DEFAULT_CAR_TYPE).strip(),
+                        rate_per_bushel=round(rate, 4),
+                        effective_date=effective,
+                        expiration_date=_parse_date(row.get("expiration_date")),
+                        tariff_ref=(row.get("tariff_ref") or "").strip() or None,
+                    )
+                )
+            except (KeyError, ValueError) as exc:
+                raise ValueError(f"{path}:{line_no}: {exc}") from exc
+    return lanes
+
+
+def fetch_lanes(conn) -> List[FreightLane]:
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT origin_station, destination, destination_type, car_type,
+                   rate_per_bushel, effective_date, expiration_date, tariff_ref
+            FROM freight_lane_rates
+            """
+        )
+        rows = cur.fetchall()
+    return [
+        FreightLane(
+            origin_station=row["origin_station"],
+            destination=row["destination"],
+            destination_type=row["destination_type"],
+            car_type=row["car_type"],
+            rate_per_bushel=float(row["rate_per_bushel"]),
+            effective_date=row["effective_date"],
+            expiration_date=row.get("expiration_date"),
+            tariff_ref=row.get("tariff_ref"),
+        )
+        for row in rows
+    ]
+
+
+def fetch_lanes_version(conn) -> Tuple[int, Optional[str]]:
+    with conn.cursor() as cur:
+        cur.execute("SELECT COUNT(*) AS n, MAX(loaded_at) AS loaded_at FROM freight_lane_rates")
+        row = cur.fetchone()
+    return int(row["n"]), str(row["loaded_at"]) if row["loaded_at"] is not None else None
+
+
+def upsert_lanes(conn, lanes: List[FreightLane]) -> int:
+    with conn.cursor() as cur:
+        cur.executemany(
+            """
+            INSERT INTO freight_lane_rates (
+                origin_station, destination, destination_type, car_type,
+                rate_per_bushel, effective_date, expiration_date, tariff_ref
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT (origin_station, destination_type, destination, car_type, effective_date)
+            DO UPDATE SET
+                rate_per_bushel = EXCLUDED.rate_per_bushel,
+                expiration_date = EXCLUDED.expiration_date,
+                tariff_ref = EXCLUDED.tariff_ref,
+                loaded_at = NOW()
+            """,
+            [
+                [
+                    normalize_station(lane.origin_station),
+                    normalize_station(lane.destination),
+                    lane.destination_type,
+                    lane.car_type.lower(),
+                    lane.rate_per_bushel,
+                    lane.effective_date,
+                    lane.expiration_date,
+                    lane.tariff_ref,
+                ]
+                for lane in lanes
+            ],
+        )
+    return len(lanes)
+
+
+_CACHE: Dict[str, FreightRateTable] = {}
+_CACHE_LOCK = threading.Lock()
+
+
+def invalidate_freight_rates(source: Optional[str] = None) -> None:
+    with _CACHE_LOCK:
+        if source is None:
+            _CACHE.clear()
+        else:
+            _CACHE.pop(source, None)
+
+
+def load_freight_rates(source: str, repo: Any = None) -> FreightRateTable:
+    """Cached table for a CSV path or `db` (read through `repo`); rebuilt when the source changes."""
+    if source == DB_SOURCE:
+        if repo is None:
+            raise RuntimeError("--freight-rates db needs a repository")
+        version: Any = repo.freight_lanes_version()
+    else:
+        stat = os.stat(source)
+        version = (stat.st_mtime_ns, stat.st_size)
+    with _CACHE_LOCK:
+        cached = _CACHE.get(source)
+    if cached is not None and cached.version == version:
+        return cached
+    lanes = repo.fetch_freight_lanes() if source == DB_SOURCE else read_lanes_csv(source)
+    table = FreightRateTable(lanes, version)
+    with _CACHE_LOCK:
+        _CACHE[source] = table
+    return table
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Freight lane rate tables")
+    sub = parser.add_subparsers(dest="command", required=True)
+    load = sub.add_parser("load", help="Upsert a lane CSV into freight_lane_rates")
+    load.add_argument("--csv", required=True)
+    load.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    show = sub.add_parser("quotes", help="Print the rates in force for an origin on a date")
+    show.add_argument("--source", required=True, help="CSV path, or 'db'")
+    show.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    show.add_argument("--origin", default=DEFAULT_ORIGIN_STATION)
+    show.add_argument("--car-type", default=DEFAULT_CAR_TYPE)
+    show.add_argument("--date", type=date.fromisoformat, default=date.today())
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    repo = None
+    if args.command == "load" or args.source == DB_SOURCE:
+        if not args.database_url:
+            print("DATABASE_URL is required", file=sys.stderr)
+            return 2
+        from ranker_repository import PostgresRepository
+
+        repo = PostgresRepository.connect(args.database_url)
+    try:
+        if args.command == "load":
+            lanes = read_lanes_csv(args.csv)
+            count = upsert_lanes(repo.conn, lanes)
+            repo.commit()
+            print(f"[freight] upserted {count} lanes from {args.csv}", file=sys.stderr)
+            return 0
+        quotes = load_freight_rates(args.source, repo).quotes(args.origin, args.car_type, args.date)
+        for dest, (rate, ref) in sorted({**quotes.by_state, **quotes.by_station}.items()):
+            print(f"{dest:<24} {rate:>8.4f}  {ref or ''}")
+        return 0
+    finally:
+        if repo is not None:
+            repo.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
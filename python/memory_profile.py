@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""`tracemalloc` memory profile of a `morning_ranker.py` run (`--profile-memory`).
+
+Hooks into the `ranker_metrics` stage spans, so every stage the ranker already times
+(fetch_buyers, scrape, scrape.parse, ranking, persist, ...) also gets:
+
+- peakBytes: the largest traced-memory high-water mark reached inside one call,
+  measured from the allocation level at stage entry
+- retainedBytes: memory still allocated when the stage returns (summed over calls)
+- topRetained: for top-level stages, the call sites (file:line) holding that memory,
+  e.g. the `RankedBuyer` list and rationale dicts after `ranking`
+
+Stages that run with a `format`/`mode` attribute are keyed separately, so pypdf page
+extraction shows up as `scrape.parse[pdf]` and BeautifulSoup trees as
+`scrape.parse[html]`. tracemalloc cannot attribute a transient peak to a call site;
+split the stage if a peak needs narrowing down.
+
+The report is plain JSON with sites relative to the repo / site-packages, so two runs
+diff cleanly; `compare_reports` flags stages whose peak grew past a threshold.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+REPORT_VERSION = 1
+STAGE_KEY_ATTRIBUTES = ("format", "mode")
+# Ignore growth on stages that stay tiny; a 40% jump on 200 KiB is noise.
+REGRESSION_MIN_BYTES = 1024 * 1024
+
+
+@dataclass
+class _Frame:
+    key: str
+    start_current: int
+    peak: int
+    snapshot: Optional[tracemalloc.Snapshot] = None
+
+
+@dataclass
+class _StageStats:
+    calls: int = 0
+    peak_bytes: int = 0
+    retained_bytes: int = 0
+    top_retained: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def stage_key(name: str, attributes: Dict[str, Any]) -> str:
+    for attr in STAGE_KEY_ATTRIBUTES:
+        if attributes.get(attr):
+            return f"{name}[{attributes[attr]}]"
+    return name
+
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_STDLIB = os.path.dirname(os.__file__)
+
+
+def _site(frame: tracemalloc.Frame) -> str:
+    # Strip machine-specific prefixes so reports from different hosts line up.
+    path = frame.filename
+    marker = f"site-packages{os.sep}"
+    if marker in path:
+        path = path.split(marker, 1)[1]
+    elif path.startswith(_REPO_ROOT + os.sep):
+        path = os.path.relpath(path, _REPO_ROOT)
+    elif path.startswith(_STDLIB + os.sep):
+        path = os.path.join("<stdlib>", os.path.relpath(path, _STDLIB))
+    return f"{path}:{frame.lineno}"
+
+
+class StageMemoryProfiler:
+    """Stage listener for `ranker_metrics.METRICS`. Assumes stages do not overlap.
+
+    tracemalloc is process-wide, so `morning_ranker` runs its stage graph on a single
+    worker while profiling; concurrent stages would blur into each other's peaks.
+    """
+
+    def __init__(self, top_sites: int = 10, traceback_frames: int = 1):
+        self.top_sites = top_sites
+        self.traceback_frames = traceback_frames
+        self._lock = threading.Lock()
+        self._stack: List[_Frame] = []
+        self._stats: Dict[str, _StageStats] = {}
+        self._started_at = 0.0
+        self._overall_peak = 0
+        self._filters = (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        )
+
+    def start(self) -> None:
+        from ranker_metrics import METRICS
+
+        self._started_at = time.time()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.traceback_frames)
+        tracemalloc.reset_peak()
+        METRICS.listeners.append(self)
+
+    def stop(self) -> None:
+        from ranker_metrics import METRICS
+
+        if self in METRICS.listeners:
+            METRICS.listeners.remove(self)
+        _, peak = tracemalloc.get_traced_memory()
+        self._overall_peak = max(self._overall_peak, peak)
+        tracemalloc.stop()
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(self._filters)
+
+    def on_stage_enter(self, name: str, attributes: Dict[str, Any]) -> None:
+        with self._lock:
+            _, peak = tracemalloc.get_traced_memory()
+            self._overall_peak = max(self._overall_peak, peak)
+            if self._stack:
+                # Fold the parent's high-water mark so far in before resetting it for the child.
+                self._stack[-1].peak = max(self._stack[-1].peak, peak)
+            # The snapshot itself is traced; take it before measuring the stage's baseline.
+            snapshot = None if self._stack else self._snapshot()
+            tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            self._stack.append(_Frame(stage_key(name, attributes), current, current, snapshot))
+
+    def on_stage_exit(self, name: str, attributes: Dict[str, Any]) -> None:
+        with self._lock:
+            if not self._stack:
+                return
+            frame = self._stack.pop()
+            current, peak = tracemalloc.get_traced_memory()
+            self._overall_peak = max(self._overall_peak, peak)
+            frame.peak = max(frame.peak, peak)
+            if self._stack:
+                self._stack[-1].peak = max(self._stack[-1].peak, frame.peak)
+
+            stats = self._stats.setdefault(frame.key, _StageStats())
+            stats.calls += 1
+            stats.retained_bytes += current - frame.start_current
+            stage_peak = frame.peak - frame.start_current
+            if frame.snapshot is not None and stage_peak >= stats.peak_bytes:
+                stats.top_retained = self._top_retained(frame.snapshot)
+            if frame.snapshot is not None:
+                # Keep the snapshots' own allocations out of the next stage's peak.
+                tracemalloc.reset_peak()
+            stats.peak_bytes = max(stats.peak_bytes, stage_peak)
+
+    def _top_retained(self, before: tracemalloc.Snapshot) -> List[Dict[str, Any]]:
+        diff = self._snapshot().compare_to(before, "lineno")
+        out = []
+        for stat in diff[: self.top_sites]:
+            if stat.size_diff <= 0:
+                break
+            out.append({
+                "site": _site(stat.traceback[0]),
+                "sizeBytes": stat.size_diff,
+                "count": stat.count_diff,
+            })
+        return out
+
+    def report(self, labels: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        with self._lock:
+            stages = {
+                key: {
+                    "calls": s.calls,
+                    "peakBytes": s.peak_bytes,
+                    "retainedBytes": s.retained_bytes,
+                    "topRetained": s.top_retained,
+                }
+                for key, s in sorted(self._stats.items())
+            }
+        return {
+            "version": REPORT_VERSION,
+            "startedAt": self._started_at,
+            "labels": labels or {},
+            "overallPeakBytes": self._overall_peak,
+            "stages": stages,
+        }
+
+
+def compare_reports(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold_pct: float,
+    min_bytes: int = REGRESSION_MIN_BYTES,
+) -> List[Dict[str, Any]]:
+    """Stages whose peak grew more than `threshold_pct` over the baseline report."""
+    regressions = []
+    base_stages = baseline.get("stages", {})
+    for key, stage in current.get("stages", {}).items():
+        base = base_stages.get(key)
+        peak = int(stage.get("peakBytes") or 0)
+        if base is None or peak < min_bytes:
+            continue
+        base_peak = max(int(base.get("peakBytes") or 0), 1)
+        growth = (peak - base_peak) * 100.0 / base_peak
+        if growth > threshold_pct:
+            regressions.append({
+                "stage": key,
+                "baselinePeakBytes": base_peak,
+                "peakBytes": peak,
+                "growthPct": round(growth, 1),
+            })
+    return regressions
+
+
+def write_report(path: str, report: Dict[str, Any]) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load_report(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def print_report(report: Dict[str, Any], stream=sys.stderr) -> None:
+    print(f"[memory] overall peak {report['overallPeakBytes'] / 1e6:.1f} MB", file=stream)
+    for key, stage in sorted(report["stages"].items(), key=lambda kv: -kv[1]["peakBytes"]):
+        print(
+            f"[memory] {key:<32} calls={stage['calls']:<4} "
+            f"peak={stage['peakBytes'] / 1e6:8.2f} MB retained={stage['retainedBytes'] / 1e6:8.2f} MB",
+            file=stream,
+        )
+    for item in report.get("regressions", []):
+        print(
+            f"[memory] REGRESSION {item['stage']}: peak {item['baselinePeakBytes'] / 1e6:.2f} MB -> "
+            f"{item['peakBytes'] / 1e6:.2f} MB (+{item['growthPct']}%)",
+            file=stream,
+        )
@@ -14,23 +14,28 @@ Optional ML coefficients can be loaded to guide the final ranking blend.
 from __future__ import annotations
 
 import argparse
+import hashlib
 import io
 import json
 import math
 import os
 import re
 import sys
-from dataclasses import dataclass
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from functools import lru_cache, partial
 from datetime import date, datetime, timezone
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from urllib.parse import urljoin, quote
 
-try:
-    import psycopg  # type: ignore
-    from psycopg.rows import dict_row  # type: ignore
-except Exception:  # pragma: no cover
-    psycopg = None
-    dict_row = None
+from ranker_metrics import METRICS
+from regex_guard import REGEX_GUARD
+
+# Optional dependencies (psycopg, requests, bs4, pypdf) are imported by the require_*
+# helpers on the paths that need them, so a memory-backend dry run or a reused intraday
+# rerun does not pay for them. `run_benchmarks.py --suite startup` checks the import budget.
 
 
 DEFAULT_API_BASE_URL = os.environ.get("CORN_INTEL_API_BASE_URL", "http://localhost:3000")
@@ -101,6 +106,7 @@ GENERIC_CASH_PATTERNS = [
     r"(?i)(yellow\s+corn)[^\n\r]{0,120}?\$?([0-9]+(?:\.[0-9]{1,4})?)",
 ]
 GENERIC_BASIS_PATTERN = r"(?i)basis[^\n\r]{0,80}?([+-]?[0-9]+(?:\.[0-9]{1,4})?)"
+REGEX_GUARD.trust(*GENERIC_CASH_PATTERNS, GENERIC_BASIS_PATTERN)
 
 
 @dataclass
@@ -121,6 +127,8 @@ class BuyerRow:
     facility_phone: Optional[str]
     website_url: Optional[str]
     contact_role: Optional[str]
+    created_at: Optional[datetime] = None
+    row_version: Optional[datetime] = None
 
 
 @dataclass
@@ -136,6 +144,8 @@ class SourceConfig:
     basis_regex: Optional[str] = None
     futures_regex: Optional[str] = None
     confidence_score: int = 90
+    # Delivery month (YYYY-MM) -> pattern for the posted basis of that month's bid (forward_curve).
+    delivery_basis_regex: Optional[Dict[str, str]] = None
 
 
 @dataclass
@@ -153,6 +163,11 @@ class BidObservation:
     parsed_from_pdf: bool
     raw_excerpt: Optional[str]
     raw_payload_json: Dict[str, Any]
+    id: Optional[str] = None
+    # sha256 of the fetched body in the raw document archive (raw_archive.py), if archived.
+    raw_body_sha256: Optional[str] = None
+    # Set by bid_validation when the bid is held out of ranking; stored, never ranked.
+    quarantine_reasons: Optional[List[str]] = None
 
 
 @dataclass
@@ -174,6 +189,11 @@ class RankedBuyer:
     ml_score: Optional[float]
     composite_score: float
     rationale: Dict[str, Any]
+    state_basis: Optional[float] = None
+    # Set when a lane rate (freight_rates) priced the freight instead of the state table.
+    freight_source: Optional[str] = None
+    # Posted basis by delivery month (YYYY-MM) from the bid's source, for forward_curve.
+    delivery_basis: Optional[Dict[str, float]] = None
 
 
 def now_utc() -> datetime:
@@ -183,6 +203,14 @@ def now_utc() -> datetime:
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Corn Intel morning ranker")
     parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument(
+        "--backend",
+        choices=["postgres", "memory"],
+        default=os.environ.get("CORN_INTEL_RANKER_BACKEND", "postgres"),
+        help="memory: run against an in-process store loaded from the facilities seed (no Postgres)",
+    )
+    parser.add_argument("--seed-file", help="Facilities seed for --backend memory (default: apps/api/seeds/facilities.seed.json)")
+    parser.add_argument("--generated-buyers-file", help="Rail confidence source for --backend memory (default: src/data/buyers.json)")
     parser.add_argument("--api-base-url", default=DEFAULT_API_BASE_URL)
     parser.add_argument("--crop", default=DEFAULT_CROP)
     parser.add_argument("--bid-source-config", default=os.environ.get("CORN_INTEL_BID_SOURCE_CONFIG"))
@@ -193,19 +221,139 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--skip-scrape", action="store_true", help="Disable web/PDF scraping and use USDA fallback only")
     parser.add_argument("--max-bid-age-hours", type=float, default=36.0)
     parser.add_argument("--http-timeout", type=float, default=15.0)
+    parser.add_argument("--regex-timeout-ms", type=float, default=500.0, help="Per-search budget for bid source patterns")
+    parser.add_argument(
+        "--origins-file",
+        default=os.environ.get("CORN_INTEL_ORIGINS_FILE"),
+        help="JSON list of origin elevators; adds a per-origin top-N and top states to the run summary",
+    )
+    parser.add_argument(
+        "--freight-rates",
+        default=os.environ.get("CORN_INTEL_FREIGHT_RATES"),
+        help="Lane freight rates: a CSV (see freight_rates.example.csv) or 'db' for freight_lane_rates",
+    )
+    parser.add_argument("--freight-origin", default="CAMPBELL, MN", help="Origin station for lane rates")
+    parser.add_argument(
+        "--radius-center",
+        metavar="LAT,LNG",
+        help="Rank buyers within --radius-miles of this point instead of the corridor state list",
+    )
+    parser.add_argument("--radius-miles", type=float)
+    parser.add_argument(
+        "--corridor-file",
+        default=os.environ.get("CORN_INTEL_CORRIDOR_FILE"),
+        help="Rank buyers within --corridor-miles of this rail line (GeoJSON) instead of the corridor state list",
+    )
+    parser.add_argument("--corridor-miles", type=float, default=25.0)
+    parser.add_argument(
+        "--basis-history-dir",
+        default=os.environ.get("CORN_INTEL_USDA_HISTORY_DIR"),
+        help="usda_history.py store; its latest regional basis replaces the hard-coded fallback when the USDA API is down",
+    )
+    parser.add_argument("--freight-car-type", default="shuttle", help="Car type for lane rates")
+    parser.add_argument(
+        "--forward-curve",
+        default=os.environ.get("CORN_INTEL_FORWARD_CURVE"),
+        help="Futures forward curve (JSON file or URL, contract month -> price); adds a call list per delivery month",
+    )
+    parser.add_argument("--delivery-months", help="Comma-separated YYYY-MM delivery months (default: every contract on the curve)")
+    parser.add_argument(
+        "--rank-uncertainty",
+        type=int,
+        default=int(os.environ.get("CORN_INTEL_RANK_UNCERTAINTY_SAMPLES", "0")),
+        metavar="SAMPLES",
+        help="Monte Carlo samples for per-buyer rank bands (P10/P50/P90, P(top N)) in rationale_json; 0 disables",
+    )
+    parser.add_argument("--rank-uncertainty-seed", type=int, default=0)
+    parser.add_argument(
+        "--history-features",
+        action="store_true",
+        help="Add 7/30-day basis, volatility, trend and posting-regularity features (bid_history.py)",
+    )
+    parser.add_argument("--bid-history-cache", help="Rolling bid history cache file (default: per crop under ~/.cache/cornintel)")
+    parser.add_argument(
+        "--no-validate-bids",
+        action="store_true",
+        help="Rank scraped bids without the batch outlier check (bid_validation.py)",
+    )
+    parser.add_argument("--validation-z", type=float, default=4.0, help="z-score beyond which a scraped basis is quarantined")
+    parser.add_argument("--bid-distribution-cache", help="Cached per-buyer/state basis distributions (default: per crop under ~/.cache/cornintel)")
+    parser.add_argument(
+        "--no-stream-observations",
+        action="store_true",
+        help="Insert scraped observations with the ranking transaction instead of streaming them to a writer thread as they are scraped",
+    )
+    parser.add_argument(
+        "--persist-deltas",
+        action="store_true",
+        default=os.environ.get("CORN_INTEL_PERSIST_DELTAS", "").lower() in {"1", "true", "yes"},
+        help="Write only the recommendation rows that changed since today's last run (migration 011)",
+    )
+    parser.add_argument(
+        "--delta-max-changed",
+        type=float,
+        default=0.5,
+        help="Write a full run instead of a delta when more than this share of the rows changed",
+    )
+    parser.add_argument("--observation-batch-size", type=int, default=25)
+    parser.add_argument("--observation-queue-size", type=int, default=200, help="Max scraped observations buffered for the writer")
+    parser.add_argument(
+        "--raw-archive-dir",
+        default=os.environ.get("CORN_INTEL_RAW_ARCHIVE_DIR"),
+        help="Keep every fetched page/PDF in this zstd content-addressed archive (see raw_archive.py reextract)",
+    )
     parser.add_argument("--model-coefficients-file", help="Optional JSON coefficients exported by train_rank_model.py")
     parser.add_argument("--dry-run", action="store_true", help="Compute rankings but do not write DB rows")
+    parser.add_argument(
+        "--metrics-textfile",
+        default=os.environ.get("CORN_INTEL_METRICS_TEXTFILE"),
+        help="Write run metrics in Prometheus textfile-collector format",
+    )
+    parser.add_argument(
+        "--trace-file",
+        default=os.environ.get("CORN_INTEL_TRACE_FILE"),
+        help="Append this run's stage spans as OTLP/JSON",
+    )
+    parser.add_argument("--usda-cache-file", help="USDA market context cache (default: ~/.cache/cornintel/usda_market_context.json)")
+    parser.add_argument("--usda-cache-ttl-minutes", type=float, default=60.0)
+    parser.add_argument(
+        "--usda-cache-refresh-minutes",
+        type=float,
+        default=45.0,
+        help="Refresh a cached USDA value in the background once it is this old (default 45)",
+    )
+    parser.add_argument(
+        "--usda-cache-max-stale-hours",
+        type=float,
+        default=24.0,
+        help="Never serve a cached USDA value older than this when the API is down; use the fallback (default 24)",
+    )
+    parser.add_argument("--no-usda-cache", action="store_true", help="Always fetch USDA context live")
+    parser.add_argument("--checkpoint-dir", help="Stage checkpoint root (default: ~/.cache/cornintel/ranker-runs)")
+    parser.add_argument("--resume", metavar="RUN_KEY", help="Resume a failed run from its stage checkpoints")
+    parser.add_argument("--no-reuse", action="store_true", help="Always re-rank even if inputs match a prior run")
+    parser.add_argument("--dump-snapshot", help="Write the resolved run inputs to this columnar snapshot file")
+    parser.add_argument("--replay", metavar="SNAPSHOT", help="Rank from a snapshot file only (no DB/network)")
+    parser.add_argument("--profile-memory", metavar="REPORT", help="Profile per-stage memory with tracemalloc and write a JSON report")
+    parser.add_argument("--memory-baseline", metavar="REPORT", help="Earlier --profile-memory report to check for peak regressions")
+    parser.add_argument("--memory-regression-pct", type=float, default=25.0, help="Flag stages whose peak grew more than this")
     parser.add_argument("--debug", action="store_true")
     return parser.parse_args()
 
 
-def require_psycopg() -> None:
-    if psycopg is None or dict_row is None:
+@lru_cache(maxsize=None)
+def require_psycopg():
+    try:
+        import psycopg  # type: ignore
+        from psycopg.rows import dict_row  # type: ignore
+        return psycopg, dict_row
+    except Exception as exc:  # pragma: no cover
         raise RuntimeError(
             "psycopg is required. Install dependencies from python/requirements.txt and try again."
-        )
+        ) from exc
 
 
+@lru_cache(maxsize=None)
 def require_requests():
     try:
         import requests  # type: ignore
@@ -214,6 +362,7 @@ def require_requests():
         raise RuntimeError("requests is required for USDA/web scraping (python/requirements.txt)") from exc
 
 
+@lru_cache(maxsize=None)
 def require_bs4():
     try:
         from bs4 import BeautifulSoup  # type: ignore
@@ -222,6 +371,7 @@ def require_bs4():
         raise RuntimeError("beautifulsoup4 is required for HTML scraping (python/requirements.txt)") from exc
 
 
+@lru_cache(maxsize=None)
 def require_pypdf():
     try:
         from pypdf import PdfReader  # type: ignore
@@ -230,23 +380,53 @@ def require_pypdf():
         raise RuntimeError("pypdf is required for PDF parsing (python/requirements.txt)") from exc
 
 
+def _check_model_payload(payload: Any) -> Dict[str, Any]:
+    if not isinstance(payload, dict) or "coefficients" not in payload:
+        raise ValueError("Invalid model coefficients file: missing 'coefficients'")
+    return payload
+
+
 def load_model_coefficients(path: Optional[str]) -> Optional[Dict[str, Any]]:
+    """The model file, shared per process while its mtime is unchanged (treat as read-only)."""
     if not path:
         return None
-    with open(path, "r", encoding="utf-8") as f:
-        payload = json.load(f)
-    if "coefficients" not in payload:
-        raise ValueError("Invalid model coefficients file: missing 'coefficients'")
-    return payload
+    from config_cache import load_compiled
+
+    return load_compiled("model", path, _check_model_payload)
+
 
+def load_source_configs(path: Optional[str], crop: str, errors: Optional[List[str]] = None) -> List[SourceConfig]:
+    """Parse bid_sources.json. Sources with an invalid regex are skipped and reported in `errors`.
 
-def load_source_configs(path: Optional[str], crop: str) -> List[SourceConfig]:
+    The validated form is cached on disk keyed by the file's mtime (config_cache), so runs
+    after the first skip re-checking every pattern until the file is edited. The key also
+    covers this module, regex_guard and SOURCE_RULES_VERSION.
+    """
     if not path:
         return []
-    with open(path, "r", encoding="utf-8") as f:
-        payload = json.load(f)
+    import regex_guard
+    from config_cache import load_compiled
+
+    compiled = load_compiled(
+        "sources",
+        path,
+        lambda payload: compile_source_configs(payload, crop),
+        variant=f"{crop}|{REGEX_GUARD.engine}|rules-{SOURCE_RULES_VERSION}",
+        persist=True,
+        depends_on=[regex_guard.__file__],
+    )
+    for message in compiled["problems"]:
+        print(f"[sources] {message}", file=sys.stderr)
+        if errors is not None:
+            errors.append(message)
+    return [SourceConfig(**raw) for raw in compiled["sources"]]
+
+
+def compile_source_configs(payload: Any, crop: str) -> Dict[str, Any]:
+    """bid_sources.json -> {"sources": [SourceConfig fields], "problems": [messages]} for `crop`."""
     raw_sources = payload.get("sources", []) if isinstance(payload, dict) else []
     result: List[SourceConfig] = []
+    messages: List[str] = []
     for raw in raw_sources:
         if not isinstance(raw, dict):
             continue
@@ -256,6 +436,11 @@ def load_source_configs(path: Optional[str], crop: str) -> List[SourceConfig]:
         mode = str(raw.get("mode") or "html").strip().lower()
         if mode not in {"html", "pdf", "html_to_pdf"}:
             continue
+        problems = validate_source_patterns(raw)
+        if problems:
+            messages.append(f"{raw.get('label') or raw.get('url')}: {'; '.join(problems)}")
+            if any(p.startswith("invalid") for p in problems):
+                continue
         result.append(
             SourceConfig(
                 buyer_external_seed_key=str(raw["buyer_external_seed_key"]),
@@ -269,19 +454,83 @@ def load_source_configs(path: Optional[str], crop: str) -> List[SourceConfig]:
                 basis_regex=(str(raw.get("basis_regex")) if raw.get("basis_regex") else None),
                 futures_regex=(str(raw.get("futures_regex")) if raw.get("futures_regex") else None),
                 confidence_score=int(raw.get("confidence_score") or 90),
+                delivery_basis_regex=(
+                    {str(k): str(v) for k, v in raw["delivery_basis_regex"].items()}
+                    if isinstance(raw.get("delivery_basis_regex"), dict) and raw["delivery_basis_regex"]
+                    else None
+                ),
             )
         )
-    return result
+    return {"sources": [asdict(source) for source in result], "problems": messages}
 
 
-def connect_db(database_url: str):
-    require_psycopg()
-    return psycopg.connect(database_url, row_factory=dict_row)  # type: ignore[arg-type]
+# Part of the compiled bid_sources.json cache key (load_source_configs). Bump when how
+# sources are parsed or checked changes in a way no source file edit shows, e.g. a
+# behaviour change in an upgraded dependency.
+SOURCE_RULES_VERSION = 1
+
+SOURCE_PATTERN_FIELDS = {
+    "value_regex": re.I | re.M,
+    "basis_regex": re.I | re.M,
+    "futures_regex": re.I | re.M,
+    "pdf_link_regex": 0,
+}
 
 
-def fetch_buyers(conn, crop: str, verified_only: bool, limit: int) -> List[BuyerRow]:
-    clauses = ["b.active = TRUE", "b.crop_type = %s", "b.launch_scope = 'corridor'", "b.state = ANY(%s)"]
-    params: List[Any] = [crop, list(PRIMARY_CORRIDOR_STATES)]
+def validate_source_patterns(raw: Dict[str, Any]) -> List[str]:
+    """Compile each configured pattern up front; 'invalid ...' problems disable the source."""
+    problems: List[str] = []
+    for field_name, flags in SOURCE_PATTERN_FIELDS.items():
+        pattern = raw.get(field_name)
+        if not pattern:
+            continue
+        try:
+            for warning in REGEX_GUARD.validate(str(pattern), flags):
+                problems.append(f"{field_name}: {warning}")
+        except re.error as exc:
+            problems.append(f"invalid {field_name}: {exc}")
+    delivery = raw.get("delivery_basis_regex")
+    if delivery is not None and not isinstance(delivery, dict):
+        problems.append("invalid delivery_basis_regex: expected an object of delivery month -> pattern")
+    for month, pattern in (delivery.items() if isinstance(delivery, dict) else []):
+        if not re.fullmatch(r"\d{4}-(0[1-9]|1[0-2])", str(month)):
+            problems.append(f"invalid delivery_basis_regex month {month!r}: expected YYYY-MM")
+            continue
+        try:
+            for warning in REGEX_GUARD.validate(str(pattern), re.I | re.M):
+                problems.append(f"delivery_basis_regex[{month}]: {warning}")
+        except re.error as exc:
+            problems.append(f"invalid delivery_basis_regex[{month}]: {exc}")
+    return problems
+
+
+def connect_db(database_url: str):
+    psycopg, dict_row = require_psycopg()
+    return psycopg.connect(database_url, row_factory=dict_row)
+
+
+def buyer_limit(limit: int) -> int:
+    return max(1, min(limit, 5000))
+
+
+def fetch_buyers(
+    conn,
+    crop: str,
+    verified_only: bool,
+    limit: Optional[int],
+    bbox: Optional[Tuple[float, float, float, float]] = None,
+) -> List[BuyerRow]:
+    """Rankable buyers. `bbox` (min_lat, max_lat, min_lng, max_lng) replaces the corridor
+    state list with a coordinate box; spatial_index.SpatialScope then filters exactly.
+    `limit=None` returns every match, so a caller can limit after that exact filter."""
+    clauses = ["b.active = TRUE", "b.crop_type = %s"]
+    params: List[Any] = [crop]
+    if bbox is None:
+        clauses += ["b.launch_scope = 'corridor'", "b.state = ANY(%s)"]
+        params.append(list(PRIMARY_CORRIDOR_STATES))
+    else:
+        clauses += ["b.lat BETWEEN %s AND %s", "b.lng BETWEEN %s AND %s"]
+        params += list(bbox)
     if verified_only:
         clauses.append("bc.verified_status = 'verified'")
 
@@ -302,14 +551,17 @@ def fetch_buyers(conn, crop: str, verified_only: bool, limit: int) -> List[Buyer
             bc.verified_status,
             bc.facility_phone,
             bc.website_url,
-            bc.contact_role
+            bc.contact_role,
+            b.created_at,
+            GREATEST(b.updated_at, bc.updated_at) AS row_version
         FROM buyers b
         LEFT JOIN buyer_contacts bc ON bc.buyer_id = b.id
         WHERE {' AND '.join(clauses)}
         ORDER BY COALESCE(b.rail_confidence, 0) DESC, b.state ASC, b.name ASC
         LIMIT %s
     """
-    params.append(max(1, min(limit, 5000)))
+    # LIMIT NULL is no limit.
+    params.append(buyer_limit(limit) if limit is not None else None)
 
     with conn.cursor() as cur:
         cur.execute(sql, params)
@@ -333,17 +585,34 @@ def fetch_buyers(conn, crop: str, verified_only: bool, limit: int) -> List[Buyer
             facility_phone=row.get("facility_phone"),
             website_url=row.get("website_url"),
             contact_role=row.get("contact_role"),
+            created_at=row.get("created_at"),
+            row_version=row.get("row_version"),
         )
         for row in rows
     ]
 
 
-def fetch_latest_observations(conn, crop: str, buyer_ids: Iterable[str]) -> Dict[str, BidObservation]:
+def bid_identity(obs: BidObservation) -> Tuple[str, str, Optional[float], Optional[float]]:
+    """What makes two stored rows the same bid, whatever their ids."""
+    return (
+        str(obs.buyer_id),
+        obs.source_url or "",
+        float(obs.cash_bid) if obs.cash_bid is not None else None,
+        float(obs.basis) if obs.basis is not None else None,
+    )
+
+
+def fetch_latest_observations(
+    conn, crop: str, buyer_ids: Iterable[str], exclude: Iterable[BidObservation] = ()
+) -> Dict[str, BidObservation]:
+    """Each buyer's newest unquarantined observation, skipping copies of the `exclude` bids."""
     ids = list(buyer_ids)
     if not ids:
         return {}
+    excluded = [bid_identity(o) for o in exclude]
     sql = """
         SELECT DISTINCT ON (buyer_id)
+            id,
             buyer_id,
             crop_type,
             source_kind,
@@ -356,14 +625,24 @@ def fetch_latest_observations(conn, crop: str, buyer_ids: Iterable[str]) -> Dict
             COALESCE(confidence_score, 50) AS confidence_score,
             parsed_from_pdf,
             raw_excerpt,
-            raw_payload_json
-        FROM buyer_cash_bid_observations
+            raw_payload_json,
+            raw_body_sha256
+        FROM buyer_cash_bid_observations o
         WHERE buyer_id = ANY(%s)
           AND crop_type = %s
+          AND quarantine_reasons IS NULL
+          AND NOT EXISTS (
+              SELECT 1
+              FROM unnest(%s::text[], %s::text[], %s::numeric[], %s::numeric[]) AS x(buyer_id, source_url, cash_bid, basis)
+              WHERE x.buyer_id = o.buyer_id::text
+                AND x.source_url = COALESCE(o.source_url, '')
+                AND x.cash_bid IS NOT DISTINCT FROM o.cash_bid
+                AND x.basis IS NOT DISTINCT FROM o.basis
+          )
         ORDER BY buyer_id, observed_at DESC, COALESCE(confidence_score, 0) DESC
     """
     with conn.cursor() as cur:
-        cur.execute(sql, [ids, crop])
+        cur.execute(sql, [ids, crop, *([list(col) for col in zip(*excluded)] or [[], [], [], []])])
         rows = cur.fetchall()
 
     out: Dict[str, BidObservation] = {}
@@ -382,24 +661,51 @@ def fetch_latest_observations(conn, crop: str, buyer_ids: Iterable[str]) -> Dict
             parsed_from_pdf=bool(row.get("parsed_from_pdf")),
             raw_excerpt=row.get("raw_excerpt"),
             raw_payload_json=row.get("raw_payload_json") or {},
+            id=row.get("id"),
+            raw_body_sha256=row.get("raw_body_sha256"),
         )
     return out
 
 
-def create_run(conn, crop: str) -> str:
+def create_run(
+    conn,
+    crop: str,
+    input_fingerprint: Optional[str] = None,
+    reused_from_run_id: Optional[str] = None,
+) -> str:
     with conn.cursor() as cur:
         cur.execute(
             """
-            INSERT INTO morning_recommendation_runs (run_date, crop_type, status, started_at)
-            VALUES (CURRENT_DATE, %s, 'running', NOW())
+            INSERT INTO morning_recommendation_runs (
+                run_date, crop_type, status, started_at, input_fingerprint, reused_from_run_id
+            )
+            VALUES (CURRENT_DATE, %s, 'running', NOW(), %s, %s)
             RETURNING id
             """,
-            [crop],
+            [crop, input_fingerprint, reused_from_run_id],
         )
         row = cur.fetchone()
     return row["id"]
 
 
+def find_reusable_run(conn, crop: str, input_fingerprint: str) -> Optional[Dict[str, Any]]:
+    """Most recent successful run with identical inputs; resolves pointer rows to the run that owns the rows."""
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT COALESCE(reused_from_run_id, id) AS source_run_id, top_states, summary_json
+            FROM morning_recommendation_runs
+            WHERE crop_type = %s
+              AND input_fingerprint = %s
+              AND status = 'success'
+            ORDER BY started_at DESC
+            LIMIT 1
+            """,
+            [crop, input_fingerprint],
+        )
+        return cur.fetchone()
+
+
 def finalize_run(conn, run_id: str, status: str, top_states: List[str], source_summary: Dict[str, Any], summary: Dict[str, Any]) -> None:
     with conn.cursor() as cur:
         cur.execute(
@@ -427,12 +733,13 @@ def insert_observations(conn, observations: List[BidObservation]) -> int:
                 INSERT INTO buyer_cash_bid_observations (
                     buyer_id, crop_type, source_kind, source_label, source_url, observed_at,
                     cash_bid, basis, futures_price, confidence_score, parsed_from_pdf,
-                    raw_excerpt, raw_payload_json
+                    raw_excerpt, raw_payload_json, raw_body_sha256, quarantine_reasons
                 ) VALUES (
                     %s, %s, %s, %s, %s, %s,
                     %s, %s, %s, %s, %s,
-                    %s, %s::jsonb
+                    %s, %s::jsonb, %s, %s::jsonb
                 )
+                RETURNING id
                 """,
                 [
                     obs.buyer_id,
@@ -448,16 +755,148 @@ def insert_observations(conn, observations: List[BidObservation]) -> int:
                     obs.parsed_from_pdf,
                     obs.raw_excerpt,
                     json.dumps(obs.raw_payload_json),
+                    obs.raw_body_sha256,
+                    json.dumps(obs.quarantine_reasons) if obs.quarantine_reasons else None,
                 ],
             )
+            row = cur.fetchone()
+            obs.id = row["id"] if row else obs.id
             inserted += 1
+    METRICS.incr("rows_written_total", inserted, table="buyer_cash_bid_observations")
     return inserted
 
 
-def insert_recommendations(conn, run_id: str, ranked: List[RankedBuyer]) -> int:
+RECOMMENDATION_COLUMNS = [
+    "run_id",
+    "buyer_id",
+    "rank",
+    "state",
+    "composite_score",
+    "cash_bid",
+    "basis",
+    "futures_price",
+    "estimated_freight",
+    "estimated_net_bid",
+    "rail_confidence",
+    "bid_source_kind",
+    "bid_source_label",
+    "bid_source_url",
+    "bid_observed_at",
+    "rationale_json",
+]
+# Rationale entries that move with the clock, not the inputs. A delta run does not
+# rewrite a row for them; the base run's values are served instead.
+VOLATILE_RATIONALE_KEYS = {"bidFreshnessHours"}
+VOLATILE_RAW_FEATURES = {"bid_freshness_hours"}
+
+
+def recommendation_row(run_id: str, rank: int, item: RankedBuyer) -> Dict[str, Any]:
+    return {
+        "run_id": run_id,
+        "buyer_id": item.buyer.id,
+        "rank": rank,
+        "state": item.buyer.state,
+        "composite_score": round(item.composite_score, 4),
+        "cash_bid": item.cash_bid,
+        "basis": item.basis,
+        "futures_price": item.futures_price,
+        "estimated_freight": item.estimated_freight,
+        "estimated_net_bid": item.estimated_net_bid,
+        "rail_confidence": item.buyer.rail_confidence,
+        "bid_source_kind": item.bid_source_kind,
+        "bid_source_label": item.bid_source_label,
+        "bid_source_url": item.bid_source_url,
+        "bid_observed_at": item.bid_observed_at,
+        "rationale_json": json.loads(json.dumps(item.rationale)),
+    }
+
+
+def _comparable_row(row: Dict[str, Any]) -> Tuple[Any, ...]:
+    """A recommendation row as stored: NUMERIC(12, 4) values, volatile rationale dropped."""
+    values: List[Any] = []
+    for name in RECOMMENDATION_COLUMNS[1:-1]:
+        value = row.get(name)
+        if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool) and name != "rank":
+            value = round(float(value), 4)
+        elif isinstance(value, datetime):
+            value = value.astimezone(UTC)
+        elif name == "buyer_id":
+            value = str(value)
+        values.append(value)
+    rationale = {k: v for k, v in (row.get("rationale_json") or {}).items() if k not in VOLATILE_RATIONALE_KEYS}
+    if isinstance(rationale.get("rawFeatures"), dict):
+        rationale["rawFeatures"] = {k: v for k, v in rationale["rawFeatures"].items() if k not in VOLATILE_RAW_FEATURES}
+    values.append(json.dumps(rationale, sort_keys=True, default=str))
+    return tuple(values)
+
+
+def plan_recommendation_delta(
+    base_rows: List[Dict[str, Any]], run_id: str, ranked: List[RankedBuyer], max_changed_fraction: float
+) -> Optional[List[int]]:
+    """Ranks whose row differs from the base run's; None when a full write is the better deal."""
+    base_by_rank = {int(row["rank"]): _comparable_row(row) for row in base_rows}
+    changed = [
+        rank
+        for rank, item in enumerate(ranked, start=1)
+        if base_by_rank.get(rank) != _comparable_row(recommendation_row(run_id, rank, item))
+    ]
+    if len(changed) > max_changed_fraction * len(ranked):
+        return None
+    return changed
+
+
+def find_delta_base(conn, crop: str) -> Optional[str]:
+    """The full run today's latest successful run for `crop` is based on (itself when full)."""
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT COALESCE(base_run_id, id) AS base_run_id
+            FROM morning_recommendation_runs
+            WHERE crop_type = %s
+              AND run_date = CURRENT_DATE
+              AND status = 'success'
+              AND reused_from_run_id IS NULL
+            ORDER BY run_date DESC, started_at DESC
+            LIMIT 1
+            """,
+            [crop],
+        )
+        row = cur.fetchone()
+    return row["base_run_id"] if row else None
+
+
+def fetch_recommendation_rows(conn, run_id: str) -> List[Dict[str, Any]]:
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""
+            SELECT {', '.join(RECOMMENDATION_COLUMNS)}
+            FROM morning_recommendations
+            WHERE run_id = %s
+            ORDER BY rank
+            """,
+            [run_id],
+        )
+        return cur.fetchall()
+
+
+def set_run_recommendations(conn, run_id: str, count: int, base_run_id: Optional[str] = None) -> None:
+    with conn.cursor() as cur:
+        cur.execute(
+            "UPDATE morning_recommendation_runs SET recommendation_count = %s, base_run_id = %s WHERE id = %s",
+            [count, base_run_id, run_id],
+        )
+
+
+def insert_recommendations(conn, run_id: str, ranked: List[RankedBuyer], ranks: Optional[Iterable[int]] = None) -> int:
+    """Write the ranked rows; with `ranks`, only those (a delta run's changed rows)."""
+    only = set(ranks) if ranks is not None else None
     inserted = 0
     with conn.cursor() as cur:
         for idx, item in enumerate(ranked, start=1):
+            if only is not None and idx not in only:
+                continue
+            row = recommendation_row(run_id, idx, item)
+            row["rationale_json"] = json.dumps(row["rationale_json"])
             cur.execute(
                 """
                 INSERT INTO morning_recommendations (
@@ -472,33 +911,130 @@ def insert_recommendations(conn, run_id: str, ranked: List[RankedBuyer]) -> int:
                     %s, %s::jsonb
                 )
                 """,
-                [
-                    run_id,
-                    item.buyer.id,
-                    idx,
-                    item.buyer.state,
-                    round(item.composite_score, 4),
-                    item.cash_bid,
-                    item.basis,
-                    item.futures_price,
-                    item.estimated_freight,
-                    item.estimated_net_bid,
-                    item.buyer.rail_confidence,
-                    item.bid_source_kind,
-                    item.bid_source_label,
-                    item.bid_source_url,
-                    item.bid_observed_at,
-                    json.dumps(item.rationale),
-                ],
+                [row[name] for name in RECOMMENDATION_COLUMNS],
             )
             inserted += 1
+    METRICS.incr("rows_written_total", inserted, table="morning_recommendations")
     return inserted
 
 
+CANDIDATE_FEATURE_COLUMNS = [
+    "run_id",
+    "buyer_id",
+    "run_date",
+    "crop_type",
+    "state",
+    "verified_status",
+    "selected_rank",
+    "cash_bid",
+    "estimated_net_bid",
+    "rail_confidence",
+    "contact_verified",
+    "bid_freshness_hours",
+    "source_confidence",
+    "state_basis",
+    "estimated_freight",
+    "bid_source_kind",
+    "weighted_score",
+    "ml_score",
+    "composite_score",
+    "basis_mean_7d",
+    "basis_mean_30d",
+    "bid_volatility_30d",
+    "bid_trend_30d",
+    "posting_regularity_30d",
+]
+# Optional rolling-window features (bid_history.py, --history-features); NULL in the
+# feature store for runs without them.
+HISTORY_FEATURE_NAMES = [
+    "basis_mean_7d",
+    "basis_mean_30d",
+    "bid_volatility_30d",
+    "bid_trend_30d",
+    "posting_regularity_30d",
+]
+
+
+def insert_candidate_features(
+    conn,
+    run_id: str,
+    run_date: date,
+    crop: str,
+    candidates: List[RankedBuyer],
+    ranked: List[RankedBuyer],
+) -> int:
+    """Bulk-COPY every evaluated candidate's feature vector into the run-keyed feature store."""
+    if not candidates:
+        return 0
+    with conn.cursor() as cur:
+        with cur.copy(f"COPY morning_candidate_features ({', '.join(CANDIDATE_FEATURE_COLUMNS)}) FROM STDIN") as copy:
+            for row in candidate_feature_rows(run_id, run_date, crop, candidates, ranked):
+                copy.write_row(row)
+    METRICS.incr("rows_written_total", len(candidates), table="morning_candidate_features")
+    return len(candidates)
+
+
+def candidate_feature_rows(
+    run_id: str,
+    run_date: date,
+    crop: str,
+    candidates: List[RankedBuyer],
+    ranked: List[RankedBuyer],
+) -> Iterator[List[Any]]:
+    """Feature-store rows in CANDIDATE_FEATURE_COLUMNS order."""
+    rank_by_buyer = {item.buyer.id: idx for idx, item in enumerate(ranked, start=1)}
+    for item in candidates:
+        fv = item.feature_values
+        yield [
+            run_id,
+            item.buyer.id,
+            run_date,
+            crop,
+            item.buyer.state,
+            item.buyer.verified_status,
+            rank_by_buyer.get(item.buyer.id),
+            fv["cash_bid"],
+            fv["estimated_net_bid"],
+            fv["rail_confidence"],
+            fv["contact_verified"],
+            fv["bid_freshness_hours"],
+            fv["source_confidence"],
+            item.state_basis,
+            item.estimated_freight,
+            item.bid_source_kind,
+            round(item.weighted_score, 6),
+            item.ml_score,
+            round(item.composite_score, 6),
+            *(fv.get(name) for name in HISTORY_FEATURE_NAMES),
+        ]
+
+
+def fetch_candidate_features(conn, run_ids: Iterable[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """Read stored candidate feature rows grouped by run_id."""
+    ids = list(run_ids)
+    if not ids:
+        return {}
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""
+            SELECT {', '.join(CANDIDATE_FEATURE_COLUMNS)}
+            FROM morning_candidate_features
+            WHERE run_id = ANY(%s)
+            """,
+            [ids],
+        )
+        rows = cur.fetchall()
+    out: Dict[str, List[Dict[str, Any]]] = {}
+    for row in rows:
+        out.setdefault(row["run_id"], []).append(row)
+    return out
+
+
 def fetch_json(url: str, timeout: float) -> Dict[str, Any]:
     requests = require_requests()
     response = requests.get(url, timeout=timeout, headers={"User-Agent": "CornIntelMorningRanker/1.0"})
     response.raise_for_status()
+    METRICS.incr("bytes_downloaded_total", len(response.content), kind="api")
     return response.json()
 
 
@@ -544,7 +1080,30 @@ def parse_usda_regional_basis(grain_report_payload: Dict[str, Any]) -> Dict[str,
     return merged
 
 
-def fetch_usda_market_context(api_base_url: str, timeout: float, crop: str) -> Tuple[float, Dict[str, float], Dict[str, Any]]:
+def fetch_usda_futures(base_url: str, timeout: float) -> Tuple[float, str]:
+    futures = fetch_json(f"{base_url}/api/usda/futures-price", timeout)
+    fp = futures.get("futuresPrice")
+    if fp is None:
+        raise ValueError("futures-price response has no futuresPrice")
+    return float(fp), str(futures.get("source") or "usda")
+
+
+def fetch_usda_regional_basis(base_url: str, timeout: float) -> Tuple[Dict[str, float], str]:
+    grain = fetch_json(f"{base_url}/api/usda/grain-report?commodity={quote('Corn')}", timeout)
+    return parse_usda_regional_basis(grain), str(grain.get("source") or "usda")
+
+
+def fetch_usda_market_context(
+    api_base_url: str,
+    timeout: float,
+    crop: str,
+    cache=None,
+) -> Tuple[float, Dict[str, float], Dict[str, Any]]:
+    """Futures price + regional basis map.
+
+    With a `usda_cache.MarketContextCache`, fresh cached values are served without a
+    round trip and stale ones replace the hard-coded fallbacks when the API fails.
+    """
     futures_price = 4.30
     futures_source = "fallback"
     regional_basis = dict(FALLBACK_REGIONAL_BASIS)
@@ -559,29 +1118,48 @@ def fetch_usda_market_context(api_base_url: str, timeout: float, crop: str) -> T
             "note": "Non-corn crop uses fallback USDA mapping in morning ranker",
         }
 
-    try:
-        futures = fetch_json(f"{api_base_url.rstrip('/')}/api/usda/futures-price", timeout)
-        fp = futures.get("futuresPrice")
-        if fp is not None:
-            futures_price = float(fp)
-        futures_source = str(futures.get("source") or futures_source)
-    except Exception as exc:
-        futures_source = f"fallback ({exc})"
-
-    try:
-        grain = fetch_json(
-            f"{api_base_url.rstrip('/')}/api/usda/grain-report?commodity={quote('Corn')}",
-            timeout,
-        )
-        regional_basis = parse_usda_regional_basis(grain)
-        grain_source = str(grain.get("source") or grain_source)
-    except Exception as exc:
-        grain_source = f"fallback ({exc})"
+    base = api_base_url.rstrip("/")
+    fetch_futures = partial(fetch_usda_futures, base, timeout)
+    fetch_basis = partial(fetch_usda_regional_basis, base, timeout)
+
+    summary: Dict[str, Any] = {"crop": crop}
+    if cache is not None:
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures_job = pool.submit(cache.resolve, "futuresPrice", fetch_futures)
+            basis_job = pool.submit(cache.resolve, "regionalBasis", fetch_basis)
+        cached_fp, futures_meta = futures_job.result()
+        cached_basis, basis_meta = basis_job.result()
+        if cached_fp is not None:
+            futures_price = float(cached_fp)
+            futures_source = str(futures_meta.get("source"))
+        else:
+            futures_source = f"fallback ({futures_meta.get('error')})"
+        if cached_basis is not None:
+            regional_basis = {k: float(v) for k, v in cached_basis.items()}
+            grain_source = str(basis_meta.get("source"))
+        else:
+            grain_source = f"fallback ({basis_meta.get('error')})"
+        summary["futuresCache"] = futures_meta
+        summary["grainCache"] = basis_meta
+        summary["stale"] = bool(futures_meta.get("stale") or basis_meta.get("stale"))
+    else:
+        # The two USDA endpoints are independent; overlap the round trips.
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures_job = pool.submit(fetch_futures)
+            basis_job = pool.submit(fetch_basis)
+        try:
+            futures_price, futures_source = futures_job.result()
+        except Exception as exc:
+            futures_source = f"fallback ({exc})"
+        try:
+            regional_basis, grain_source = basis_job.result()
+        except Exception as exc:
+            grain_source = f"fallback ({exc})"
 
     return futures_price, regional_basis, {
         "futuresSource": futures_source,
         "grainSource": grain_source,
-        "crop": crop,
+        **summary,
     }
 
 
@@ -599,8 +1177,10 @@ def extract_text_from_pdf(pdf_bytes: bytes) -> str:
 
 def fetch_url(url: str, timeout: float) -> Tuple[bytes, str]:
     requests = require_requests()
-    response = requests.get(url, timeout=timeout, headers={"User-Agent": "CornIntelMorningRanker/1.0"})
-    response.raise_for_status()
+    with METRICS.stage("scrape.fetch", url=url):
+        response = requests.get(url, timeout=timeout, headers={"User-Agent": "CornIntelMorningRanker/1.0"})
+        response.raise_for_status()
+    METRICS.incr("bytes_downloaded_total", len(response.content), kind="website")
     return response.content, response.headers.get("Content-Type", "")
 
 
@@ -617,18 +1197,21 @@ def extract_html_text(html: str, selector: Optional[str]) -> str:
 def find_pdf_link(html: str, base_url: str, regex: Optional[str]) -> Optional[str]:
     BeautifulSoup = require_bs4()
     soup = BeautifulSoup(html, "html.parser")
-    pattern = re.compile(regex) if regex else None
+
+    def matches(value: str) -> bool:
+        return REGEX_GUARD.search(regex, value, label="pdf_link_regex") is not None if regex else True
+
     for a in soup.find_all("a", href=True):
         href = str(a.get("href"))
         text = a.get_text(" ", strip=True)
         candidate = href if href.lower().endswith(".pdf") else text
-        if pattern and not pattern.search(candidate):
+        if regex and not matches(candidate):
             continue
-        if ".pdf" in href.lower() or (pattern and pattern.search(text)):
+        if ".pdf" in href.lower() or (regex and matches(text)):
             return urljoin(base_url, href)
-    if pattern:
+    if regex:
         for match in re.finditer(r'https?://[^\s"\']+\.pdf', html, flags=re.I):
-            if pattern.search(match.group(0)):
+            if matches(match.group(0)):
                 return match.group(0)
     else:
         match = re.search(r'https?://[^\s"\']+\.pdf', html, flags=re.I)
@@ -656,8 +1239,9 @@ def normalize_basis_value(value: Optional[float]) -> Optional[float]:
     return value
 
 
-def extract_match_and_excerpt(text: str, pattern: str) -> Tuple[Optional[re.Match[str]], Optional[str]]:
-    match = re.search(pattern, text, flags=re.I | re.M)
+def extract_match_and_excerpt(text: str, pattern: str, label: str = "") -> Tuple[Optional[Any], Optional[str]]:
+    # Time-boxed: a runaway pattern counts as no match and shows up in slowPatterns.
+    match = REGEX_GUARD.search(pattern, text, re.I | re.M, label)
     if not match:
         return None, None
     start = max(0, match.start() - 80)
@@ -666,7 +1250,7 @@ def extract_match_and_excerpt(text: str, pattern: str) -> Tuple[Optional[re.Matc
     return match, excerpt
 
 
-def match_to_value(match: re.Match[str]) -> Optional[float]:
+def match_to_value(match: Any) -> Optional[float]:
     groups = [g for g in match.groups() if g is not None]
     if not groups:
         return parse_number(match.group(0))
@@ -690,7 +1274,7 @@ def extract_bid_metrics(text: str, source: SourceConfig) -> Tuple[Optional[float
     for pat in cash_patterns:
         if not pat:
             continue
-        match, found_excerpt = extract_match_and_excerpt(text, pat)
+        match, found_excerpt = extract_match_and_excerpt(text, pat, source.label)
         if not match:
             continue
         candidate = match_to_value(match)
@@ -708,16 +1292,16 @@ def extract_bid_metrics(text: str, source: SourceConfig) -> Tuple[Optional[float
             break
 
     if source.basis_regex:
-        match, _ = extract_match_and_excerpt(text, source.basis_regex)
+        match, _ = extract_match_and_excerpt(text, source.basis_regex, source.label)
         if match:
             basis = normalize_basis_value(match_to_value(match))
     else:
-        match, _ = extract_match_and_excerpt(text, GENERIC_BASIS_PATTERN)
+        match, _ = extract_match_and_excerpt(text, GENERIC_BASIS_PATTERN, source.label)
         if match:
             basis = normalize_basis_value(match_to_value(match))
 
     if source.futures_regex:
-        match, _ = extract_match_and_excerpt(text, source.futures_regex)
+        match, _ = extract_match_and_excerpt(text, source.futures_regex, source.label)
         if match:
             futures_price = match_to_value(match)
             if futures_price and futures_price > 20:
@@ -726,40 +1310,113 @@ def extract_bid_metrics(text: str, source: SourceConfig) -> Tuple[Optional[float
     return cash_bid, basis, futures_price, excerpt
 
 
-def scrape_bid_source(source: SourceConfig, buyer: BuyerRow, timeout: float, debug: bool = False) -> Tuple[Optional[BidObservation], Optional[str]]:
+def extract_delivery_basis(text: str, source: SourceConfig) -> Dict[str, float]:
+    """Posted basis per delivery month, from the source's delivery_basis_regex patterns."""
+    out: Dict[str, float] = {}
+    for month, pattern in (source.delivery_basis_regex or {}).items():
+        match, _ = extract_match_and_excerpt(text, pattern, f"{source.label} {month}")
+        value = normalize_basis_value(match_to_value(match)) if match else None
+        if value is not None:
+            out[month] = value
+    return out
+
+
+def document_text(source: SourceConfig, body: bytes, parsed_from_pdf: bool) -> str:
+    """Text of one fetched document: the PDF's text, or the HTML page's (selector-scoped) text."""
+    if parsed_from_pdf:
+        with METRICS.stage("scrape.parse", format="pdf"):
+            return extract_text_from_pdf(body)
+    with METRICS.stage("scrape.parse", format="html"):
+        return extract_html_text(body.decode("utf-8", errors="ignore"), source.text_selector)
+
+
+def archive_body(archive: Any, body: bytes, kind: str) -> Optional[str]:
+    """Best-effort: a full or broken archive disk must not fail the scrape."""
+    try:
+        digest, stored = archive.put(body)
+    except OSError as exc:
+        METRICS.incr("raw_archive_errors_total")
+        print(f"[archive] could not store {kind} body: {exc}", file=sys.stderr)
+        return None
+    METRICS.incr("raw_archive_objects_total", result="stored" if stored else "deduplicated", kind=kind)
+    return digest
+
+
+def scrape_bid_source(
+    source: SourceConfig,
+    buyer: BuyerRow,
+    timeout: float,
+    debug: bool = False,
+    archive: Any = None,
+) -> Tuple[Optional[BidObservation], Optional[str]]:
     try:
         parsed_from_pdf = False
         final_url = source.url
         payload: Dict[str, Any] = {"mode": source.mode, "buyer": buyer.name}
+        fetched_at = now_utc()
+        page_bytes: Optional[bytes] = None
 
         if source.mode == "pdf":
             raw_bytes, content_type = fetch_url(source.url, timeout)
             parsed_from_pdf = True
-            text = extract_text_from_pdf(raw_bytes)
             payload["contentType"] = content_type
         else:
             raw_bytes, content_type = fetch_url(source.url, timeout)
-            html = raw_bytes.decode("utf-8", errors="ignore")
             payload["contentType"] = content_type
 
             if source.mode == "html_to_pdf":
-                pdf_url = find_pdf_link(html, source.url, source.pdf_link_regex)
+                page_bytes = raw_bytes
+                with METRICS.stage("scrape.parse", format="html_link"):
+                    pdf_url = find_pdf_link(raw_bytes.decode("utf-8", errors="ignore"), source.url, source.pdf_link_regex)
                 if not pdf_url:
                     return None, f"No PDF link matched at {source.url}"
                 final_url = pdf_url
-                pdf_bytes, pdf_ct = fetch_url(pdf_url, timeout)
+                raw_bytes, pdf_ct = fetch_url(pdf_url, timeout)
                 parsed_from_pdf = True
                 payload["resolvedPdfUrl"] = pdf_url
                 payload["pdfContentType"] = pdf_ct
-                text = extract_text_from_pdf(pdf_bytes)
-            else:
-                text = extract_html_text(html, source.text_selector)
 
-        cash_bid, basis, futures_price, excerpt = extract_bid_metrics(text, source)
+        body_sha256 = archive_body(archive, raw_bytes, "pdf" if parsed_from_pdf else "html") if archive else None
+        if body_sha256:
+            payload["rawBodySha256"] = body_sha256
+
+        text = document_text(source, raw_bytes, parsed_from_pdf)
+        with METRICS.stage("scrape.extract"):
+            cash_bid, basis, futures_price, excerpt = extract_bid_metrics(text, source)
+            delivery_basis = extract_delivery_basis(text, source) if source.delivery_basis_regex else {}
+
+        if archive and body_sha256:
+            entry: Dict[str, Any] = {
+                "fetchedAt": fetched_at.isoformat(),
+                "buyerId": buyer.id,
+                "externalSeedKey": buyer.external_seed_key,
+                "buyerName": buyer.name,
+                "source": asdict(source),
+                "url": final_url,
+                "parsedFromPdf": parsed_from_pdf,
+                "bodySha256": body_sha256,
+                "bodyBytes": len(raw_bytes),
+                "result": None if cash_bid is None else {
+                    "cashBid": cash_bid, "basis": basis, "futuresPrice": futures_price,
+                },
+            }
+            if delivery_basis and entry["result"] is not None:
+                entry["result"]["deliveryBasis"] = delivery_basis
+            if page_bytes is not None:
+                entry["pageSha256"] = archive_body(archive, page_bytes, "html")
+                entry["pageBytes"] = len(page_bytes)
+            try:
+                archive.record(entry)
+            except OSError as exc:
+                METRICS.incr("raw_archive_errors_total")
+                print(f"[archive] could not index {final_url}: {exc}", file=sys.stderr)
+
         if cash_bid is None:
             return None, f"No cash bid extracted from {final_url}"
 
         source_kind = "website_pdf" if parsed_from_pdf else "website_html"
+        if delivery_basis:
+            payload["deliveryBasis"] = delivery_basis
         obs = BidObservation(
             buyer_id=buyer.id,
             crop_type=source.crop_type,
@@ -780,6 +1437,7 @@ def scrape_bid_source(source: SourceConfig, buyer: BuyerRow, timeout: float, deb
                 "buyerCity": buyer.city,
                 "buyerState": buyer.state,
             },
+            raw_body_sha256=body_sha256,
         )
         if debug:
             print(f"[scrape] {buyer.name}: cash={obs.cash_bid} source={obs.source_kind} url={final_url}")
@@ -788,8 +1446,8 @@ def scrape_bid_source(source: SourceConfig, buyer: BuyerRow, timeout: float, deb
         return None, str(exc)
 
 
-def estimate_freight(state: str, rail_confidence: Optional[int]) -> float:
-    base = STATE_FREIGHT_ESTIMATE.get(state.upper(), 0.56)
+def estimate_freight(state: str, rail_confidence: Optional[int], lane_rate: Optional[float] = None) -> float:
+    base = lane_rate if lane_rate is not None else STATE_FREIGHT_ESTIMATE.get(state.upper(), 0.56)
     rc = rail_confidence if rail_confidence is not None else 0
     if rc < 40:
         base += 0.20
@@ -798,6 +1456,132 @@ def estimate_freight(state: str, rail_confidence: Optional[int]) -> float:
     return round(base, 4)
 
 
+def load_validation_distributions(args: argparse.Namespace, repo: Any) -> Tuple[Any, Dict[str, Any]]:
+    """The bid distributions validation checks against (cache, or rebuilt from the repository)."""
+    from bid_validation import default_cache_path, load_distributions
+
+    cache_path = args.bid_distribution_cache or default_cache_path(args.crop)
+    return load_distributions(cache_path, args.crop, repo, now_utc())
+
+
+def validate_scraped_bids(
+    args: argparse.Namespace,
+    repo: Any,
+    buyers: List[BuyerRow],
+    observations: List[BidObservation],
+    futures_price: Optional[float],
+    regional_basis: Dict[str, float],
+    loaded: Tuple[Any, Dict[str, Any]],
+    stored_before: Set[str],
+) -> Tuple[Dict[str, BidObservation], Dict[str, Any], Callable[[], int]]:
+    """Run bid_validation over this run's scrapes; returns the per-buyer best among accepted bids.
+
+    `loaded` is `load_validation_distributions`, read before this run wrote anything.
+    Quarantined observations get `quarantine_reasons`; those the writer already stored
+    are flagged with an UPDATE, the rest are inserted with it. The third value folds the
+    accepted bids into the distribution cache; call it only once the run has committed.
+    """
+    from bid_validation import default_cache_path, record_accepted, validate_observations
+
+    buyers_by_id = {str(b.id): b for b in buyers}
+    cache_path = args.bid_distribution_cache or default_cache_path(args.crop)
+    distributions, dist_meta = loaded
+    report = validate_observations(
+        observations, buyers_by_id, futures_price, regional_basis, distributions, args.validation_z
+    )
+    flagged = [(str(obs.id), reasons) for obs, reasons in report.quarantined if obs.id]
+    repo.quarantine_observations(flagged)
+    # `stored_before`: written by an earlier attempt of this run, so a rebuilt cache has them.
+    unsaved = [obs for obs in report.accepted if not obs.id or str(obs.id) not in stored_before]
+
+    def record_validated() -> int:
+        added = record_accepted(distributions, unsaved, buyers_by_id, futures_price)
+        distributions.save(cache_path)
+        return added
+
+    best: Dict[str, BidObservation] = {}
+    for obs in report.accepted:
+        prev = best.get(obs.buyer_id)
+        if prev is None or (obs.confidence_score, obs.observed_at) > (prev.confidence_score, prev.observed_at):
+            best[obs.buyer_id] = obs
+    for obs, reasons in report.quarantined:
+        METRICS.incr("bids_quarantined_total", reason=reasons[0].split(" ", 1)[0])
+        print(f"[validation] quarantined {obs.source_url or obs.buyer_id}: {'; '.join(reasons)}", file=sys.stderr)
+    return best, {**report.to_json(buyers_by_id), "distributions": dist_meta}, record_validated
+
+
+def replace_quarantined(
+    repo: Any, crop: str, latest_obs: Dict[str, BidObservation], observations: List[BidObservation]
+) -> Dict[str, BidObservation]:
+    """Stored observations, with copies of bids this run quarantined replaced by older ones.
+
+    A bid quarantined now may already be stored unflagged (scraped before validation
+    existed, or by a `--no-validate-bids` run); it must not come back as the buyer's
+    latest observation. Matches by id, or by source and values for unsaved scrapes. The
+    affected buyers are queried again without those bids, so a buyer with an earlier
+    accepted bid keeps it instead of falling back to the USDA basis.
+    """
+    quarantined = [o for o in observations if o.quarantine_reasons]
+    ids = {str(o.id) for o in quarantined if o.id}
+    bids = {bid_identity(o) for o in quarantined}
+    affected = [
+        buyer_id for buyer_id, obs in latest_obs.items() if str(obs.id) in ids or bid_identity(obs) in bids
+    ]
+    if not affected:
+        return latest_obs
+    kept = {buyer_id: obs for buyer_id, obs in latest_obs.items() if buyer_id not in affected}
+    kept.update(repo.fetch_latest_observations(crop, affected, exclude=quarantined))
+    return kept
+
+
+def persist_recommendations(
+    repo: Any, crop: str, run_id: str, ranked: List[RankedBuyer], deltas: bool, max_changed_fraction: float
+) -> Tuple[int, Dict[str, Any]]:
+    """Write the run's recommendations: in full, or as a delta against today's base run."""
+    base_run_id = repo.find_delta_base(crop) if deltas else None
+    if base_run_id is not None:
+        ranks = plan_recommendation_delta(repo.fetch_recommendation_rows(base_run_id), run_id, ranked, max_changed_fraction)
+        if ranks is not None:
+            written = repo.insert_recommendations(run_id, ranked, ranks)
+            repo.set_run_recommendations(run_id, len(ranked), base_run_id)
+            METRICS.incr("recommendation_rows_skipped_total", len(ranked) - written)
+            return written, {
+                "mode": "delta",
+                "baseRunId": str(base_run_id),
+                "changedRows": written,
+                "unchangedRows": len(ranked) - written,
+            }
+    written = repo.insert_recommendations(run_id, ranked)
+    repo.set_run_recommendations(run_id, len(ranked))
+    summary: Dict[str, Any] = {"mode": "full"}
+    if base_run_id is not None:
+        summary["reason"] = f"more than {max_changed_fraction:.0%} of rows changed since {base_run_id}"
+    return written, summary
+
+
+def basis_from_history(
+    history_dir: str,
+    crop: str,
+    usda_summary: Dict[str, Any],
+    regional_basis: Dict[str, float],
+) -> Dict[str, float]:
+    """Regional basis from the local USDA history as of today, or `regional_basis` unchanged."""
+    try:
+        from usda_history import load_basis_history
+
+        history = load_basis_history(history_dir, crop)
+        basis, meta = history.as_of(now_utc().date())
+    except Exception as exc:
+        print(f"[usda] basis history unavailable: {exc}", file=sys.stderr)
+        usda_summary["basisHistory"] = {"error": str(exc)}
+        return regional_basis
+    usda_summary["basisHistory"] = meta
+    if not meta["regions"]:
+        return regional_basis
+    usda_summary["grainSource"] = f"history ({usda_summary.get('grainSource')})"
+    return basis
+
+
 def basis_for_state(state: str, regional_basis: Dict[str, float]) -> float:
     region = STATE_TO_REGION.get(state.upper(), "Midwest")
     return float(regional_basis.get(region, FALLBACK_REGIONAL_BASIS.get(region, -0.25)))
@@ -897,28 +1681,43 @@ def compute_ml_score(model: Optional[Dict[str, Any]], raw_features: Dict[str, fl
     return total
 
 
-def build_rankings(
+def observation_for(
+    buyer_id: str, scraped_obs: Dict[str, BidObservation], latest_obs: Dict[str, BidObservation]
+) -> Optional[BidObservation]:
+    """The bid a buyer is ranked on: a fresh scrape shadows the stored row; quarantined bids never count."""
+    for obs in (scraped_obs.get(buyer_id), latest_obs.get(buyer_id)):
+        if obs is not None and not obs.quarantine_reasons:
+            return obs
+    return None
+
+
+def resolve_candidates(
     buyers: List[BuyerRow],
     latest_obs: Dict[str, BidObservation],
     scraped_obs: Dict[str, BidObservation],
     futures_price: float,
     regional_basis: Dict[str, float],
     max_bid_age_hours: float,
-    model_payload: Optional[Dict[str, Any]],
-    top_states_count: int,
-    top_n: int,
-) -> Tuple[List[RankedBuyer], List[str], Dict[str, Any]]:
-    reference = now_utc()
+    reference: datetime,
+    freight_quotes: Any = None,
+    history_features: Optional[Dict[str, Dict[str, float]]] = None,
+) -> List[RankedBuyer]:
+    """Resolve each rail-served buyer's bid and raw feature vector (unscored).
+
+    `freight_quotes` (freight_rates.FreightQuotes) prices freight from lane rates where a
+    lane covers the buyer; everyone else falls back to the state table.
+    `history_features` (bid_history, by buyer id) adds HISTORY_FEATURE_NAMES to every
+    feature vector; buyers without recent postings get the state basis and zeros.
+    """
     pre_rank: List[RankedBuyer] = []
 
-    # First pass: resolve bids + build raw features.
     for buyer in buyers:
         rail_conf = buyer.rail_confidence if buyer.rail_confidence is not None else 0
         if rail_conf < 40:
             # BNSF-focused morning list: keep strong/likely rail-served only.
             continue
 
-        obs = scraped_obs.get(buyer.id) or latest_obs.get(buyer.id)
+        obs = observation_for(buyer.id, scraped_obs, latest_obs)
         use_obs = None
         if obs:
             age_h = hours_since(obs.observed_at, reference)
@@ -935,6 +1734,7 @@ def build_rankings(
             bid_source_url = use_obs.source_url
             bid_observed_at = use_obs.observed_at
             src_conf = float(use_obs.confidence_score)
+            delivery_basis = (use_obs.raw_payload_json or {}).get("deliveryBasis") or None
         else:
             basis = state_basis
             used_futures = futures_price
@@ -944,8 +1744,10 @@ def build_rankings(
             bid_source_url = None
             bid_observed_at = None
             src_conf = 70.0
+            delivery_basis = None
 
-        freight = estimate_freight(buyer.state, buyer.rail_confidence)
+        lane = freight_quotes.lookup(buyer.city, buyer.state) if freight_quotes is not None else None
+        freight = estimate_freight(buyer.state, buyer.rail_confidence, lane[0] if lane else None)
         est_net = round(cash_bid - freight, 4) if cash_bid is not None else None
         freshness_h = hours_since(bid_observed_at, reference) if bid_observed_at else 9999.0
 
@@ -957,6 +1759,13 @@ def build_rankings(
             "bid_freshness_hours": float(min(freshness_h, 9999.0)),
             "source_confidence": float(src_conf),
         }
+        if history_features is not None:
+            history = history_features.get(str(buyer.id)) or {}
+            raw_features["basis_mean_7d"] = float(history.get("basis_mean_7d", state_basis))
+            raw_features["basis_mean_30d"] = float(history.get("basis_mean_30d", state_basis))
+            raw_features["bid_volatility_30d"] = float(history.get("bid_volatility_30d", 0.0))
+            raw_features["bid_trend_30d"] = float(history.get("bid_trend_30d", 0.0))
+            raw_features["posting_regularity_30d"] = float(history.get("posting_regularity_30d", 0.0))
 
         pre_rank.append(
             RankedBuyer(
@@ -977,11 +1786,18 @@ def build_rankings(
                 ml_score=None,
                 composite_score=0.0,
                 rationale={},
+                state_basis=float(state_basis),
+                freight_source=lane[1] if lane else None,
+                delivery_basis=delivery_basis,
             )
         )
+    return pre_rank
+
 
+def apply_scores(pre_rank: List[RankedBuyer], model_payload: Optional[Dict[str, Any]], weights: Dict[str, float]) -> None:
+    """Fill weighted/ML/composite scores and rationale in place."""
     if not pre_rank:
-        return [], [], {"evaluated": 0}
+        return
 
     # Normalize selected features for weighted deterministic score.
     cash_norm = min_max_norm([x.feature_values["cash_bid"] for x in pre_rank])
@@ -997,12 +1813,12 @@ def build_rankings(
 
     for idx, item in enumerate(pre_rank):
         contributions = {
-            "cash_bid": cash_norm[idx] * DEFAULT_WEIGHTED_SCORE["cash_bid"],
-            "estimated_net_bid": net_norm[idx] * DEFAULT_WEIGHTED_SCORE["estimated_net_bid"],
-            "rail_confidence": rail_norm[idx] * DEFAULT_WEIGHTED_SCORE["rail_confidence"],
-            "contact_verified": contact_norm[idx] * DEFAULT_WEIGHTED_SCORE["contact_verified"],
-            "bid_freshness": freshness_norm[idx] * DEFAULT_WEIGHTED_SCORE["bid_freshness"],
-            "source_confidence": source_conf_norm[idx] * DEFAULT_WEIGHTED_SCORE["source_confidence"],
+            "cash_bid": cash_norm[idx] * weights["cash_bid"],
+            "estimated_net_bid": net_norm[idx] * weights["estimated_net_bid"],
+            "rail_confidence": rail_norm[idx] * weights["rail_confidence"],
+            "contact_verified": contact_norm[idx] * weights["contact_verified"],
+            "bid_freshness": freshness_norm[idx] * weights["bid_freshness"],
+            "source_confidence": source_conf_norm[idx] * weights["source_confidence"],
         }
         weighted_score = sum(contributions.values())
         item.weighted_score = weighted_score
@@ -1028,9 +1844,22 @@ def build_rankings(
             "bidFreshnessHours": round(item.bid_freshness_hours, 2),
             "estimatedFreight": item.estimated_freight,
         }
+        if item.freight_source:
+            item.rationale["freightSource"] = item.freight_source
 
-    top_states = compute_top_states_by_cash(pre_rank, top_states_count)
-    filtered = [x for x in pre_rank if x.buyer.state in set(top_states)]
+
+def select_rankings(
+    candidates: List[RankedBuyer],
+    model_payload: Optional[Dict[str, Any]],
+    weights: Dict[str, float],
+    top_states_count: int,
+    top_n: int,
+) -> Tuple[List[RankedBuyer], List[str], Dict[str, Any]]:
+    if not candidates:
+        return [], [], {"evaluated": 0}
+
+    top_states = compute_top_states_by_cash(candidates, top_states_count)
+    filtered = [x for x in candidates if x.buyer.state in set(top_states)]
 
     filtered.sort(
         key=lambda x: (
@@ -1045,21 +1874,92 @@ def build_rankings(
     top_ranked = filtered[: max(1, top_n)]
 
     summary = {
-        "evaluated": len(pre_rank),
+        "evaluated": len(candidates),
         "returned": len(top_ranked),
         "topStates": top_states,
         "usesMlGuidance": model_payload is not None,
-        "weights": DEFAULT_WEIGHTED_SCORE,
+        "weights": weights,
     }
     return top_ranked, top_states, summary
 
 
+def score_candidates(
+    buyers: List[BuyerRow],
+    latest_obs: Dict[str, BidObservation],
+    scraped_obs: Dict[str, BidObservation],
+    futures_price: float,
+    regional_basis: Dict[str, float],
+    max_bid_age_hours: float,
+    model_payload: Optional[Dict[str, Any]],
+    weights: Optional[Dict[str, float]] = None,
+    reference: Optional[datetime] = None,
+    freight_quotes: Any = None,
+    history_features: Optional[Dict[str, Dict[str, float]]] = None,
+) -> List[RankedBuyer]:
+    """Every evaluated candidate, scored. This is what the feature store persists."""
+    candidates = resolve_candidates(
+        buyers,
+        latest_obs,
+        scraped_obs,
+        futures_price,
+        regional_basis,
+        max_bid_age_hours,
+        reference or now_utc(),
+        freight_quotes,
+        history_features,
+    )
+    apply_scores(candidates, model_payload, weights or DEFAULT_WEIGHTED_SCORE)
+    return candidates
+
+
+def build_rankings(
+    buyers: List[BuyerRow],
+    latest_obs: Dict[str, BidObservation],
+    scraped_obs: Dict[str, BidObservation],
+    futures_price: float,
+    regional_basis: Dict[str, float],
+    max_bid_age_hours: float,
+    model_payload: Optional[Dict[str, Any]],
+    top_states_count: int,
+    top_n: int,
+    weights: Optional[Dict[str, float]] = None,
+    reference: Optional[datetime] = None,
+    freight_quotes: Any = None,
+    history_features: Optional[Dict[str, Dict[str, float]]] = None,
+) -> Tuple[List[RankedBuyer], List[str], Dict[str, Any]]:
+    # `weights` / `reference` default to production behaviour; backtests override both
+    # to replay a historical morning under alternative scoring. `freight_quotes` are the
+    # lane rates in force on the reference date (None: state table). `history_features`
+    # are the optional rolling-window features from bid_history.
+    weights = weights or DEFAULT_WEIGHTED_SCORE
+    candidates = score_candidates(
+        buyers,
+        latest_obs,
+        scraped_obs,
+        futures_price,
+        regional_basis,
+        max_bid_age_hours,
+        model_payload,
+        weights=weights,
+        reference=reference,
+        freight_quotes=freight_quotes,
+        history_features=history_features,
+    )
+    return select_rankings(candidates, model_payload, weights, top_states_count, top_n)
+
+
 def scrape_observations_for_buyers(
     buyers: List[BuyerRow],
     configs: List[SourceConfig],
     timeout: float,
     debug: bool,
+    archive: Any = None,
+    on_observation: Optional[Callable[[BidObservation], None]] = None,
 ) -> Tuple[List[BidObservation], Dict[str, BidObservation], Dict[str, Any]]:
+    """Scrape every configured source: every observation, and the per-buyer best.
+
+    `on_observation` sees each observation as soon as it is parsed (the observation writer).
+    """
     by_key = {b.external_seed_key: b for b in buyers if b.external_seed_key}
     grouped: Dict[str, List[SourceConfig]] = {}
     for cfg in configs:
@@ -1069,6 +1969,7 @@ def scrape_observations_for_buyers(
     best_for_buyer: Dict[str, BidObservation] = {}
     errors: List[str] = []
     attempted = 0
+    REGEX_GUARD.reset_stats()
     succeeded = 0
 
     for external_key, cfgs in grouped.items():
@@ -1078,7 +1979,9 @@ def scrape_observations_for_buyers(
             continue
         for cfg in cfgs:
             attempted += 1
-            obs, err = scrape_bid_source(cfg, buyer, timeout, debug=debug)
+            with METRICS.stage("scrape.source", buyer=buyer.name, mode=cfg.mode):
+                obs, err = scrape_bid_source(cfg, buyer, timeout, debug=debug, archive=archive)
+            METRICS.incr("scrape_sources_total", result="error" if err else "ok")
             if err:
                 errors.append(f"{buyer.name}: {err}")
                 continue
@@ -1086,6 +1989,8 @@ def scrape_observations_for_buyers(
                 continue
             succeeded += 1
             observations.append(obs)
+            if on_observation is not None:
+                on_observation(obs)
             prev = best_for_buyer.get(buyer.id)
             if prev is None or (obs.confidence_score, obs.observed_at) > (prev.confidence_score, prev.observed_at):
                 best_for_buyer[buyer.id] = obs
@@ -1096,10 +2001,135 @@ def scrape_observations_for_buyers(
         "succeeded": succeeded,
         "failed": max(0, attempted - succeeded),
         "sampleErrors": errors[:15],
+        "regexEngine": REGEX_GUARD.engine,
+        "slowPatterns": REGEX_GUARD.slow_patterns(),
     }
+    if archive is not None:
+        summary["rawArchive"] = archive.root
     return observations, best_for_buyer, summary
 
 
+# Model score change below which a reused run still counts as the same ranking; scores
+# are stored to 4 decimals.
+FINGERPRINT_SCORE_TOLERANCE = 1e-4
+
+
+def model_freshness_step_hours(model_payload: Optional[Dict[str, Any]]) -> Optional[float]:
+    """Bid age (hours) that moves the model score by at most FINGERPRINT_SCORE_TOLERANCE.
+
+    None when there is no model, or it has no `bid_freshness_hours` coefficient. The
+    logistic link only shrinks the change (slope <= 1/4), so the linear bound is safe.
+    """
+    coef = float(((model_payload or {}).get("coefficients") or {}).get("bid_freshness_hours") or 0.0)
+    return FINGERPRINT_SCORE_TOLERANCE / abs(coef) if coef else None
+
+
+def compute_input_fingerprint(
+    buyers: List[BuyerRow],
+    latest_obs: Dict[str, BidObservation],
+    scraped_best_map: Dict[str, BidObservation],
+    futures_price: float,
+    regional_basis: Dict[str, float],
+    weights: Dict[str, float],
+    model_payload: Optional[Dict[str, Any]],
+    config: Dict[str, Any],
+    reference: datetime,
+) -> str:
+    """Stable hash over everything `build_rankings` reads.
+
+    Buyers contribute (id, row_version). Observations contribute what ranking reads from
+    them, never their id: every run stores its scrape as new rows, so the same bid comes
+    back under a new id whether it is scraped again or read from the table. Time only
+    matters through the freshness bucket and the max-age cutoff, so those are hashed
+    instead of raw ages or observed_at; a model that reads the raw age
+    (`bid_freshness_hours`) also gets the age, in steps of its sensitivity.
+    """
+    max_age = float(config.get("maxBidAgeHours") or 0.0)
+    age_step = model_freshness_step_hours(model_payload)
+
+    def number(value: Any) -> Optional[float]:
+        # Stored rows come back as NUMERIC (Decimal); fresh scrapes are floats.
+        return round(float(value), 4) if value is not None else None
+
+    def obs_key(obs: Optional[BidObservation]) -> List[Any]:
+        if obs is None:
+            return []
+        age_h = hours_since(obs.observed_at, reference)
+        return [
+            obs.source_kind,
+            obs.source_label,
+            obs.source_url,
+            number(obs.cash_bid),
+            number(obs.basis),
+            number(obs.futures_price),
+            int(obs.confidence_score),
+            (obs.raw_payload_json or {}).get("deliveryBasis") or None,
+            age_h <= max_age,
+            freshness_score(age_h),
+            math.floor(min(age_h, 9999.0) / age_step) if age_step else None,
+        ]
+
+    h = hashlib.sha256()
+    for buyer in sorted(buyers, key=lambda b: str(b.id)):
+        h.update(
+            json.dumps(
+                [
+                    str(buyer.id),
+                    buyer.row_version.isoformat() if buyer.row_version else None,
+                    obs_key(observation_for(buyer.id, scraped_best_map, latest_obs)),
+                ],
+                default=str,
+            ).encode("utf-8")
+        )
+    h.update(
+        json.dumps(
+            {
+                "futuresPrice": futures_price,
+                "regionalBasis": regional_basis,
+                "weights": weights,
+                "model": model_payload,
+                "config": config,
+            },
+            sort_keys=True,
+            default=str,
+        ).encode("utf-8")
+    )
+    return h.hexdigest()
+
+
+StageFn = Callable[[Dict[str, Any]], Any]
+
+
+def run_stage_graph(stages: Dict[str, Tuple[List[str], StageFn]], max_workers: int = 4) -> Dict[str, Any]:
+    """Run `{name: (deps, fn)}` on a thread pool, starting each stage once its deps finish.
+
+    Each fn receives the results dict (only its deps are guaranteed present) and is
+    timed as a METRICS stage of the same name. The first stage error propagates after
+    in-flight stages settle.
+    """
+
+    def timed(name: str, fn: StageFn, current: Dict[str, Any]) -> Any:
+        with METRICS.stage(name):
+            return fn(current)
+
+    results: Dict[str, Any] = {}
+    pending = dict(stages)
+    running: Dict[Any, str] = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while pending or running:
+            for name, (deps, fn) in list(pending.items()):
+                if all(dep in results for dep in deps):
+                    running[pool.submit(timed, name, fn, results)] = name
+                    del pending[name]
+            if not running:
+                raise RuntimeError(f"Stage graph cannot progress; unresolved deps for {sorted(pending)}")
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for fut in done:
+                name = running.pop(fut)
+                results[name] = fut.result()
+    return results
+
+
 def print_rank_preview(ranked: List[RankedBuyer], top_states: List[str]) -> None:
     print(f"Top states: {', '.join(top_states) if top_states else '(none)'}")
     for item in ranked[:15]:
@@ -1111,11 +2141,163 @@ def print_rank_preview(ranked: List[RankedBuyer], top_states: List[str]) -> None
         )
 
 
+def export_metrics(args: argparse.Namespace) -> None:
+    """Write the Prometheus textfile / OTLP spans if configured. Never fails the run."""
+    labels = {"crop": args.crop}
+    try:
+        if args.metrics_textfile:
+            METRICS.write_prometheus_textfile(args.metrics_textfile, labels)
+        if args.trace_file:
+            METRICS.write_otlp_json(args.trace_file, {"cornintel.crop": args.crop})
+    except Exception as exc:
+        print(f"[metrics] export failed: {exc}", file=sys.stderr)
+
+
+def open_repository(args: argparse.Namespace):
+    """Storage backend for this run (see ranker_repository)."""
+    import ranker_repository
+
+    if args.backend == "memory":
+        return ranker_repository.InMemoryRepository.from_seed(
+            args.seed_file or ranker_repository.DEFAULT_SEED_FILE,
+            args.generated_buyers_file or ranker_repository.DEFAULT_GENERATED_BUYERS_FILE,
+        )
+    return ranker_repository.PostgresRepository.connect(args.database_url)
+
+
+def finish_memory_profile(args: argparse.Namespace, profiler: Any) -> None:
+    """Stop tracemalloc, write the --profile-memory report and flag peak regressions."""
+    from memory_profile import compare_reports, load_report, print_report, write_report
+
+    profiler.stop()
+    report = profiler.report({"crop": args.crop, "limit": args.limit, "replay": args.replay})
+    try:
+        if args.memory_baseline:
+            report["regressions"] = compare_reports(
+                report, load_report(args.memory_baseline), args.memory_regression_pct
+            )
+        write_report(args.profile_memory, report)
+    except Exception as exc:
+        print(f"[memory] report failed: {exc}", file=sys.stderr)
+    print_report(report)
+
+
+def dry_run_payload(top_states: List[str], summary_json: Dict[str, Any], ranked: List[RankedBuyer]) -> Dict[str, Any]:
+    return {
+        "dryRun": True,
+        "topStates": top_states,
+        "summary": summary_json,
+        "preview": [
+            {
+                "rank": i + 1,
+                "buyer": f"{item.buyer.name} ({item.buyer.state})",
+                "cashBid": item.cash_bid,
+                "estimatedNetBid": item.estimated_net_bid,
+                "railConfidence": item.buyer.rail_confidence,
+                "source": item.bid_source_kind,
+                "score": round(item.composite_score, 4),
+                **({"rankUncertainty": item.rationale["rankUncertainty"]} if "rankUncertainty" in item.rationale else {}),
+            }
+            for i, item in enumerate(ranked[:15])
+        ],
+    }
+
+
+def replay_snapshot(path: str) -> int:
+    """Rank straight from a run snapshot: no DB, API or website access."""
+    from run_snapshot import read_snapshot
+
+    with METRICS.stage("load_snapshot"):
+        snap = read_snapshot(path)
+    config = snap.config
+    freight_quotes = None
+    if config.get("freight"):
+        from freight_rates import FreightQuotes
+
+        freight_quotes = FreightQuotes.from_json(config["freight"]["quotes"])
+    top_n = int(config.get("topN") or 30)
+    with METRICS.stage("ranking"):
+        candidates = score_candidates(
+            buyers=snap.buyers,
+            latest_obs=snap.latest_obs,
+            scraped_obs=snap.scraped_best_map,
+            futures_price=snap.futures_price,
+            regional_basis=snap.regional_basis,
+            max_bid_age_hours=float(config.get("maxBidAgeHours") or 36.0),
+            model_payload=snap.model_payload,
+            reference=snap.captured_at,
+            freight_quotes=freight_quotes,
+            history_features=snap.history_features,
+        )
+        ranked, top_states, ranking_summary = select_rankings(
+            candidates,
+            snap.model_payload,
+            DEFAULT_WEIGHTED_SCORE,
+            top_states_count=int(config.get("topStates") or 3),
+            top_n=top_n,
+        )
+    if config.get("forwardCurve"):
+        from forward_curve import ForwardCurve, rank_delivery_months
+
+        with METRICS.stage("ranking.delivery_months"):
+            delivery_rankings = rank_delivery_months(
+                candidates,
+                ForwardCurve.from_json(config["forwardCurve"]),
+                config["forwardCurve"]["deliveryMonths"],
+                snap.model_payload,
+                DEFAULT_WEIGHTED_SCORE,
+                int(config.get("topStates") or 3),
+                top_n,
+            )
+        ranking_summary["deliveryMonths"] = {r.delivery_month: r.to_json() for r in delivery_rankings}
+    uncertainty = config.get("rankUncertainty")
+    if uncertainty:
+        from rank_uncertainty import rank_uncertainty
+
+        with METRICS.stage("ranking.uncertainty", samples=uncertainty["samples"]):
+            ranking_summary["rankUncertainty"] = rank_uncertainty(
+                candidates,
+                ranked,
+                top_states,
+                snap.model_payload,
+                DEFAULT_WEIGHTED_SCORE,
+                top_n=top_n,
+                samples=int(uncertainty["samples"]),
+                seed=int(uncertainty.get("seed") or 0),
+            )
+    summary_json = {
+        **ranking_summary,
+        "futuresPrice": snap.futures_price,
+        "regionalBasis": snap.regional_basis,
+        "replayOf": path,
+        "capturedAt": snap.captured_at.isoformat(),
+        "buyerCountInput": len(snap.buyers),
+        "scrapedObservationsNew": len(snap.scraped_obs_list),
+    }
+    print(json.dumps(dry_run_payload(top_states, summary_json, ranked), indent=2))
+    return 0 if ranked else 1
+
+
 def main() -> int:
     args = parse_args()
+    METRICS.reset()
+
+    profiler = None
+    if args.profile_memory:
+        from memory_profile import StageMemoryProfiler
 
-    if not args.database_url:
-        print("DATABASE_URL is required (or pass --database-url)", file=sys.stderr)
+        profiler = StageMemoryProfiler()
+        profiler.start()
+
+    if args.replay:
+        try:
+            return replay_snapshot(args.replay)
+        finally:
+            if profiler is not None:
+                finish_memory_profile(args, profiler)
+
+    if args.backend == "postgres" and not args.database_url:
+        print("DATABASE_URL is required (or pass --database-url, or --backend memory)", file=sys.stderr)
         return 2
 
     if not args.skip_scrape and args.bid_source_config and not os.path.exists(args.bid_source_config):
@@ -1123,100 +2305,481 @@ def main() -> int:
         return 2
 
     model_payload = load_ml_coefficients(args.model_coefficients_file)
-    source_configs = load_source_configs(args.bid_source_config, args.crop) if (args.bid_source_config and not args.skip_scrape) else []
+    origins = None
+    if args.origins_file:
+        from multi_origin import load_origins
+
+        origins = load_origins(args.origins_file)
+    spatial_scope = None
+    if args.radius_center or args.radius_miles is not None or args.corridor_file:
+        from spatial_index import scope_from_args
+
+        try:
+            spatial_scope = scope_from_args(args)
+        except (OSError, ValueError) as exc:
+            print(f"Invalid spatial scope: {exc}", file=sys.stderr)
+            return 2
+    REGEX_GUARD.configure(budget_seconds=args.regex_timeout_ms / 1000.0)
+    source_config_errors: List[str] = []
+    source_configs = (
+        load_source_configs(args.bid_source_config, args.crop, source_config_errors)
+        if (args.bid_source_config and not args.skip_scrape)
+        else []
+    )
+
+    import run_checkpoints as ckpt
+
+    checkpoint_root = args.checkpoint_dir or ckpt.DEFAULT_CHECKPOINT_ROOT
+    resumed_stages: List[str] = []
+    if args.resume:
+        checkpoints = ckpt.CheckpointStore.open(checkpoint_root, args.resume)
+        if checkpoints.manifest.get("args", {}).get("crop") != args.crop:
+            print(f"Run {args.resume} was started for a different crop; refusing to resume.", file=sys.stderr)
+            return 2
+        resumed_stages = list(checkpoints.manifest.get("completed", []))
+        if checkpoints.is_complete("persist"):
+            print(json.dumps({"runKey": args.resume, **checkpoints.load("persist")}, indent=2, default=str))
+            return 0
+    else:
+        checkpoints = ckpt.CheckpointStore.create(
+            checkpoint_root,
+            {k: v for k, v in vars(args).items() if k != "database_url"},
+        )
+        ckpt.prune_checkpoints(checkpoint_root, keep=checkpoints.run_key)
+    print(f"[checkpoint] run key {checkpoints.run_key} ({checkpoints.path})", file=sys.stderr)
+
+    usda_cache = None
+    if not args.no_usda_cache:
+        from usda_cache import DEFAULT_USDA_CACHE_PATH, MarketContextCache
+
+        usda_cache = MarketContextCache(
+            args.usda_cache_file or DEFAULT_USDA_CACHE_PATH,
+            ttl_seconds=args.usda_cache_ttl_minutes * 60.0,
+            refresh_after_seconds=args.usda_cache_refresh_minutes * 60.0,
+            max_stale_seconds=args.usda_cache_max_stale_hours * 3600.0,
+        )
+
+    raw_archive = None
+    if args.raw_archive_dir and source_configs and not args.skip_scrape:
+        from raw_archive import RawArchive
+
+        raw_archive = RawArchive(args.raw_archive_dir)
 
-    conn = None
+    repo = None
+    writer = None
     run_id: Optional[str] = None
+    # Observations inserted in the run's own transaction (not by the writer thread).
+    run_observations: List[BidObservation] = []
     try:
-        conn = connect_db(args.database_url)
-        conn.autocommit = False
+        repo = open_repository(args)
+
+        scrape_enabled = bool(source_configs) and not args.skip_scrape
+
+        spatial_summary: Dict[str, Any] = {}
+
+        def fetch_buyers_in_scope() -> List[BuyerRow]:
+            if spatial_scope is None:
+                return repo.fetch_buyers(args.crop, args.verified_only, args.limit)
+            from spatial_index import index_for
+
+            # The box is a prefilter; `--limit` applies to the buyers in the exact scope.
+            fetched = repo.fetch_buyers(args.crop, args.verified_only, None, spatial_scope.bbox())
+            started = time.perf_counter()
+            index_for(fetched)
+            indexed = time.perf_counter()
+            selected = spatial_scope.select(fetched)[: buyer_limit(args.limit)]
+            spatial_summary.update({
+                "buyersInBox": len(fetched),
+                "buyersInScope": len(selected),
+                "indexMs": round((indexed - started) * 1000.0, 3),
+                "queryMs": round((time.perf_counter() - indexed) * 1000.0, 3),
+            })
+            return selected
+
+        empty_scrape: Tuple[List[BidObservation], Dict[str, BidObservation], Dict[str, Any]] = (
+            [],
+            {},
+            {"configuredSourceCount": 0, "attempted": 0, "succeeded": 0, "failed": 0},
+        )
+
+        validate_bids = scrape_enabled and not args.no_validate_bids
+        # Observations written by an earlier attempt of this run (see run_checkpoints).
+        written_earlier = checkpoints.is_complete("observations")
+        # Each scraped observation goes to a writer thread as soon as it is parsed, and is
+        # committed in small batches on the writer's own session: a crash mid-scrape keeps
+        # the bids fetched so far. Validation runs once the scrape is done and flags the
+        # quarantined rows with an UPDATE.
+        streamed: List[BidObservation] = []
+        scrape_deps = ["fetch_buyers"]
+        if scrape_enabled and not args.dry_run and not args.no_stream_observations and not checkpoints.is_complete("scrape"):
+            from observation_writer import ObservationWriter
+
+            writer = ObservationWriter(
+                repo.open_session(),
+                batch_size=args.observation_batch_size,
+                queue_size=args.observation_queue_size,
+            ).start()
+
+            def stream_observation(obs: BidObservation) -> None:
+                streamed.append(obs)
+                writer.submit(obs)
+
+            def close_writer() -> Dict[str, Any]:
+                stats = writer.close()
+                # Indexed like the scrape checkpoint, which exists only once the scrape finished.
+                if checkpoints.is_complete("scrape") and not checkpoints.is_complete("observations"):
+                    checkpoints.save("observations", ckpt.encode_written(streamed, writer.failed))
+                return stats
+
+            # The latest-observation query and the distribution rebuild must not see this
+            # run's rows, so they finish before the scrape starts writing.
+            scrape_deps = ["fetch_buyers", "latest_observations"] + (["bid_distributions"] if validate_bids else [])
+
+        # Critical path is buyers -> scrape; the USDA fetch overlaps with it, and so do the
+        # latest-observation query and distribution load when nothing is streamed. Memory
+        # profiling runs the graph on one worker so tracemalloc peaks stay per-stage.
+        stages: Dict[str, Tuple[List[str], StageFn]] = {
+            "fetch_buyers": ([], lambda r: checkpoints.stage(
+                "buyers",
+                fetch_buyers_in_scope,
+                ckpt.encode_buyers,
+                ckpt.decode_buyers,
+            )),
+            "latest_observations": (["fetch_buyers"], lambda r: checkpoints.stage(
+                "latest_observations",
+                lambda: repo.fetch_latest_observations(args.crop, [b.id for b in r["fetch_buyers"]]),
+                lambda m: ckpt.encode_observations(list(m.values())),
+                lambda raw: {o.buyer_id: o for o in ckpt.decode_observations(raw)},
+            )),
+            "scrape": (scrape_deps, lambda r: checkpoints.stage(
+                "scrape",
+                lambda: scrape_observations_for_buyers(
+                    r["fetch_buyers"],
+                    source_configs,
+                    timeout=args.http_timeout,
+                    debug=args.debug,
+                    archive=raw_archive,
+                    on_observation=stream_observation if writer is not None else None,
+                ),
+                ckpt.encode_scrape,
+                ckpt.decode_scrape,
+            ) if scrape_enabled and r["fetch_buyers"] else empty_scrape),
+            "usda": ([], lambda r: checkpoints.stage(
+                "usda",
+                lambda: fetch_usda_market_context(args.api_base_url, args.http_timeout, args.crop, cache=usda_cache),
+                list,
+                tuple,
+            )),
+        }
+        if validate_bids:
+            stages["bid_distributions"] = ([], lambda r: load_validation_distributions(args, repo))
+        stage_results = run_stage_graph(stages, max_workers=1 if profiler is not None else 4)
+        if writer is not None:
+            stage_results["scrape"][2]["observationWriter"] = close_writer()
 
-        buyers = fetch_buyers(conn, args.crop, args.verified_only, args.limit)
+        buyers: List[BuyerRow] = stage_results["fetch_buyers"]
         if not buyers:
             print("No buyers found for morning ranking scope.", file=sys.stderr)
             return 1
-
-        latest_obs = fetch_latest_observations(conn, args.crop, [b.id for b in buyers])
-
-        scraped_obs_list: List[BidObservation] = []
-        scraped_best_map: Dict[str, BidObservation] = {}
-        scrape_summary: Dict[str, Any] = {"configuredSourceCount": 0, "attempted": 0, "succeeded": 0, "failed": 0}
-        if source_configs and not args.skip_scrape:
-            scraped_obs_list, scraped_best_map, scrape_summary = scrape_observations_for_buyers(
-                buyers,
-                source_configs,
-                timeout=args.http_timeout,
-                debug=args.debug,
+        latest_obs: Dict[str, BidObservation] = stage_results["latest_observations"]
+        scraped_obs_list, scraped_best_map, scrape_summary = stage_results["scrape"]
+        futures_price, regional_basis, usda_summary = stage_results["usda"]
+        if args.basis_history_dir and str(usda_summary.get("grainSource", "")).startswith("fallback"):
+            regional_basis = basis_from_history(args.basis_history_dir, args.crop, usda_summary, regional_basis)
+        scraped_new = int(scrape_summary.get("succeeded", len(scraped_obs_list)))
+        # What the writer did not store (failed batches, or everything when not streaming)
+        # goes in with the run's own transaction.
+        pending_observations = scraped_obs_list
+        if checkpoints.is_complete("observations"):
+            pending_observations = ckpt.restore_written(scraped_obs_list, checkpoints.load("observations"))
+        stored_before = {str(o.id) for o in scraped_obs_list if o.id} if written_earlier else set()
+        record_validated: Callable[[], int] = lambda: 0
+        if validate_bids and scraped_obs_list:
+            with METRICS.stage("validate_bids"):
+                # The fallback futures price is a placeholder, not a reference to check bids against.
+                trusted_futures = None if usda_summary.get("futuresSource", "").startswith("fallback") else futures_price
+                scraped_best_map, scrape_summary["validation"], record_validated = validate_scraped_bids(
+                    args,
+                    repo,
+                    buyers,
+                    scraped_obs_list,
+                    trusted_futures,
+                    regional_basis,
+                    stage_results["bid_distributions"],
+                    stored_before,
+                )
+            if not args.dry_run:
+                # Streamed rows are already committed; flag them now rather than with the run.
+                repo.commit()
+            latest_obs = replace_quarantined(repo, args.crop, latest_obs, scraped_obs_list)
+
+        run_config = {
+            "crop": args.crop,
+            "verifiedOnly": bool(args.verified_only),
+            "maxBidAgeHours": args.max_bid_age_hours,
+            "topStates": args.top_states,
+            "topN": args.top_n,
+            "limit": args.limit,
+            "skipScrape": bool(args.skip_scrape),
+            "bidSourceConfig": args.bid_source_config,
+        }
+        if origins:
+            # Part of the input fingerprint: a reused run must have the same origin lists.
+            run_config["origins"] = [asdict(o) for o in origins]
+        if spatial_scope is not None:
+            run_config["spatialScope"] = spatial_scope.to_json()
+        if args.rank_uncertainty > 0:
+            # Bands are part of the persisted rationale, so a reused run must have them too.
+            run_config["rankUncertainty"] = {"samples": args.rank_uncertainty, "seed": args.rank_uncertainty_seed}
+        reference = now_utc()
+        freight_quotes = None
+        if args.freight_rates:
+            from freight_rates import load_freight_rates
+
+            with METRICS.stage("freight_rates"):
+                freight_table = load_freight_rates(args.freight_rates, repo)
+                freight_quotes = freight_table.quotes(args.freight_origin, args.freight_car_type, reference.date())
+            # The resolved rates (not just the source) go into the fingerprint and snapshot,
+            # so a new tariff, or a lane expiring overnight, forces a re-rank.
+            run_config["freight"] = {
+                "source": args.freight_rates,
+                "lanes": freight_table.lane_count,
+                "quotes": freight_quotes.to_json(),
+            }
+        forward_curve = None
+        delivery_months: List[str] = []
+        if args.forward_curve:
+            from forward_curve import load_forward_curve, parse_delivery_months
+
+            with METRICS.stage("forward_curve"):
+                forward_curve, curve_meta = load_forward_curve(args.forward_curve, args.http_timeout, cache=usda_cache)
+            delivery_months = parse_delivery_months(args.delivery_months, forward_curve)
+            past_curve = [m for m in delivery_months if forward_curve.contract_for(m) is None]
+            if past_curve:
+                print(f"[forward-curve] no contract on or after {', '.join(past_curve)}; skipping", file=sys.stderr)
+                curve_meta = {**curve_meta, "monthsPastCurve": past_curve}
+            usda_summary["forwardCurve"] = curve_meta
+            # The prices themselves: a new settlement forces a re-rank.
+            run_config["forwardCurve"] = {**forward_curve.to_json(), "deliveryMonths": delivery_months}
+        history_features = None
+        history_summary: Dict[str, Any] = {}
+        if args.history_features:
+            from bid_history import default_cache_path, load_bid_history
+
+            cache_path = args.bid_history_cache or default_cache_path(args.crop)
+            with METRICS.stage("bid_history"):
+                history = load_bid_history(cache_path, args.crop)
+                history_summary = history.refresh(repo, reference)
+                # Streamed rows the refresh already read come back as duplicates and are skipped.
+                history_summary["scrapedAdded"] = history.add_observations(
+                    [o for o in scraped_obs_list if not o.quarantine_reasons]
+                )
+                history_features = history.features_for([b.id for b in buyers], reference)
+                history.save(cache_path)
+            history_summary["buyersWithHistory"] = len(history_features)
+            # Fingerprint the features themselves: new history alone must force a re-rank.
+            run_config["historyFeatures"] = hashlib.sha256(
+                json.dumps(history_features, sort_keys=True).encode("utf-8")
+            ).hexdigest()
+        source_summary = {
+            "usda": usda_summary,
+            "scrape": scrape_summary,
+            "config": run_config,
+        }
+        if history_summary:
+            source_summary["bidHistory"] = history_summary
+        if source_config_errors:
+            source_summary["sourceConfigErrors"] = source_config_errors
+
+        if args.dump_snapshot:
+            from run_snapshot import RunSnapshot, write_snapshot
+
+            write_snapshot(
+                args.dump_snapshot,
+                RunSnapshot(
+                    captured_at=reference,
+                    buyers=buyers,
+                    latest_obs=latest_obs,
+                    scraped_obs_list=scraped_obs_list,
+                    scraped_best_map=scraped_best_map,
+                    futures_price=futures_price,
+                    regional_basis=regional_basis,
+                    usda_summary=usda_summary,
+                    model_payload=model_payload,
+                    config=run_config,
+                    history_features=history_features,
+                ),
             )
 
-        futures_price, regional_basis, usda_summary = fetch_usda_market_context(args.api_base_url, args.http_timeout, args.crop)
-
-        ranked, top_states, ranking_summary = build_rankings(
-            buyers=buyers,
-            latest_obs=latest_obs,
-            scraped_obs=scraped_best_map,
-            futures_price=futures_price,
-            regional_basis=regional_basis,
-            max_bid_age_hours=args.max_bid_age_hours,
-            model_payload=model_payload,
-            top_states_count=args.top_states,
-            top_n=args.top_n,
+        input_fingerprint = compute_input_fingerprint(
+            buyers,
+            latest_obs,
+            scraped_best_map,
+            futures_price,
+            regional_basis,
+            DEFAULT_WEIGHTED_SCORE,
+            model_payload,
+            run_config,
+            reference,
         )
 
+        def write_observations() -> int:
+            streamed_count = int(scrape_summary["observationWriter"]["inserted"]) if writer is not None else 0
+            inserted = repo.insert_observations(pending_observations)
+            run_observations.extend(pending_observations)
+            return streamed_count + inserted
+
+        prior = None if args.no_reuse else repo.find_reusable_run(args.crop, input_fingerprint)
+        if prior and not args.dry_run:
+            # Inputs unchanged: record a pointer run instead of re-ranking and re-writing rows.
+            source_run_id = prior["source_run_id"]
+            run_id = repo.create_run(args.crop, input_fingerprint, source_run_id)
+            inserted_observations = write_observations()
+            summary_json = {
+                **(prior.get("summary_json") or {}),
+                "runDate": date.today().isoformat(),
+                "inputFingerprint": input_fingerprint,
+                "reusedFromRunId": str(source_run_id),
+                "scrapedObservationsNew": scraped_new,
+                "scrapedObservationsInserted": inserted_observations,
+                "recommendationsInserted": 0,
+                "candidateFeaturesInserted": 0,
+                "metrics": METRICS.summary(),
+            }
+            top_states = list(prior.get("top_states") or [])
+            repo.finalize_run(run_id, "success", top_states, source_summary, summary_json)
+            repo.commit()
+            record_validated()
+            checkpoints.save("persist", {"runId": run_id, "status": "success", "topStates": top_states})
+            print(json.dumps({
+                "runId": run_id,
+                "status": "success",
+                "topStates": top_states,
+                "summary": summary_json,
+                "sourceSummary": source_summary,
+            }, indent=2, default=str))
+            return 0
+
+        with METRICS.stage("ranking"):
+            candidates = score_candidates(
+                buyers=buyers,
+                latest_obs=latest_obs,
+                scraped_obs=scraped_best_map,
+                futures_price=futures_price,
+                regional_basis=regional_basis,
+                max_bid_age_hours=args.max_bid_age_hours,
+                model_payload=model_payload,
+                reference=reference,
+                freight_quotes=freight_quotes,
+                history_features=history_features,
+            )
+            ranked, top_states, ranking_summary = select_rankings(
+                candidates,
+                model_payload,
+                DEFAULT_WEIGHTED_SCORE,
+                top_states_count=args.top_states,
+                top_n=args.top_n,
+            )
+        delivery_rankings = None
+        if forward_curve is not None:
+            from forward_curve import rank_delivery_months
+
+            with METRICS.stage("ranking.delivery_months", months=len(delivery_months)):
+                delivery_rankings = rank_delivery_months(
+                    candidates, forward_curve, delivery_months, model_payload, DEFAULT_WEIGHTED_SCORE, args.top_states, args.top_n
+                )
+        uncertainty_summary = None
+        if args.rank_uncertainty > 0:
+            from rank_uncertainty import rank_uncertainty
+
+            with METRICS.stage("ranking.uncertainty", samples=args.rank_uncertainty):
+                uncertainty_summary = rank_uncertainty(
+                    candidates,
+                    ranked,
+                    top_states,
+                    model_payload,
+                    DEFAULT_WEIGHTED_SCORE,
+                    top_n=args.top_n,
+                    samples=args.rank_uncertainty,
+                    seed=args.rank_uncertainty_seed,
+                )
+        origin_rankings = None
+        if origins:
+            from multi_origin import rank_origins
+
+            with METRICS.stage("ranking.origins", origins=len(origins)):
+                origin_rankings = rank_origins(
+                    candidates, origins, model_payload, DEFAULT_WEIGHTED_SCORE, args.top_states, args.top_n
+                )
+
         if not ranked:
             print("No ranked buyers produced (check rail confidence/contact scope).", file=sys.stderr)
             return 1
 
         status = "success"
-        source_summary = {
-            "usda": usda_summary,
-            "scrape": scrape_summary,
-            "config": {
-                "crop": args.crop,
-                "verifiedOnly": bool(args.verified_only),
-                "maxBidAgeHours": args.max_bid_age_hours,
-                "topStates": args.top_states,
-                "topN": args.top_n,
-                "skipScrape": bool(args.skip_scrape),
-                "bidSourceConfig": args.bid_source_config,
-            },
-        }
         summary_json = {
             **ranking_summary,
             "futuresPrice": futures_price,
+            "regionalBasis": regional_basis,
             "runDate": date.today().isoformat(),
             "buyerCountInput": len(buyers),
-            "scrapedObservationsNew": len(scraped_obs_list),
+            "scrapedObservationsNew": scraped_new,
+            "inputFingerprint": input_fingerprint,
+            "checkpointRunKey": checkpoints.run_key,
+            "resumedStages": resumed_stages,
         }
+        if prior:
+            summary_json["reusableRunId"] = str(prior["source_run_id"])
+        if uncertainty_summary is not None:
+            summary_json["rankUncertainty"] = uncertainty_summary
+        if delivery_rankings is not None:
+            summary_json["deliveryMonths"] = {r.delivery_month: r.to_json() for r in delivery_rankings}
+        if origin_rankings is not None:
+            summary_json["origins"] = [r.to_json() for r in origin_rankings]
+        if spatial_scope is not None:
+            scope_json = spatial_scope.to_json()
+            if "corridor" in scope_json:
+                scope_json["corridor"] = {k: v for k, v in scope_json["corridor"].items() if k != "lines"}
+            summary_json["spatialScope"] = {**scope_json, **spatial_summary}
+        if freight_quotes is not None:
+            summary_json["freight"] = {
+                "source": args.freight_rates,
+                "originStation": freight_quotes.origin_station,
+                "carType": freight_quotes.car_type,
+                "lanesInForce": len(freight_quotes),
+                "laneRatedBuyers": sum(1 for c in candidates if c.freight_source),
+            }
+        if history_features is not None:
+            summary_json["historyFeatures"] = {
+                "mode": history_summary.get("mode"),
+                "buyersWithHistory": len(history_features),
+            }
 
         if args.dry_run:
-            print(json.dumps({
-                "dryRun": True,
-                "topStates": top_states,
-                "summary": summary_json,
-                "preview": [
-                    {
-                        "rank": i + 1,
-                        "buyer": f"{item.buyer.name} ({item.buyer.state})",
-                        "cashBid": item.cash_bid,
-                        "estimatedNetBid": item.estimated_net_bid,
-                        "railConfidence": item.buyer.rail_confidence,
-                        "source": item.bid_source_kind,
-                        "score": round(item.composite_score, 4),
-                    }
-                    for i, item in enumerate(ranked[:15])
-                ],
-            }, indent=2))
-            conn.rollback()
+            summary_json["metrics"] = METRICS.summary()
+            print(json.dumps(dry_run_payload(top_states, summary_json, ranked), indent=2))
+            repo.rollback()
             return 0
 
-        run_id = create_run(conn, args.crop)
-        inserted_observations = insert_observations(conn, scraped_obs_list)
-        inserted_recommendations = insert_recommendations(conn, run_id, ranked)
-        summary_json["scrapedObservationsInserted"] = inserted_observations
-        summary_json["recommendationsInserted"] = inserted_recommendations
-        finalize_run(conn, run_id, status, top_states, source_summary, summary_json)
-        conn.commit()
+        with METRICS.stage("persist"):
+            run_id = repo.create_run(args.crop, input_fingerprint)
+            with METRICS.stage("persist.observations"):
+                inserted_observations = write_observations()
+            with METRICS.stage("persist.recommendations"):
+                inserted_recommendations, summary_json["recommendationStorage"] = persist_recommendations(
+                    repo, args.crop, run_id, ranked, args.persist_deltas, args.delta_max_changed
+                )
+            with METRICS.stage("persist.candidate_features"):
+                inserted_features = repo.insert_candidate_features(run_id, date.today(), args.crop, candidates, ranked)
+            summary_json["scrapedObservationsInserted"] = inserted_observations
+            summary_json["recommendationsInserted"] = inserted_recommendations
+            summary_json["candidateFeaturesInserted"] = inserted_features
+            summary_json["metrics"] = METRICS.summary()
+            repo.finalize_run(run_id, status, top_states, source_summary, summary_json)
+            repo.commit()
+            # Dry runs and failed runs leave the distribution cache alone.
+            record_validated()
+        checkpoints.save("persist", {"runId": run_id, "status": status, "topStates": top_states})
 
         print(json.dumps({
             "runId": run_id,
@@ -1228,25 +2791,41 @@ def main() -> int:
         return 0
     except KeyboardInterrupt:
         print("Interrupted", file=sys.stderr)
-        if conn is not None:
-            conn.rollback()
+        if repo is not None:
+            repo.rollback()
         return 130
     except Exception as exc:
-        if conn is not None:
+        if repo is not None:
             try:
                 if run_id:
-                    finalize_run(conn, run_id, "failed", [], {"error": str(exc)}, {"error": str(exc)})
-                    conn.commit()
+                    repo.finalize_run(run_id, "failed", [], {"error": str(exc)}, {"error": str(exc)})
+                    repo.commit()
+                    if run_observations:
+                        # Committed with the failed run: a resume must not write them again.
+                        checkpoints.save("observations", ckpt.encode_written(scraped_obs_list, []))
                 else:
-                    conn.rollback()
+                    repo.rollback()
             except Exception:
-                conn.rollback()
+                repo.rollback()
         print(f"morning_ranker failed: {exc}", file=sys.stderr)
+        print(f"Resume with: --resume {checkpoints.run_key}", file=sys.stderr)
         return 1
     finally:
-        if conn is not None:
-            conn.close()
+        if writer is not None:
+            # Committed batches are recorded even when the run fails, so a resume skips them.
+            close_writer()
+        if repo is not None:
+            repo.close()
+        REGEX_GUARD.close()
+        if usda_cache is not None:
+            usda_cache.wait_for_refresh(args.http_timeout)
+        export_metrics(args)
+        if profiler is not None:
+            finish_memory_profile(args, profiler)
 
 
 if __name__ == "__main__":
+    # Sibling modules (run_snapshot, run_checkpoints, ...) import `morning_ranker`;
+    # alias it to this script so they share one copy of the dataclasses.
+    sys.modules.setdefault("morning_ranker", sys.modules[__name__])
     raise SystemExit(main())
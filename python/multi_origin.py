@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""Per-origin call lists: one freight / net-bid matrix for every (origin, buyer) pair.
+
+`estimate_freight` prices everything from Campbell, MN through `STATE_FREIGHT_ESTIMATE`.
+For a merchandiser shipping out of several elevators, each origin needs its own ranking:
+freight (and so net bid, the weighted score and the ML score) depends on where the train
+leaves from, while the buyer's bid, rail confidence, contact and freshness do not.
+
+`rank_origins` resolves the candidates once, then scores all origins together:
+
+    rail_miles[o, b] = haversine(origin o, buyer b) * RAIL_CIRCUITY
+    freight[o, b]    = FREIGHT_BASE_PER_BU + FREIGHT_PER_RAIL_MILE * rail_miles[o, b]
+                       + the rail_confidence surcharge estimate_freight applies
+    net[o, b]        = cash[b] - freight[o, b]
+
+The rates are a linear fit that roughly reproduces STATE_FREIGHT_ESTIMATE from Campbell.
+Scoring, top states and the top-N cut follow `apply_scores` / `compute_top_states_by_cash`
+/ `select_rankings` per origin. With numpy installed the matrix is computed in one
+broadcast pass. Without it, each origin is scored by running those functions on copies
+of the candidates. That path is slow but exact, and is the reference the numpy path
+is checked against.
+
+Origins file (`morning_ranker.py --origins-file`):
+
+    [{"name": "Campbell, MN", "lat": 46.098, "lng": -96.404}, ...]
+"""
+
+from __future__ import annotations
+
+import json
+import math
+from dataclasses import dataclass, replace
+from typing import Any, Dict, List, Optional, Sequence
+
+from morning_ranker import (
+    DEFAULT_WEIGHTED_SCORE,
+    RankedBuyer,
+    apply_scores,
+    freshness_score,
+    score_contact_verified,
+    select_rankings,
+    source_confidence_norm,
+)
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover
+    np = None
+
+EARTH_RADIUS_MILES = 3958.8
+RAIL_CIRCUITY = 1.2
+FREIGHT_BASE_PER_BU = 0.14
+FREIGHT_PER_RAIL_MILE = 0.00035
+# Same order as resolve_candidates' raw_features, so ML totals accumulate identically.
+_FEATURE_ORDER = [
+    "cash_bid",
+    "estimated_net_bid",
+    "rail_confidence",
+    "contact_verified",
+    "bid_freshness_hours",
+    "source_confidence",
+]
+
+
+@dataclass
+class Origin:
+    name: str
+    lat: float
+    lng: float
+
+
+@dataclass
+class OriginRanking:
+    origin: Origin
+    top_states: List[str]
+    ranked: List[RankedBuyer]
+
+    def to_json(self, limit: Optional[int] = None) -> Dict[str, Any]:
+        return {
+            "origin": {"name": self.origin.name, "lat": self.origin.lat, "lng": self.origin.lng},
+            "topStates": self.top_states,
+            "ranked": [
+                {
+                    "rank": i + 1,
+                    "buyerId": str(item.buyer.id),
+                    "buyer": item.buyer.name,
+                    "state": item.buyer.state,
+                    "cashBid": item.cash_bid,
+                    "estimatedFreight": item.estimated_freight,
+                    "estimatedNetBid": item.estimated_net_bid,
+                    "railMiles": item.rationale.get("railMiles"),
+                    "score": round(item.composite_score, 4),
+                }
+                for i, item in enumerate(self.ranked[:limit] if limit else self.ranked)
+            ],
+        }
+
+
+def load_origins(path: str) -> List[Origin]:
+    with open(path, "r", encoding="utf-8") as f:
+        payload = json.load(f)
+    rows = payload.get("origins", []) if isinstance(payload, dict) else payload
+    origins = [Origin(name=str(r["name"]), lat=float(r["lat"]), lng=float(r["lng"])) for r in rows]
+    if not origins:
+        raise ValueError(f"No origins in {path}")
+    return origins
+
+
+def rail_confidence_surcharge(rail_confidence: Optional[int]) -> float:
+    rc = rail_confidence if rail_confidence is not None else 0
+    if rc < 40:
+        return 0.20
+    if rc < 70:
+        return 0.08
+    return 0.0
+
+
+def haversine_miles(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(min(1.0, math.sqrt(a)))
+
+
+def freight_for_miles(rail_miles: float, rail_confidence: Optional[int]) -> float:
+    return round(FREIGHT_BASE_PER_BU + FREIGHT_PER_RAIL_MILE * rail_miles + rail_confidence_surcharge(rail_confidence), 4)
+
+
+def rank_origins(
+    candidates: Sequence[RankedBuyer],
+    origins: Sequence[Origin],
+    model_payload: Optional[Dict[str, Any]],
+    weights: Optional[Dict[str, float]] = None,
+    top_states_count: int = 3,
+    top_n: int = 30,
+    vectorized: Optional[bool] = None,
+) -> List[OriginRanking]:
+    """Per-origin top states and top-N from resolved candidates (see `resolve_candidates`)."""
+    weights = weights or DEFAULT_WEIGHTED_SCORE
+    if not candidates or not origins:
+        return [OriginRanking(origin=o, top_states=[], ranked=[]) for o in origins]
+    use_numpy = np is not None if vectorized is None else vectorized
+    if use_numpy and np is None:
+        raise RuntimeError("numpy is required for vectorized multi-origin ranking")
+    if use_numpy:
+        return _rank_origins_numpy(list(candidates), list(origins), model_payload, weights, top_states_count, top_n)
+    return _rank_origins_python(list(candidates), list(origins), model_payload, weights, top_states_count, top_n)
+
+
+def _with_origin(item: RankedBuyer, freight: float) -> RankedBuyer:
+    cash = item.cash_bid
+    net = round(cash - freight, 4) if cash is not None else None
+    features = dict(item.feature_values)
+    features["estimated_net_bid"] = float(net or 0.0)
+    # Origin freight comes from rail miles, not the lane table.
+    return replace(
+        item, estimated_freight=float(freight), estimated_net_bid=net, feature_values=features, freight_source=None
+    )
+
+
+def _rank_origins_python(
+    candidates: List[RankedBuyer],
+    origins: List[Origin],
+    model_payload: Optional[Dict[str, Any]],
+    weights: Dict[str, float],
+    top_states_count: int,
+    top_n: int,
+) -> List[OriginRanking]:
+    out = []
+    for origin in origins:
+        miles = [
+            haversine_miles(origin.lat, origin.lng, item.buyer.lat, item.buyer.lng) * RAIL_CIRCUITY for item in candidates
+        ]
+        per_origin = [
+            _with_origin(item, freight_for_miles(m, item.buyer.rail_confidence)) for item, m in zip(candidates, miles)
+        ]
+        apply_scores(per_origin, model_payload, weights)
+        for item, m in zip(per_origin, miles):
+            item.rationale.update({"origin": origin.name, "railMiles": round(m, 1)})
+        ranked, top_states, _ = select_rankings(per_origin, model_payload, weights, top_states_count, top_n)
+        out.append(OriginRanking(origin=origin, top_states=top_states, ranked=ranked))
+    return out
+
+
+def _min_max_rows(matrix):
+    lo = matrix.min(axis=1, keepdims=True)
+    hi = matrix.max(axis=1, keepdims=True)
+    # math.isclose's default test, which min_max_norm uses.
+    flat = np.abs(hi - lo) <= 1e-9 * np.maximum(np.abs(lo), np.abs(hi))
+    return np.where(flat, 0.5, (matrix - lo) / np.where(flat, 1.0, hi - lo))
+
+
+def _min_max(values):
+    lo, hi = values.min(), values.max()
+    if math.isclose(lo, hi):
+        return np.full_like(values, 0.5)
+    return (values - lo) / (hi - lo)
+
+
+def _rank_origins_numpy(
+    candidates: List[RankedBuyer],
+    origins: List[Origin],
+    model_payload: Optional[Dict[str, Any]],
+    weights: Dict[str, float],
+    top_states_count: int,
+    top_n: int,
+) -> List[OriginRanking]:
+    cash = np.array([c.cash_bid for c in candidates], dtype=np.float64)
+    blat = np.radians(np.array([c.buyer.lat for c in candidates], dtype=np.float64))
+    blng = np.radians(np.array([c.buyer.lng for c in candidates], dtype=np.float64))
+    olat = np.radians(np.array([o.lat for o in origins], dtype=np.float64))[:, None]
+    olng = np.radians(np.array([o.lng for o in origins], dtype=np.float64))[:, None]
+    surcharge = np.array([rail_confidence_surcharge(c.buyer.rail_confidence) for c in candidates], dtype=np.float64)
+
+    # (origins x buyers) in one broadcast pass.
+    a = np.sin((blat - olat) / 2) ** 2 + np.cos(olat) * np.cos(blat) * np.sin((blng - olng) / 2) ** 2
+    rail_miles = 2 * EARTH_RADIUS_MILES * np.arcsin(np.minimum(1.0, np.sqrt(a))) * RAIL_CIRCUITY
+    freight = np.round(FREIGHT_BASE_PER_BU + FREIGHT_PER_RAIL_MILE * rail_miles + surcharge, 4)
+    net = np.round(cash - freight, 4)
+
+    # Origin-independent contributions, computed once (same terms as apply_scores).
+    cash_c = _min_max(cash) * weights["cash_bid"]
+    rail_c = _min_max(np.array([c.feature_values["rail_confidence"] for c in candidates])) * weights["rail_confidence"]
+    contact_c = np.array([score_contact_verified(c.buyer.verified_status) for c in candidates]) * weights["contact_verified"]
+    fresh_c = np.array([freshness_score(c.bid_freshness_hours) for c in candidates]) * weights["bid_freshness"]
+    source_c = np.array([source_confidence_norm(c.source_confidence) for c in candidates]) * weights["source_confidence"]
+    net_c = _min_max_rows(net) * weights["estimated_net_bid"]
+    weighted = cash_c + net_c + rail_c + contact_c + fresh_c + source_c
+
+    composite = weighted
+    ml = None
+    if model_payload:
+        coeffs = model_payload.get("coefficients") or {}
+        total = np.full(net.shape, float(model_payload.get("intercept") or 0.0))
+        for name in _FEATURE_ORDER:
+            coef = coeffs.get(name)
+            if coef is None:
+                continue
+            column = net if name == "estimated_net_bid" else np.array([c.feature_values[name] for c in candidates])
+            total = total + float(coef) * column
+        if str(model_payload.get("model_type", "")).startswith("logistic"):
+            with np.errstate(over="ignore"):
+                ml = 1.0 / (1.0 + np.exp(-total))
+        else:
+            ml = total
+        composite = weighted * 0.7 + _min_max_rows(ml) * 0.3
+
+    states = [c.buyer.state for c in candidates]
+    by_state: Dict[str, List[int]] = {}
+    for idx, state in enumerate(states):
+        by_state.setdefault(state, []).append(idx)
+    state_index = {state: code for code, state in enumerate(by_state)}
+    state_codes = np.array([state_index[s] for s in states])
+    rail = np.array([float(c.buyer.rail_confidence or 0) for c in candidates])
+    state_rows = [(state, np.array(idx), float(rail[idx].mean())) for state, idx in by_state.items()]
+    # compute_top_states_by_cash takes each state's top 3 by (cash, net). Cash does not
+    # depend on the origin, so only buyers tied with the 3rd-best cash can swap per origin.
+    contenders = []
+    for state, idx, avg_rail in state_rows:
+        order = idx[np.argsort(-cash[idx], kind="stable")]
+        cutoff = cash[order[min(2, len(order) - 1)]]
+        contenders.append((state, order[cash[order] >= cutoff], avg_rail))
+
+    out = []
+    k = max(1, top_n)
+    for o, origin in enumerate(origins):
+        scored_states = []
+        for state, idx, avg_rail in contenders:
+            top = sorted(idx, key=lambda i: (cash[i], net[o, i]), reverse=True)[:3]
+            scored_states.append((state, float(np.mean(cash[top])), float(np.mean(net[o, top])), avg_rail))
+        scored_states.sort(key=lambda x: (x[1], x[2], x[3]), reverse=True)
+        top_states = [s for s, *_ in scored_states[: max(1, top_states_count)]]
+
+        allowed = np.isin(state_codes, [state_index[s] for s in top_states])
+        comp = np.where(allowed, composite[o], -np.inf)
+        eligible = int(allowed.sum())
+        if eligible > k:
+            part = np.argpartition(-comp, k - 1)[:k]
+            pool = np.nonzero(comp >= comp[part].min())[0]  # keep ties at the cut
+        else:
+            pool = np.nonzero(allowed)[0]
+        pool = sorted(
+            pool,
+            key=lambda i: (comp[i], net[o, i], cash[i], candidates[i].buyer.rail_confidence or 0),
+            reverse=True,
+        )[:k]
+
+        ranked = []
+        for i in pool:
+            item = _with_origin(candidates[i], float(freight[o, i]))
+            item.weighted_score = float(weighted[o, i])
+            item.ml_score = float(ml[o, i]) if ml is not None else None
+            item.composite_score = float(composite[o, i])
+            # Same rationale shape apply_scores writes, plus the origin.
+            contributions = {
+                "cash_bid": cash_c[i],
+                "estimated_net_bid": net_c[o, i],
+                "rail_confidence": rail_c[i],
+                "contact_verified": contact_c[i],
+                "bid_freshness": fresh_c[i],
+                "source_confidence": source_c[i],
+            }
+            item.rationale = {
+                "contributions": {name: round(float(v), 4) for name, v in contributions.items()},
+                "rawFeatures": {name: round(v, 4) for name, v in item.feature_values.items()},
+                "weightedScore": round(item.weighted_score, 4),
+                "mlScore": round(item.ml_score, 6) if item.ml_score is not None else None,
+                "compositeScore": round(item.composite_score, 4),
+                "bidSourceKind": item.bid_source_kind,
+                "bidFreshnessHours": round(item.bid_freshness_hours, 2),
+                "estimatedFreight": item.estimated_freight,
+                "origin": origin.name,
+                "railMiles": round(float(rail_miles[o, i]), 1),
+            }
+            ranked.append(item)
+        out.append(OriginRanking(origin=origin, top_states=top_states, ranked=ranked))
+    return out
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Writes a run's scraped observations to the database while the scrape runs.
+
+`scrape_observations_for_buyers` hands each observation to `ObservationWriter.submit` as
+soon as it is parsed. A single writer thread drains a bounded queue and inserts in small
+batches on its own repository session (a second Postgres connection), committing after
+every batch:
+
+- a crash or Ctrl-C mid-scrape keeps every bid fetched so far
+- the ranking transaction stays short; it no longer carries the observation inserts
+- memory is bounded by `queue_size`; when the database falls behind, `submit` blocks
+
+Validation (bid_validation) needs the whole scrape, so it runs after `close()` and flags
+the quarantined rows with an UPDATE (`quarantine_observations`). The latest-observation
+query and the distribution rebuild finish before the scrape starts, and ranking uses the
+in-memory scrape, so a run ranks the same with or without the writer
+(`--no-stream-observations`).
+
+Batches that fail are rolled back and kept in `failed`, so the caller can retry them
+in the ranking transaction instead of losing them.
+"""
+
+from __future__ import annotations
+
+import queue
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from morning_ranker import METRICS, BidObservation
+
+DEFAULT_BATCH_SIZE = 25
+DEFAULT_QUEUE_SIZE = 200
+# A partial batch is written after this long, so a slow scrape still persists steadily.
+DEFAULT_FLUSH_SECONDS = 2.0
+
+_STOP = object()
+
+
+class ObservationWriter:
+    def __init__(
+        self,
+        session: Any,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        flush_seconds: float = DEFAULT_FLUSH_SECONDS,
+    ):
+        self.session = session
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+        self.failed: List[BidObservation] = []
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, queue_size))
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._stats: Dict[str, Any] = {
+            "submitted": 0,
+            "inserted": 0,
+            "batches": 0,
+            "failedBatches": 0,
+            "blockedSubmits": 0,
+            "maxQueueDepth": 0,
+            "maxBatchMs": 0.0,
+            "errors": [],
+        }
+
+    def start(self) -> "ObservationWriter":
+        self._thread = threading.Thread(target=self._run, name="observation-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def submit(self, obs: BidObservation) -> None:
+        """Queue one observation; blocks while the queue is full (backpressure)."""
+        if self._thread is None or not self._thread.is_alive():
+            raise RuntimeError("observation writer is not running")
+        self._stats["submitted"] += 1
+        try:
+            self._queue.put_nowait(obs)
+        except queue.Full:
+            self._stats["blockedSubmits"] += 1
+            self._queue.put(obs)
+        self._stats["maxQueueDepth"] = max(self._stats["maxQueueDepth"], self._queue.qsize())
+
+    def close(self) -> Dict[str, Any]:
+        """Flush what is queued, stop the thread and release the session. Returns stats."""
+        if self._closed:
+            return self.stats()
+        self._closed = True
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+        try:
+            self.session.close()
+        except Exception:
+            pass
+        return self.stats()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, "errors": list(self._stats["errors"]), "failedObservations": len(self.failed)}
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_seconds
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._write(batch)
+
+    def _write(self, batch: List[BidObservation]) -> None:
+        started = time.perf_counter()
+        try:
+            inserted = self.session.insert_observations(batch)
+            self.session.commit()
+        except Exception as exc:
+            try:
+                self.session.rollback()
+            except Exception:
+                pass
+            for obs in batch:
+                obs.id = None
+            self.failed.extend(batch)
+            self._stats["failedBatches"] += 1
+            if len(self._stats["errors"]) < 5:
+                self._stats["errors"].append(str(exc))
+            METRICS.incr("observation_writer_batches_total", result="error")
+            print(f"[observations] batch of {len(batch)} failed, will retry with the run: {exc}", file=sys.stderr)
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000.0
+        self._stats["inserted"] += inserted
+        self._stats["batches"] += 1
+        self._stats["maxBatchMs"] = round(max(self._stats["maxBatchMs"], elapsed_ms), 2)
+        METRICS.incr("observation_writer_batches_total", result="ok")
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""Monte Carlo rank-uncertainty bands for the call list.
+
+`apply_scores` gives each buyer one composite score. Some inputs behind that score are
+much softer than others:
+- a USDA-derived fallback bid is the regional basis, not the elevator's own
+- a 30-hour-old posting may have moved since
+- a low-confidence extraction may be a misread
+
+`rank_uncertainty` draws `samples` perturbed cash bids for every candidate, re-scores
+all samples in bulk as (samples x candidates) arrays, and reports each ranked buyer's
+rank distribution. The noise on a candidate's cash bid, in $/bu, is the root-sum-square of:
+
+    BASE_BID_SIGMA                                      every bid moves intraday
+    CONFIDENCE_SIGMA * (1 - source_confidence_norm)     low-confidence extraction
+    STALENESS_SIGMA  * (1 - freshness_score)            bid age
+    USDA_FALLBACK_SIGMA                                 USDA-derived bids only
+
+The USDA term is one draw per region per sample. Fallback bids in a region all come from
+the same regional basis, so they move together.
+
+Net bids follow the perturbed cash bids; freight, rail confidence, contact status,
+freshness and source confidence are held fixed. Every sample is scored exactly as
+`apply_scores` does: min-max over all candidates, and the 0.7/0.3 ML blend when a model
+is loaded. Ranks are taken within the run's top states. Re-picking the states for
+every sample would turn one question into two: would this buyer be called, and would
+its state still be on the list.
+
+Each ranked buyer's `rationale_json` gets:
+
+    "rankUncertainty": {"p10": 2, "p50": 4, "p90": 9, "pTopN": 0.93, "bidSigma": 0.031}
+
+The draws come from a seeded generator, so a re-run or a snapshot replay with the same
+inputs reproduces the bands.
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from morning_ranker import (
+    DEFAULT_WEIGHTED_SCORE,
+    STATE_TO_REGION,
+    RankedBuyer,
+    freshness_score,
+    score_contact_verified,
+    source_confidence_norm,
+)
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover
+    np = None
+
+DEFAULT_SAMPLES = 2000
+BASE_BID_SIGMA = 0.01
+CONFIDENCE_SIGMA = 0.06
+STALENESS_SIGMA = 0.08
+USDA_FALLBACK_SIGMA = 0.10
+# Samples are scored in chunks of about this many (sample, candidate) cells, which keeps
+# the working arrays to a few tens of MB however large the candidate set is.
+CHUNK_CELLS = 1 << 20
+# Buyers off the list whose chance of making it is at least this are listed in the summary.
+CONTENDER_MIN_P = 0.05
+MAX_CONTENDERS = 5
+
+
+def bid_sigma(item: RankedBuyer) -> float:
+    """This candidate's independent bid noise, $/bu (the shared USDA term is separate)."""
+    confidence = CONFIDENCE_SIGMA * (1.0 - source_confidence_norm(item.source_confidence))
+    staleness = STALENESS_SIGMA * (1.0 - freshness_score(item.bid_freshness_hours))
+    return math.sqrt(BASE_BID_SIGMA**2 + confidence**2 + staleness**2)
+
+
+def _min_max_rows(matrix):
+    lo = matrix.min(axis=1, keepdims=True)
+    hi = matrix.max(axis=1, keepdims=True)
+    # math.isclose's default test, which min_max_norm uses.
+    flat = np.abs(hi - lo) <= 1e-9 * np.maximum(np.abs(lo), np.abs(hi))
+    return np.where(flat, 0.5, (matrix - lo) / np.where(flat, 1.0, hi - lo))
+
+
+def _min_max(values):
+    lo, hi = values.min(), values.max()
+    if math.isclose(lo, hi):
+        return np.full_like(values, 0.5)
+    return (values - lo) / (hi - lo)
+
+
+def rank_uncertainty(
+    candidates: Sequence[RankedBuyer],
+    ranked: Sequence[RankedBuyer],
+    top_states: Sequence[str],
+    model_payload: Optional[Dict[str, Any]],
+    weights: Optional[Dict[str, float]] = None,
+    top_n: int = 30,
+    samples: int = DEFAULT_SAMPLES,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """Add `rankUncertainty` to each ranked buyer's rationale; returns the run summary.
+
+    `candidates` are every scored candidate (`score_candidates`); `ranked` / `top_states`
+    are `select_rankings`' result for them.
+    """
+    if np is None:
+        raise RuntimeError("numpy is required for --rank-uncertainty")
+    weights = weights or DEFAULT_WEIGHTED_SCORE
+    started = time.perf_counter()
+    candidates = list(candidates)
+    states = set(top_states)
+    pool = np.array([i for i, c in enumerate(candidates) if c.buyer.state in states], dtype=np.int64)
+    summary: Dict[str, Any] = {"samples": samples, "seed": seed, "topN": top_n, "pool": int(pool.size)}
+    if not candidates or pool.size == 0 or samples <= 0:
+        return summary
+
+    count = len(candidates)
+    # float32 for everything per sample: the score gaps that matter are far above its resolution.
+    cash = np.array([c.feature_values["cash_bid"] for c in candidates], dtype=np.float32)
+    freight = np.array([c.estimated_freight for c in candidates], dtype=np.float32)
+    sigma = np.array([bid_sigma(c) for c in candidates], dtype=np.float64)
+    fallback = [c.bid_source_kind == "usda" for c in candidates]
+    regions: Dict[str, int] = {}
+    region_codes = np.array(
+        [
+            regions.setdefault(STATE_TO_REGION.get(c.buyer.state.upper(), "Midwest"), len(regions)) if usda else -1
+            for c, usda in zip(candidates, fallback)
+        ],
+        dtype=np.int64,
+    )
+    shared = region_codes >= 0
+
+    # Contributions that do not depend on the bid, once (same terms as apply_scores).
+    fixed = (
+        _min_max(np.array([c.feature_values["rail_confidence"] for c in candidates])) * weights["rail_confidence"]
+        + np.array([score_contact_verified(c.buyer.verified_status) for c in candidates]) * weights["contact_verified"]
+        + np.array([freshness_score(c.bid_freshness_hours) for c in candidates]) * weights["bid_freshness"]
+        + np.array([source_confidence_norm(c.source_confidence) for c in candidates]) * weights["source_confidence"]
+    )
+    ml_fixed = None
+    coef_cash = coef_net = 0.0
+    logistic = False
+    if model_payload:
+        coeffs = model_payload.get("coefficients") or {}
+        ml_fixed = np.full(count, float(model_payload.get("intercept") or 0.0))
+        for name in candidates[0].feature_values:
+            coef = coeffs.get(name)
+            if coef is None or name in ("cash_bid", "estimated_net_bid"):
+                continue
+            ml_fixed = ml_fixed + float(coef) * np.array([c.feature_values[name] for c in candidates])
+        coef_cash = float(coeffs.get("cash_bid") or 0.0)
+        coef_net = float(coeffs.get("estimated_net_bid") or 0.0)
+        logistic = str(model_payload.get("model_type", "")).startswith("logistic")
+
+    index = {id(c): i for i, c in enumerate(candidates)}
+    slot = {int(i): j for j, i in enumerate(pool)}
+    listed = [(item, slot[index[id(item)]]) for item in ranked if index.get(id(item)) in slot]
+    columns = np.array([j for _, j in listed], dtype=np.int64)
+    k = max(1, top_n)
+
+    scale = sigma.astype(np.float32)
+    fixed = fixed.astype(np.float32)
+    rng = np.random.default_rng(seed)
+    ranks = np.empty((samples, columns.size), dtype=np.int32)
+    hits = np.zeros(pool.size, dtype=np.int64)
+    chunk = max(1, CHUNK_CELLS // count)
+    for start in range(0, samples, chunk):
+        rows = min(chunk, samples - start)
+        noise = rng.standard_normal((rows, count), dtype=np.float32) * scale
+        if regions:
+            region_noise = rng.standard_normal((rows, len(regions)), dtype=np.float32) * np.float32(USDA_FALLBACK_SIGMA)
+            noise[:, shared] += region_noise[:, region_codes[shared]]
+        cash_s = cash + noise
+        net_s = cash_s - freight
+        weighted = (
+            _min_max_rows(cash_s) * weights["cash_bid"] + _min_max_rows(net_s) * weights["estimated_net_bid"] + fixed
+        )
+        if ml_fixed is not None:
+            total = ml_fixed.astype(np.float32) + coef_cash * cash_s + coef_net * net_s
+            if logistic:
+                with np.errstate(over="ignore"):
+                    total = 1.0 / (1.0 + np.exp(-total))
+            composite = weighted * 0.7 + _min_max_rows(total) * 0.3
+        else:
+            composite = weighted
+        scores = composite[:, pool]
+        ordered = np.sort(scores, axis=1)
+        # In the top N when at least as good as the sample's Nth-best score.
+        cutoff = ordered[:, -k] if pool.size >= k else ordered[:, 0] - 1.0
+        hits += (scores >= cutoff[:, None]).sum(axis=0)
+        # Listed buyers' ranks: 1 + how many pool buyers outscore them in that sample.
+        mine = scores[:, columns]
+        for r in range(rows):
+            ranks[start + r] = pool.size + 1 - np.searchsorted(ordered[r], mine[r], side="right")
+
+    p_top = hits / samples
+    bands = np.percentile(ranks, (10, 50, 90), axis=0, method="nearest") if columns.size else None
+    for c, (item, j) in enumerate(listed):
+        i = int(pool[j])
+        item.rationale["rankUncertainty"] = {
+            "p10": int(bands[0, c]),
+            "p50": int(bands[1, c]),
+            "p90": int(bands[2, c]),
+            "pTopN": round(float(p_top[j]), 4),
+            "bidSigma": round(float(math.hypot(sigma[i], USDA_FALLBACK_SIGMA) if shared[i] else sigma[i]), 4),
+        }
+
+    on_list = set(columns.tolist())
+    contenders: List[Dict[str, Any]] = []
+    for j in np.argsort(-p_top, kind="stable"):
+        if len(contenders) >= MAX_CONTENDERS or p_top[j] < CONTENDER_MIN_P:
+            break
+        if int(j) in on_list:
+            continue
+        item = candidates[int(pool[j])]
+        contenders.append(
+            {
+                "buyerId": str(item.buyer.id),
+                "buyer": item.buyer.name,
+                "state": item.buyer.state,
+                "pTopN": round(float(p_top[j]), 4),
+            }
+        )
+    summary.update(
+        {
+            "fallbackRegions": len(regions),
+            "expectedListTurnover": round(float(columns.size - p_top[columns].sum()), 2),
+            "contenders": contenders,
+            "elapsedMs": round((time.perf_counter() - started) * 1000.0, 1),
+        }
+    )
+    return summary
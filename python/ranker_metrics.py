@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""Lightweight per-run instrumentation for `morning_ranker.py`.
+
+Stage timings are recorded as spans (name, start/end, parent, attributes) and folded
+into per-stage aggregates; counters track bytes downloaded and rows written. Cost is
+a couple of `perf_counter_ns` calls and a dict update per stage, so it stays on in
+production. Exports:
+
+- `summary()`: compact dict stored in `summary_json["metrics"]`
+- `write_prometheus_textfile()`: node_exporter textfile-collector format
+- `write_otlp_json()`: OTLP/JSON `resourceSpans` payload (one line per run) that an
+  OpenTelemetry collector `filelog`/`otlpjson` receiver can ingest
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+SERVICE_NAME = "cornintel-morning-ranker"
+
+
+@dataclass
+class Span:
+    name: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int
+    end_ns: int = 0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+class RunMetrics:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # Optional stage observers (e.g. memory_profile.StageMemoryProfiler) with
+        # on_stage_enter(name, attributes) / on_stage_exit(name, attributes).
+        self.listeners: List[Any] = []
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.trace_id = secrets.token_hex(16)
+            self.spans: List[Span] = []
+            self.stage_totals: Dict[str, List[float]] = {}  # name -> [count, total_ms, max_ms]
+            self.counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+            self._wall_offset_ns = time.time_ns() - time.perf_counter_ns()
+
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def stage(self, name: str, **attributes: Any) -> Iterator[Span]:
+        stack = self._stack()
+        span = Span(
+            name=name,
+            span_id=secrets.token_hex(8),
+            parent_id=stack[-1].span_id if stack else None,
+            start_ns=time.perf_counter_ns(),
+            attributes=dict(attributes),
+        )
+        stack.append(span)
+        for listener in self.listeners:
+            listener.on_stage_enter(name, span.attributes)
+        try:
+            yield span
+        except BaseException as exc:
+            span.error = str(exc) or type(exc).__name__
+            raise
+        finally:
+            span.end_ns = time.perf_counter_ns()
+            stack.pop()
+            for listener in self.listeners:
+                listener.on_stage_exit(name, span.attributes)
+            elapsed_ms = (span.end_ns - span.start_ns) / 1e6
+            with self._lock:
+                self.spans.append(span)
+                agg = self.stage_totals.setdefault(name, [0, 0.0, 0.0])
+                agg[0] += 1
+                agg[1] += elapsed_ms
+                agg[2] = max(agg[2], elapsed_ms)
+
+    def incr(self, name: str, value: float = 1, **labels: str) -> None:
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            stages = {
+                name: {"count": int(c), "totalMs": round(total, 2), "maxMs": round(mx, 2)}
+                for name, (c, total, mx) in self.stage_totals.items()
+            }
+            counters: Dict[str, Any] = {}
+            for (name, labels), value in sorted(self.counters.items()):
+                label = ",".join(f"{k}={v}" for k, v in labels)
+                counters[f"{name}{{{label}}}" if label else name] = value
+        return {"traceId": self.trace_id, "stages": stages, "counters": counters}
+
+    def write_prometheus_textfile(self, path: str, labels: Optional[Dict[str, str]] = None) -> None:
+        base = dict(labels or {})
+
+        def fmt(extra: Dict[str, str]) -> str:
+            merged = {**base, **extra}
+            if not merged:
+                return ""
+            inner = ",".join(f'{k}="{_escape_label(v)}"' for k, v in sorted(merged.items()))
+            return "{" + inner + "}"
+
+        lines = [
+            "# HELP cornintel_ranker_stage_seconds_total Time spent in each ranker stage during the last run.",
+            "# TYPE cornintel_ranker_stage_seconds_total gauge",
+        ]
+        with self._lock:
+            stage_totals = dict(self.stage_totals)
+            counters = dict(self.counters)
+        for name, (_, total_ms, _) in sorted(stage_totals.items()):
+            lines.append(f"cornintel_ranker_stage_seconds_total{fmt({'stage': name})} {total_ms / 1000.0:.6f}")
+        lines += [
+            "# HELP cornintel_ranker_stage_calls Number of times each stage ran during the last run.",
+            "# TYPE cornintel_ranker_stage_calls gauge",
+        ]
+        for name, (count, _, _) in sorted(stage_totals.items()):
+            lines.append(f"cornintel_ranker_stage_calls{fmt({'stage': name})} {int(count)}")
+        seen_names = set()
+        for (name, label_items), value in sorted(counters.items()):
+            metric = f"cornintel_ranker_{name}"
+            if metric not in seen_names:
+                lines.append(f"# TYPE {metric} gauge")
+                seen_names.add(metric)
+            lines.append(f"{metric}{fmt(dict(label_items))} {value}")
+        lines.append(f"cornintel_ranker_last_run_timestamp_seconds{fmt({})} {time.time():.0f}")
+
+        # node_exporter reads *.prom files; rename atomically so it never sees a partial file.
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp, path)
+
+    def write_otlp_json(self, path: str, resource_attributes: Optional[Dict[str, Any]] = None) -> None:
+        with self._lock:
+            spans = list(self.spans)
+        otlp_spans = []
+        for span in spans:
+            otlp: Dict[str, Any] = {
+                "traceId": self.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": 1,
+                "startTimeUnixNano": str(span.start_ns + self._wall_offset_ns),
+                "endTimeUnixNano": str(span.end_ns + self._wall_offset_ns),
+                "attributes": [_otlp_attr(k, v) for k, v in span.attributes.items()],
+                "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+            }
+            if span.parent_id:
+                otlp["parentSpanId"] = span.parent_id
+            otlp_spans.append(otlp)
+        payload = {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            _otlp_attr(k, v)
+                            for k, v in {"service.name": SERVICE_NAME, **(resource_attributes or {})}.items()
+                        ]
+                    },
+                    "scopeSpans": [{"scope": {"name": "ranker_metrics"}, "spans": otlp_spans}],
+                }
+            ]
+        }
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(payload) + "\n")
+
+
+def _escape_label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _otlp_attr(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+METRICS = RunMetrics()
@@ -0,0 +1,550 @@
+#!/usr/bin/env python3
+"""Storage backends for `morning_ranker.py`.
+
+`main()` talks to a repository instead of a raw connection:
+
+- `PostgresRepository`: production. Delegates to the SQL functions in
+  `morning_ranker` (fetch_buyers, create_run, insert_*, finalize_run, ...) over one
+  psycopg connection, so the SQL and its transaction semantics are unchanged.
+- `InMemoryRepository`: no Postgres. Loads buyers the way `npm run buyers:seed` does
+  (facilities.seed.json, rail confidence / crop from src/data/buyers.json) and keeps
+  runs, observations, recommendations and candidate features in Python lists. Reads
+  mirror the SQL filters and ordering; writes are undone on `rollback()`.
+
+Select with `--backend memory` (plus `--seed-file` / `--generated-buyers-file`) for
+offline tests and CPU-only benchmarks.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+import uuid
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Protocol, Tuple
+
+import morning_ranker as mr
+from morning_ranker import (
+    CANDIDATE_FEATURE_COLUMNS,
+    METRICS,
+    PRIMARY_CORRIDOR_STATES,
+    UTC,
+    BidObservation,
+    BuyerRow,
+    RankedBuyer,
+)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SEED_FILE = os.path.join(REPO_ROOT, "apps", "api", "seeds", "facilities.seed.json")
+DEFAULT_GENERATED_BUYERS_FILE = os.path.join(REPO_ROOT, "src", "data", "buyers.json")
+# Same list as CORRIDOR_STATES in apps/api/src/cli/buyers-seed.ts (drives launch_scope).
+SEED_CORRIDOR_STATES = {"ND", "MN", "SD", "IA", "NE", "KS", "TX", "WA", "OR", "CA"}
+_SEED_NAMESPACE = uuid.UUID("5b0c1c52-8f3e-4a43-9d6b-3f0f6f2f0c11")
+
+
+class RankerRepository(Protocol):
+    def fetch_buyers(
+        self, crop: str, verified_only: bool, limit: Optional[int], bbox: Optional[Tuple[float, float, float, float]] = None
+    ) -> List[BuyerRow]: ...
+
+    def fetch_latest_observations(self, crop: str, buyer_ids: Iterable[str], exclude: Iterable[BidObservation] = ()) -> Dict[str, BidObservation]: ...
+
+    def find_reusable_run(self, crop: str, input_fingerprint: str) -> Optional[Dict[str, Any]]: ...
+
+    def create_run(self, crop: str, input_fingerprint: Optional[str] = None, reused_from_run_id: Optional[str] = None) -> str: ...
+
+    def finalize_run(self, run_id: str, status: str, top_states: List[str], source_summary: Dict[str, Any], summary: Dict[str, Any]) -> None: ...
+
+    def insert_observations(self, observations: List[BidObservation]) -> int: ...
+
+    def find_delta_base(self, crop: str) -> Optional[str]: ...
+
+    def fetch_recommendation_rows(self, run_id: str) -> List[Dict[str, Any]]: ...
+
+    def insert_recommendations(self, run_id: str, ranked: List[RankedBuyer], ranks: Optional[Iterable[int]] = None) -> int: ...
+
+    def set_run_recommendations(self, run_id: str, count: int, base_run_id: Optional[str] = None) -> None: ...
+
+    def insert_candidate_features(self, run_id: str, run_date: date, crop: str, candidates: List[RankedBuyer], ranked: List[RankedBuyer]) -> int: ...
+
+    def fetch_freight_lanes(self) -> List[Any]: ...
+
+    def freight_lanes_version(self) -> Any: ...
+
+    def fetch_bid_history(self, crop: str, observed_since: datetime, created_after: Optional[datetime] = None) -> List[Dict[str, Any]]: ...
+
+    def fetch_bid_distributions(self, crop: str, since: datetime) -> List[Dict[str, Any]]: ...
+
+    def quarantine_observations(self, items: List[Tuple[str, List[str]]]) -> int: ...
+
+    def commit(self) -> None: ...
+
+    def rollback(self) -> None: ...
+
+    def close(self) -> None: ...
+
+    def open_session(self) -> "RankerRepository": ...
+
+
+class PostgresRepository:
+    def __init__(self, conn, database_url: Optional[str] = None):
+        self.conn = conn
+        self.database_url = database_url
+
+    @classmethod
+    def connect(cls, database_url: str) -> "PostgresRepository":
+        conn = mr.connect_db(database_url)
+        conn.autocommit = False
+        return cls(conn, database_url)
+
+    def open_session(self) -> "PostgresRepository":
+        """A second connection, so its writes commit independently of this one's transaction."""
+        if not self.database_url:
+            raise RuntimeError("open_session needs a repository created with PostgresRepository.connect")
+        return PostgresRepository.connect(self.database_url)
+
+    def fetch_buyers(
+        self, crop: str, verified_only: bool, limit: Optional[int], bbox: Optional[Tuple[float, float, float, float]] = None
+    ) -> List[BuyerRow]:
+        return mr.fetch_buyers(self.conn, crop, verified_only, limit, bbox)
+
+    def fetch_latest_observations(self, crop: str, buyer_ids: Iterable[str], exclude: Iterable[BidObservation] = ()) -> Dict[str, BidObservation]:
+        return mr.fetch_latest_observations(self.conn, crop, buyer_ids, exclude)
+
+    def find_reusable_run(self, crop: str, input_fingerprint: str) -> Optional[Dict[str, Any]]:
+        return mr.find_reusable_run(self.conn, crop, input_fingerprint)
+
+    def create_run(self, crop: str, input_fingerprint: Optional[str] = None, reused_from_run_id: Optional[str] = None) -> str:
+        return mr.create_run(self.conn, crop, input_fingerprint, reused_from_run_id)
+
+    def finalize_run(self, run_id: str, status: str, top_states: List[str], source_summary: Dict[str, Any], summary: Dict[str, Any]) -> None:
+        mr.finalize_run(self.conn, run_id, status, top_states, source_summary, summary)
+
+    def insert_observations(self, observations: List[BidObservation]) -> int:
+        return mr.insert_observations(self.conn, observations)
+
+    def find_delta_base(self, crop: str) -> Optional[str]:
+        return mr.find_delta_base(self.conn, crop)
+
+    def fetch_recommendation_rows(self, run_id: str) -> List[Dict[str, Any]]:
+        return mr.fetch_recommendation_rows(self.conn, run_id)
+
+    def insert_recommendations(self, run_id: str, ranked: List[RankedBuyer], ranks: Optional[Iterable[int]] = None) -> int:
+        return mr.insert_recommendations(self.conn, run_id, ranked, ranks)
+
+    def set_run_recommendations(self, run_id: str, count: int, base_run_id: Optional[str] = None) -> None:
+        mr.set_run_recommendations(self.conn, run_id, count, base_run_id)
+
+    def insert_candidate_features(self, run_id: str, run_date: date, crop: str, candidates: List[RankedBuyer], ranked: List[RankedBuyer]) -> int:
+        return mr.insert_candidate_features(self.conn, run_id, run_date, crop, candidates, ranked)
+
+    def fetch_freight_lanes(self) -> List[Any]:
+        import freight_rates
+
+        return freight_rates.fetch_lanes(self.conn)
+
+    def freight_lanes_version(self) -> Any:
+        import freight_rates
+
+        return freight_rates.fetch_lanes_version(self.conn)
+
+    def fetch_bid_history(self, crop: str, observed_since: datetime, created_after: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        import bid_history
+
+        return bid_history.fetch_history_rows(self.conn, crop, observed_since, created_after)
+
+    def fetch_bid_distributions(self, crop: str, since: datetime) -> List[Dict[str, Any]]:
+        import bid_validation
+
+        return bid_validation.fetch_distribution_rows(self.conn, crop, since)
+
+    def quarantine_observations(self, items: List[Tuple[str, List[str]]]) -> int:
+        if not items:
+            return 0
+        with self.conn.cursor() as cur:
+            cur.executemany(
+                "UPDATE buyer_cash_bid_observations SET quarantine_reasons = %s::jsonb WHERE id = %s",
+                [(json.dumps(reasons), obs_id) for obs_id, reasons in items],
+            )
+        return len(items)
+
+    def commit(self) -> None:
+        self.conn.commit()
+
+    def rollback(self) -> None:
+        self.conn.rollback()
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class InMemoryRepository:
+    def __init__(self, buyers: Optional[List[Dict[str, Any]]] = None):
+        # Rows are dicts keyed like the Postgres columns the SQL functions read.
+        self.buyers: List[Dict[str, Any]] = list(buyers or [])
+        self.observations: List[Dict[str, Any]] = []
+        self.runs: Dict[str, Dict[str, Any]] = {}
+        self.recommendations: List[Dict[str, Any]] = []
+        self.candidate_features: List[Dict[str, Any]] = []
+        # freight_rates.FreightLane rows; tests append directly (there is no loader for memory).
+        self.freight_lanes: List[Any] = []
+        self._undo: List[Callable[[], None]] = []
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_seed(
+        cls,
+        seed_file: str = DEFAULT_SEED_FILE,
+        generated_buyers_file: Optional[str] = DEFAULT_GENERATED_BUYERS_FILE,
+    ) -> "InMemoryRepository":
+        """Buyers as `buyers-seed.ts` would upsert them from the same files."""
+        with open(seed_file, "r", encoding="utf-8") as f:
+            facilities = json.load(f)
+        generated: Dict[str, Dict[str, Any]] = {}
+        if generated_buyers_file and os.path.exists(generated_buyers_file):
+            with open(generated_buyers_file, "r", encoding="utf-8") as f:
+                for row in json.load(f):
+                    generated[seed_key(row["name"], row["city"], row["state"], row["type"])] = row
+
+        # A stable timestamp keeps buyer row_versions (and so input fingerprints) stable across runs.
+        seeded_at = datetime.fromtimestamp(os.path.getmtime(seed_file), tz=UTC)
+        buyers = []
+        for facility in facilities:
+            key = seed_key(facility["name"], facility["city"], facility["state"], facility["type"])
+            match = generated.get(key, {})
+            state = str(facility["state"]).upper()
+            phone = (facility.get("phone") or "").strip() or None
+            website = (facility.get("website") or "").strip() or None
+            buyers.append({
+                "id": str(uuid.uuid5(_SEED_NAMESPACE, key)),
+                "external_seed_key": key,
+                "name": facility["name"],
+                "type": facility["type"],
+                "city": facility["city"],
+                "state": state,
+                "region": facility.get("region"),
+                "lat": float(facility["lat"]),
+                "lng": float(facility["lng"]),
+                "crop_type": facility.get("cropType") or match.get("cropType") or mr.DEFAULT_CROP,
+                "launch_scope": "corridor" if state in SEED_CORRIDOR_STATES else "out_of_scope",
+                "rail_confidence": match.get("railConfidence"),
+                "active": True,
+                "verified_status": "unverified",
+                "facility_phone": phone,
+                "website_url": website,
+                "contact_role": "Operations" if facility["type"] == "transload" else "Grain Desk",
+                "created_at": seeded_at,
+                "updated_at": seeded_at,
+            })
+        return cls(buyers)
+
+    # -- reads -----------------------------------------------------------------
+
+    def fetch_buyers(
+        self, crop: str, verified_only: bool, limit: Optional[int], bbox: Optional[Tuple[float, float, float, float]] = None
+    ) -> List[BuyerRow]:
+        def in_scope(b: Dict[str, Any]) -> bool:
+            if bbox is None:
+                return b["launch_scope"] == "corridor" and b["state"] in PRIMARY_CORRIDOR_STATES
+            return bbox[0] <= float(b["lat"]) <= bbox[1] and bbox[2] <= float(b["lng"]) <= bbox[3]
+
+        with self._lock:
+            rows = [
+                b for b in self.buyers
+                if b["active"]
+                and b["crop_type"] == crop
+                and in_scope(b)
+                and (not verified_only or b.get("verified_status") == "verified")
+            ]
+        rows.sort(key=lambda b: b["name"])
+        rows.sort(key=lambda b: b["state"])
+        rows.sort(key=lambda b: b.get("rail_confidence") or 0, reverse=True)
+        return [
+            BuyerRow(
+                id=b["id"],
+                external_seed_key=b.get("external_seed_key"),
+                name=b["name"],
+                type=b["type"],
+                city=b["city"],
+                state=b["state"],
+                region=b["region"],
+                lat=float(b["lat"]),
+                lng=float(b["lng"]),
+                crop_type=b["crop_type"],
+                launch_scope=b["launch_scope"],
+                rail_confidence=int(b["rail_confidence"]) if b.get("rail_confidence") is not None else None,
+                verified_status=b.get("verified_status"),
+                facility_phone=b.get("facility_phone"),
+                website_url=b.get("website_url"),
+                contact_role=b.get("contact_role"),
+                created_at=b.get("created_at"),
+                row_version=b.get("updated_at"),
+            )
+            for b in (rows if limit is None else rows[: mr.buyer_limit(limit)])
+        ]
+
+    def fetch_latest_observations(self, crop: str, buyer_ids: Iterable[str], exclude: Iterable[BidObservation] = ()) -> Dict[str, BidObservation]:
+        ids = {str(i) for i in buyer_ids}
+        excluded = {mr.bid_identity(o) for o in exclude}
+        latest: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for row in self.observations:
+                buyer_id = str(row["buyer_id"])
+                if buyer_id not in ids or row["crop_type"] != crop or row.get("quarantine_reasons"):
+                    continue
+                if excluded:
+                    values = [float(row[k]) if row.get(k) is not None else None for k in ("cash_bid", "basis")]
+                    if (buyer_id, row.get("source_url") or "", *values) in excluded:
+                        continue
+                prev = latest.get(buyer_id)
+                # ORDER BY observed_at DESC, COALESCE(confidence_score, 0) DESC
+                if prev is None or (row["observed_at"], row.get("confidence_score") or 0) > (prev["observed_at"], prev.get("confidence_score") or 0):
+                    latest[buyer_id] = row
+        return {
+            buyer_id: BidObservation(
+                buyer_id=row["buyer_id"],
+                crop_type=row["crop_type"],
+                source_kind=row["source_kind"],
+                source_label=row.get("source_label") or row["source_kind"],
+                source_url=row.get("source_url") or "",
+                observed_at=row["observed_at"],
+                cash_bid=row.get("cash_bid"),
+                basis=row.get("basis"),
+                futures_price=row.get("futures_price"),
+                confidence_score=int(row.get("confidence_score") or 50),
+                parsed_from_pdf=bool(row.get("parsed_from_pdf")),
+                raw_excerpt=row.get("raw_excerpt"),
+                raw_payload_json=row.get("raw_payload_json") or {},
+                id=row["id"],
+                raw_body_sha256=row.get("raw_body_sha256"),
+            )
+            for buyer_id, row in latest.items()
+        }
+
+    def find_reusable_run(self, crop: str, input_fingerprint: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            matches = [
+                r for r in self.runs.values()
+                if r["crop_type"] == crop and r["input_fingerprint"] == input_fingerprint and r["status"] == "success"
+            ]
+        if not matches:
+            return None
+        run = max(matches, key=lambda r: r["started_at"])
+        return {
+            "source_run_id": run["reused_from_run_id"] or run["id"],
+            "top_states": run["top_states"],
+            "summary_json": run["summary_json"],
+        }
+
+    # -- writes ----------------------------------------------------------------
+
+    def create_run(self, crop: str, input_fingerprint: Optional[str] = None, reused_from_run_id: Optional[str] = None) -> str:
+        run_id = str(uuid.uuid4())
+        with self._lock:
+            self.runs[run_id] = {
+                "id": run_id,
+                "run_date": date.today(),
+                "crop_type": crop,
+                "status": "running",
+                "started_at": mr.now_utc(),
+                "ended_at": None,
+                "top_states": [],
+                "source_summary_json": {},
+                "summary_json": {},
+                "input_fingerprint": input_fingerprint,
+                "reused_from_run_id": reused_from_run_id,
+                "base_run_id": None,
+                "recommendation_count": None,
+            }
+            self._undo.append(lambda: self.runs.pop(run_id, None))
+        return run_id
+
+    def finalize_run(self, run_id: str, status: str, top_states: List[str], source_summary: Dict[str, Any], summary: Dict[str, Any]) -> None:
+        with self._lock:
+            run = self.runs.get(run_id)
+            if run is None:
+                return
+            before = dict(run)
+            run.update({
+                "status": status,
+                "ended_at": mr.now_utc(),
+                "top_states": list(top_states),
+                # Round-trip through JSON like the ::jsonb casts do.
+                "source_summary_json": json.loads(json.dumps(source_summary, default=str)),
+                "summary_json": json.loads(json.dumps(summary, default=str)),
+            })
+            self._undo.append(lambda: run.update(before))
+
+    def _append(self, table: List[Dict[str, Any]], rows: List[Dict[str, Any]]) -> None:
+        table.extend(rows)
+        # By identity, not position: another session may have appended after us.
+        added = {id(row) for row in rows}
+        self._undo.append(lambda: table.__setitem__(slice(None), [row for row in table if id(row) not in added]))
+
+    def insert_observations(self, observations: List[BidObservation]) -> int:
+        rows = [
+            {
+                "id": str(uuid.uuid4()),
+                "buyer_id": str(obs.buyer_id),
+                "crop_type": obs.crop_type,
+                "source_kind": obs.source_kind,
+                "source_label": obs.source_label,
+                "source_url": obs.source_url,
+                "observed_at": obs.observed_at,
+                "cash_bid": obs.cash_bid,
+                "basis": obs.basis,
+                "futures_price": obs.futures_price,
+                "confidence_score": obs.confidence_score,
+                "parsed_from_pdf": obs.parsed_from_pdf,
+                "raw_excerpt": obs.raw_excerpt,
+                "raw_payload_json": json.loads(json.dumps(obs.raw_payload_json, default=str)),
+                "raw_body_sha256": obs.raw_body_sha256,
+                "created_at": datetime.now(tz=UTC),
+                "quarantine_reasons": list(obs.quarantine_reasons) if obs.quarantine_reasons else None,
+            }
+            for obs in observations
+        ]
+        with self._lock:
+            self._append(self.observations, rows)
+        for obs, row in zip(observations, rows):
+            obs.id = row["id"]
+        METRICS.incr("rows_written_total", len(rows), table="buyer_cash_bid_observations")
+        return len(rows)
+
+    def find_delta_base(self, crop: str) -> Optional[str]:
+        today = date.today()
+        with self._lock:
+            runs = [
+                r for r in self.runs.values()
+                if r["crop_type"] == crop and r["run_date"] == today and r["status"] == "success" and not r["reused_from_run_id"]
+            ]
+        if not runs:
+            return None
+        run = max(runs, key=lambda r: r["started_at"])
+        return run["base_run_id"] or run["id"]
+
+    def fetch_recommendation_rows(self, run_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = [dict(r) for r in self.recommendations if r["run_id"] == run_id]
+        return sorted(rows, key=lambda r: r["rank"])
+
+    def resolved_recommendations(self, run_id: str) -> List[Dict[str, Any]]:
+        """The run's full list, as the morning_recommendations_resolved view rebuilds it."""
+        with self._lock:
+            run = self.runs.get(run_id) or {}
+        own = {r["rank"]: r for r in self.fetch_recommendation_rows(run_id)}
+        if run.get("base_run_id"):
+            for row in self.fetch_recommendation_rows(run["base_run_id"]):
+                if row["rank"] <= (run.get("recommendation_count") or 0) and row["rank"] not in own:
+                    own[row["rank"]] = {**row, "run_id": run_id}
+        return [own[rank] for rank in sorted(own)]
+
+    def insert_recommendations(self, run_id: str, ranked: List[RankedBuyer], ranks: Optional[Iterable[int]] = None) -> int:
+        only = set(ranks) if ranks is not None else None
+        rows = [
+            {**mr.recommendation_row(run_id, idx, item), "buyer_id": str(item.buyer.id)}
+            for idx, item in enumerate(ranked, start=1)
+            if only is None or idx in only
+        ]
+        with self._lock:
+            self._append(self.recommendations, rows)
+        METRICS.incr("rows_written_total", len(rows), table="morning_recommendations")
+        return len(rows)
+
+    def set_run_recommendations(self, run_id: str, count: int, base_run_id: Optional[str] = None) -> None:
+        with self._lock:
+            run = self.runs.get(run_id)
+            if run is None:
+                return
+            before = dict(run)
+            run.update({"recommendation_count": count, "base_run_id": base_run_id})
+            self._undo.append(lambda: run.update(before))
+
+    def insert_candidate_features(self, run_id: str, run_date: date, crop: str, candidates: List[RankedBuyer], ranked: List[RankedBuyer]) -> int:
+        rows = [
+            dict(zip(CANDIDATE_FEATURE_COLUMNS, row))
+            for row in mr.candidate_feature_rows(run_id, run_date, crop, candidates, ranked)
+        ]
+        with self._lock:
+            self._append(self.candidate_features, rows)
+        METRICS.incr("rows_written_total", len(rows), table="morning_candidate_features")
+        return len(rows)
+
+    def fetch_freight_lanes(self) -> List[Any]:
+        with self._lock:
+            return list(self.freight_lanes)
+
+    def freight_lanes_version(self) -> Any:
+        with self._lock:
+            return len(self.freight_lanes), id(self.freight_lanes)
+
+    def fetch_bid_history(self, crop: str, observed_since: datetime, created_after: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = list(self.observations)
+        return [
+            {k: row.get(k) for k in ("buyer_id", "observed_at", "cash_bid", "basis", "futures_price", "created_at")}
+            for row in rows
+            if row["crop_type"] == crop
+            and row["observed_at"] >= observed_since
+            and not row.get("quarantine_reasons")
+            and (created_after is None or (row.get("created_at") or row["observed_at"]) > created_after)
+        ]
+
+    def fetch_bid_distributions(self, crop: str, since: datetime) -> List[Dict[str, Any]]:
+        with self._lock:
+            state_by_id = {str(b["id"]): b["state"] for b in self.buyers}
+            rows = list(self.observations)
+        samples: Dict[Tuple[str, Optional[str]], List[float]] = {}
+        for row in rows:
+            if row["crop_type"] != crop or row["observed_at"] < since or row["source_kind"] == "usda" or row.get("quarantine_reasons"):
+                continue
+            x = row.get("basis")
+            if x is None and row.get("cash_bid") is not None and row.get("futures_price") is not None:
+                x = row["cash_bid"] - row["futures_price"]
+            state = state_by_id.get(str(row["buyer_id"]))
+            if x is None or state is None:
+                continue
+            # GROUPING SETS ((state, buyer_id), (state))
+            samples.setdefault((state, str(row["buyer_id"])), []).append(float(x))
+            samples.setdefault((state, None), []).append(float(x))
+        out = []
+        for (state, buyer_id), xs in samples.items():
+            mean = sum(xs) / len(xs)
+            out.append({"state": state, "buyer_id": buyer_id, "n": len(xs), "mean": mean, "m2": sum((x - mean) ** 2 for x in xs)})
+        return out
+
+    def quarantine_observations(self, items: List[Tuple[str, List[str]]]) -> int:
+        reasons_by_id = {str(obs_id): list(reasons) for obs_id, reasons in items}
+        with self._lock:
+            rows = [row for row in self.observations if row["id"] in reasons_by_id]
+            previous = [(row, row.get("quarantine_reasons")) for row in rows]
+            for row in rows:
+                row["quarantine_reasons"] = reasons_by_id[row["id"]]
+            self._undo.append(lambda: [row.__setitem__("quarantine_reasons", old) for row, old in previous])
+        return len(rows)
+
+    def commit(self) -> None:
+        with self._lock:
+            self._undo.clear()
+
+    def rollback(self) -> None:
+        with self._lock:
+            while self._undo:
+                self._undo.pop()()
+
+    def close(self) -> None:
+        self.rollback()
+
+    def open_session(self) -> "InMemoryRepository":
+        """Same tables and lock, separate undo journal: commits/rollbacks are independent."""
+        session = InMemoryRepository.__new__(InMemoryRepository)
+        session.__dict__.update(self.__dict__)
+        session._undo = []
+        return session
+
+
+def seed_key(name: str, city: str, state: str, buyer_type: str) -> str:
+    """`external_seed_key` as computed by apps/api/src/cli/buyers-seed.ts (normalizeKey)."""
+    return "__".join(re.sub(r"[^a-z0-9]+", "-", str(part).strip().lower()).strip("-") for part in (name, city, state, buyer_type))
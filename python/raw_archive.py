@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""Content-addressed archive of the raw pages and PDFs fetched by the scraper.
+
+Observations only keep a short `raw_excerpt`, so an improved `value_regex` or
+`extract_bid_metrics` could never be checked against past documents. With
+`morning_ranker.py --raw-archive-dir DIR` every fetched body is kept here:
+
+    DIR/objects/ab/<sha256>.zst   zstd-compressed body, keyed by the sha256 of the raw bytes
+    DIR/index/YYYY-MM-DD.jsonl    one line per scraped source: source config, buyer,
+                                  body hashes and what was extracted at the time
+
+Identical bodies (unchanged bid sheets) are stored once. `BidObservation.raw_body_sha256`
+points at the document the bid was extracted from.
+
+`reextract` re-parses a date range from the archive in parallel, with no network, and
+reports where the current extractor disagrees with what was extracted at fetch time:
+
+  python raw_archive.py reextract --archive-dir DIR --start 2026-03-01 --end 2026-03-31
+  python raw_archive.py reextract --archive-dir DIR --start 2026-03-01 \\
+      --bid-source-config bid_sources.json --fail-on-lost --output /tmp/reextract.json
+  python raw_archive.py stats --archive-dir DIR
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_RAW_ARCHIVE_DIR = os.environ.get("CORN_INTEL_RAW_ARCHIVE_DIR")
+DEFAULT_ZSTD_LEVEL = 10
+# Extracted values closer than this are the same bid.
+VALUE_TOLERANCE = 1e-6
+
+
+def require_zstandard():
+    try:
+        import zstandard  # type: ignore
+        return zstandard
+    except Exception as exc:  # pragma: no cover
+        raise RuntimeError("zstandard is required for the raw document archive (python/requirements.txt)") from exc
+
+
+class RawArchive:
+    def __init__(self, root: str, level: int = DEFAULT_ZSTD_LEVEL):
+        self.root = root
+        self.level = level
+        self._zstd = require_zstandard()
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(root, "index"), exist_ok=True)
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}.zst")
+
+    def put(self, body: bytes) -> Tuple[str, bool]:
+        """Store `body`; returns (sha256 hex digest, newly_stored)."""
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._object_path(digest)
+        if os.path.exists(path):
+            return digest, False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Compressor objects are not safe to share across threads; they are cheap to make.
+        compressed = self._zstd.ZstdCompressor(level=self.level).compress(body)
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(compressed)
+        os.replace(tmp, path)
+        return digest, True
+
+    def get(self, digest: str) -> bytes:
+        with open(self._object_path(digest), "rb") as f:
+            compressed = f.read()
+        body = self._zstd.ZstdDecompressor().decompress(compressed)
+        if hashlib.sha256(body).hexdigest() != digest:
+            raise ValueError(f"archived object {digest} is corrupt")
+        return body
+
+    def has(self, digest: str) -> bool:
+        return os.path.exists(self._object_path(digest))
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        """Append one scraped-source entry to the index file for its `fetchedAt` day."""
+        day = str(entry["fetchedAt"])[:10]
+        line = json.dumps(entry, sort_keys=True, default=str)
+        with self._lock:
+            with open(os.path.join(self.root, "index", f"{day}.jsonl"), "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def iter_entries(self, start: Optional[date] = None, end: Optional[date] = None) -> Iterator[Dict[str, Any]]:
+        """Index entries fetched on days in [start, end], oldest day first."""
+        index_dir = os.path.join(self.root, "index")
+        for name in sorted(os.listdir(index_dir)):
+            if not name.endswith(".jsonl"):
+                continue
+            try:
+                day = date.fromisoformat(name[:-6])
+            except ValueError:
+                continue
+            if (start and day < start) or (end and day > end):
+                continue
+            with open(os.path.join(index_dir, name), "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+    def stats(self) -> Dict[str, Any]:
+        objects = 0
+        compressed_bytes = 0
+        for dirpath, _, filenames in os.walk(os.path.join(self.root, "objects")):
+            for name in filenames:
+                if name.endswith(".zst"):
+                    objects += 1
+                    compressed_bytes += os.path.getsize(os.path.join(dirpath, name))
+        entries = 0
+        raw_bytes = 0
+        days = set()
+        for entry in self.iter_entries():
+            entries += 1
+            raw_bytes += int(entry.get("bodyBytes") or 0) + int(entry.get("pageBytes") or 0)
+            days.add(str(entry["fetchedAt"])[:10])
+        return {
+            "root": self.root,
+            "objects": objects,
+            "compressedBytes": compressed_bytes,
+            "indexEntries": entries,
+            "indexedRawBytes": raw_bytes,
+            "days": len(days),
+            "firstDay": min(days) if days else None,
+            "lastDay": max(days) if days else None,
+        }
+
+
+def _values_differ(a: Optional[float], b: Optional[float]) -> bool:
+    if a is None or b is None:
+        return (a is None) != (b is None)
+    return abs(float(a) - float(b)) > VALUE_TOLERANCE
+
+
+def _reextract_chunk(root: str, entries: List[Dict[str, Any]], overrides: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    import morning_ranker as mr
+
+    archive = RawArchive(root)
+    out = []
+    for entry in entries:
+        source_fields = dict(entry["source"])
+        source_fields.update(overrides.get(_override_key(source_fields), {}))
+        source = mr.SourceConfig(**source_fields)
+        result: Dict[str, Any] = {"fetchedAt": entry["fetchedAt"], "label": source.label, "url": entry.get("url"),
+                                  "bodySha256": entry.get("bodySha256"), "before": entry.get("result")}
+        try:
+            body = archive.get(entry["bodySha256"])
+            text = mr.document_text(source, body, bool(entry.get("parsedFromPdf")))
+            cash_bid, basis, futures_price, _ = mr.extract_bid_metrics(text, source)
+            result["after"] = None if cash_bid is None else {
+                "cashBid": cash_bid, "basis": basis, "futuresPrice": futures_price,
+            }
+        except Exception as exc:
+            result["after"] = None
+            result["error"] = str(exc)
+        out.append(result)
+    return out
+
+
+def _override_key(source_fields: Dict[str, Any]) -> str:
+    return f"{source_fields.get('buyer_external_seed_key')}|{source_fields.get('url')}"
+
+
+def load_source_overrides(path: Optional[str], crop: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """Current bid_sources.json patterns keyed by (buyer key, url), applied over archived configs."""
+    if not path:
+        return {}
+    import morning_ranker as mr
+
+    overrides: Dict[str, Dict[str, Any]] = {}
+    for source in mr.load_source_configs(path, crop or mr.DEFAULT_CROP):
+        fields = asdict(source)
+        overrides[_override_key(fields)] = {k: v for k, v in fields.items() if k.endswith("_regex") or k == "text_selector"}
+    return overrides
+
+
+def classify(result: Dict[str, Any]) -> str:
+    before, after = result.get("before"), result.get("after")
+    if before is None and after is None:
+        return "stillMissing"
+    if before is None:
+        return "gained"
+    if after is None:
+        return "lost"
+    if any(_values_differ(before.get(k), after.get(k)) for k in ("cashBid", "basis", "futuresPrice")):
+        return "changed"
+    return "unchanged"
+
+
+def reextract(
+    root: str,
+    start: Optional[date],
+    end: Optional[date],
+    source_config: Optional[str] = None,
+    crop: Optional[str] = None,
+    workers: Optional[int] = None,
+    chunk_size: int = 64,
+) -> Dict[str, Any]:
+    archive = RawArchive(root)
+    overrides = load_source_overrides(source_config, crop)
+    entries = [e for e in archive.iter_entries(start, end) if e.get("bodySha256")]
+    if crop:
+        entries = [e for e in entries if e["source"].get("crop_type") == crop]
+    chunks = [entries[i:i + chunk_size] for i in range(0, len(entries), chunk_size)]
+
+    results: List[Dict[str, Any]] = []
+    if chunks:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for chunk_results in pool.map(_reextract_chunk, [root] * len(chunks), chunks, [overrides] * len(chunks)):
+                results.extend(chunk_results)
+
+    counts: Dict[str, int] = {"unchanged": 0, "changed": 0, "gained": 0, "lost": 0, "stillMissing": 0}
+    diffs = []
+    for result in results:
+        kind = classify(result)
+        counts[kind] += 1
+        if kind not in {"unchanged", "stillMissing"}:
+            diffs.append({"kind": kind, **result})
+    return {
+        "archive": root,
+        "start": start.isoformat() if start else None,
+        "end": end.isoformat() if end else None,
+        "sourceConfig": source_config,
+        "documents": len(results),
+        "errors": sum(1 for r in results if r.get("error")),
+        "counts": counts,
+        "diffs": diffs,
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Raw scraped-document archive tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rex = sub.add_parser("reextract", help="Re-run extraction over archived documents (no network)")
+    rex.add_argument("--archive-dir", default=DEFAULT_RAW_ARCHIVE_DIR, required=DEFAULT_RAW_ARCHIVE_DIR is None)
+    rex.add_argument("--start", type=date.fromisoformat, help="First fetch day (YYYY-MM-DD, inclusive)")
+    rex.add_argument("--end", type=date.fromisoformat, help="Last fetch day (YYYY-MM-DD, inclusive)")
+    rex.add_argument("--days", type=int, help="Shortcut for --start N days before --end (default today)")
+    rex.add_argument("--bid-source-config", help="Apply this bid_sources.json's patterns instead of the archived ones")
+    rex.add_argument("--crop")
+    rex.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    rex.add_argument("--output", help="Write the full report JSON here")
+    rex.add_argument("--fail-on-lost", action="store_true", help="Exit 1 if a previously extracted bid is now missed")
+    rex.add_argument("--fail-on-diff", action="store_true", help="Exit 1 on any lost or changed value")
+
+    st = sub.add_parser("stats", help="Object/index counts and sizes")
+    st.add_argument("--archive-dir", default=DEFAULT_RAW_ARCHIVE_DIR, required=DEFAULT_RAW_ARCHIVE_DIR is None)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    if args.command == "stats":
+        print(json.dumps(RawArchive(args.archive_dir).stats(), indent=2))
+        return 0
+
+    end = args.end
+    start = args.start
+    if args.days is not None:
+        end = end or datetime.now().date()
+        start = end - timedelta(days=args.days)
+    report = reextract(args.archive_dir, start, end, args.bid_source_config, args.crop, args.workers)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, default=str)
+            f.write("\n")
+    print(json.dumps({k: v for k, v in report.items() if k != "diffs"}, indent=2))
+    for diff in report["diffs"][:20]:
+        print(f"[reextract] {diff['kind']}: {diff['label']} {diff['fetchedAt']} {diff.get('before')} -> {diff.get('after')}",
+              file=sys.stderr)
+
+    counts = report["counts"]
+    if args.fail_on_diff and (counts["lost"] or counts["changed"]):
+        return 1
+    if args.fail_on_lost and counts["lost"]:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""Time-boxed regular expressions for `bid_sources.json` patterns.
+
+`value_regex` / `basis_regex` / `futures_regex` / `pdf_link_regex` are user-edited and
+run over whole documents, so one catastrophically backtracking pattern could hang a
+morning run. Every search in the scraper goes through `RegexGuard.search`, which:
+
+- compiles once per (pattern, flags) and caches; `validate()` is called at config
+  load so bad patterns are rejected before any fetching starts
+- enforces a per-search time budget: with the optional `regex` package installed,
+  its native `timeout=`; otherwise the search runs in a persistent worker process
+  that is killed and respawned when the budget is exceeded
+- runs patterns registered with `trust()` (the ranker's own built-in patterns)
+  in-process: under the same native timeout when `regex` is installed, otherwise with
+  no budget, since the worker round-trip is not free. A trusted pattern must therefore
+  be linear in the text (bounded gaps, no nested quantifiers); tests/test_regex_guard.py
+  times each built-in one on adversarial input
+- records searches slower than `slow_seconds` (and timeouts) for the scrape summary
+
+A timed-out search behaves like "no match", so extraction falls through to the next
+pattern and the run carries on.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import regex as _regex  # type: ignore
+except Exception:  # pragma: no cover
+    _regex = None
+
+DEFAULT_BUDGET_SECONDS = 0.5
+DEFAULT_SLOW_SECONDS = 0.05
+WORKER_START_TIMEOUT_SECONDS = 30.0
+# Nested unbounded quantifiers such as (a+)+ or (\w*)* are the classic backtracking bombs.
+_NESTED_QUANTIFIER = re.compile(r"\((?:[^()\\]|\\.)*[+*](?:[^()\\]|\\.)*\)[+*{]")
+
+
+class RegexTimeout(Exception):
+    pass
+
+
+@dataclass
+class GuardedMatch:
+    """The subset of `re.Match` the extractors use, returned from the worker process."""
+
+    span: Tuple[int, int]
+    group0: str
+    group_values: Tuple[Optional[str], ...]
+
+    def start(self) -> int:
+        return self.span[0]
+
+    def end(self) -> int:
+        return self.span[1]
+
+    def group(self, index: int = 0) -> Optional[str]:
+        return self.group0 if index == 0 else self.group_values[index - 1]
+
+    def groups(self) -> Tuple[Optional[str], ...]:
+        return self.group_values
+
+
+def _to_guarded(match: Any) -> Optional[GuardedMatch]:
+    if match is None:
+        return None
+    return GuardedMatch(span=match.span(), group0=match.group(0), group_values=tuple(match.groups()))
+
+
+def _worker_loop(conn) -> None:
+    compiled: Dict[Tuple[str, int], Any] = {}
+    conn.send(("ready", None))
+    while True:
+        try:
+            pattern, flags, text = conn.recv()
+        except EOFError:
+            return
+        try:
+            key = (pattern, flags)
+            if key not in compiled:
+                compiled[key] = re.compile(pattern, flags)
+            conn.send(("ok", _to_guarded(compiled[key].search(text))))
+        except Exception as exc:
+            conn.send(("error", str(exc)))
+
+
+class _SearchWorker:
+    """One long-lived `re` worker process; killed and respawned after a timeout."""
+
+    def __init__(self) -> None:
+        # Imported here: most runs never search with an untrusted pattern, and
+        # multiprocessing is most of this module's import time.
+        import multiprocessing
+
+        self._ctx = multiprocessing.get_context("spawn")
+        self._proc = None
+        self._conn = None
+
+    def _ensure(self) -> None:
+        if self._proc is not None and self._proc.is_alive():
+            return
+        parent, child = self._ctx.Pipe()
+        proc = self._ctx.Process(target=_worker_loop, args=(child,), name="regex-guard", daemon=True)
+        proc.start()
+        child.close()
+        # Spawn start-up (interpreter + imports) must not eat into the first search's budget.
+        if not parent.poll(WORKER_START_TIMEOUT_SECONDS):
+            proc.kill()
+            raise RuntimeError("regex worker failed to start")
+        parent.recv()
+        self._proc, self._conn = proc, parent
+
+    def search(self, pattern: str, flags: int, text: str, budget: float) -> Optional[GuardedMatch]:
+        self._ensure()
+        assert self._conn is not None
+        try:
+            self._conn.send((pattern, flags, text))
+            if not self._conn.poll(budget):
+                self.kill()
+                raise RegexTimeout(f"regex exceeded {budget:.3f}s")
+            status, payload = self._conn.recv()
+        except (EOFError, OSError) as exc:
+            self.kill()
+            raise RuntimeError(f"regex worker died: {exc}") from exc
+        if status == "error":
+            raise re.error(payload)
+        return payload
+
+    def kill(self) -> None:
+        if self._proc is not None:
+            self._proc.kill()
+            self._proc.join(1.0)
+        if self._conn is not None:
+            self._conn.close()
+        self._proc = self._conn = None
+
+
+class RegexGuard:
+    def __init__(self, budget_seconds: float = DEFAULT_BUDGET_SECONDS, slow_seconds: float = DEFAULT_SLOW_SECONDS):
+        self.budget_seconds = budget_seconds
+        self.slow_seconds = slow_seconds
+        self.engine = "regex" if _regex is not None else "re+worker"
+        self._compiled: Dict[Tuple[str, int], Any] = {}
+        self._worker: Optional[_SearchWorker] = None
+        self._lock = threading.Lock()
+        self._slow: Dict[str, Dict[str, Any]] = {}
+        self._trusted: set = set()
+
+    def trust(self, *patterns: str) -> None:
+        """Mark built-in patterns as safe to run in-process (unbudgeted without `regex`).
+
+        Only for patterns whose search time is linear in the text on any input.
+        """
+        self._trusted.update(patterns)
+
+    def configure(self, budget_seconds: Optional[float] = None, slow_seconds: Optional[float] = None) -> None:
+        if budget_seconds is not None:
+            self.budget_seconds = budget_seconds
+        if slow_seconds is not None:
+            self.slow_seconds = slow_seconds
+
+    def compile(self, pattern: str, flags: int = 0) -> Any:
+        key = (pattern, flags)
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            # Compile with `re` even when `regex` does the matching, so validation is the
+            # same for every install; `regex` accepts everything `re` does.
+            compiled = re.compile(pattern, flags)
+            if _regex is not None:
+                compiled = _regex.compile(pattern, flags)
+            self._compiled[key] = compiled
+        return compiled
+
+    def validate(self, pattern: str, flags: int = 0) -> List[str]:
+        """Compile `pattern` (raises re.error if invalid); returns non-fatal warnings."""
+        self.compile(pattern, flags)
+        warnings = []
+        if _NESTED_QUANTIFIER.search(pattern):
+            warnings.append("nested quantifier; may backtrack catastrophically")
+        return warnings
+
+    def search(self, pattern: str, text: str, flags: int = 0, label: str = "") -> Optional[Any]:
+        """`re.search` with the time budget. Returns None on no match *or* timeout."""
+        compiled = self.compile(pattern, flags)
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            if _regex is not None:
+                try:
+                    return compiled.search(text, timeout=self.budget_seconds)
+                except TimeoutError:
+                    timed_out = True
+                    return None
+            if pattern in self._trusted:
+                return compiled.search(text)
+            with self._lock:
+                if self._worker is None:
+                    self._worker = _SearchWorker()
+                # Worker start-up is not the pattern's fault; keep it out of the timing.
+                self._worker._ensure()
+                started = time.perf_counter()
+                try:
+                    return self._worker.search(pattern, flags, text, self.budget_seconds)
+                except RegexTimeout:
+                    timed_out = True
+                    return None
+        finally:
+            elapsed = time.perf_counter() - started
+            if timed_out or elapsed >= self.slow_seconds:
+                self._record(pattern, label, elapsed, len(text), timed_out)
+
+    def _record(self, pattern: str, label: str, elapsed: float, text_len: int, timed_out: bool) -> None:
+        with self._lock:
+            entry = self._slow.setdefault(
+                pattern,
+                {"pattern": pattern, "sources": [], "count": 0, "timeouts": 0, "maxMs": 0.0, "maxTextChars": 0},
+            )
+            entry["count"] += 1
+            entry["timeouts"] += int(timed_out)
+            entry["maxMs"] = round(max(entry["maxMs"], elapsed * 1000.0), 2)
+            entry["maxTextChars"] = max(entry["maxTextChars"], text_len)
+            if label and label not in entry["sources"] and len(entry["sources"]) < 5:
+                entry["sources"].append(label)
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._slow.clear()
+
+    def slow_patterns(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return sorted((dict(e) for e in self._slow.values()), key=lambda e: (-e["timeouts"], -e["maxMs"]))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._worker is not None:
+                self._worker.kill()
+                self._worker = None
+
+
+REGEX_GUARD = RegexGuard()
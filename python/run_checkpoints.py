@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""Local stage checkpoints for `morning_ranker.py`.
+
+Each run gets a checkpoint key and a directory under the checkpoint root:
+
+    <root>/<run_key>/manifest.json      args + completed stages
+    <root>/<run_key>/<stage>.json       stage output (buyers, latest_observations, scrape, usda,
+                                        observations, persist)
+
+`--resume RUN_KEY` reloads completed stages and only recomputes the rest, so a DB
+hiccup at persist time no longer repeats minutes of scraping. Ranking itself is cheap
+and always recomputed from the checkpointed inputs. The `observations` stage records
+which scraped observations the writer thread stored; a resume writes only the rest
+(batches that failed, or that a crash cut off) instead of inserting duplicates.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from dataclasses import asdict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from morning_ranker import BidObservation, BuyerRow
+
+DEFAULT_CHECKPOINT_ROOT = os.environ.get(
+    "CORN_INTEL_CHECKPOINT_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "cornintel", "ranker-runs"),
+)
+CHECKPOINT_RETENTION_DAYS = 7
+
+T = TypeVar("T")
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"__dt__": value.isoformat()}
+    if isinstance(value, uuid.UUID):
+        return {"__uuid__": str(value)}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and len(value) == 1:
+        if "__dt__" in value:
+            return datetime.fromisoformat(value["__dt__"])
+        if "__uuid__" in value:
+            # Restore UUID objects so psycopg binds them as uuid (e.g. in `= ANY(%s)`).
+            return uuid.UUID(value["__uuid__"])
+    return value
+
+
+# Datetimes/UUIDs inside dataclass fields are handled by the json `default` /
+# `object_hook` pair on write and load, so these helpers only map dataclasses.
+def encode_buyers(buyers: List[BuyerRow]) -> List[Dict[str, Any]]:
+    return [asdict(b) for b in buyers]
+
+
+def decode_buyers(raw: List[Dict[str, Any]]) -> List[BuyerRow]:
+    return [BuyerRow(**r) for r in raw]
+
+
+def encode_observations(observations: List[BidObservation]) -> List[Dict[str, Any]]:
+    return [asdict(o) for o in observations]
+
+
+def decode_observations(raw: List[Dict[str, Any]]) -> List[BidObservation]:
+    return [BidObservation(**r) for r in raw]
+
+
+def encode_scrape(result: Tuple[List[BidObservation], Dict[str, BidObservation], Dict[str, Any]]) -> Dict[str, Any]:
+    observations, best_map, summary = result
+    index = {id(o): i for i, o in enumerate(observations)}
+    return {
+        # Ids are the writer's, still being assigned; the `observations` stage records them.
+        "observations": [{**o, "id": None} for o in encode_observations(observations)],
+        "best": [index[id(o)] for o in best_map.values()],
+        "summary": summary,
+    }
+
+
+def decode_scrape(raw: Dict[str, Any]) -> Tuple[List[BidObservation], Dict[str, BidObservation], Dict[str, Any]]:
+    observations = decode_observations(raw["observations"])
+    best = {observations[i].buyer_id: observations[i] for i in raw["best"]}
+    return observations, best, raw["summary"]
+
+
+def encode_written(observations: List[BidObservation], failed: List[BidObservation]) -> Dict[str, Any]:
+    """The observation writer's outcome, by index into the checkpointed scrape."""
+    index = {id(o): i for i, o in enumerate(observations)}
+    return {
+        "ids": [str(o.id) if o.id else None for o in observations],
+        "failed": [index[id(o)] for o in failed],
+    }
+
+
+def restore_written(observations: List[BidObservation], raw: Dict[str, Any]) -> List[BidObservation]:
+    """Put back the ids the writer stored; returns what is left to write (failed batches included)."""
+    for obs, obs_id in zip(observations, raw["ids"]):
+        obs.id = obs_id
+    return [o for o in observations if not o.id]
+
+
+class CheckpointStore:
+    def __init__(self, root: str, run_key: str, manifest: Dict[str, Any]):
+        self.root = root
+        self.run_key = run_key
+        self.path = os.path.join(root, run_key)
+        self.manifest = manifest
+        # Stages run concurrently in morning_ranker's stage graph; serialize manifest updates.
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, root: str, run_args: Dict[str, Any]) -> "CheckpointStore":
+        run_key = uuid.uuid4().hex
+        os.makedirs(os.path.join(root, run_key), exist_ok=True)
+        store = cls(root, run_key, {"runKey": run_key, "createdAt": time.time(), "args": run_args, "completed": []})
+        store._write_json("manifest.json", store.manifest)
+        return store
+
+    @classmethod
+    def open(cls, root: str, run_key: str) -> "CheckpointStore":
+        manifest_path = os.path.join(root, run_key, "manifest.json")
+        if not os.path.exists(manifest_path):
+            raise RuntimeError(f"No checkpoints found for run {run_key} under {root}")
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return cls(root, run_key, json.load(f))
+
+    def is_complete(self, stage: str) -> bool:
+        return stage in self.manifest.get("completed", [])
+
+    def load(self, stage: str) -> Any:
+        with open(os.path.join(self.path, f"{stage}.json"), "r", encoding="utf-8") as f:
+            return json.load(f, object_hook=_decode_value)
+
+    def save(self, stage: str, payload: Any) -> None:
+        self._write_json(f"{stage}.json", payload)
+        with self._lock:
+            if stage not in self.manifest["completed"]:
+                self.manifest["completed"].append(stage)
+            self._write_json("manifest.json", self.manifest)
+
+    def stage(
+        self,
+        name: str,
+        compute: Callable[[], T],
+        encode: Callable[[T], Any] = lambda v: v,
+        decode: Callable[[Any], T] = lambda v: v,
+    ) -> T:
+        """Return the checkpointed result for `name`, computing and saving it if missing."""
+        if self.is_complete(name):
+            return decode(self.load(name))
+        value = compute()
+        self.save(name, encode(value))
+        return value
+
+    def _write_json(self, name: str, payload: Any) -> None:
+        # Write-then-rename so a crash never leaves a truncated checkpoint behind.
+        target = os.path.join(self.path, name)
+        tmp = f"{target}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(payload, f, default=_encode_value)
+        os.replace(tmp, target)
+
+
+def prune_checkpoints(root: str, keep_days: int = CHECKPOINT_RETENTION_DAYS, keep: Optional[str] = None) -> int:
+    if not os.path.isdir(root):
+        return 0
+    cutoff = time.time() - keep_days * 86400
+    removed = 0
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if name == keep or not os.path.isdir(path):
+            continue
+        if os.path.getmtime(path) < cutoff:
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+    return removed
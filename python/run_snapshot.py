@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""Columnar snapshots of a morning run's resolved inputs.
+
+A snapshot is one file that `morning_ranker.py --replay` (and the benchmarks) can rank
+from with no Postgres, API or website access:
+
+    b"CISNAP01" | u64 header length | header JSON | pad | Arrow IPC stream per table
+
+The header carries the scalar context (futures price, regional basis, model payload,
+run config, capture time) and the byte range of each table section. Sections are
+64-byte aligned so a memory-mapped read hands Arrow its column buffers without
+copying; only the row objects `build_rankings` consumes are materialized.
+
+Tables: buyers, latest_observations, scraped_observations (every new scrape),
+scraped_best (buyer_id -> chosen scrape, by row index into scraped_observations),
+and history_features (buyer_id + HISTORY_FEATURE_NAMES) when the run used them.
+Observation rows keep their stored id and quarantine_reasons, so a replay skips the
+bids the run quarantined.
+"""
+
+from __future__ import annotations
+
+import json
+import struct
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from morning_ranker import HISTORY_FEATURE_NAMES, UTC, BidObservation, BuyerRow
+
+SNAPSHOT_MAGIC = b"CISNAP01"
+SNAPSHOT_VERSION = 1
+_ALIGN = 64
+
+
+@dataclass
+class RunSnapshot:
+    captured_at: datetime
+    buyers: List[BuyerRow]
+    latest_obs: Dict[str, BidObservation]
+    scraped_obs_list: List[BidObservation]
+    scraped_best_map: Dict[str, BidObservation]
+    futures_price: float
+    regional_basis: Dict[str, float]
+    usda_summary: Dict[str, Any]
+    model_payload: Optional[Dict[str, Any]]
+    config: Dict[str, Any]
+    # bid_history features by buyer id, for runs with --history-features.
+    history_features: Optional[Dict[str, Dict[str, float]]] = None
+
+
+def require_pyarrow():
+    try:
+        import pyarrow as pa  # type: ignore
+        import pyarrow.ipc  # type: ignore  # noqa: F401
+        return pa
+    except Exception as exc:  # pragma: no cover
+        raise RuntimeError("pyarrow is required for run snapshots (python/requirements.txt)") from exc
+
+
+def _buyer_schema(pa):
+    return pa.schema(
+        [
+            ("id", pa.string()),
+            ("external_seed_key", pa.string()),
+            ("name", pa.string()),
+            ("type", pa.string()),
+            ("city", pa.string()),
+            ("state", pa.string()),
+            ("region", pa.string()),
+            ("lat", pa.float64()),
+            ("lng", pa.float64()),
+            ("crop_type", pa.string()),
+            ("launch_scope", pa.string()),
+            ("rail_confidence", pa.int32()),
+            ("verified_status", pa.string()),
+            ("facility_phone", pa.string()),
+            ("website_url", pa.string()),
+            ("contact_role", pa.string()),
+            ("created_at", pa.timestamp("us", tz="UTC")),
+        ]
+    )
+
+
+def _observation_schema(pa):
+    return pa.schema(
+        [
+            ("id", pa.string()),
+            ("buyer_id", pa.string()),
+            ("crop_type", pa.string()),
+            ("source_kind", pa.string()),
+            ("source_label", pa.string()),
+            ("source_url", pa.string()),
+            ("observed_at", pa.timestamp("us", tz="UTC")),
+            ("cash_bid", pa.float64()),
+            ("basis", pa.float64()),
+            ("futures_price", pa.float64()),
+            ("confidence_score", pa.int32()),
+            ("parsed_from_pdf", pa.bool_()),
+            ("raw_excerpt", pa.string()),
+            ("raw_payload_json", pa.string()),
+            ("raw_body_sha256", pa.string()),
+            ("quarantine_reasons", pa.list_(pa.string())),
+        ]
+    )
+
+
+def _buyers_table(pa, buyers: List[BuyerRow]):
+    schema = _buyer_schema(pa)
+    columns: Dict[str, List[Any]] = {name: [] for name in schema.names}
+    for b in buyers:
+        for name in schema.names:
+            value = getattr(b, name)
+            columns[name].append(str(value) if name == "id" else value)
+    return pa.table(columns, schema=schema)
+
+
+def _observations_table(pa, observations: List[BidObservation]):
+    schema = _observation_schema(pa)
+    columns: Dict[str, List[Any]] = {name: [] for name in schema.names}
+    for o in observations:
+        for name in schema.names:
+            value = getattr(o, name)
+            if name == "buyer_id" or (name == "id" and value is not None):
+                value = str(value)
+            elif name == "raw_payload_json":
+                value = json.dumps(value or {}, default=str)
+            columns[name].append(value)
+    return pa.table(columns, schema=schema)
+
+
+def _history_table(pa, features: Dict[str, Dict[str, float]]):
+    ids = list(features)
+    columns = {"buyer_id": pa.array(ids, type=pa.string())}
+    for name in HISTORY_FEATURE_NAMES:
+        columns[name] = pa.array([features[i].get(name) for i in ids], type=pa.float64())
+    return pa.table(columns)
+
+
+def _ipc_bytes(pa, table) -> bytes:
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def write_snapshot(path: str, snapshot: RunSnapshot) -> int:
+    """Write `snapshot` to `path`; returns bytes written."""
+    pa = require_pyarrow()
+
+    # Buyer ids may be UUID objects from psycopg; the snapshot keys everything by str.
+    best_index = {id(o): i for i, o in enumerate(snapshot.scraped_obs_list)}
+    best_rows = [best_index[id(o)] for o in snapshot.scraped_best_map.values() if id(o) in best_index]
+    sections = {
+        "buyers": _ipc_bytes(pa, _buyers_table(pa, snapshot.buyers)),
+        "latest_observations": _ipc_bytes(pa, _observations_table(pa, list(snapshot.latest_obs.values()))),
+        "scraped_observations": _ipc_bytes(pa, _observations_table(pa, snapshot.scraped_obs_list)),
+        "scraped_best": _ipc_bytes(pa, pa.table({"row": pa.array(best_rows, type=pa.int32())})),
+    }
+    if snapshot.history_features is not None:
+        sections["history_features"] = _ipc_bytes(pa, _history_table(pa, snapshot.history_features))
+
+    header: Dict[str, Any] = {
+        "version": SNAPSHOT_VERSION,
+        "capturedAt": snapshot.captured_at.isoformat(),
+        "futuresPrice": snapshot.futures_price,
+        "regionalBasis": snapshot.regional_basis,
+        "usdaSummary": snapshot.usda_summary,
+        "modelPayload": snapshot.model_payload,
+        "config": snapshot.config,
+        "sections": {},
+    }
+    # Section offsets depend on header size, so lay out with a generous fixed header pad.
+    header_probe = json.dumps({**header, "sections": {k: [0, len(v)] for k, v in sections.items()}}, default=str)
+    data_start = _align(len(SNAPSHOT_MAGIC) + 8 + len(header_probe) + 256)
+    offset = data_start
+    for name, blob in sections.items():
+        header["sections"][name] = [offset, len(blob)]
+        offset = _align(offset + len(blob))
+    header_bytes = json.dumps(header, default=str).encode("utf-8")
+
+    with open(path, "wb") as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        for name, blob in sections.items():
+            start, _ = header["sections"][name]
+            f.write(b"\0" * (start - f.tell()))
+            f.write(blob)
+        return f.tell()
+
+
+def _align(n: int) -> int:
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _rows_to_buyers(rows: List[Dict[str, Any]]) -> List[BuyerRow]:
+    return [BuyerRow(**row) for row in rows]
+
+
+def _rows_to_observations(rows: List[Dict[str, Any]]) -> List[BidObservation]:
+    out: List[BidObservation] = []
+    for row in rows:
+        row["raw_payload_json"] = json.loads(row["raw_payload_json"] or "{}")
+        out.append(BidObservation(**row))
+    return out
+
+
+def read_snapshot(path: str) -> RunSnapshot:
+    """Memory-map `path` and rebuild the ranker inputs."""
+    pa = require_pyarrow()
+    source = pa.memory_map(path, "r")
+    magic = source.read(len(SNAPSHOT_MAGIC))
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError(f"Not a run snapshot: {path}")
+    (header_len,) = struct.unpack("<Q", source.read(8))
+    header = json.loads(source.read(header_len).decode("utf-8"))
+    if header.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {header.get('version')} in {path}")
+
+    tables = {}
+    for name, (offset, length) in header["sections"].items():
+        # read_at on a memory map returns a zero-copy slice of the mapping.
+        tables[name] = pa.ipc.open_stream(source.read_at(length, offset)).read_all()
+
+    buyers = _rows_to_buyers(tables["buyers"].to_pylist())
+    latest = _rows_to_observations(tables["latest_observations"].to_pylist())
+    scraped = _rows_to_observations(tables["scraped_observations"].to_pylist())
+    best_rows = tables["scraped_best"].column("row").to_pylist()
+    history_features = None
+    if "history_features" in tables:
+        history_features = {
+            row.pop("buyer_id"): {k: v for k, v in row.items() if v is not None}
+            for row in tables["history_features"].to_pylist()
+        }
+
+    return RunSnapshot(
+        captured_at=datetime.fromisoformat(header["capturedAt"]).astimezone(UTC),
+        buyers=buyers,
+        latest_obs={o.buyer_id: o for o in latest},
+        scraped_obs_list=scraped,
+        scraped_best_map={scraped[i].buyer_id: scraped[i] for i in best_rows},
+        futures_price=float(header["futuresPrice"]),
+        regional_basis={k: float(v) for k, v in header["regionalBasis"].items()},
+        usda_summary=header.get("usdaSummary") or {},
+        model_payload=header.get("modelPayload"),
+        config=header.get("config") or {},
+        history_features=history_features,
+    )
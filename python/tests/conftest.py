@@ -0,0 +1,162 @@
+"""Shared fixtures: `morning_ranker.main()` end to end on the in-memory repository.
+
+`RankerHarness` runs the real ranker against `ranker_repository.InMemoryRepository`
+with no network and every cache under pytest's `tmp_path`:
+
+- bid pages are canned HTML served by a `fetch_url` stand-in (`post`)
+- the USDA endpoints return FUTURES_PRICE and the fallback regional basis map
+- the repository is shared across runs, so reuse, deltas and resume see earlier runs
+
+Run from `python/`: `python -m pytest -q tests`.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import os
+import sys
+from contextlib import redirect_stdout
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytest
+
+PYTHON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PYTHON_DIR not in sys.path:
+    sys.path.insert(0, PYTHON_DIR)
+
+import config_cache  # noqa: E402
+import morning_ranker as mr  # noqa: E402
+from ranker_repository import InMemoryRepository  # noqa: E402
+
+FUTURES_PRICE = 4.60
+
+
+def observation(
+    buyer: mr.BuyerRow,
+    observed_at: datetime,
+    basis: float,
+    cash: Optional[float] = None,
+    confidence: int = 90,
+    url: Optional[str] = None,
+) -> mr.BidObservation:
+    """A scraped-looking observation; cash defaults to FUTURES_PRICE + basis."""
+    return mr.BidObservation(
+        buyer_id=buyer.id,
+        crop_type=mr.DEFAULT_CROP,
+        source_kind="website_html",
+        source_label=f"{buyer.name} bids",
+        source_url=url or f"https://bids.test/{buyer.external_seed_key}",
+        observed_at=observed_at,
+        cash_bid=round(FUTURES_PRICE + basis, 2) if cash is None else cash,
+        basis=basis,
+        futures_price=None,
+        confidence_score=confidence,
+        parsed_from_pdf=False,
+        raw_excerpt=None,
+        raw_payload_json={},
+    )
+
+
+@pytest.fixture(scope="session")
+def seed_rows() -> List[Dict[str, Any]]:
+    return InMemoryRepository.from_seed().buyers
+
+
+@pytest.fixture
+def repo(seed_rows) -> InMemoryRepository:
+    return InMemoryRepository([dict(row) for row in seed_rows])
+
+
+class RankerHarness:
+    def __init__(self, repo: InMemoryRepository, tmp_path, monkeypatch):
+        self.repo = repo
+        self.tmp_path = tmp_path
+        self.pages: Dict[str, str] = {}
+        self.sources: List[Dict[str, Any]] = []
+        self.fetches: List[str] = []
+        self.buyers = repo.fetch_buyers(mr.DEFAULT_CROP, False, 5000)
+        self.config_path = str(tmp_path / "bid_sources.json")
+        monkeypatch.setattr(mr, "open_repository", lambda args: repo)
+        monkeypatch.setattr(mr, "fetch_url", self.fetch_url)
+        monkeypatch.setattr(mr, "fetch_usda_futures", lambda base, timeout: (FUTURES_PRICE, "test"))
+        monkeypatch.setattr(
+            mr, "fetch_usda_regional_basis", lambda base, timeout: (dict(mr.FALLBACK_REGIONAL_BASIS), "test")
+        )
+        monkeypatch.setattr(config_cache, "DEFAULT_COMPILED_CACHE_DIR", str(tmp_path / "compiled"))
+
+    def fetch_url(self, url: str, timeout: float) -> Tuple[bytes, str]:
+        self.fetches.append(url)
+        if url not in self.pages:
+            raise RuntimeError(f"404 Not Found: {url}")
+        return self.pages[url].encode("utf-8"), "text/html"
+
+    def buyers_in(self, state: str) -> List[mr.BuyerRow]:
+        return [b for b in self.buyers if b.state == state]
+
+    def post(
+        self,
+        buyer: mr.BuyerRow,
+        basis: float,
+        cash: Optional[float] = None,
+        confidence: int = 90,
+        url: Optional[str] = None,
+    ) -> str:
+        """Add (or replace) a source page for `buyer`; cash defaults to futures + basis."""
+        url = url or f"https://bids.test/{buyer.external_seed_key}/{len(self.sources)}"
+        cash = round(FUTURES_PRICE + basis, 2) if cash is None else cash
+        self.pages[url] = f"<html><body><p>Yellow corn cash bid ${cash:.2f}</p><p>Basis {basis:+.2f}</p></body></html>"
+        if not any(s["url"] == url for s in self.sources):
+            self.sources.append(
+                {
+                    "buyer_external_seed_key": buyer.external_seed_key,
+                    "crop_type": mr.DEFAULT_CROP,
+                    "mode": "html",
+                    "url": url,
+                    "label": f"{buyer.name} bids",
+                    "confidence_score": confidence,
+                }
+            )
+        return url
+
+    def post_state(self, state: str, basis: float = -0.20, count: int = 6) -> List[str]:
+        return [self.post(buyer, basis) for buyer in self.buyers_in(state)[:count]]
+
+    def argv(self, *extra: str) -> List[str]:
+        return [
+            "morning_ranker.py",
+            "--backend", "memory",
+            "--bid-source-config", self.config_path,
+            "--checkpoint-dir", str(self.tmp_path / "runs"),
+            "--no-usda-cache",
+            "--bid-distribution-cache", str(self.tmp_path / "bid_distributions.json"),
+            "--top-states", "20",
+            "--top-n", "200",
+            *extra,
+        ]
+
+    def run(self, *extra: str) -> Tuple[int, Dict[str, Any]]:
+        """Run the ranker once; returns (exit code, the JSON it printed)."""
+        with open(self.config_path, "w", encoding="utf-8") as f:
+            json.dump({"sources": self.sources}, f)
+        # Rewrites within one mtime tick must not hit the in-process compiled config.
+        config_cache.invalidate_compiled(self.config_path)
+        out = io.StringIO()
+        saved = sys.argv
+        sys.argv = self.argv(*extra)
+        try:
+            with redirect_stdout(out):
+                code = mr.main()
+        finally:
+            sys.argv = saved
+        text = out.getvalue().strip()
+        return code, (json.loads(text) if text else {})
+
+    def stored_observations(self, url: Optional[str] = None) -> List[Dict[str, Any]]:
+        return [row for row in self.repo.observations if url is None or row["source_url"] == url]
+
+
+@pytest.fixture
+def harness(repo, tmp_path, monkeypatch) -> RankerHarness:
+    return RankerHarness(repo, tmp_path, monkeypatch)
@@ -0,0 +1,108 @@
+from datetime import timedelta
+
+import backtest_rankings as bt
+import morning_ranker as mr
+from conftest import observation
+
+CURRENT = bt.BacktestVariant(name="current", weights=dict(mr.DEFAULT_WEIGHTED_SCORE), model_payload=None)
+
+
+def historical_run(started_at):
+    return bt.HistoricalRun(
+        run_id="run-1",
+        run_date=started_at.date(),
+        started_at=started_at,
+        futures_price=4.60,
+        regional_basis=dict(mr.FALLBACK_REGIONAL_BASIS),
+        top_n=50,
+        top_states=5,
+        max_bid_age_hours=48.0,
+    )
+
+
+def test_timeline_lookups_are_point_in_time(harness):
+    buyer = harness.buyers_in("ND")[0]
+    t0 = mr.now_utc() - timedelta(days=2)
+    before, after = observation(buyer, t0, -0.30), observation(buyer, t0 + timedelta(hours=6), -0.10)
+    timeline = bt.ObservationTimeline([after, before])
+
+    assert timeline.latest_as_of(buyer.id, t0 - timedelta(seconds=1)) is None
+    assert timeline.latest_as_of(buyer.id, t0 + timedelta(hours=1)) is before
+    assert timeline.latest_as_of(buyer.id, t0 + timedelta(hours=6)) is after
+    assert timeline.realized_between(buyer.id, t0, t0 + timedelta(hours=12)) == [after]
+
+
+def test_replayed_day_ranks_on_pre_run_bids_and_scores_later_ones(harness):
+    buyers = harness.buyers_in("ND") + harness.buyers_in("MN")
+    started_at = mr.now_utc() - timedelta(days=1)
+    posted = [observation(b, started_at - timedelta(hours=2), -0.25) for b in buyers]
+    realized = observation(buyers[0], started_at + timedelta(hours=3), 0.40)
+
+    def replay(observations):
+        bt._init_worker(buyers, bt.ObservationTimeline(observations), [CURRENT], {}, 24.0, {})
+        return bt.evaluate_day(historical_run(started_at))["variants"]["current"]
+
+    without_outcome, with_outcome = replay(posted), replay(posted + [realized])
+
+    # A bid posted after the run never feeds the replayed ranking, only its score.
+    assert with_outcome["topStates"] == without_outcome["topStates"]
+    assert with_outcome["listSize"] == without_outcome["listSize"]
+    assert with_outcome["featureSource"] == "observations"
+    assert without_outcome["realizedNetBidMean"] is None
+    freight = mr.estimate_freight(buyers[0].state, buyers[0].rail_confidence)
+    assert with_outcome["realizedNetBidMean"] == round(realized.cash_bid - freight, 4)
+
+
+def test_feature_store_replay_reproduces_the_live_list(harness):
+    harness.post_state("ND")
+    harness.post_state("MN", basis=-0.35)
+    harness.post_state("IA", basis=-0.15, count=3)
+    code, out = harness.run("--top-states", "2", "--top-n", "10")
+    assert code == 0
+    run_id = out["runId"]
+    stored = [r for r in harness.repo.candidate_features if r["run_id"] == run_id]
+    live = [r["buyer_id"] for r in harness.repo.resolved_recommendations(run_id)]
+
+    candidates = bt.candidates_from_store(stored, {b.id: b for b in harness.buyers})
+    bt.apply_scores(candidates, None, CURRENT.weights)
+    ranked, top_states, _ = bt.select_rankings(candidates, None, CURRENT.weights, 2, 10)
+
+    # Every evaluated candidate is stored, not only the ones that made the list.
+    assert len(stored) > len(live)
+    assert top_states == out["topStates"]
+    assert [item.buyer.id for item in ranked] == live
+
+
+class FakeBasisHistory:
+    def __init__(self, basis):
+        self.basis = basis
+
+    def as_of(self, day):
+        return dict(self.basis), {"regions": len(self.basis)}
+
+
+def test_runs_without_a_recorded_basis_are_marked_and_filled_from_history():
+    started_at = mr.now_utc() - timedelta(days=3)
+    row = {"id": "run-1", "run_date": started_at.date(), "started_at": started_at, "summary_json": {"futuresPrice": 4.6}}
+    recorded = bt.historical_run_from_row({**row, "summary_json": {"regionalBasis": {"ND": -0.5}}})
+    missing = bt.historical_run_from_row(row)
+
+    assert (recorded.basis_source, recorded.regional_basis) == ("run", {"ND": -0.5})
+    assert (missing.basis_source, missing.regional_basis) == ("fallback", dict(mr.FALLBACK_REGIONAL_BASIS))
+
+    assert bt.apply_basis_history([recorded, missing], FakeBasisHistory({"ND": -0.4})) == 1
+    assert (recorded.basis_source, recorded.regional_basis) == ("run", {"ND": -0.5})
+    assert (missing.basis_source, missing.regional_basis) == ("history", {"ND": -0.4})
+
+
+def test_replayed_day_reports_basis_source_and_current_buyer_state(harness):
+    buyers = harness.buyers_in("ND")
+    started_at = mr.now_utc() - timedelta(days=1)
+    run = historical_run(started_at)
+    run.basis_source = "fallback"
+    bt._init_worker(buyers, bt.ObservationTimeline([]), [CURRENT], {}, 24.0, {})
+
+    day = bt.evaluate_day(run)
+
+    assert day["regionalBasisSource"] == "fallback"
+    assert day["currentStateFields"] == ["active", "rail_confidence", "verified_status"]
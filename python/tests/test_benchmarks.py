@@ -0,0 +1,74 @@
+import os
+import sys
+
+import pytest
+
+import morning_ranker as mr
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import run_benchmarks as rb  # noqa: E402
+
+
+def test_compare_ignores_noise_and_flags_real_slowdowns():
+    baseline = {"results": {"fast": {"medianMs": 0.2}, "slow": {"medianMs": 10.0}, "steady": {"medianMs": 10.0}}}
+    results = {
+        "fast": {"medianMs": 0.6},  # +200%, but under the noise floor
+        "slow": {"medianMs": 14.0},
+        "steady": {"medianMs": 10.4},
+        "new": {"medianMs": 99.0},
+    }
+
+    assert [r["benchmark"] for r in rb.compare(results, baseline, threshold_pct=25.0)] == ["slow"]
+
+
+def test_summarize_reports_order_statistics():
+    assert rb.summarize([3.0, 1.0, 2.0]) == {"repeat": 3, "minMs": 1.0, "medianMs": 2.0, "meanMs": 2.0, "maxMs": 3.0}
+
+
+@pytest.mark.parametrize("doc", rb.load_corpus(), ids=lambda d: d["file"])
+def test_extraction_corpus_documents_parse(doc):
+    source = doc["source"]
+    if source.mode == "pdf":
+        text = mr.extract_text_from_pdf(doc["raw"])
+    else:
+        text = mr.extract_html_text(doc["raw"].decode("utf-8", errors="ignore"), source.text_selector)
+
+    cash_bid, basis, _, _ = mr.extract_bid_metrics(text, source)
+
+    assert text.strip()
+    if doc["file"] == "no_bids_posted.html":
+        assert (cash_bid, basis) == (None, None)
+    else:
+        # The generic patterns miss a cash cell on its own line; the basis still parses.
+        assert cash_bid is not None or basis is not None
+        assert cash_bid is None or 2.0 <= cash_bid <= 20.0
+
+
+def test_importing_the_ranker_loads_no_heavy_modules():
+    _, loaded = rb.import_profile("morning_ranker")
+
+    assert "morning_ranker" in loaded
+    assert {name.split(".")[0] for name in loaded} & set(rb.LAZY_MODULES) == set()
+
+
+def test_startup_budget_fails_on_slow_imports_or_eager_heavy_modules():
+    def results(median_ms, lazy):
+        return {"import_morning_ranker": {"medianMs": median_ms, "lazyModulesLoaded": lazy}}
+
+    assert rb.check_startup_budget(results(40.0, []), 60.0)["ok"]
+    assert not rb.check_startup_budget(results(75.0, []), 60.0)["ok"]
+    assert not rb.check_startup_budget(results(40.0, ["numpy"]), 60.0)["ok"]
+    assert rb.check_startup_budget({}, 60.0) is None
+
+
+def test_ranking_suite_times_a_captured_snapshot(harness, tmp_path):
+    harness.post_state("ND")
+    snapshot_path = str(tmp_path / "morning.snapshot")
+    assert harness.run("--dry-run", "--dump-snapshot", snapshot_path)[0] == 0
+
+    results = rb.bench_ranking_snapshot(snapshot_path, repeat=2)
+
+    assert results["read_snapshot[morning]"]["n"] == len(harness.buyers)
+    assert results["build_rankings_snapshot[morning]"]["n"] == len(harness.buyers)
+    assert results["build_rankings_snapshot[morning]"]["repeat"] >= 1
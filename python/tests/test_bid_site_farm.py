@@ -0,0 +1,64 @@
+import os
+import socket
+import sys
+import urllib.error
+import urllib.request
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from bid_site_farm import BidSiteFarm, FarmConfig, load_test  # noqa: E402
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def farm():
+    config = FarmConfig(
+        sites=15,
+        servers=1,
+        port=free_port(),
+        mode_weights=(1.0, 1.0, 1.0),
+        latency_median_ms=1.0,
+        latency_p99_ms=1.0,
+        error_rate=0.0,
+        timeout_rate=0.0,
+    )
+    farm = BidSiteFarm(config)
+    farm.start()
+    yield farm
+    farm.stop()
+
+
+def test_load_test_scrapes_every_mode(farm):
+    assert set(farm.site_modes) == {"html", "pdf", "html_to_pdf"}
+
+    summary = load_test(farm, buyer_count=15, timeout=5.0, seed=7)
+
+    assert summary["sites"] == 15
+    assert summary["succeeded"] == 15 and summary["failed"] == 0
+    assert summary["observations"] == 15
+    assert summary["farmStats"].get("200", 0) >= 15
+
+
+def test_etag_revalidation_returns_not_modified(farm):
+    url = farm.entry_url(0)
+    with urllib.request.urlopen(url, timeout=5) as resp:
+        etag = resp.headers["ETag"]
+        assert resp.read()
+
+    request = urllib.request.Request(url, headers={"If-None-Match": etag})
+    with pytest.raises(urllib.error.HTTPError) as err:
+        urllib.request.urlopen(request, timeout=5)
+    assert err.value.code == 304
+
+
+def test_error_rate_one_fails_every_request():
+    farm = BidSiteFarm(FarmConfig(sites=3, latency_median_ms=1.0, latency_p99_ms=1.0, error_rate=1.0, timeout_rate=0.0))
+
+    assert {farm.draw_fault()[1] for _ in range(20)} == {"error"}
@@ -0,0 +1,91 @@
+import json
+import os
+
+from conftest import FUTURES_PRICE
+
+
+def bad_cash():
+    # $0.80 above futures while the posted basis says -0.20.
+    return round(FUTURES_PRICE + 0.80, 2)
+
+
+def recommendation_for(harness, run_id, buyer):
+    [row] = [r for r in harness.repo.resolved_recommendations(run_id) if r["buyer_id"] == buyer.id]
+    return row
+
+
+def test_quarantined_bid_never_becomes_the_candidates_observation(harness):
+    harness.post_state("ND")
+    buyer = harness.buyers_in("MN")[0]
+    bad = harness.post(buyer, basis=-0.20, cash=bad_cash())
+    # Stored unflagged by a run without validation; today's run quarantines the same bid.
+    code, _ = harness.run("--no-validate-bids")
+    assert code == 0
+
+    code, out = harness.run("--no-reuse")
+
+    assert code == 0
+    assert out["sourceSummary"]["scrape"]["validation"]["quarantined"] == 1
+    row = recommendation_for(harness, out["runId"], buyer)
+    assert row["bid_source_url"] != bad
+    assert row["cash_bid"] != bad_cash()
+
+
+def test_earlier_accepted_bid_still_backs_a_quarantined_scrape(harness):
+    harness.post_state("ND")
+    buyer = harness.buyers_in("MN")[0]
+    url = harness.post(buyer, basis=-0.25)
+    assert harness.run()[0] == 0
+    harness.post(buyer, basis=-0.20, cash=bad_cash(), url=url)
+
+    code, out = harness.run("--no-reuse")
+
+    assert code == 0
+    row = recommendation_for(harness, out["runId"], buyer)
+    assert row["bid_source_url"] == url
+    assert row["cash_bid"] == round(FUTURES_PRICE - 0.25, 2)
+
+
+def test_older_accepted_bid_replaces_a_stored_copy_of_a_quarantined_bid(harness):
+    harness.post_state("ND")
+    buyer = harness.buyers_in("MN")[0]
+    url = harness.post(buyer, basis=-0.25)
+    assert harness.run()[0] == 0
+    # The bad bid is stored unflagged by a run without validation, newer than the good one.
+    harness.post(buyer, basis=-0.20, cash=bad_cash(), url=url)
+    assert harness.run("--no-validate-bids", "--no-reuse")[0] == 0
+
+    code, out = harness.run("--no-reuse")
+
+    assert code == 0
+    assert out["sourceSummary"]["scrape"]["validation"]["quarantined"] == 1
+    row = recommendation_for(harness, out["runId"], buyer)
+    assert row["bid_source_kind"] != "usda"
+    assert row["cash_bid"] == round(FUTURES_PRICE - 0.25, 2)
+
+
+def state_count(harness, state):
+    with open(harness.tmp_path / "bid_distributions.json", encoding="utf-8") as f:
+        return json.load(f)["byState"].get(state, [0])[0]
+
+
+def test_distribution_cache_counts_only_committed_bids(harness, monkeypatch):
+    urls = harness.post_state("ND")
+    assert harness.run("--dry-run")[0] == 0
+    assert state_count(harness, "ND") == 0
+
+    def boom(*args, **kwargs):
+        raise RuntimeError("database went away")
+
+    with monkeypatch.context() as m:
+        m.setattr(harness.repo, "insert_recommendations", boom)
+        assert harness.run("--no-stream-observations")[0] == 1
+    assert state_count(harness, "ND") == 0
+
+    assert harness.run()[0] == 0
+    assert state_count(harness, "ND") == len(urls)
+
+    # A rebuild reads every stored row (the failed run's too); this run's bids are added once.
+    os.remove(harness.tmp_path / "bid_distributions.json")
+    assert harness.run("--no-reuse")[0] == 0
+    assert state_count(harness, "ND") == len(harness.stored_observations())
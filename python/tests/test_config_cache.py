@@ -0,0 +1,84 @@
+import json
+import os
+
+import config_cache
+import morning_ranker as mr
+
+
+def write_sources(path, sources):
+    path.write_text(json.dumps({"sources": sources}))
+
+
+def source(url, **patterns):
+    return {"buyer_external_seed_key": "k", "url": url, "label": url, **patterns}
+
+
+def source_loader(tmp_path, monkeypatch):
+    """(path, load): load() reads bid_sources.json as a fresh process would -> (sources, builds so far)."""
+    builds = []
+    compile_source_configs = mr.compile_source_configs
+
+    def counting(payload, crop):
+        builds.append(crop)
+        return compile_source_configs(payload, crop)
+
+    monkeypatch.setattr(mr, "compile_source_configs", counting)
+    path = tmp_path / "bid_sources.json"
+
+    def load():
+        config_cache.invalidate_compiled()
+        return mr.load_source_configs(str(path), mr.DEFAULT_CROP), len(builds)
+
+    return path, load
+
+
+def test_compiled_sources_are_reused_across_processes(tmp_path, monkeypatch):
+    path, load = source_loader(tmp_path, monkeypatch)
+    write_sources(path, [source("https://a.test", value_regex=r"cash\s+([0-9.]+)"), source("https://b.test", value_regex="(")])
+
+    first, builds = load()
+    second, builds_after = load()
+
+    assert [s.url for s in first] == [s.url for s in second] == ["https://a.test"]
+    assert (builds, builds_after) == (1, 1)
+
+
+def test_rules_version_and_dependencies_invalidate_compiled_sources(tmp_path, monkeypatch):
+    path, load = source_loader(tmp_path, monkeypatch)
+    write_sources(path, [source("https://a.test")])
+    assert load()[1] == 1
+
+    monkeypatch.setattr(mr, "SOURCE_RULES_VERSION", mr.SOURCE_RULES_VERSION + 1)
+    assert load()[1] == 2
+
+    # A changed regex_guard (same mtime and size, different bytes) rebuilds too.
+    import regex_guard
+
+    monkeypatch.setitem(config_cache._SOURCE_DIGESTS, os.path.abspath(regex_guard.__file__), "changed")
+    assert load()[1] == 3
+    assert load()[1] == 3
+
+
+def test_depends_on_file_content_is_part_of_the_key(tmp_path, monkeypatch):
+    monkeypatch.setattr(config_cache, "_SOURCE_DIGESTS", {})
+    config = tmp_path / "model.json"
+    config.write_text(json.dumps({"w": 1}))
+    rules = tmp_path / "rules.py"
+    rules.write_text("RULE = 1\n")
+    builds = []
+
+    def build(payload):
+        builds.append(payload)
+        return payload
+
+    def load():
+        config_cache.invalidate_compiled()
+        return config_cache.load_compiled("t", str(config), build, persist=True, cache_dir=str(tmp_path), depends_on=[str(rules)])
+
+    load()
+    load()
+    rules.write_text("RULE = 2\n")
+    config_cache._SOURCE_DIGESTS.clear()  # a new process
+    load()
+
+    assert len(builds) == 2
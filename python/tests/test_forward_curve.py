@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from conftest import FUTURES_PRICE
+from forward_curve import ForwardCurve, parse_contract_month, parse_curve_payload
+
+CURVE = {"source": "cme-settle", "contracts": {"ZCZ26": 452, "ZCH27": 4.66, "2027-05": 4.74}}
+
+
+@pytest.mark.parametrize("key,month", [("2026-12", "2026-12"), ("ZCZ26", "2026-12"), ("ZCH7", "2027-03"), ("cz26", "2026-12")])
+def test_contract_months_parse_from_symbols_and_dates(key, month):
+    assert parse_contract_month(key) == month
+
+
+def test_delivery_months_price_off_the_next_contract():
+    curve = ForwardCurve(prices=parse_curve_payload(CURVE), source="test")
+
+    assert curve.prices == {"2026-12": 4.52, "2027-03": 4.66, "2027-05": 4.74}  # cents -> dollars
+    assert curve.contract_for("2026-11") == "2026-12"
+    assert curve.contract_for("2027-01") == "2027-03"
+    assert curve.contract_for("2027-07") is None
+
+
+def test_ranker_adds_a_call_list_per_delivery_month(harness, tmp_path):
+    buyer, *others = harness.buyers_in("ND")[:6]
+    for other in others:
+        harness.post(other, basis=-0.20)
+    url = harness.post(buyer, basis=-0.20)
+    harness.pages[url] = harness.pages[url].replace("</body>", "<p>Mar 27 basis -0.05</p></body>")
+    harness.sources[-1]["delivery_basis_regex"] = {"2027-03": r"(?i)mar\s*27\s*basis\s*([+-]?[0-9.]+)"}
+    curve_path = tmp_path / "curve.json"
+    curve_path.write_text(json.dumps(CURVE))
+
+    code, out = harness.run("--forward-curve", str(curve_path), "--delivery-months", "2027-01,2027-03")
+
+    assert code == 0
+    months = out["summary"]["deliveryMonths"]
+    assert list(months) == ["2027-01", "2027-03"]
+    for month in months.values():
+        assert (month["contract"], month["futuresPrice"]) == ("2027-03", 4.66)
+    # The posted March basis where the sheet lists one, else the spot basis, off March futures.
+    rows = {row["buyerId"]: row for row in months["2027-03"]["ranked"]}
+    assert rows[buyer.id]["basis"] == pytest.approx(-0.05)
+    assert rows[buyer.id]["cashBid"] == pytest.approx(4.66 - 0.05)
+    assert months["2027-03"]["buyersWithPostedBasis"] == 1
+    assert all(rows[other.id]["cashBid"] == pytest.approx(4.66 - 0.20) for other in others if other.id in rows)
+    assert any(other.id in rows for other in others)
+    assert out["summary"]["futuresPrice"] == FUTURES_PRICE
@@ -0,0 +1,78 @@
+import os
+from datetime import date
+
+import pytest
+
+import morning_ranker as mr
+
+from freight_rates import FreightLane, FreightRateTable, invalidate_freight_rates, load_freight_rates, read_lanes_csv
+
+LANES_CSV = """origin_station,destination,destination_type,car_type,rate_per_bushel,rate_per_car,bushels_per_car,effective_date,expiration_date,tariff_ref
+"CAMPBELL, MN",ND,state,shuttle,0.18,,,2026-01-01,,T-1
+"CAMPBELL, MN",MN,state,shuttle,,735,3500,2026-01-01,,T-1
+"CAMPBELL, MN",TX,state,shuttle,0.57,,,2026-01-01,2026-06-30,T-1
+"CAMPBELL, MN",TX,state,shuttle,0.55,,,2026-07-01,,T-1-S1
+"CAMPBELL, MN","Fargo,ND",station,shuttle,0.09,,,2026-01-01,,T-2
+"""
+
+
+@pytest.fixture
+def lanes_csv(tmp_path):
+    path = tmp_path / "lanes.csv"
+    path.write_text(LANES_CSV)
+    invalidate_freight_rates()
+    yield str(path)
+    invalidate_freight_rates()
+
+
+def test_quotes_resolve_the_lane_in_force_on_a_date(lanes_csv):
+    table = FreightRateTable(read_lanes_csv(lanes_csv))
+
+    spring = table.quotes("Campbell,  MN", "SHUTTLE", date(2026, 3, 1))
+    assert spring.lookup("Fargo", "ND") == (0.09, "lane:T-2")  # station beats state
+    assert spring.lookup("Minot", "ND") == (0.18, "lane:T-1")
+    assert spring.lookup("Willmar", "MN") == (0.21, "lane:T-1")  # per car / bushels per car
+    assert spring.lookup("Amarillo", "TX") == (0.57, "lane:T-1")
+    assert table.quotes("CAMPBELL, MN", "shuttle", date(2026, 8, 1)).lookup("Amarillo", "TX") == (0.55, "lane:T-1-S1")
+    assert spring.lookup("Omaha", "NE") is None
+    assert table.quotes("CAMPBELL, MN", "shuttle", date(2025, 12, 31)).lookup("Minot", "ND") is None
+
+
+def test_expired_lane_without_a_successor_is_not_quoted():
+    lane = FreightLane("CAMPBELL, MN", "KS", "state", "shuttle", 0.42, date(2026, 1, 1), date(2026, 2, 1))
+    table = FreightRateTable([lane])
+
+    assert table.quotes("CAMPBELL, MN", "shuttle", date(2026, 2, 2)).lookup("Salina", "KS") is None
+
+
+def test_loaded_table_is_cached_until_the_file_changes(lanes_csv):
+    table = load_freight_rates(lanes_csv)
+    assert load_freight_rates(lanes_csv) is table
+
+    with open(lanes_csv, "a", encoding="utf-8") as f:
+        f.write('"CAMPBELL, MN",SD,state,shuttle,0.25,,,2026-01-01,,T-1\n')
+    stat = os.stat(lanes_csv)
+    os.utime(lanes_csv, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    reloaded = load_freight_rates(lanes_csv)
+    assert reloaded is not table and reloaded.lane_count == table.lane_count + 1
+
+
+def test_ranker_prices_buyers_from_lane_rates(harness, lanes_csv):
+    harness.post_state("ND")
+
+    code, out = harness.run("--freight-rates", lanes_csv)
+
+    assert code == 0
+    buyers = {b.id: b for b in harness.buyers}
+    lane_rates = {"lane:T-2": 0.09, "lane:T-1-S1": 0.55, "ND": 0.18, "MN": 0.21, "TX": 0.57}
+    sources = set()
+    for row in harness.repo.resolved_recommendations(out["runId"]):
+        buyer = buyers[row["buyer_id"]]
+        source = row["rationale_json"].get("freightSource")
+        sources.add(source)
+        rate = (lane_rates.get(source) or lane_rates.get(buyer.state)) if source else None
+        # No lane covers the buyer: the per-state estimate, with no lane source.
+        assert (source is None) == (buyer.state not in {"ND", "MN", "TX"})
+        assert row["estimated_freight"] == mr.estimate_freight(buyer.state, buyer.rail_confidence, rate)
+    assert {"lane:T-2", "lane:T-1", None} <= sources
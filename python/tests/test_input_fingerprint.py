@@ -0,0 +1,65 @@
+from datetime import timedelta
+
+import morning_ranker as mr
+from conftest import FUTURES_PRICE, observation
+
+
+def test_identical_scrapes_have_the_same_fingerprint(harness):
+    harness.post_state("ND")
+    harness.post_state("MN", basis=-0.30)
+
+    code, first = harness.run()
+    assert code == 0
+    code, second = harness.run()
+
+    assert code == 0
+    assert second["summary"]["inputFingerprint"] == first["summary"]["inputFingerprint"]
+    assert second["summary"]["reusedFromRunId"] == str(first["runId"])
+
+
+def test_stored_row_fingerprints_like_the_scrape_it_came_from(harness):
+    urls = harness.post_state("ND")
+    code, first = harness.run()
+    assert code == 0
+    # The source is down: the buyer falls back to the row the first run stored.
+    del harness.pages[urls[0]]
+
+    code, second = harness.run("--dry-run")
+
+    assert code == 0
+    assert second["summary"]["inputFingerprint"] == first["summary"]["inputFingerprint"]
+
+
+def test_changed_bid_changes_the_fingerprint(harness):
+    urls = harness.post_state("ND")
+    code, first = harness.run()
+    assert code == 0
+    harness.post(harness.buyers_in("ND")[0], basis=-0.10, url=urls[0])
+
+    code, second = harness.run()
+
+    assert code == 0
+    assert second["summary"]["inputFingerprint"] != first["summary"]["inputFingerprint"]
+    assert "reusedFromRunId" not in second["summary"]
+
+
+def test_model_reading_raw_bid_age_fingerprints_the_age(repo):
+    buyers = repo.fetch_buyers(mr.DEFAULT_CROP, False, 5)
+    observed = mr.now_utc() - timedelta(hours=5)
+    latest = {b.id: observation(b, observed, basis=-0.20) for b in buyers}
+
+    def fingerprint(model, hours_later):
+        reference = observed + timedelta(hours=5 + hours_later)
+        config = {"maxBidAgeHours": 72}
+        return mr.compute_input_fingerprint(
+            buyers, latest, {}, FUTURES_PRICE, {}, mr.DEFAULT_WEIGHTED_SCORE, model, config, reference
+        )
+
+    # Same freshness bucket (4-12h): only a model that reads raw hours sees the difference.
+    assert fingerprint(None, 0) == fingerprint(None, 2)
+    age_blind = {"coefficients": {"cash_bid": 0.5}}
+    assert fingerprint(age_blind, 0) == fingerprint(age_blind, 2)
+    age_aware = {"coefficients": {"cash_bid": 0.5, "bid_freshness_hours": -0.01}}
+    assert fingerprint(age_aware, 0) != fingerprint(age_aware, 2)
+    # Below the model's sensitivity (0.01 h moves the score by 1e-4) the run is still reusable.
+    assert fingerprint(age_aware, 0) == fingerprint(age_aware, 0.001)
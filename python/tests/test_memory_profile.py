@@ -0,0 +1,45 @@
+import json
+
+from memory_profile import StageMemoryProfiler, compare_reports
+from ranker_metrics import METRICS
+
+MB = 1024 * 1024
+
+
+def test_stage_peak_and_retained_bytes():
+    profiler = StageMemoryProfiler()
+    profiler.start()
+    try:
+        with METRICS.stage("scrape.parse", format="pdf"):
+            scratch = bytearray(8 * MB)
+            del scratch
+            kept = bytearray(2 * MB)
+    finally:
+        profiler.stop()
+
+    stage = profiler.report()["stages"]["scrape.parse[pdf]"]
+    assert stage["calls"] == 1
+    assert stage["peakBytes"] >= 8 * MB
+    assert 2 * MB <= stage["retainedBytes"] < 3 * MB
+    assert any("test_memory_profile.py" in site["site"] for site in stage["topRetained"])
+    del kept
+
+
+def test_compare_reports_flags_only_large_growth():
+    baseline = {"stages": {"ranking": {"peakBytes": 10 * MB}, "tiny": {"peakBytes": 1000}}}
+    current = {"stages": {"ranking": {"peakBytes": 14 * MB}, "tiny": {"peakBytes": 5000}, "new": {"peakBytes": 50 * MB}}}
+
+    assert [r["stage"] for r in compare_reports(current, baseline, threshold_pct=25.0)] == ["ranking"]
+    assert compare_reports(current, baseline, threshold_pct=50.0) == []
+
+
+def test_profiled_run_writes_a_per_stage_report(harness, tmp_path):
+    harness.post_state("ND")
+    report_path = tmp_path / "memory.json"
+
+    code, _ = harness.run("--profile-memory", str(report_path))
+
+    assert code == 0
+    report = json.loads(report_path.read_text())
+    assert {"scrape", "scrape.parse[html]", "ranking", "persist"} <= set(report["stages"])
+    assert report["overallPeakBytes"] >= max(s["peakBytes"] for s in report["stages"].values())
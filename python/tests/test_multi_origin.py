@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+import multi_origin
+
+pytest.importorskip("numpy")
+
+ORIGINS = [
+    {"name": "Campbell, MN", "lat": 46.098, "lng": -96.404},
+    {"name": "Minot, ND", "lat": 48.233, "lng": -101.296},
+    {"name": "Ames, IA", "lat": 42.026, "lng": -93.620},
+]
+
+
+def origins_run(harness, tmp_path, monkeypatch):
+    seen = {}
+    real = multi_origin.rank_origins
+
+    def recording(candidates, origins, *args, **kwargs):
+        seen.update(candidates=list(candidates), origins=list(origins), args=args)
+        return real(candidates, origins, *args, **kwargs)
+
+    monkeypatch.setattr(multi_origin, "rank_origins", recording)
+    path = tmp_path / "origins.json"
+    path.write_text(json.dumps(ORIGINS))
+    code, out = harness.run("--dry-run", "--origins-file", str(path), "--top-states", "2", "--top-n", "10")
+    assert code == 0
+    return out, seen
+
+
+def test_each_origin_gets_its_own_freight_and_call_list(harness, tmp_path, monkeypatch):
+    harness.post_state("ND")
+    harness.post_state("MN", basis=-0.22)
+    harness.post_state("IA", basis=-0.18)
+
+    out, _ = origins_run(harness, tmp_path, monkeypatch)
+
+    rankings = out["summary"]["origins"]
+    assert [r["origin"]["name"] for r in rankings] == [o["name"] for o in ORIGINS]
+    buyers = {b.id: b for b in harness.buyers}
+    freight_by_buyer = {}
+    for r in rankings:
+        assert len(r["ranked"]) <= 10 and len(r["topStates"]) == 2
+        origin = r["origin"]
+        for row in r["ranked"]:
+            buyer = buyers[row["buyerId"]]
+            miles = multi_origin.haversine_miles(origin["lat"], origin["lng"], buyer.lat, buyer.lng) * multi_origin.RAIL_CIRCUITY
+            assert row["estimatedFreight"] == multi_origin.freight_for_miles(miles, buyer.rail_confidence)
+            freight_by_buyer.setdefault(row["buyerId"], set()).add(row["estimatedFreight"])
+    # Same bids, different origins: at least one buyer is priced differently per origin.
+    assert any(len(prices) > 1 for prices in freight_by_buyer.values())
+
+
+def test_vectorized_matrix_matches_the_per_origin_reference(harness, tmp_path, monkeypatch):
+    harness.post_state("ND")
+    harness.post_state("MN", basis=-0.22)
+    harness.post_state("IA", basis=-0.18)
+    _, seen = origins_run(harness, tmp_path, monkeypatch)
+
+    def summarize(vectorized):
+        rankings = multi_origin.rank_origins(seen["candidates"], seen["origins"], *seen["args"], vectorized=vectorized)
+        return [
+            (r.top_states, [(str(i.buyer.id), i.estimated_freight, round(i.composite_score, 9)) for i in r.ranked])
+            for r in rankings
+        ]
+
+    assert summarize(True) == summarize(False)
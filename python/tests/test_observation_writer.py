@@ -0,0 +1,73 @@
+import json
+import time
+
+import pytest
+
+import morning_ranker as mr
+from conftest import FUTURES_PRICE
+
+
+@pytest.mark.parametrize("mode", ["stream", "--no-stream-observations"])
+def test_every_scraped_bid_is_validated_and_written_in_both_modes(harness, tmp_path, mode):
+    urls = harness.post_state("ND")
+    buyer = harness.buyers_in("ND")[0]
+    # Not the buyer's best (lower confidence), and cash disagrees with futures + basis.
+    bad = harness.post(buyer, basis=-0.20, cash=round(FUTURES_PRICE + 0.80, 2), confidence=40, url="https://bids.test/bad")
+    snapshot_path = tmp_path / "run.snapshot"
+    extra = ["--dump-snapshot", str(snapshot_path)]
+    if mode != "stream":
+        extra.append(mode)
+
+    code, out = harness.run(*extra)
+
+    assert code == 0
+    validation = out["sourceSummary"]["scrape"]["validation"]
+    assert validation["checked"] == len(urls) + 1
+    assert validation["quarantined"] == 1
+    assert ("observationWriter" in out["sourceSummary"]["scrape"]) == (mode == "stream")
+    assert out["summary"]["scrapedObservationsInserted"] == len(urls) + 1
+    [stored_bad] = harness.stored_observations(bad)
+    assert stored_bad["quarantine_reasons"]
+
+    with open(tmp_path / "runs" / out["summary"]["checkpointRunKey"] / "scrape.json", encoding="utf-8") as f:
+        assert len(json.load(f)["observations"]) == len(urls) + 1
+    from run_snapshot import read_snapshot
+
+    assert len(read_snapshot(str(snapshot_path)).scraped_obs_list) == len(urls) + 1
+
+
+def test_streaming_does_not_change_the_ranking(harness):
+    harness.post_state("ND")
+    harness.post_state("MN", basis=-0.35)
+
+    def ranked(*extra):
+        code, out = harness.run("--no-reuse", *extra)
+        assert code == 0
+        rows = harness.repo.resolved_recommendations(out["runId"])
+        return out["summary"]["inputFingerprint"], [(r["buyer_id"], r["rank"]) for r in rows]
+
+    assert ranked() == ranked("--no-stream-observations")
+
+
+def test_bids_parsed_before_a_crash_mid_scrape_stay_written(harness, monkeypatch):
+    urls = harness.post_state("ND", count=6)
+    serve = harness.fetch_url
+    stored_at_crash = []
+
+    def crash_on_fourth_fetch(url, timeout):
+        if len(harness.fetches) == 3:
+            deadline = time.monotonic() + 5.0
+            while len(harness.stored_observations()) < 3 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            stored_at_crash.append(len(harness.stored_observations()))
+            raise KeyboardInterrupt
+        return serve(url, timeout)
+
+    monkeypatch.setattr(mr, "fetch_url", crash_on_fourth_fetch)
+    code, _ = harness.run("--observation-batch-size", "1")
+
+    assert code == 130
+    # Committed by the writer while the scrape was still running, and kept after the crash.
+    assert stored_at_crash == [3]
+    assert sorted(row["source_url"] for row in harness.stored_observations()) == sorted(harness.fetches)
+    assert len(harness.fetches) == 3 and set(harness.fetches) < set(urls)
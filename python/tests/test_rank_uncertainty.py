@@ -0,0 +1,30 @@
+def uncertainty_run(harness, *extra):
+    code, out = harness.run("--dry-run", "--rank-uncertainty", "200", "--rank-uncertainty-seed", "3", *extra)
+    assert code == 0
+    return out
+
+
+def test_bands_are_ordered_and_reproducible(harness):
+    harness.post_state("ND")
+    harness.post_state("MN", basis=-0.22)
+
+    first = uncertainty_run(harness, "--top-states", "2", "--top-n", "10")
+    second = uncertainty_run(harness, "--top-states", "2", "--top-n", "10")
+
+    assert first["preview"] == second["preview"]
+    for row in first["preview"]:
+        band = row["rankUncertainty"]
+        assert 1 <= band["p10"] <= band["p50"] <= band["p90"]
+        assert 0.0 <= band["pTopN"] <= 1.0
+    assert first["summary"]["rankUncertainty"]["samples"] == 200
+
+
+def test_list_longer_than_the_pool_is_always_in_the_top_n(harness):
+    harness.post_state("ND")
+
+    out = uncertainty_run(harness)  # --top-n 200 covers every candidate in the top states
+
+    summary = out["summary"]["rankUncertainty"]
+    assert summary["pool"] < 200
+    assert summary["expectedListTurnover"] == 0.0
+    assert all(row["rankUncertainty"]["pTopN"] == 1.0 for row in out["preview"])
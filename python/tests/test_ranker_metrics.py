@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+from ranker_metrics import RunMetrics
+
+
+def test_stages_nest_and_errors_are_recorded():
+    metrics = RunMetrics()
+    with metrics.stage("scrape"):
+        with metrics.stage("scrape.fetch", url="https://a.test"):
+            pass
+    with pytest.raises(RuntimeError):
+        with metrics.stage("persist"):
+            raise RuntimeError("db down")
+    metrics.incr("rows_written_total", 3, table="obs")
+    metrics.incr("rows_written_total", 2, table="obs")
+
+    spans = {s.name: s for s in metrics.spans}
+    assert spans["scrape.fetch"].parent_id == spans["scrape"].span_id
+    assert spans["persist"].error == "db down"
+    summary = metrics.summary()
+    assert summary["stages"]["scrape"]["count"] == 1
+    assert summary["counters"] == {"rows_written_total{table=obs}": 5}
+
+
+def test_run_exports_prometheus_textfile_and_otlp_spans(harness, tmp_path):
+    harness.post_state("ND")
+    prom, trace = tmp_path / "ranker.prom", tmp_path / "trace.jsonl"
+
+    code, out = harness.run("--metrics-textfile", str(prom), "--trace-file", str(trace))
+
+    assert code == 0
+    # The run summary is taken inside "persist"; the exports see the finished run.
+    assert {"scrape", "validate_bids", "ranking"} <= set(out["summary"]["metrics"]["stages"])
+    text = prom.read_text()
+    assert 'cornintel_ranker_stage_seconds_total{crop="Yellow Corn",stage="ranking"}' in text
+    assert 'cornintel_ranker_scrape_sources_total{crop="Yellow Corn",result="ok"} 6' in text
+    [line] = trace.read_text().splitlines()
+    spans = json.loads(line)["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert {"scrape", "ranking", "persist"} <= {s["name"] for s in spans}
+    assert len({s["traceId"] for s in spans}) == 1
@@ -0,0 +1,58 @@
+from datetime import timedelta
+
+import morning_ranker as mr
+from conftest import observation
+
+
+def test_from_seed_matches_the_corridor_buyer_scope(repo):
+    buyers = repo.fetch_buyers(mr.DEFAULT_CROP, False, 5000)
+
+    assert buyers
+    assert {b.state for b in buyers} <= set(mr.PRIMARY_CORRIDOR_STATES)
+    confidences = [b.rail_confidence or 0 for b in buyers]
+    assert confidences == sorted(confidences, reverse=True)
+    # Stable ids and row versions keep input fingerprints stable across processes.
+    assert [b.id for b in buyers] == [b.id for b in repo.fetch_buyers(mr.DEFAULT_CROP, False, 5000)]
+
+
+def test_rollback_undoes_uncommitted_writes_only(repo):
+    buyer = repo.fetch_buyers(mr.DEFAULT_CROP, False, 1)[0]
+    now = mr.now_utc()
+    kept = observation(buyer, now - timedelta(hours=1), basis=-0.20)
+    repo.insert_observations([kept])
+    repo.commit()
+
+    run_id = repo.create_run(mr.DEFAULT_CROP)
+    repo.insert_observations([observation(buyer, now, basis=-0.10)])
+    repo.quarantine_observations([(kept.id, ["cash_basis_mismatch"])])
+    repo.rollback()
+
+    assert run_id not in repo.runs
+    assert [row["id"] for row in repo.observations] == [kept.id]
+    assert repo.observations[0]["quarantine_reasons"] is None
+
+
+def test_latest_observation_skips_quarantined_rows(repo):
+    buyer = repo.fetch_buyers(mr.DEFAULT_CROP, False, 1)[0]
+    now = mr.now_utc()
+    older = observation(buyer, now - timedelta(hours=2), basis=-0.20)
+    newer = observation(buyer, now, basis=-0.90)
+    repo.insert_observations([older, newer])
+    repo.quarantine_observations([(newer.id, ["basis_outlier"])])
+
+    assert repo.fetch_latest_observations(mr.DEFAULT_CROP, [buyer.id])[buyer.id].id == older.id
+
+
+def test_sessions_share_tables_but_not_transactions(repo):
+    buyer = repo.fetch_buyers(mr.DEFAULT_CROP, False, 1)[0]
+    session = repo.open_session()
+    session.insert_observations([observation(buyer, mr.now_utc(), basis=-0.20)])
+    session.commit()
+
+    mine = observation(buyer, mr.now_utc(), basis=-0.30)
+    repo.insert_observations([mine])
+    session.rollback()
+    assert len(repo.observations) == 2
+
+    repo.rollback()
+    assert len(session.observations) == 1 and mine.id not in [row["id"] for row in session.observations]
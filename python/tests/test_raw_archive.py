@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+pytest.importorskip("zstandard")
+
+from raw_archive import RawArchive, reextract  # noqa: E402
+
+
+def test_put_deduplicates_and_round_trips(tmp_path):
+    archive = RawArchive(str(tmp_path / "archive"))
+
+    digest, stored = archive.put(b"<html>Corn $4.40</html>")
+
+    assert stored and archive.put(b"<html>Corn $4.40</html>") == (digest, False)
+    assert archive.get(digest) == b"<html>Corn $4.40</html>"
+    assert archive.stats()["objects"] == 1
+
+
+def test_scrape_archives_bodies_and_reextract_reports_regex_changes(harness, tmp_path):
+    urls = harness.post_state("ND", count=3)
+    archive_dir = str(tmp_path / "archive")
+
+    code, out = harness.run("--raw-archive-dir", archive_dir)
+
+    assert code == 0
+    stored = harness.stored_observations()
+    assert len(stored) == len(urls) and all(row["raw_body_sha256"] for row in stored)
+    archive = RawArchive(archive_dir)
+    assert all(archive.has(row["raw_body_sha256"]) for row in stored)
+
+    report = reextract(archive_dir, None, None, workers=1)
+    assert report["documents"] == len(urls)
+    assert report["counts"]["unchanged"] == len(urls) and report["diffs"] == []
+
+    # The current config's value_regex is re-applied to the archived body, offline.
+    harness.sources[0]["value_regex"] = r"\$([0-9])"
+    with open(harness.config_path, "w", encoding="utf-8") as f:
+        json.dump({"sources": harness.sources}, f)
+    report = reextract(archive_dir, None, None, source_config=harness.config_path, workers=1)
+    assert report["counts"]["unchanged"] == len(urls) - 1
+    [diff] = report["diffs"]
+    assert (diff["url"], diff["kind"], diff["after"]["cashBid"]) == (urls[0], "changed", 4.0)
+    assert harness.fetches.count(urls[0]) == 1
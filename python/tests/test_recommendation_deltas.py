@@ -0,0 +1,74 @@
+import morning_ranker as mr
+
+
+def stable(rows):
+    """Resolved rows minus what legitimately differs between two runs of the same inputs."""
+    out = []
+    for row in rows:
+        comparable = dict(row)
+        # Each run scrapes (and so observes) at its own time.
+        for key in ("run_id", "bid_observed_at"):
+            comparable.pop(key)
+        comparable["rationale_json"] = {
+            k: v for k, v in row["rationale_json"].items() if k not in mr.VOLATILE_RATIONALE_KEYS | {"rawFeatures"}
+        }
+        out.append(comparable)
+    return out
+
+
+def test_rerun_writes_only_changed_rows_and_resolves_to_the_full_list(harness):
+    harness.post_state("ND")
+    buyer = harness.buyers_in("ND")[0]
+
+    code, base = harness.run("--persist-deltas")
+    assert code == 0 and base["summary"]["recommendationStorage"] == {"mode": "full"}
+
+    harness.post(buyer, basis=+0.30, url=harness.sources[0]["url"])  # this buyer's bid moves up
+    code, delta = harness.run("--persist-deltas", "--no-reuse")
+    code_full, full = harness.run("--no-reuse")
+
+    assert code == code_full == 0
+    storage = delta["summary"]["recommendationStorage"]
+    assert storage["mode"] == "delta" and storage["baseRunId"] == base["runId"]
+    total = len(harness.repo.resolved_recommendations(full["runId"]))
+    assert 0 < storage["changedRows"] < total
+    assert storage["changedRows"] + storage["unchangedRows"] == total
+    assert delta["summary"]["recommendationsInserted"] == storage["changedRows"]
+    assert stable(harness.repo.resolved_recommendations(delta["runId"])) == stable(
+        harness.repo.resolved_recommendations(full["runId"])
+    )
+
+
+def test_mostly_changed_rerun_falls_back_to_a_full_write(harness):
+    harness.post_state("ND")
+    code, _ = harness.run("--persist-deltas")
+    assert code == 0
+
+    harness.post_state("ND", basis=+0.40)
+    code, out = harness.run("--persist-deltas", "--no-reuse", "--delta-max-changed", "0.01")
+
+    assert code == 0
+    storage = out["summary"]["recommendationStorage"]
+    assert storage["mode"] == "full" and "rows changed since" in storage["reason"]
+
+
+def test_reused_delta_run_resolves_through_its_source_to_the_full_list(harness):
+    harness.post_state("ND")
+    buyer = harness.buyers_in("ND")[0]
+    code, base = harness.run("--persist-deltas")
+    assert code == 0
+
+    harness.post(buyer, basis=+0.30, url=harness.sources[0]["url"])
+    code, delta = harness.run("--persist-deltas", "--no-reuse")
+    code_reused, reused = harness.run("--persist-deltas")
+    code_full, full = harness.run("--no-reuse")
+
+    assert code == code_reused == code_full == 0
+    assert delta["summary"]["recommendationStorage"]["baseRunId"] == base["runId"]
+    # The pointer run has no rows of its own; readers follow reused_from_run_id to the delta run.
+    assert reused["summary"]["reusedFromRunId"] == delta["runId"]
+    assert harness.repo.fetch_recommendation_rows(reused["runId"]) == []
+    source = harness.repo.runs[reused["runId"]]["reused_from_run_id"] or reused["runId"]
+    assert stable(harness.repo.resolved_recommendations(source)) == stable(
+        harness.repo.resolved_recommendations(full["runId"])
+    )
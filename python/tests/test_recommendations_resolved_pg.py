@@ -0,0 +1,122 @@
+"""Migration 011's morning_recommendations_resolved view on a real Postgres.
+
+Runs only with CORN_INTEL_TEST_DATABASE_URL set. Everything (schema, migrations, rows)
+happens in one transaction that is rolled back, so any scratch database will do.
+"""
+
+import os
+import uuid
+from datetime import timedelta
+
+import pytest
+
+import morning_ranker as mr
+from conftest import FUTURES_PRICE, observation
+from ranker_repository import REPO_ROOT, PostgresRepository
+
+DATABASE_URL = os.environ.get("CORN_INTEL_TEST_DATABASE_URL")
+MIGRATIONS_DIR = os.path.join(REPO_ROOT, "apps", "api", "migrations")
+# The run lookup of listMorningRecommendationsForRun (apps/api/src/repositories/recommendations-repo.ts).
+RESOLVE_FOR_RUN = """
+    SELECT mr.rank, mr.buyer_id::text AS buyer_id, mr.cash_bid
+    FROM morning_recommendations_resolved mr
+    WHERE mr.run_id = (SELECT COALESCE(r.reused_from_run_id, r.id) FROM morning_recommendation_runs r WHERE r.id = %s)
+    ORDER BY mr.rank
+"""
+
+pytestmark = pytest.mark.skipif(not DATABASE_URL, reason="CORN_INTEL_TEST_DATABASE_URL is not set")
+
+
+@pytest.fixture
+def pg():
+    conn = mr.connect_db(DATABASE_URL)
+    schema = f"ranker_test_{uuid.uuid4().hex[:12]}"
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"CREATE SCHEMA {schema}")
+            cur.execute(f"SET LOCAL search_path TO {schema}, public")
+            for name in sorted(os.listdir(MIGRATIONS_DIR)):
+                if name.endswith(".sql"):
+                    with open(os.path.join(MIGRATIONS_DIR, name), encoding="utf-8") as f:
+                        cur.execute(f.read())
+        yield PostgresRepository(conn)
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+def insert_buyers(repo, buyers):
+    with repo.conn.cursor() as cur:
+        for b in buyers:
+            cur.execute(
+                """
+                INSERT INTO buyers (id, external_seed_key, name, type, city, state, region, lat, lng,
+                                    crop_type, rail_confidence, launch_scope)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """,
+                [b.id, b.external_seed_key, b.name, b.type, b.city, b.state, b.region, b.lat, b.lng,
+                 b.crop_type, b.rail_confidence, b.launch_scope],
+            )
+
+
+def record_run(repo, ranked=None, reused_from=None, hours_ago=0):
+    """A successful run as main() records it: full or delta rows, or a pointer to `reused_from`."""
+    run_id = repo.create_run(mr.DEFAULT_CROP, "fingerprint", reused_from)
+    if ranked is not None:
+        mr.persist_recommendations(repo, mr.DEFAULT_CROP, run_id, ranked, True, 1.0)
+    repo.finalize_run(run_id, "success", [], {}, {})
+    with repo.conn.cursor() as cur:
+        # One transaction shares one NOW(); space the runs out like separate mornings' reruns.
+        cur.execute(
+            "UPDATE morning_recommendation_runs SET started_at = NOW() - %s WHERE id = %s",
+            [timedelta(hours=hours_ago), run_id],
+        )
+    return run_id
+
+
+def resolved(repo, run_id):
+    with repo.conn.cursor() as cur:
+        cur.execute(RESOLVE_FOR_RUN, [run_id])
+        return [(row["rank"], row["buyer_id"], float(row["cash_bid"])) for row in cur.fetchall()]
+
+
+def ranked_rows(ranked):
+    return [(rank, str(item.buyer.id), round(item.cash_bid, 4)) for rank, item in enumerate(ranked, start=1)]
+
+
+def test_delta_run_on_top_of_a_reused_base_resolves_to_the_full_list(pg, repo):
+    buyers = repo.fetch_buyers(mr.DEFAULT_CROP, False, 12)
+    insert_buyers(pg, buyers)
+    observed = mr.now_utc() - timedelta(hours=1)
+
+    def rank(bumped=None):
+        scraped = {
+            b.id: observation(b, observed, basis=-0.20 - 0.01 * i + (0.01 if b.id == bumped else 0.0))
+            for i, b in enumerate(buyers)
+        }
+        ranked, _, _ = mr.build_rankings(
+            buyers, {}, scraped, FUTURES_PRICE, dict(mr.FALLBACK_REGIONAL_BASIS), 36.0, None, 5, 50,
+            reference=observed + timedelta(hours=1),
+        )
+        return ranked
+
+    base_ranked = rank()
+    base = record_run(pg, base_ranked, hours_ago=3)
+    # An unchanged rerun only points at the base; a delta must still be based on the full run.
+    reused_base = record_run(pg, reused_from=base, hours_ago=2)
+    assert str(pg.find_delta_base(mr.DEFAULT_CROP)) == str(base)
+
+    # A mid-table bid edging up swaps a few ranks without moving any feature's min or max.
+    delta_ranked = rank(bumped=base_ranked[5].buyer.id)
+    delta = record_run(pg, delta_ranked, hours_ago=1)
+    reused_delta = record_run(pg, reused_from=delta)
+
+    with pg.conn.cursor() as cur:
+        cur.execute("SELECT base_run_id, recommendation_count FROM morning_recommendation_runs WHERE id = %s", [delta])
+        row = cur.fetchone()
+        cur.execute("SELECT COUNT(*) AS n FROM morning_recommendations WHERE run_id = %s", [delta])
+        own_rows = cur.fetchone()["n"]
+    assert (str(row["base_run_id"]), row["recommendation_count"]) == (str(base), len(delta_ranked))
+    assert 0 < own_rows < len(delta_ranked)
+    assert resolved(pg, reused_base) == resolved(pg, base) == ranked_rows(base_ranked)
+    assert resolved(pg, reused_delta) == resolved(pg, delta) == ranked_rows(delta_ranked)
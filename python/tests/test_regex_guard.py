@@ -0,0 +1,81 @@
+import re
+import time
+
+import pytest
+
+import morning_ranker as mr
+from regex_guard import RegexGuard
+
+BOMB = r"(a+)+$"
+
+
+@pytest.fixture
+def guard():
+    guard = RegexGuard(budget_seconds=0.5, slow_seconds=0.05)
+    yield guard
+    guard.close()
+
+
+def test_validate_rejects_invalid_and_warns_on_nested_quantifiers(guard):
+    with pytest.raises(re.error):
+        guard.validate(r"([0-9]+")
+    assert guard.validate(BOMB) == ["nested quantifier; may backtrack catastrophically"]
+    assert guard.validate(r"(?i)corn[^\n]{0,120}?\$?([0-9]+(?:\.[0-9]{1,4})?)") == []
+
+
+def test_search_matches_like_re(guard):
+    pattern, text = r"(?i)basis\s*([+-]?[0-9.]+)", "Yellow corn Basis -0.25"
+    expected = re.search(pattern, text)
+
+    match = guard.search(pattern, text, label="site")
+
+    assert (match.start(), match.end(), match.group(0)) == (expected.start(), expected.end(), expected.group(0))
+    assert match.groups() == ("-0.25",)
+
+
+def test_runaway_search_times_out_as_no_match_and_is_reported(guard):
+    guard.configure(budget_seconds=0.2)
+
+    assert guard.search(BOMB, "a" * 40 + "!", label="bad site") is None
+    # The killed worker is respawned for the next search.
+    assert guard.search(r"b+", "abbc").group(0) == "bb"
+    [slow] = guard.slow_patterns()
+    assert slow["pattern"] == BOMB and slow["timeouts"] == 1 and slow["sources"] == ["bad site"]
+
+
+def test_trusted_patterns_run_in_process(guard):
+    guard.trust(r"c(o)rn")
+
+    match = guard.search(r"c(o)rn", "corn")
+
+    assert match.group(1) == "o" and guard._worker is None
+
+
+def adversarial_texts(size):
+    """Near-misses for the built-in patterns: keywords with no number after them, on one line."""
+    return {
+        "keywords": ("cash bid yellow corn basis " * size)[: size * 4],
+        "open whitespace": "cash yellow " + " " * size * 4,
+        "digits without keyword": "7" * size * 4,
+        "dots after digits": "corn 1" + ".1" * size * 2,
+    }
+
+
+def search_seconds(pattern, text):
+    best = float("inf")
+    for _ in range(3):
+        started = time.perf_counter()
+        re.search(pattern, text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+@pytest.mark.parametrize("pattern", mr.GENERIC_CASH_PATTERNS + [mr.GENERIC_BASIS_PATTERN])
+def test_trusted_builtin_patterns_are_linear_on_adversarial_input(pattern):
+    # They run without a budget when `regex` is not installed: 8x the text must cost
+    # about 8x the time, never the 64x of a quadratic pattern.
+    assert pattern in mr.REGEX_GUARD._trusted
+    small, large = adversarial_texts(5_000), adversarial_texts(40_000)
+    for name in small:
+        ratio = search_seconds(pattern, large[name]) / max(search_seconds(pattern, small[name]), 1e-6)
+        assert ratio < 24, f"{name}: {ratio:.1f}x"
@@ -0,0 +1,62 @@
+import json
+import os
+
+import pytest
+
+
+def boom(*args, **kwargs):
+    raise RuntimeError("database went away")
+
+
+def flaky_sessions(repo, fail_call):
+    """`open_session` whose insert_observations fails on the `fail_call`-th batch."""
+    open_session = repo.open_session
+
+    def open_flaky():
+        session = open_session()
+        insert = session.insert_observations
+        calls = []
+
+        def insert_observations(observations):
+            calls.append(len(observations))
+            if len(calls) == fail_call:
+                raise RuntimeError("connection reset")
+            return insert(observations)
+
+        session.insert_observations = insert_observations
+        return session
+
+    return open_flaky
+
+
+def only_run_key(harness):
+    [key] = os.listdir(harness.tmp_path / "runs")
+    return key
+
+
+def load_stage(harness, key, stage):
+    with open(harness.tmp_path / "runs" / key / f"{stage}.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize("failing", ["create_run", "insert_recommendations"])
+def test_resume_writes_each_observation_once(harness, monkeypatch, failing):
+    urls = harness.post_state("ND", count=6)
+    with monkeypatch.context() as m:
+        m.setattr(harness.repo, "open_session", flaky_sessions(harness.repo, fail_call=2))
+        m.setattr(harness.repo, failing, boom)
+        code, _ = harness.run("--observation-batch-size", "2")
+    assert code == 1
+    key = only_run_key(harness)
+    written = load_stage(harness, key, "observations")
+    # The writer's second batch failed. It is retried in the run's transaction, which a
+    # failure after create_run still commits (with the failed run row).
+    committed_with_failed_run = failing == "insert_recommendations"
+    assert len(written["failed"]) == (0 if committed_with_failed_run else 2)
+    assert sum(1 for i in written["ids"] if i) == (6 if committed_with_failed_run else 4)
+
+    code, out = harness.run("--resume", key)
+
+    assert code == 0
+    assert out["summary"]["scrapedObservationsInserted"] == (0 if committed_with_failed_run else 2)
+    assert sorted(row["source_url"] for row in harness.stored_observations()) == sorted(urls)
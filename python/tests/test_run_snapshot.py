@@ -0,0 +1,53 @@
+from conftest import FUTURES_PRICE
+from run_snapshot import read_snapshot
+
+
+def without_timing(summary):
+    return {k: v for k, v in summary.items() if k != "elapsedMs"}
+
+
+def test_replay_ranks_exactly_like_the_captured_run_without_io(harness, tmp_path, monkeypatch):
+    harness.post_state("ND")
+    harness.post_state("MN", basis=-0.35)
+    snapshot_path = str(tmp_path / "run.snapshot")
+    code, live = harness.run("--dry-run", "--dump-snapshot", snapshot_path, "--rank-uncertainty", "50")
+    assert code == 0
+    fetched = len(harness.fetches)
+    monkeypatch.setattr(harness.repo, "fetch_buyers", None)  # replay must not touch the database
+
+    code, replayed = harness.run("--replay", snapshot_path)
+
+    assert code == 0
+    assert len(harness.fetches) == fetched
+    assert replayed["topStates"] == live["topStates"]
+    assert replayed["preview"] == live["preview"]
+    assert without_timing(replayed["summary"]["rankUncertainty"]) == without_timing(live["summary"]["rankUncertainty"])
+
+
+def test_snapshot_round_trips_run_inputs(harness, tmp_path):
+    urls = harness.post_state("ND")
+    snapshot_path = str(tmp_path / "run.snapshot")
+    assert harness.run("--dry-run", "--dump-snapshot", snapshot_path)[0] == 0
+
+    snap = read_snapshot(snapshot_path)
+
+    assert {b.id for b in snap.buyers} == {b.id for b in harness.buyers}
+    assert sorted(o.source_url for o in snap.scraped_obs_list) == sorted(urls)
+    assert set(snap.scraped_best_map) == {b.id for b in harness.buyers_in("ND")[: len(urls)]}
+    assert snap.config["crop"] == "Yellow Corn"
+
+
+def test_snapshot_keeps_observation_ids_and_quarantine_reasons(harness, tmp_path):
+    harness.post_state("ND")
+    buyer = harness.buyers_in("MN")[0]
+    bad = harness.post(buyer, basis=-0.20, cash=round(FUTURES_PRICE + 0.80, 2))
+    snapshot_path = str(tmp_path / "run.snapshot")
+    assert harness.run("--dump-snapshot", snapshot_path)[0] == 0
+
+    snap = read_snapshot(snapshot_path)
+
+    stored = {row["source_url"]: str(row["id"]) for row in harness.stored_observations()}
+    assert {o.source_url: o.id for o in snap.scraped_obs_list} == stored
+    [quarantined] = [o for o in snap.scraped_obs_list if o.quarantine_reasons]
+    assert quarantined.source_url == bad
+    assert buyer.id not in snap.scraped_best_map
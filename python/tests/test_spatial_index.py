@@ -0,0 +1,102 @@
+import os
+import sys
+
+import pytest
+
+import morning_ranker as mr
+import spatial_index
+from multi_origin import haversine_miles
+from spatial_index import BuyerSpatialIndex, SpatialScope
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from synthetic import generate_buyers  # noqa: E402
+
+FARGO = (46.877, -96.789)
+# Fargo -> Minneapolis, roughly along the BNSF main line.
+CORRIDOR = [[(46.877, -96.789), (46.352, -94.202), (44.978, -93.265)]]
+
+
+@pytest.fixture(scope="module")
+def buyers():
+    return generate_buyers(2000, 11)
+
+
+@pytest.fixture(scope="module")
+def corridor_distances(buyers):
+    # 1-mile sampling of the line: within ~0.5 mile of the exact distance.
+    dense = spatial_index._densify(CORRIDOR[0], 1.0)
+    return [min(haversine_miles(b.lat, b.lng, lat, lng) for lat, lng in dense) for b in buyers]
+
+
+@pytest.fixture(params=["numpy", "python"])
+def engine(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(spatial_index, "np", None)
+    return request.param
+
+
+@pytest.mark.parametrize("miles", [5.0, 60.0, 400.0])
+def test_radius_matches_brute_force(buyers, engine, miles):
+    index = BuyerSpatialIndex(buyers)
+
+    got = index.within_radius(FARGO[0], FARGO[1], miles)
+
+    assert got == [k for k, b in enumerate(buyers) if haversine_miles(FARGO[0], FARGO[1], b.lat, b.lng) <= miles]
+
+
+def test_corridor_keeps_buyers_near_the_line(buyers, corridor_distances, engine):
+    index = BuyerSpatialIndex(buyers)
+
+    got = set(index.within_corridor(CORRIDOR, 25.0))
+
+    assert got and got == set(sorted(got))
+    for k, distance in enumerate(corridor_distances):
+        if distance <= 24.0:
+            assert k in got
+        elif distance >= 26.0:
+            assert k not in got
+
+
+def test_scope_intersects_radius_and_corridor_and_keeps_order(buyers):
+    scope = SpatialScope(center=FARGO, radius_miles=150.0, corridor=CORRIDOR, corridor_miles=25.0)
+
+    selected = scope.select(list(buyers))
+
+    radius_only = SpatialScope(center=FARGO, radius_miles=150.0).select(list(buyers))
+    corridor_only = SpatialScope(corridor=CORRIDOR, corridor_miles=25.0).select(list(buyers))
+    assert selected and [b.id for b in selected] == [b.id for b in radius_only if b in corridor_only]
+    min_lat, max_lat, min_lng, max_lng = scope.bbox()
+    assert all(min_lat <= b.lat <= max_lat and min_lng <= b.lng <= max_lng for b in selected)
+
+
+def test_ranker_radius_scope_replaces_the_state_list(harness):
+    harness.post_state("ND")
+
+    code, out = harness.run("--dry-run", "--radius-center", f"{FARGO[0]},{FARGO[1]}", "--radius-miles", "120")
+
+    assert code == 0
+    everywhere = harness.repo.fetch_buyers(mr.DEFAULT_CROP, False, 5000, bbox=(-90.0, 90.0, -180.0, 180.0))
+    by_label = {f"{b.name} ({b.state})": b for b in everywhere}
+    ranked = [by_label[row["buyer"]] for row in out["preview"]]
+    assert ranked
+    assert all(haversine_miles(FARGO[0], FARGO[1], b.lat, b.lng) <= 120.0 for b in ranked)
+
+
+def test_limit_applies_after_the_exact_radius_filter(harness):
+    minneapolis, miles, limit = (44.978, -93.265), 200.0, 14
+    scope = SpatialScope(center=minneapolis, radius_miles=miles)
+    in_box = harness.repo.fetch_buyers(mr.DEFAULT_CROP, False, None, scope.bbox())
+    in_radius = [b for b in in_box if haversine_miles(minneapolis[0], minneapolis[1], b.lat, b.lng) <= miles]
+    # Limiting the box first would keep buyers outside the radius and drop ones inside it.
+    assert len(in_radius) > limit
+    assert any(b not in in_radius for b in in_box[:limit])
+
+    code, out = harness.run("--radius-center", "44.978,-93.265", "--radius-miles", "200", "--limit", str(limit))
+
+    assert code == 0
+    assert out["summary"]["spatialScope"]["buyersInScope"] == limit
+    scored = {row["buyer_id"] for row in harness.repo.candidate_features if row["run_id"] == out["runId"]}
+    assert scored == {b.id for b in in_radius[:limit]}
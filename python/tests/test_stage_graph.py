@@ -0,0 +1,39 @@
+import threading
+
+import pytest
+
+import morning_ranker as mr
+
+
+def test_independent_stages_overlap_and_dependents_see_their_inputs():
+    both_running = threading.Barrier(2, timeout=5)
+
+    def rendezvous(value):
+        def fn(results):
+            both_running.wait()  # BrokenBarrierError unless the other stage runs at the same time
+            return value
+
+        return fn
+
+    results = mr.run_stage_graph({
+        "buyers": ([], rendezvous(["b1", "b2"])),
+        "usda": ([], rendezvous(4.6)),
+        "scrape": (["buyers"], lambda r: [f"obs:{b}" for b in r["buyers"]]),
+        "rank": (["scrape", "usda"], lambda r: (len(r["scrape"]), r["usda"])),
+    })
+
+    assert results["rank"] == (2, 4.6)
+    assert set(results) == {"buyers", "usda", "scrape", "rank"}
+
+
+def test_stage_error_propagates():
+    def fail(results):
+        raise ValueError("usda down")
+
+    with pytest.raises(ValueError, match="usda down"):
+        mr.run_stage_graph({"buyers": ([], lambda r: []), "usda": ([], fail), "rank": (["usda"], lambda r: 1)})
+
+
+def test_unresolvable_dependencies_are_reported():
+    with pytest.raises(RuntimeError, match="unresolved deps"):
+        mr.run_stage_graph({"a": (["b"], lambda r: 1), "b": (["a"], lambda r: 2)})
@@ -0,0 +1,66 @@
+import json
+import time
+
+import pytest
+
+from usda_cache import MarketContextCache
+
+HOUR = 3600.0
+
+
+def cache_with(tmp_path, age_seconds, value=4.5):
+    path = tmp_path / "usda.json"
+    path.write_text(json.dumps({"futuresPrice": {"value": value, "source": "cached", "fetchedAt": time.time() - age_seconds}}))
+    return MarketContextCache(str(path), ttl_seconds=HOUR, refresh_after_seconds=0.75 * HOUR, max_stale_seconds=24 * HOUR)
+
+
+class Fetcher:
+    def __init__(self, value=4.7, error=None):
+        self.value, self.error, self.calls = value, error, 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.error:
+            raise RuntimeError(self.error)
+        return self.value, "live"
+
+
+def test_fresh_entry_is_served_without_a_refresh(tmp_path):
+    cache, fetch = cache_with(tmp_path, 0.5 * HOUR), Fetcher()
+
+    value, meta = cache.resolve("futuresPrice", fetch)
+    cache.wait_for_refresh(1.0)
+
+    assert (value, meta["cache"], fetch.calls) == (4.5, "fresh", 0)
+    assert "refreshing" not in meta
+
+
+def test_ageing_entry_is_refreshed_once_in_the_background(tmp_path):
+    cache, fetch = cache_with(tmp_path, 0.8 * HOUR), Fetcher()
+
+    first, meta = cache.resolve("futuresPrice", fetch)
+    _, again = cache.resolve("futuresPrice", fetch)
+    cache.wait_for_refresh(5.0)
+
+    # The refresh may land before the second lookup; either way it does not start another.
+    assert (first, meta["cache"], meta["refreshing"], again.get("refreshing", False)) == (4.5, "fresh", True, False)
+    assert fetch.calls == 1
+    assert MarketContextCache(cache.path).resolve("futuresPrice", Fetcher())[0] == 4.7
+
+
+def test_stale_entry_covers_an_outage(tmp_path):
+    cache = cache_with(tmp_path, 3 * HOUR)
+
+    value, meta = cache.resolve("futuresPrice", Fetcher(error="timed out"))
+
+    assert (value, meta["cache"], meta["stale"]) == (4.5, "stale", True)
+
+
+@pytest.mark.parametrize("error, expected", [("timed out", None), (None, 4.7)])
+def test_entry_past_max_stale_is_not_served(tmp_path, error, expected):
+    cache = cache_with(tmp_path, 30 * HOUR)
+
+    value, meta = cache.resolve("futuresPrice", Fetcher(error=error))
+
+    assert value == expected
+    assert meta["cache"] == ("expired" if error else "refreshed")
@@ -0,0 +1,94 @@
+import gzip
+import json
+from datetime import timedelta
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+import morning_ranker as mr  # noqa: E402
+from usda_history import compact, ingest, load_basis_history, read_rows  # noqa: E402
+
+
+def mars_report(day, rows):
+    """A raw MARS report: basis in cents, either a single value or a min/max range."""
+    results = []
+    for state, trade_loc, basis in rows:
+        row = {
+            "report_date": day.strftime("%m/%d/%Y"),
+            "market_location_state": state,
+            "trade_loc": trade_loc,
+            "commodity": "Corn",
+        }
+        if isinstance(basis, tuple):
+            row["basis Min"], row["basis Max"] = basis
+        else:
+            row["basis"] = basis
+        results.append(row)
+    return [{"reportSection": "Report Summary"}, {"reportSection": "Report Detail", "results": results}]
+
+
+@pytest.fixture
+def today():
+    return mr.now_utc().date()
+
+
+def write_report(path, payload):
+    opener = gzip.open if str(path).endswith(".gz") else open
+    with opener(path, "wt", encoding="utf-8") as f:
+        json.dump(payload, f)
+    return str(path)
+
+
+def test_as_of_uses_the_latest_report_within_max_age(tmp_path, today):
+    reports = tmp_path / "reports"
+    reports.mkdir()
+    write_report(reports / "old.json", mars_report(today - timedelta(days=30), [("TX", "Houston", 70)]))
+    recent = mars_report(today - timedelta(days=2), [("ND", "Fargo", -40), ("MN", "Duluth", (-30, -20))])
+    write_report(reports / "recent.json.gz", recent)
+    history_dir = str(tmp_path / "history")
+
+    result = ingest(history_dir, [str(reports)], workers=1)
+    basis, meta = load_basis_history(history_dir).as_of(today)
+
+    assert (result["files"], result["rows"], result["errors"]) == (2, 3, [])
+    # Mean across Midwest trade locations: (-0.40 + -0.25) / 2.
+    assert basis["Midwest"] == pytest.approx(-0.325)
+    # Texas's only report is older than max_age_days: the fallback applies.
+    assert basis["Texas"] == mr.FALLBACK_REGIONAL_BASIS["Texas"] and "Texas" not in meta["regions"]
+    assert load_basis_history(history_dir).as_of(today - timedelta(days=29))[0]["Texas"] == pytest.approx(0.70)
+
+
+def test_reingest_replaces_rows_and_compact_deduplicates(tmp_path, today):
+    history_dir = str(tmp_path / "history")
+    day = today - timedelta(days=1)
+    first = write_report(tmp_path / "a.json", mars_report(day, [("ND", "Fargo", -40)]))
+    ingest(history_dir, [first], workers=1)
+    before = load_basis_history(history_dir)
+    corrected = write_report(tmp_path / "b.json", mars_report(day, [("ND", "Fargo", -35)]))
+    ingest(history_dir, [corrected], workers=1)
+
+    after = load_basis_history(history_dir)
+    assert after is not before and after.as_of(today)[0]["Midwest"] == pytest.approx(-0.35)
+    assert compact(history_dir)["partsBefore"] == 2
+    assert read_rows(history_dir).num_rows == 1
+
+
+def test_ranker_uses_history_when_the_usda_api_is_down(harness, monkeypatch, tmp_path, today):
+    history_dir = str(tmp_path / "history")
+    report = write_report(tmp_path / "r.json", mars_report(today - timedelta(days=1), [("ND", "Fargo", -52)]))
+    ingest(history_dir, [report], workers=1)
+
+    def down(base, timeout):
+        raise RuntimeError("503 Service Unavailable")
+
+    monkeypatch.setattr(mr, "fetch_usda_regional_basis", down)
+    harness.post_state("ND")
+
+    code, out = harness.run("--basis-history-dir", history_dir)
+
+    assert code == 0
+    usda = out["sourceSummary"]["usda"]
+    assert usda["grainSource"].startswith("history (fallback")
+    assert usda["basisHistory"]["regions"] == {"Midwest": (today - timedelta(days=1)).isoformat()}
+    assert out["summary"]["regionalBasis"]["Midwest"] == pytest.approx(-0.52)
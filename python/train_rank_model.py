@@ -10,6 +10,14 @@ Expected CSV columns:
 - source_confidence
 - outcome_won (0/1)
 
+With `--history-features`, the rolling-window columns (basis_mean_7d, basis_mean_30d,
+bid_volatility_30d, bid_trend_30d, posting_regularity_30d) are trained on too. Rows
+ranked without them (NULL in the feature store) are dropped.
+
+Alternatively pass `--labels-csv` (run_id, buyer_id, outcome_won) with `--database-url`:
+features are then read from the `morning_candidate_features` store written by each
+morning run, so nothing is re-derived from raw observations.
+
 Exports a JSON coefficient file that `morning_ranker.py` can load via --model-coefficients-file.
 """
 
@@ -17,13 +25,40 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
 import sys
 
 
+def load_feature_store_frame(pd, database_url: str, labels_csv: str, feature_cols, target_col: str):
+    from morning_ranker import connect_db, fetch_candidate_features
+
+    labels = pd.read_csv(labels_csv, dtype={"run_id": str, "buyer_id": str})
+    conn = connect_db(database_url)
+    try:
+        stored = fetch_candidate_features(conn, labels["run_id"].dropna().unique().tolist())
+    finally:
+        conn.close()
+    rows = [
+        {"run_id": str(run_id), "buyer_id": str(row["buyer_id"]), **{c: row.get(c) for c in feature_cols}}
+        for run_id, run_rows in stored.items()
+        for row in run_rows
+    ]
+    features = pd.DataFrame(rows, columns=["run_id", "buyer_id", *feature_cols])
+    return labels[["run_id", "buyer_id", target_col]].merge(features, on=["run_id", "buyer_id"], how="inner")
+
+
 def main() -> int:
     parser = argparse.ArgumentParser()
-    parser.add_argument("--csv", required=True, help="Training CSV with labeled outcomes")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--csv", help="Training CSV with labeled outcomes")
+    source.add_argument("--labels-csv", help="Outcome labels (run_id, buyer_id, outcome_won) joined to the feature store")
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
     parser.add_argument("--out", required=True, help="Output JSON coefficients file")
+    parser.add_argument(
+        "--history-features",
+        action="store_true",
+        help="Also train on the bid_history rolling-window features (runs ranked with --history-features)",
+    )
     args = parser.parse_args()
 
     try:
@@ -45,14 +80,30 @@ def main() -> int:
         "bid_freshness_hours",
         "source_confidence",
     ]
+    if args.history_features:
+        from morning_ranker import HISTORY_FEATURE_NAMES
+
+        feature_cols += HISTORY_FEATURE_NAMES
     target_col = "outcome_won"
 
-    df = pd.read_csv(args.csv)
+    if args.labels_csv:
+        if not args.database_url:
+            print("DATABASE_URL is required with --labels-csv (or pass --database-url)", file=sys.stderr)
+            return 2
+        df = load_feature_store_frame(pd, args.database_url, args.labels_csv, feature_cols, target_col)
+    else:
+        df = pd.read_csv(args.csv)
     missing = [c for c in feature_cols + [target_col] if c not in df.columns]
     if missing:
         print(f"Missing columns: {missing}", file=sys.stderr)
         return 2
 
+    if args.history_features:
+        # A missing history feature means the run did not compute them, not "zero".
+        df = df.dropna(subset=HISTORY_FEATURE_NAMES)
+        if df.empty:
+            print("No rows with history features; rank with --history-features first", file=sys.stderr)
+            return 2
     X = df[feature_cols].fillna(0)
     y = df[target_col].astype(int)
 
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Persistent TTL cache for the USDA market context used by `morning_ranker.py`.
+
+Stores the last good futures price and regional basis map, each with the time it
+was fetched, in one small JSON file. Lookups follow stale-while-revalidate:
+
+- fresh (age < refresh_after): served immediately, nothing else happens
+- ageing (refresh_after <= age < TTL): served immediately; a background thread
+  refreshes the entry (once per key per process)
+- stale (TTL <= age < max_stale): a live fetch is attempted; if the API is slow or
+  down the stale value is served and flagged, instead of the hard-coded fallback constants
+- expired (age >= max_stale) or missing: live fetch, and on failure no cached value;
+  the caller falls back to the constants
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+DEFAULT_USDA_CACHE_PATH = os.environ.get(
+    "CORN_INTEL_USDA_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "cornintel", "usda_market_context.json"),
+)
+DEFAULT_USDA_CACHE_TTL_SECONDS = 60 * 60
+DEFAULT_USDA_CACHE_REFRESH_SECONDS = 45 * 60
+# Older than this, a cached price is worse than admitting the API is down.
+DEFAULT_USDA_CACHE_MAX_STALE_SECONDS = 24 * 60 * 60
+
+# fetch() -> (value, source label). Raises on failure.
+Fetcher = Callable[[], Tuple[Any, str]]
+
+
+class MarketContextCache:
+    def __init__(
+        self,
+        path: str = DEFAULT_USDA_CACHE_PATH,
+        ttl_seconds: float = DEFAULT_USDA_CACHE_TTL_SECONDS,
+        refresh_after_seconds: float = DEFAULT_USDA_CACHE_REFRESH_SECONDS,
+        max_stale_seconds: float = DEFAULT_USDA_CACHE_MAX_STALE_SECONDS,
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.refresh_after_seconds = min(refresh_after_seconds, ttl_seconds)
+        self.max_stale_seconds = max(max_stale_seconds, ttl_seconds)
+        self._lock = threading.Lock()
+        self._refreshers: Dict[str, threading.Thread] = {}
+        self._entries: Dict[str, Dict[str, Any]] = self._read()
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+            return payload if isinstance(payload, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _store(self, key: str, value: Any, source: str) -> None:
+        with self._lock:
+            self._entries[key] = {"value": value, "source": source, "fetchedAt": time.time()}
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp, self.path)
+
+    def _refresh_in_background(self, key: str, fetch: Fetcher) -> bool:
+        def run() -> None:
+            try:
+                value, source = fetch()
+            except Exception:
+                return
+            self._store(key, value, source)
+
+        with self._lock:
+            if key in self._refreshers:
+                return False
+            thread = threading.Thread(target=run, name=f"usda-cache-refresh-{key}")
+            self._refreshers[key] = thread
+        thread.start()
+        return True
+
+    def resolve(self, key: str, fetch: Fetcher) -> Tuple[Optional[Any], Dict[str, Any]]:
+        """Return (value, meta). value is None only when there is no live or cached data."""
+        with self._lock:
+            entry = self._entries.get(key)
+        age = time.time() - float(entry["fetchedAt"]) if entry else None
+
+        if entry is not None and age is not None and age < self.ttl_seconds:
+            meta = {"cache": "fresh", "ageSeconds": round(age, 1), "source": entry["source"], "stale": False}
+            if age >= self.refresh_after_seconds:
+                meta["refreshing"] = self._refresh_in_background(key, fetch)
+            return entry["value"], meta
+
+        try:
+            value, source = fetch()
+        except Exception as exc:
+            if entry is None:
+                return None, {"cache": "miss", "error": str(exc), "stale": False}
+            if age is not None and age >= self.max_stale_seconds:
+                return None, {"cache": "expired", "ageSeconds": round(age, 1), "error": str(exc), "stale": False}
+            return entry["value"], {
+                "cache": "stale",
+                "ageSeconds": round(age or 0.0, 1),
+                "source": entry["source"],
+                "stale": True,
+                "error": str(exc),
+            }
+        self._store(key, value, source)
+        return value, {"cache": "refreshed" if entry else "miss", "source": source, "stale": False}
+
+    def wait_for_refresh(self, timeout: float) -> None:
+        """Let background refreshes land on disk before the process exits."""
+        deadline = time.time() + timeout
+        for thread in list(self._refreshers.values()):
+            thread.join(max(0.0, deadline - time.time()))
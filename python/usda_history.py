@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+"""Local time-series store of historical USDA grain report basis, by region and date.
+
+`parse_usda_regional_basis` keeps only today's basis per region. This module bulk-loads
+historical grain report payloads into a directory of Parquet files, so the ranker and the
+backtests can look up the regional basis as of any date without calling the API:
+
+    DIR/part-<ingest time>-<id>.parquet   commodity, region, state, trade_loc,
+                                          report_date, basis (dollars), source_file
+
+Columns are dictionary-encoded and zstd-compressed, and rows are sorted by
+(commodity, region, report_date). Re-ingesting a report replaces earlier rows with the
+same (commodity, region, report_date, trade_loc): the newest part wins when the store is
+read, and `compact` rewrites everything into one deduplicated file.
+
+Inputs are `.json`, `.jsonl` or `.json.gz` files, or directories of them. Each JSON
+document may be either of these:
+
+- an `/api/usda/grain-report` response: `{"data": {"results": [...], "summary": {...}}}`
+- a raw MARS report: a list of sections (rows under "Report Detail") or `{"results": [...]}`
+  with `report_date`, `market_location_state`, `trade_loc`, `basis Min` / `basis Max`
+
+`BasisHistory.as_of(day)` gives the regional map `fetch_usda_market_context` would
+have produced that morning: for each region, the mean basis across trade locations on the
+latest report date on or before `day` (within `max_age_days`), merged over
+FALLBACK_REGIONAL_BASIS.
+
+  python usda_history.py ingest --history-dir DIR reports/2019 reports/2020 --workers 8
+  python usda_history.py compact --history-dir DIR
+  python usda_history.py as-of --history-dir DIR --date 2024-03-15
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import gzip
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from morning_ranker import FALLBACK_REGIONAL_BASIS, STATE_TO_REGION, coerce_usda_basis
+
+DEFAULT_USDA_HISTORY_DIR = os.environ.get(
+    "CORN_INTEL_USDA_HISTORY_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "cornintel", "usda_history"),
+)
+DEFAULT_COMMODITY = "Corn"
+# A region's last report older than this is not "as of" anything; the fallback applies.
+DEFAULT_MAX_AGE_DAYS = 14
+COLUMNS = ["commodity", "region", "state", "trade_loc", "report_date", "basis", "source_file"]
+
+
+def require_parquet():
+    try:
+        import pyarrow as pa  # type: ignore
+        import pyarrow.parquet as pq  # type: ignore
+        return pa, pq
+    except Exception as exc:  # pragma: no cover
+        raise RuntimeError("pyarrow is required for the USDA basis history (python/requirements.txt)") from exc
+
+
+def normalize_commodity(name: Any, default: str = DEFAULT_COMMODITY) -> str:
+    """'Yellow Corn' (the ranker's crop, and MARS's commodity) is stored as 'Corn'."""
+    return str(name or "").replace("Yellow ", "").strip() or default
+
+
+def _parse_date(value: Any) -> Optional[date]:
+    if not value:
+        return None
+    text = str(value).strip()
+    for fmt in ("%Y-%m-%d", "%m/%d/%Y"):
+        try:
+            return datetime.strptime(text[:10], fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _report_rows(payload: Any) -> Tuple[List[Dict[str, Any]], Optional[date]]:
+    """(result rows, payload-level report date) for either supported document shape."""
+    default_day = None
+    if isinstance(payload, dict) and isinstance(payload.get("data"), (dict, list)):
+        data = payload["data"]
+        if isinstance(data, dict):
+            default_day = _parse_date((data.get("summary") or {}).get("reportDate"))
+        payload = data
+    if isinstance(payload, list):
+        detail = [s for s in payload if isinstance(s, dict) and s.get("reportSection") == "Report Detail"]
+        if detail:
+            return list(detail[0].get("results") or []), default_day
+        return [r for r in payload if isinstance(r, dict)], default_day
+    if isinstance(payload, dict):
+        return list(payload.get("results") or []), default_day
+    return [], default_day
+
+
+def _row_basis(row: Dict[str, Any]) -> Optional[float]:
+    basis = coerce_usda_basis(row.get("basis"))
+    if basis is not None:
+        return basis
+    lo = coerce_usda_basis(row.get("basis Min", row.get("basisMin")))
+    hi = coerce_usda_basis(row.get("basis Max", row.get("basisMax")))
+    if lo is None or hi is None:
+        return lo if hi is None else hi
+    return (lo + hi) / 2.0
+
+
+def parse_report(payload: Any, commodity: str, source_file: str, columns: Dict[str, List[Any]]) -> Tuple[int, int]:
+    """Append one document's rows to `columns`; returns (rows kept, rows skipped)."""
+    rows, default_day = _report_rows(payload)
+    kept = skipped = 0
+    for row in rows:
+        if not isinstance(row, dict) or row.get("current") == "No":
+            skipped += 1
+            continue
+        state = str(row.get("state") or row.get("market_location_state") or row.get("location_state") or "").upper()
+        region = STATE_TO_REGION.get(state) or str(row.get("region") or "").strip()
+        day = _parse_date(row.get("report_date") or row.get("reportDate")) or default_day
+        basis = _row_basis(row)
+        if not region or day is None or basis is None:
+            skipped += 1
+            continue
+        columns["commodity"].append(normalize_commodity(row.get("commodity"), commodity))
+        columns["region"].append(region)
+        columns["state"].append(state or None)
+        columns["trade_loc"].append(str(row.get("trade_loc") or row.get("tradeLoc") or ""))
+        columns["report_date"].append(day)
+        columns["basis"].append(float(basis))
+        columns["source_file"].append(source_file)
+        kept += 1
+    return kept, skipped
+
+
+def _open_text(path: str):
+    return gzip.open(path, "rt", encoding="utf-8") if path.endswith(".gz") else open(path, "r", encoding="utf-8")
+
+
+def _parse_files(paths: List[str], commodity: str) -> Tuple[Dict[str, List[Any]], int, List[str]]:
+    """Worker: parse a chunk of input files into column lists."""
+    columns: Dict[str, List[Any]] = {name: [] for name in COLUMNS}
+    skipped = 0
+    errors: List[str] = []
+    for path in paths:
+        name = os.path.basename(path)
+        try:
+            with _open_text(path) as f:
+                if ".jsonl" in path:
+                    documents: Iterator[Any] = (json.loads(line) for line in f if line.strip())
+                else:
+                    documents = iter([json.load(f)])
+                for document in documents:
+                    skipped += parse_report(document, commodity, name, columns)[1]
+        except (OSError, ValueError) as exc:
+            errors.append(f"{path}: {exc}")
+    return columns, skipped, errors
+
+
+def discover_inputs(paths: List[str]) -> List[str]:
+    found: List[str] = []
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, _, filenames in os.walk(path):
+                found.extend(
+                    os.path.join(dirpath, n) for n in filenames if n.endswith((".json", ".jsonl", ".json.gz", ".jsonl.gz"))
+                )
+        else:
+            found.append(path)
+    return sorted(found)
+
+
+def _table(pa, columns: Dict[str, List[Any]]):
+    table = pa.table(
+        {
+            "commodity": pa.array(columns["commodity"], pa.string()),
+            "region": pa.array(columns["region"], pa.string()),
+            "state": pa.array(columns["state"], pa.string()),
+            "trade_loc": pa.array(columns["trade_loc"], pa.string()),
+            "report_date": pa.array(columns["report_date"], pa.date32()),
+            "basis": pa.array(columns["basis"], pa.float64()),
+            "source_file": pa.array(columns["source_file"], pa.string()),
+        }
+    )
+    return table.sort_by([("commodity", "ascending"), ("region", "ascending"), ("report_date", "ascending")])
+
+
+def _write_part(history_dir: str, table) -> str:
+    _, pq = require_parquet()
+    os.makedirs(history_dir, exist_ok=True)
+    # Part names sort by ingest time, which is the "newest wins" order for duplicates.
+    name = f"part-{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{time.time_ns() % 10**9:09d}-{uuid.uuid4().hex[:8]}.parquet"
+    path = os.path.join(history_dir, name)
+    tmp = f"{path}.tmp"
+    pq.write_table(table, tmp, compression="zstd", use_dictionary=True)
+    os.replace(tmp, path)
+    invalidate_basis_history(history_dir)
+    return path
+
+
+def ingest(
+    history_dir: str,
+    inputs: List[str],
+    commodity: str = DEFAULT_COMMODITY,
+    workers: Optional[int] = None,
+    chunk_size: int = 64,
+) -> Dict[str, Any]:
+    """Parse every input file (in parallel) and write the rows as one new part."""
+    pa, _ = require_parquet()
+    started = time.perf_counter()
+    files = discover_inputs(inputs)
+    chunks = [files[i:i + chunk_size] for i in range(0, len(files), chunk_size)]
+    merged: Dict[str, List[Any]] = {name: [] for name in COLUMNS}
+    skipped = 0
+    errors: List[str] = []
+    if len(chunks) <= 1 or workers == 1:
+        results = [_parse_files(chunk, commodity) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_parse_files, chunks, [commodity] * len(chunks)))
+    for columns, chunk_skipped, chunk_errors in results:
+        for name in COLUMNS:
+            merged[name].extend(columns[name])
+        skipped += chunk_skipped
+        errors.extend(chunk_errors)
+    parsed = time.perf_counter()
+    rows = len(merged["basis"])
+    path = _write_part(history_dir, _table(pa, merged)) if rows else None
+    elapsed = time.perf_counter() - started
+    return {
+        "historyDir": history_dir,
+        "files": len(files),
+        "rows": rows,
+        "skippedRows": skipped,
+        "errors": errors[:20],
+        "part": path,
+        "parseSeconds": round(parsed - started, 3),
+        "seconds": round(elapsed, 3),
+        "rowsPerMinute": int(rows * 60 / elapsed) if elapsed > 0 else None,
+    }
+
+
+def _part_paths(history_dir: str) -> List[str]:
+    if not os.path.isdir(history_dir):
+        return []
+    return sorted(os.path.join(history_dir, n) for n in os.listdir(history_dir) if n.startswith("part-") and n.endswith(".parquet"))
+
+
+def read_rows(history_dir: str, commodity: Optional[str] = None, start: Optional[date] = None, end: Optional[date] = None):
+    """Every stored row (newest part wins per key) as one Arrow table."""
+    pa, pq = require_parquet()
+    filters = []
+    if commodity:
+        filters.append(("commodity", "=", commodity))
+    if start:
+        filters.append(("report_date", ">=", start))
+    if end:
+        filters.append(("report_date", "<=", end))
+    tables = []
+    for order, path in enumerate(_part_paths(history_dir)):
+        table = pq.read_table(path, filters=filters or None)
+        tables.append(table.append_column("_part", pa.array([order] * table.num_rows, pa.int32())))
+    if not tables:
+        return None
+    table = pa.concat_tables(tables, promote_options="permissive")
+    if len(tables) > 1 and table.num_rows:
+        table = _newest_per_key(pa, table)
+    return table.drop_columns(["_part"])
+
+
+def _newest_per_key(pa, table):
+    """Keep one row per (commodity, region, report_date, trade_loc): the one from the newest part."""
+    import pyarrow.compute as pc  # type: ignore
+
+    keys = ["commodity", "region", "report_date", "trade_loc"]
+    table = table.sort_by([(k, "ascending") for k in keys] + [("_part", "descending")])
+    keep = None
+    for name in keys:
+        column = table.column(name).combine_chunks()
+        # A row starts a new key when any key column differs from the previous row.
+        differs = pc.fill_null(pc.not_equal(column[1:], column[:-1]), True)
+        keep = differs if keep is None else pc.or_(keep, differs)
+    mask = pa.concat_arrays([pa.array([True]), keep])
+    return table.filter(mask)
+
+
+@dataclass
+class RegionSeries:
+    dates: List[date]
+    basis: List[float]
+    quotes: List[int]
+
+
+class BasisHistory:
+    """Per-region daily basis series for point-in-time lookups (bisect per region)."""
+
+    def __init__(self, series: Dict[str, RegionSeries], version: Any = None):
+        self.series = series
+        self.version = version
+
+    @classmethod
+    def from_table(cls, table, version: Any = None) -> "BasisHistory":
+        series: Dict[str, RegionSeries] = {}
+        if table is not None and table.num_rows:
+            daily = table.group_by(["region", "report_date"]).aggregate([("basis", "mean"), ("basis", "count")])
+            daily = daily.sort_by([("region", "ascending"), ("report_date", "ascending")])
+            regions = daily.column("region").to_pylist()
+            days = daily.column("report_date").to_pylist()
+            means = daily.column("basis_mean").to_pylist()
+            counts = daily.column("basis_count").to_pylist()
+            for region, day, mean, count in zip(regions, days, means, counts):
+                s = series.get(region)
+                if s is None:
+                    s = series[region] = RegionSeries([], [], [])
+                s.dates.append(day)
+                s.basis.append(round(float(mean), 4))
+                s.quotes.append(int(count))
+        return cls(series, version)
+
+    def as_of(self, day: date, max_age_days: int = DEFAULT_MAX_AGE_DAYS) -> Tuple[Dict[str, float], Dict[str, Any]]:
+        """(regional basis map as of `day`, per-region report dates used)."""
+        merged = dict(FALLBACK_REGIONAL_BASIS)
+        used: Dict[str, str] = {}
+        for region, s in self.series.items():
+            idx = bisect.bisect_right(s.dates, day) - 1
+            if idx < 0 or (day - s.dates[idx]).days > max_age_days:
+                continue
+            merged[region] = s.basis[idx]
+            used[region] = s.dates[idx].isoformat()
+        return merged, {"asOf": day.isoformat(), "regions": used, "maxAgeDays": max_age_days}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            region: {"first": s.dates[0].isoformat(), "last": s.dates[-1].isoformat(), "days": len(s.dates), "quotes": sum(s.quotes)}
+            for region, s in sorted(self.series.items())
+        }
+
+
+_CACHE: Dict[Tuple[str, str], BasisHistory] = {}
+_CACHE_LOCK = threading.Lock()
+
+
+def _dir_version(history_dir: str) -> Tuple[Tuple[str, int, int], ...]:
+    out = []
+    for path in _part_paths(history_dir):
+        st = os.stat(path)
+        out.append((os.path.basename(path), st.st_mtime_ns, st.st_size))
+    return tuple(out)
+
+
+def invalidate_basis_history(history_dir: Optional[str] = None) -> None:
+    with _CACHE_LOCK:
+        for key in [k for k in _CACHE if history_dir is None or k[0] == history_dir]:
+            _CACHE.pop(key, None)
+
+
+def load_basis_history(history_dir: str, commodity: str = DEFAULT_COMMODITY) -> BasisHistory:
+    """Cached per process; rebuilt when a part is added, compacted or replaced."""
+    commodity = normalize_commodity(commodity)
+    version = _dir_version(history_dir)
+    key = (history_dir, commodity)
+    with _CACHE_LOCK:
+        cached = _CACHE.get(key)
+    if cached is not None and cached.version == version:
+        return cached
+    history = BasisHistory.from_table(read_rows(history_dir, commodity), version)
+    with _CACHE_LOCK:
+        _CACHE[key] = history
+    return history
+
+
+def compact(history_dir: str) -> Dict[str, Any]:
+    """Rewrite all parts as one deduplicated, sorted part."""
+    pa, _ = require_parquet()
+    before = _part_paths(history_dir)
+    table = read_rows(history_dir)
+    if table is None:
+        return {"historyDir": history_dir, "parts": 0, "rows": 0}
+    table = table.sort_by([("commodity", "ascending"), ("region", "ascending"), ("report_date", "ascending")])
+    path = _write_part(history_dir, table)
+    for old in before:
+        os.remove(old)
+    invalidate_basis_history(history_dir)
+    return {"historyDir": history_dir, "partsBefore": len(before), "rows": table.num_rows, "part": path}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Historical USDA regional basis store")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    ing = sub.add_parser("ingest", help="Bulk-load grain report payloads (files or directories)")
+    ing.add_argument("inputs", nargs="+")
+    ing.add_argument("--history-dir", default=DEFAULT_USDA_HISTORY_DIR)
+    ing.add_argument("--commodity", default=DEFAULT_COMMODITY, help="For rows that do not name one")
+    ing.add_argument("--workers", type=int, help="Parser processes (default: CPU count)")
+
+    comp = sub.add_parser("compact", help="Merge parts into one deduplicated file")
+    comp.add_argument("--history-dir", default=DEFAULT_USDA_HISTORY_DIR)
+
+    show = sub.add_parser("as-of", help="Print the regional basis map as of a date")
+    show.add_argument("--history-dir", default=DEFAULT_USDA_HISTORY_DIR)
+    show.add_argument("--commodity", default=DEFAULT_COMMODITY)
+    show.add_argument("--date", type=date.fromisoformat, default=date.today())
+    show.add_argument("--max-age-days", type=int, default=DEFAULT_MAX_AGE_DAYS)
+
+    st = sub.add_parser("stats", help="Per-region coverage")
+    st.add_argument("--history-dir", default=DEFAULT_USDA_HISTORY_DIR)
+    st.add_argument("--commodity", default=DEFAULT_COMMODITY)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    if args.command == "ingest":
+        report = ingest(args.history_dir, args.inputs, normalize_commodity(args.commodity), args.workers)
+        print(json.dumps(report, indent=2))
+        return 1 if report["errors"] and not report["rows"] else 0
+    if args.command == "compact":
+        print(json.dumps(compact(args.history_dir), indent=2))
+        return 0
+    history = load_basis_history(args.history_dir, args.commodity)
+    if args.command == "stats":
+        print(json.dumps(history.stats(), indent=2))
+        return 0
+    basis, meta = history.as_of(args.date, args.max_age_days)
+    print(json.dumps({"regionalBasis": basis, **meta}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())